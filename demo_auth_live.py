@@ -1,10 +1,8 @@
 #!/usr/bin/env python3
 """Demostración en vivo del Auth Service"""
-import urllib.request
-import ssl
-import json
+from owlboard_client import AuthClient
 
-ctx = ssl._create_unverified_context()
+client = AuthClient(verify=False)
 
 print("\n" + "="*70)
 print("           DEMOSTRACIÓN EN VIVO - AUTH SERVICE")
@@ -14,15 +12,7 @@ print("="*70)
 print("\n📋 PASO 1: LOGIN Y GENERACIÓN DE TOKENS")
 print("-" * 70)
 credentials = {'email': 'test@owlboard.com', 'password': 'password123'}
-data = json.dumps(credentials).encode('utf-8')
-req = urllib.request.Request(
-    'https://localhost:8443/auth/login',
-    data=data,
-    headers={'Content-Type': 'application/json'},
-    method='POST'
-)
-response = urllib.request.urlopen(req, context=ctx)
-tokens = json.loads(response.read().decode())
+tokens = client.login(credentials['email'], credentials['password'])
 
 print("✅ LOGIN EXITOSO")
 print(f"   📧 Email: test@owlboard.com")
@@ -36,15 +26,7 @@ refresh_token = tokens['refresh_token']
 # PASO 2: Validar token
 print("\n📋 PASO 2: VALIDAR ACCESS TOKEN")
 print("-" * 70)
-data = json.dumps({'token': access_token}).encode('utf-8')
-req = urllib.request.Request(
-    'https://localhost:8443/auth/token/validate',
-    data=data,
-    headers={'Content-Type': 'application/json'},
-    method='POST'
-)
-response = urllib.request.urlopen(req, context=ctx)
-validation = json.loads(response.read().decode())
+validation = client.validate(access_token)
 
 print("✅ TOKEN VALIDADO CORRECTAMENTE")
 print(f"   ✓ Válido: {validation['valid']}")
@@ -55,15 +37,7 @@ print(f"   🔐 Permisos: {', '.join(validation['scopes'])}")
 # PASO 3: Introspect
 print("\n📋 PASO 3: INTROSPECCIÓN DE TOKEN (OAuth2)")
 print("-" * 70)
-data = json.dumps({'token': access_token}).encode('utf-8')
-req = urllib.request.Request(
-    'https://localhost:8443/auth/token/introspect',
-    data=data,
-    headers={'Content-Type': 'application/json'},
-    method='POST'
-)
-response = urllib.request.urlopen(req, context=ctx)
-introspection = json.loads(response.read().decode())
+introspection = client.introspect(access_token)
 
 print("✅ INTROSPECCIÓN EXITOSA")
 print(f"   ✓ Token Activo: {introspection['active']}")
@@ -74,15 +48,7 @@ print(f"   📋 Token Type: {introspection['token_type']}")
 # PASO 4: Refresh token
 print("\n📋 PASO 4: REFRESCAR TOKENS (Renovar Sesión)")
 print("-" * 70)
-data = json.dumps({'refresh_token': refresh_token}).encode('utf-8')
-req = urllib.request.Request(
-    'https://localhost:8443/auth/token/refresh',
-    data=data,
-    headers={'Content-Type': 'application/json'},
-    method='POST'
-)
-response = urllib.request.urlopen(req, context=ctx)
-new_tokens = json.loads(response.read().decode())
+new_tokens = client.refresh(refresh_token)
 
 print("✅ TOKENS REFRESCADOS")
 print(f"   🆕 Nuevo Access Token: {new_tokens['access_token'][:70]}...")
@@ -94,15 +60,7 @@ new_access_token = new_tokens['access_token']
 # PASO 5: Revoke token
 print("\n📋 PASO 5: REVOCAR TOKEN (Logout Seguro)")
 print("-" * 70)
-data = json.dumps({'token': new_access_token, 'token_type': 'access'}).encode('utf-8')
-req = urllib.request.Request(
-    'https://localhost:8443/auth/token/revoke',
-    data=data,
-    headers={'Content-Type': 'application/json'},
-    method='POST'
-)
-response = urllib.request.urlopen(req, context=ctx)
-revoke_result = json.loads(response.read().decode())
+revoke_result = client.revoke(new_access_token, 'access')
 
 print("✅ TOKEN REVOCADO")
 print(f"   🚫 Mensaje: {revoke_result['message']}")
@@ -111,15 +69,7 @@ print(f"   💡 El token ya NO es válido (blacklist en Redis)")
 # PASO 6: Verificar token revocado
 print("\n📋 PASO 6: VERIFICAR QUE TOKEN REVOCADO NO FUNCIONA")
 print("-" * 70)
-data = json.dumps({'token': new_access_token}).encode('utf-8')
-req = urllib.request.Request(
-    'https://localhost:8443/auth/token/validate',
-    data=data,
-    headers={'Content-Type': 'application/json'},
-    method='POST'
-)
-response = urllib.request.urlopen(req, context=ctx)
-validation = json.loads(response.read().decode())
+validation = client.validate(new_access_token)
 
 if not validation['valid']:
     print("✅ VERIFICACIÓN CORRECTA")
@@ -129,6 +79,8 @@ if not validation['valid']:
 else:
     print("⚠️  Token sigue válido (problema de seguridad)")
 
+client.close()
+
 # RESUMEN FINAL
 print("\n" + "="*70)
 print("                      RESUMEN DE DEMOSTRACIÓN")
@@ -0,0 +1,34 @@
+"""Piezas del Auth Service reutilizables por otros servicios y herramientas"""
+from owlboard_auth.lockout import LockoutDecision, LoginLockout, MemoryLockout
+from owlboard_auth.revocation import BloomFilter, BloomFrontFilter, JtiRevocationStore
+from owlboard_auth.timing import ServerTimingMiddleware, request_timer, stage
+from owlboard_auth.tokens import TokenError, TokenIssuer, decode, encode, token_jti
+from owlboard_auth.user_events import UserEventPublisher, UserEventSubscriber
+from owlboard_auth.users import UserCache, UserRepository, create_user_engine
+from owlboard_auth.verifier import RedisBlacklist, RevokedTokenError, TokenVerifier, bearer_token
+
+__all__ = [
+    'BloomFilter',
+    'BloomFrontFilter',
+    'JtiRevocationStore',
+    'LockoutDecision',
+    'LoginLockout',
+    'MemoryLockout',
+    'RedisBlacklist',
+    'RevokedTokenError',
+    'ServerTimingMiddleware',
+    'TokenError',
+    'TokenIssuer',
+    'TokenVerifier',
+    'UserCache',
+    'UserEventPublisher',
+    'UserEventSubscriber',
+    'UserRepository',
+    'bearer_token',
+    'create_user_engine',
+    'decode',
+    'encode',
+    'request_timer',
+    'stage',
+    'token_jti',
+]
@@ -0,0 +1,171 @@
+"""Bloqueo de login por cuenta y por IP en una sola ida y vuelta a Redis
+
+auth_service aplica MAX_LOGIN_ATTEMPTS intentos fallidos y
+LOCKOUT_DURATION_MINUTES de bloqueo. Hacerlo con GET/INCR/EXPIRE cuesta
+varias idas y vueltas por intento y, con intentos simultáneos, varios
+pueden leer el mismo contador y pasar todos. Aquí un script Lua hace en
+Redis, de forma atómica, la comprobación y el registro del intento:
+
+- si la cuenta o la IP están bloqueadas, responde cuánto falta;
+- si no, limpia de su ventana deslizante (un ZSET por clave) los intentos
+  más viejos que `window` y, si alguna ya tiene su máximo, la bloquea
+  durante `lockout`;
+- si no, apunta el intento en las dos ventanas y lo deja pasar.
+
+Se llama antes de buscar al usuario en MySQL y de verificar bcrypt, así
+que como mucho `max_attempts` intentos por ventana llegan a bcrypt aunque
+lleguen cien a la vez; el resto cuesta una llamada a Redis. Cada intento
+cuenta como fallo hasta que se demuestre lo contrario: un fallo no
+necesita otra llamada, y un login correcto la libera con `succeeded()`.
+El reloj es el `TIME` de Redis, común a todas las réplicas del servicio.
+"""
+import os
+import threading
+import time
+import uuid
+
+MAX_LOGIN_ATTEMPTS = int(os.environ.get('MAX_LOGIN_ATTEMPTS', '5'))
+LOCKOUT_DURATION_MINUTES = int(os.environ.get('LOCKOUT_DURATION_MINUTES', '15'))
+MAX_LOGIN_ATTEMPTS_PER_IP = int(os.environ.get('MAX_LOGIN_ATTEMPTS_PER_IP', '50'))
+REDIS_LOCKOUT_PREFIX = 'lockout:'
+
+# KEYS: ventana de la cuenta, ventana de la IP, bloqueo de la cuenta, bloqueo de la IP
+# ARGV: ventana (ms), bloqueo (ms), máximo por cuenta, máximo por IP, id del intento
+# Devuelve {0, 0} si pasa o {1|2, ms restantes} si está bloqueada la cuenta (1) o la IP (2)
+ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local lockout = tonumber(ARGV[2])
+for i = 1, 2 do
+  local ttl = redis.call('PTTL', KEYS[i + 2])
+  if ttl > 0 then
+    return {i, ttl}
+  end
+end
+for i = 1, 2 do
+  redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+  if redis.call('ZCARD', KEYS[i]) >= tonumber(ARGV[i + 2]) then
+    redis.call('SET', KEYS[i + 2], 1, 'PX', lockout)
+    return {i, lockout}
+  end
+end
+for i = 1, 2 do
+  redis.call('ZADD', KEYS[i], now, ARGV[5])
+  redis.call('PEXPIRE', KEYS[i], window)
+end
+return {0, 0}
+"""
+
+# KEYS: ventana de la cuenta, ventana de la IP; ARGV: id del intento
+# Un login correcto vacía la ventana de la cuenta y retira el intento de la de la IP
+RELEASE_SCRIPT = """
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+return 1
+"""
+
+SCOPES = {1: 'account', 2: 'ip'}
+
+
+class LockoutDecision:
+    __slots__ = ('allowed', 'scope', 'retry_after', 'attempt')
+
+    def __init__(self, allowed, scope=None, retry_after=0.0, attempt=None):
+        self.allowed = allowed
+        self.scope = scope
+        self.retry_after = retry_after
+        self.attempt = attempt
+
+    def __bool__(self):
+        return self.allowed
+
+    def __repr__(self):
+        if self.allowed:
+            return '<LockoutDecision allowed>'
+        return f"<LockoutDecision locked {self.scope} {self.retry_after:.0f}s>"
+
+
+class LoginLockout:
+    """Ventanas deslizantes de intentos por cuenta y por IP en Redis (DB 1).
+
+        decision = lockout.acquire(email, client_ip)   # antes de MySQL y bcrypt
+        if not decision:
+            raise HTTPException(429, headers={'Retry-After': str(math.ceil(decision.retry_after))})
+        ...
+        lockout.succeeded(email, client_ip, decision)  # solo si la contraseña es correcta
+    """
+
+    def __init__(self, redis_client, max_attempts=MAX_LOGIN_ATTEMPTS, max_ip_attempts=MAX_LOGIN_ATTEMPTS_PER_IP,
+                 window=LOCKOUT_DURATION_MINUTES * 60, lockout=LOCKOUT_DURATION_MINUTES * 60,
+                 prefix=REDIS_LOCKOUT_PREFIX):
+        self.redis = redis_client
+        self.max_attempts = max_attempts
+        self.max_ip_attempts = max_ip_attempts
+        self.window = window
+        self.lockout = lockout
+        self.prefix = prefix
+        # EVALSHA con recarga automática si Redis perdió la caché de scripts
+        self._acquire = redis_client.register_script(ACQUIRE_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+
+    def keys(self, account, ip):
+        account = account.strip().lower()
+        return [f"{self.prefix}account:{account}", f"{self.prefix}ip:{ip}",
+                f"{self.prefix}locked:account:{account}", f"{self.prefix}locked:ip:{ip}"]
+
+    def acquire(self, account, ip):
+        """Comprueba el bloqueo y registra el intento en una sola llamada"""
+        attempt = uuid.uuid4().hex
+        scope, remaining = self._acquire(keys=self.keys(account, ip), args=[
+            int(self.window * 1000), int(self.lockout * 1000), self.max_attempts, self.max_ip_attempts, attempt])
+        if scope:
+            return LockoutDecision(False, SCOPES[int(scope)], int(remaining) / 1000.0)
+        return LockoutDecision(True, attempt=attempt)
+
+    def succeeded(self, account, ip, decision):
+        self._release(keys=self.keys(account, ip)[:2], args=[decision.attempt])
+
+
+class MemoryLockout:
+    """Mismo algoritmo que LoginLockout en memoria de un proceso (stand-in y pruebas)"""
+
+    def __init__(self, max_attempts=MAX_LOGIN_ATTEMPTS, max_ip_attempts=MAX_LOGIN_ATTEMPTS_PER_IP,
+                 window=LOCKOUT_DURATION_MINUTES * 60, lockout=LOCKOUT_DURATION_MINUTES * 60, clock=time.monotonic):
+        self.max_attempts = max_attempts
+        self.max_ip_attempts = max_ip_attempts
+        self.window = window
+        self.lockout = lockout
+        self.clock = clock
+        self._windows = {}
+        self._locked = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, account, ip):
+        keys = [('account', account.strip().lower()), ('ip', ip)]
+        limits = (self.max_attempts, self.max_ip_attempts)
+        with self._lock:
+            now = self.clock()
+            for key in keys:
+                until = self._locked.get(key)
+                if until is not None:
+                    if until > now:
+                        return LockoutDecision(False, key[0], until - now)
+                    del self._locked[key]
+            for key, limit in zip(keys, limits):
+                attempts = self._windows.setdefault(key, {})
+                for attempt, at in list(attempts.items()):
+                    if at <= now - self.window:
+                        del attempts[attempt]
+                if len(attempts) >= limit:
+                    self._locked[key] = now + self.lockout
+                    return LockoutDecision(False, key[0], self.lockout)
+            attempt = uuid.uuid4().hex
+            for key in keys:
+                self._windows[key][attempt] = now
+        return LockoutDecision(True, attempt=attempt)
+
+    def succeeded(self, account, ip, decision):
+        with self._lock:
+            self._windows.pop(('account', account.strip().lower()), None)
+            self._windows.get(('ip', ip), {}).pop(decision.attempt, None)
@@ -0,0 +1,250 @@
+"""Revocación por jti con caducidad automática y filtro bloom delante
+
+Guardar el token entero como clave (`blacklist:<jwt>`) cuesta cientos de
+bytes por entrada. JtiRevocationStore guarda `revoked:<jti>` con un TTL
+igual a la vida que le queda al token, así que la entrada desaparece
+cuando el token habría caducado de todos modos.
+
+BloomFrontFilter va delante del store en cada validador: mantiene en
+memoria un filtro bloom con los jti revocados vigentes y, si el jti no
+está, responde "no revocado" sin ir a Redis. Se reconstruye con SCAN cada
+`rebuild_interval` segundos y entre reconstrucciones recibe las
+revocaciones nuevas del stream (RevocationSubscriber(front_filter=...)).
+Un falso positivo solo cuesta la consulta a Redis. Mientras el feed está
+desconectado el filtro se desactiva y todo se consulta en Redis.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from owlboard_auth.tokens import token_jti
+from owlboard_auth.verifier import REDIS_BLACKLIST_PREFIX, REDIS_REVOKED_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Bits en un bytearray y `hashes` posiciones por doble hashing de blake2b"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        bits = self.bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class JtiRevocationStore:
+    """`revoked:<jti>` en Redis con TTL hasta `exp`; sirve como `revocations` de TokenVerifier.
+
+    Con `legacy_prefix` se consultan también las claves `blacklist:<token>`
+    anteriores en el mismo EXISTS; se puede poner a None cuando haya pasado
+    la vida de un refresh token (REFRESH_TOKEN_EXPIRE_DAYS) desde el cambio.
+    Los tokens sin jti se siguen guardando por token completo.
+    """
+
+    def __init__(self, redis_client, prefix=REDIS_REVOKED_PREFIX, legacy_prefix=REDIS_BLACKLIST_PREFIX,
+                 clock=time.time):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.legacy_prefix = legacy_prefix
+        self.clock = clock
+
+    def key(self, token, jti=None):
+        """Clave que guarda la revocación de `token`"""
+        jti = jti or token_jti(token)
+        return self.prefix + jti if jti else (self.legacy_prefix or REDIS_BLACKLIST_PREFIX) + token
+
+    def _keys(self, token, claims):
+        jti = claims.get('jti') if claims else token_jti(token)
+        if not jti:
+            return [(self.legacy_prefix or REDIS_BLACKLIST_PREFIX) + token]
+        keys = [self.prefix + str(jti)]
+        if self.legacy_prefix is not None:
+            keys.append(self.legacy_prefix + token)
+        return keys
+
+    def revoke(self, token, exp, pipe=None):
+        """Revoca hasta `exp`; False si el token ya había caducado y no hace falta guardarlo"""
+        ttl = int(math.ceil(exp - self.clock()))
+        if ttl <= 0:
+            return False
+        (pipe if pipe is not None else self.redis).set(self.key(token), 1, ex=ttl)
+        return True
+
+    def is_revoked(self, token, claims=None):
+        return self.redis.exists(*self._keys(token, claims)) > 0
+
+    def revoked_many(self, tokens):
+        """Un único MGET para una lista de tokens; mismo orden que la entrada"""
+        if not tokens:
+            return []
+        groups = [self._keys(token, None) for token in tokens]
+        values = iter(self.redis.mget([key for keys in groups for key in keys]))
+        return [any([next(values) is not None for _ in keys]) for keys in groups]
+
+    def scan(self, count=1000):
+        """jti de todas las revocaciones vigentes, incluidas las de claves antiguas"""
+        for key in self.redis.scan_iter(match=self.prefix + '*', count=count):
+            yield (key.decode() if isinstance(key, bytes) else key)[len(self.prefix):]
+        if self.legacy_prefix is not None:
+            for key in self.redis.scan_iter(match=self.legacy_prefix + '*', count=count):
+                jti = token_jti((key.decode() if isinstance(key, bytes) else key)[len(self.legacy_prefix):])
+                if jti:
+                    yield jti
+
+
+class FrontFilterStats:
+    __slots__ = ('checks', 'filtered', 'lookups', 'false_positives', 'rebuilds', 'last_rebuild_s', 'entries',
+                 'nbytes')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BloomFrontFilter:
+    """Filtro bloom de jti revocados delante de un JtiRevocationStore.
+
+        front = BloomFrontFilter(JtiRevocationStore(redis_client)).start()
+        verifier = TokenVerifier(revocations=front)
+        RevocationSubscriber(redis_client, verifier, front_filter=front).start()
+
+    Sin suscriptor, una revocación hecha en otro proceso puede tardar hasta
+    `rebuild_interval` segundos en verse aquí. Cada reconstrucción dimensiona
+    el filtro para el doble de `capacity` o de las revocaciones vigentes.
+    """
+
+    def __init__(self, store, capacity=100000, error_rate=0.001, rebuild_interval=300.0, clock=time.monotonic):
+        self.store = store
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self.clock = clock
+        self.enabled = False
+        self.stats = FrontFilterStats()
+        self._bloom = None
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def rebuild(self):
+        """Recorre el store y sustituye el filtro; lo revocado durante el SCAN también entra"""
+        started = self.clock()
+        with self._lock:
+            self._pending = []
+        try:
+            jtis = list(self.store.scan())
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            for jti in self._pending:
+                bloom.add(jti)
+            self._pending = None
+            self._bloom = bloom
+            self.stats.rebuilds += 1
+            self.stats.entries = len(bloom)
+            self.stats.nbytes = bloom.nbytes
+            self.stats.last_rebuild_s = round(self.clock() - started, 6)
+        return len(bloom)
+
+    def add(self, jti):
+        """Marca un jti como revocado (revocación local o recibida del stream)"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+                self.stats.entries = len(self._bloom)
+            if self._pending is not None:
+                self._pending.append(jti)
+
+    def revoke(self, token, exp, pipe=None):
+        jti = token_jti(token)
+        if jti:
+            self.add(jti)
+        return self.store.revoke(token, exp, pipe)
+
+    def _filtered(self, token, claims):
+        """True si el filtro garantiza que `token` no está revocado"""
+        bloom = self._bloom
+        if not self.enabled or bloom is None:
+            return False
+        jti = claims.get('jti') if claims else token_jti(token)
+        return bool(jti) and str(jti) not in bloom
+
+    def is_revoked(self, token, claims=None):
+        self.stats.checks += 1
+        if self._filtered(token, claims):
+            self.stats.filtered += 1
+            return False
+        self.stats.lookups += 1
+        revoked = self.store.is_revoked(token, claims)
+        if not revoked and self.enabled and (claims.get('jti') if claims else token_jti(token)):
+            self.stats.false_positives += 1
+        return revoked
+
+    def revoked_many(self, tokens):
+        self.stats.checks += len(tokens)
+        pending = [i for i, token in enumerate(tokens) if not self._filtered(token, None)]
+        self.stats.filtered += len(tokens) - len(pending)
+        result = [False] * len(tokens)
+        if pending:
+            self.stats.lookups += 1
+            for i, revoked in zip(pending, self.store.revoked_many([tokens[i] for i in pending])):
+                result[i] = revoked
+        return result
+
+    def start(self):
+        """Primera reconstrucción (síncrona) y un hilo que repite cada `rebuild_interval`"""
+        self.rebuild()
+        self.enabled = True
+        self._thread = threading.Thread(target=self._run, name='revocation-bloom', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.rebuild_interval):
+            try:
+                self.rebuild()
+            except Exception:  # noqa: BLE001 - se conserva el filtro anterior y se reintenta
+                logger.exception('Revocation bloom rebuild failed')
@@ -0,0 +1,191 @@
+"""Difusión de revocaciones por un stream de Redis
+
+auth_service añade una entrada al stream `auth:revocations` (en la misma
+instancia redis_db que la blacklist) cada vez que revoca un token. Cada
+servicio ejecuta un RevocationSubscriber que lee el stream con XREAD
+bloqueante y expulsa el token de su TokenVerifier en milisegundos.
+
+El stream conserva las últimas entradas, así que tras una reconexión el
+suscriptor continúa desde el último id procesado. Si el recorte (MAXLEN)
+ya se llevó entradas que no había leído, o el stream desapareció, no se
+puede saber qué se perdió y se vacía la caché entera. Mientras no hay conexión la caché queda desactivada: cada
+verificación consulta la blacklist directamente.
+
+Las revocaciones se guardan por jti (`revoked:<jti>`, ver revocation.py)
+y cada entrada del stream lleva también el jti, con el que el suscriptor
+alimenta el filtro bloom del validador si se le pasa uno.
+"""
+import logging
+import threading
+
+from owlboard_auth.revocation import JtiRevocationStore
+from owlboard_auth.tokens import token_jti
+from owlboard_auth.verifier import REDIS_BLACKLIST_PREFIX, REDIS_REVOKED_PREFIX, token_digest
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_STREAM = 'auth:revocations'
+
+
+def _field(fields, name):
+    value = fields.get(name, fields.get(name.encode()))
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _id_tuple(entry_id):
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    ms, _, seq = entry_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+class RevocationPublisher:
+    """Lado de auth_service: blacklist + evento en una sola ida y vuelta"""
+
+    def __init__(self, redis_client, stream=REVOCATION_STREAM, maxlen=100000, prefix=REDIS_BLACKLIST_PREFIX,
+                 jti_prefix=REDIS_REVOKED_PREFIX):
+        self.redis = redis_client
+        self.stream = stream
+        self.maxlen = maxlen
+        self.store = JtiRevocationStore(redis_client, jti_prefix, prefix)
+
+    def revoke(self, token, exp):
+        """Revoca `token` hasta `exp` (por jti si lo tiene) y publica la revocación.
+
+        Devuelve el id de la entrada del stream, o None si el token ya había
+        caducado: ningún validador lo acepta ni lo tiene en caché más allá de
+        `exp`, así que no hace falta clave ni evento.
+        """
+        if exp <= self.store.clock():
+            return None
+        fields = {'digest': token_digest(token).hex(), 'exp': int(exp)}
+        jti = token_jti(token)
+        if jti:
+            fields['jti'] = jti
+        pipe = self.redis.pipeline(transaction=True)
+        self.store.revoke(token, exp, pipe)
+        pipe.xadd(self.stream, fields, maxlen=self.maxlen, approximate=True)
+        return pipe.execute()[-1]
+
+
+class RevocationSubscriber:
+    """Hilo que mantiene un TokenVerifier al día con el stream de revocaciones"""
+
+    def __init__(self, redis_client, verifier, stream=REVOCATION_STREAM, block_ms=1000, batch=500,
+                 max_backoff=5.0, front_filter=None):
+        self.redis = redis_client
+        self.verifier = verifier
+        self.front_filter = front_filter
+        self.stream = stream
+        self.block_ms = block_ms
+        self.batch = batch
+        self.max_backoff = max_backoff
+        self.last_id = None
+        self.position = 0  # valor de entries-added correspondiente a last_id
+        self.evicted = 0
+        self.resyncs = 0
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Fija la posición inicial y arranca el hilo.
+
+        Debe llamarse antes de servir peticiones: lo que se revoque a partir
+        de aquí llegará por el stream.
+        """
+        self._seek_tail()
+        self.connected.set()
+        self._thread = threading.Thread(target=self._run, name='revocation-subscriber', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _info(self):
+        if not self.redis.exists(self.stream):
+            return None
+        return self.redis.xinfo_stream(self.stream)
+
+    def _seek_tail(self):
+        info = self._info()
+        if info is None:
+            self.last_id, self.position = '0-0', 0
+        else:
+            self.last_id = info['last-generated-id']
+            self.position = info.get('entries-added', 0)
+
+    def _catch_up_possible(self):
+        """¿Siguen en el stream todas las entradas posteriores a `last_id`?
+
+        Con Redis 7, `entries-added` y `length` dicen exactamente cuántas
+        entradas recientes quedan; con versiones anteriores se compara con
+        la entrada más antigua y, ante la duda, se declara hueco.
+        """
+        info = self._info()
+        if info is None:
+            return self.position == 0 and _id_tuple(self.last_id) == (0, 0)
+        added = info.get('entries-added')
+        if added is not None:
+            return added - self.position <= info['length']
+        first = info.get('first-entry')
+        return not first or _id_tuple(first[0]) <= _id_tuple(self.last_id)
+
+    def _disconnect(self):
+        if self.connected.is_set():
+            logger.warning('Revocation feed disconnected; token cache disabled')
+        self.connected.clear()
+        self.verifier.caching = False
+        if self.front_filter is not None:
+            self.front_filter.enabled = False
+
+    def _reconnect(self):
+        if not self._catch_up_possible():
+            logger.warning('Revocation feed gap after %s; clearing token cache', self.last_id)
+            self.verifier.clear()
+            self._seek_tail()
+            self.resyncs += 1
+            if self.front_filter is not None:
+                self.front_filter.rebuild()
+        # Se procesa todo lo pendiente antes de volver a usar la caché
+        while self.poll(block_ms=None):
+            pass
+        self.verifier.caching = True
+        if self.front_filter is not None:
+            self.front_filter.enabled = True
+        self.connected.set()
+        logger.info('Revocation feed connected at %s', self.last_id)
+
+    def poll(self, block_ms=None):
+        """Lee y aplica un lote; devuelve cuántas entradas procesó"""
+        response = self.redis.xread({self.stream: self.last_id}, count=self.batch, block=block_ms)
+        processed = 0
+        for _stream, entries in response or ():
+            for entry_id, fields in entries:
+                digest = _field(fields, 'digest')
+                jti = _field(fields, 'jti')
+                if jti and self.front_filter is not None:
+                    self.front_filter.add(jti)
+                if digest and self.verifier.evict(digest=bytes.fromhex(digest)):
+                    self.evicted += 1
+                self.last_id = entry_id
+                self.position += 1
+                processed += 1
+        return processed
+
+    def _run(self):
+        backoff = 0.1
+        while not self._stop.is_set():
+            try:
+                if not self.connected.is_set():
+                    self._reconnect()
+                    backoff = 0.1
+                self.poll(self.block_ms)
+            except Exception:  # noqa: BLE001 - cualquier fallo de Redis se trata como desconexión
+                logger.exception('Revocation feed error')
+                self._disconnect()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
@@ -0,0 +1,244 @@
+"""Tiempos por etapa dentro de auth_service: cabecera Server-Timing e histogramas
+
+Uso dentro de un endpoint:
+
+    with request_timer('/auth/login') as timer:
+        with stage('db'):
+            user = get_user(email)
+        with stage('bcrypt'):
+            ok = verify(password, user.hashed_password)
+        ...
+    response.headers['Server-Timing'] = timer.header()
+
+`ServerTimingMiddleware` hace lo mismo para cualquier app ASGI (FastAPI) y
+sirve los histogramas agregados en /metrics. Las series se etiquetan con la
+plantilla de la ruta (`/users/{user_id}`) o, si la app no la expone, con
+los endpoints conocidos y `other` para el resto: la ruta cruda crearía una
+serie por id y por cada URL inventada de un escáner. Con la instrumentación
+desactivada (`AUTH_SERVER_TIMING=0`, por defecto) `request_timer` produce
+None y `stage()` devuelve siempre el mismo context manager vacío: el coste
+es una lectura de ContextVar por etapa.
+"""
+import bisect
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+ENABLED = os.environ.get('AUTH_SERVER_TIMING', '0').lower() in ('1', 'true', 'yes')
+
+# Límites superiores de los buckets en segundos (estilo Prometheus)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Endpoints de auth_service que se etiquetan tal cual cuando no hay plantilla de ruta
+KNOWN_ENDPOINTS = frozenset((
+    '/', '/health', '/auth/docs', '/auth/login', '/auth/token/validate', '/auth/token/introspect',
+    '/auth/token/validate/batch', '/auth/token/introspect/batch', '/auth/token/refresh', '/auth/token/revoke',
+))
+OTHER_ENDPOINT = 'other'
+
+_current = contextvars.ContextVar('owlboard_stage_timer', default=None)
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimer:
+    """Etapas (nombre, segundos) de una petición, en orden"""
+
+    __slots__ = ('endpoint', 'start', 'stages', 'total')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.stages = []
+        self.total = None
+
+    def add(self, name, seconds):
+        self.stages.append((name, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self.start if self.total is None else self.total
+
+    def header(self):
+        """Valor de Server-Timing con las etapas y el total hasta ahora (ms)"""
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages]
+        parts.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ', '.join(parts)
+
+
+def stage(name):
+    """Context manager que cronometra una etapa de la petición en curso"""
+    timer = _current.get()
+    if timer is None:
+        return _NOOP
+    return _Stage(timer, name)
+
+
+class Histograms:
+    """Histogramas acumulados por (endpoint, etapa)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, name, seconds):
+        key = (endpoint, name)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def record(self, timer):
+        for name, seconds in timer.stages:
+            self.observe(timer.endpoint, name, seconds)
+        self.observe(timer.endpoint, 'total', timer.elapsed())
+
+    def snapshot(self):
+        with self._lock:
+            items = [(key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items()]
+        result = {}
+        for (endpoint, name), (counts, total, count) in sorted(items):
+            result.setdefault(endpoint, {})[name] = {
+                'count': count,
+                'sum_s': round(total, 6),
+                'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+                'p50_ms': self._quantile(counts, count, 0.50),
+                'p99_ms': self._quantile(counts, count, 0.99),
+            }
+        return result
+
+    def _quantile(self, counts, count, q):
+        """Límite superior del bucket que contiene el cuantil (ms)"""
+        if not count:
+            return 0.0
+        rank = q * count
+        running = 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            running += n
+            if running >= rank:
+                return bound * 1000 if bound != float('inf') else None
+        return None
+
+    def render_prometheus(self, metric='auth_stage_duration_seconds'):
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        lines = [f"# HELP {metric} Duración de cada etapa de los endpoints de auth_service",
+                 f"# TYPE {metric} histogram"]
+        for (endpoint, name), (counts, total, count) in items:
+            labels = f'endpoint="{endpoint}",stage="{name}"'
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{metric}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+HISTOGRAMS = Histograms()
+
+
+@contextlib.contextmanager
+def request_timer(endpoint, registry=HISTOGRAMS, enabled=None):
+    """Activa la medición de etapas para el bloque; produce el StageTimer o None"""
+    if not (ENABLED if enabled is None else enabled):
+        yield None
+        return
+    timer = StageTimer(endpoint)
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        timer.total = time.perf_counter() - timer.start
+        _current.reset(token)
+        if registry is not None:
+            registry.record(timer)
+
+
+class ServerTimingMiddleware:
+    """Middleware ASGI: Server-Timing en cada respuesta y /metrics con los histogramas"""
+
+    def __init__(self, app, enabled=None, registry=HISTOGRAMS, metrics_path='/metrics',
+                 known_endpoints=KNOWN_ENDPOINTS):
+        self.app = app
+        self.enabled = ENABLED if enabled is None else enabled
+        self.registry = registry
+        self.metrics_path = metrics_path
+        self.known_endpoints = frozenset(known_endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        if scope['path'] == self.metrics_path:
+            await self._metrics(scope, send)
+            return
+        with request_timer(OTHER_ENDPOINT, self.registry, True) as timer:
+            async def send_with_timing(message):
+                if message['type'] == 'http.response.start':
+                    headers = list(message.get('headers', []))
+                    headers.append((b'server-timing', timer.header().encode('latin-1')))
+                    message = dict(message, headers=headers)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # El router rellena scope['route'] durante la petición; se etiqueta al terminar
+                timer.endpoint = self.endpoint_label(scope)
+
+    def endpoint_label(self, scope):
+        """Plantilla de la ruta, el path si es un endpoint conocido u `other`"""
+        template = getattr(scope.get('route'), 'path', None)
+        if template:
+            return template
+        path = scope['path']
+        return path if path in self.known_endpoints else OTHER_ENDPOINT
+
+    async def _metrics(self, scope, send):
+        if b'format=json' in scope.get('query_string', b''):
+            body, content_type = json.dumps(self.registry.snapshot()).encode(), b'application/json'
+        else:
+            body, content_type = self.registry.render_prometheus().encode(), b'text/plain; version=0.0.4'
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,112 @@
+"""JWT HS256 compatibles con los que emite auth_service"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+
+JWT_SECRET_KEY = os.environ.get(
+    'JWT_SECRET_KEY', 'your-super-secret-jwt-key-change-this-in-production-min-32-chars-recommended-64')
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES', '30'))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get('REFRESH_TOKEN_EXPIRE_DAYS', '7'))
+
+_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b'=')
+
+
+class TokenError(Exception):
+    """Token mal formado, con firma inválida o expirado"""
+
+    def __init__(self, message, expired=False):
+        super().__init__(message)
+        self.expired = expired
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+def _key(secret):
+    return secret.encode('utf-8') if isinstance(secret, str) else secret
+
+
+def encode(claims, secret=JWT_SECRET_KEY):
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    signing_input = _HEADER + b'.' + payload
+    signature = hmac.new(_key(secret), signing_input, hashlib.sha256).digest()
+    return (signing_input + b'.' + _b64encode(signature)).decode('ascii')
+
+
+def decode(token, secret=JWT_SECRET_KEY, verify_exp=True, leeway=0, now=None):
+    """Comprueba firma HS256 y `exp` y devuelve los claims"""
+    try:
+        raw = token.encode('ascii')
+        signing_input, _, signature = raw.rpartition(b'.')
+        header, _, payload = signing_input.partition(b'.')
+        if not header or not payload:
+            raise ValueError('segments')
+        if json.loads(_b64decode(header)).get('alg') != 'HS256':
+            raise TokenError('Unsupported algorithm')
+        expected = hmac.new(_key(secret), signing_input, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            raise TokenError('Signature verification failed')
+        claims = json.loads(_b64decode(payload))
+    except TokenError:
+        raise
+    except (ValueError, UnicodeError, AttributeError):
+        raise TokenError('Invalid token') from None
+    if verify_exp and 'exp' in claims:
+        if (time.time() if now is None else now) >= claims['exp'] + leeway:
+            raise TokenError('Token has expired', expired=True)
+    return claims
+
+
+def token_jti(token):
+    """jti de un JWT sin verificar la firma; None si no tiene o está mal formado"""
+    try:
+        claims = json.loads(_b64decode(token.split('.')[1].encode('ascii')))
+        jti = claims.get('jti')
+    except (IndexError, ValueError, UnicodeError, AttributeError):
+        return None
+    return str(jti) if jti else None
+
+
+class TokenIssuer:
+    """Emite pares access/refresh con los tiempos de vida del compose"""
+
+    def __init__(self, secret=JWT_SECRET_KEY, access_minutes=ACCESS_TOKEN_EXPIRE_MINUTES,
+                 refresh_days=REFRESH_TOKEN_EXPIRE_DAYS, scopes=('read', 'write')):
+        self.secret = secret
+        self.access_ttl = access_minutes * 60
+        self.refresh_ttl = refresh_days * 86400
+        self.scopes = list(scopes)
+
+    def _token(self, user, token_type, ttl, now):
+        claims = {
+            'sub': str(user['id']),
+            'email': user['email'],
+            'type': token_type,
+            'iat': now,
+            'exp': now + ttl,
+            'jti': uuid.uuid4().hex,
+        }
+        if token_type == 'access':
+            claims['scopes'] = self.scopes
+        return encode(claims, self.secret)
+
+    def issue(self, user, now=None):
+        now = int(time.time()) if now is None else now
+        return {
+            'access_token': self._token(user, 'access', self.access_ttl, now),
+            'refresh_token': self._token(user, 'refresh', self.refresh_ttl, now),
+            'token_type': 'bearer',
+            'expires_in': self.access_ttl,
+        }
+
+    def decode(self, token, **kwargs):
+        return decode(token, self.secret, **kwargs)
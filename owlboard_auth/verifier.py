@@ -0,0 +1,184 @@
+"""Verificación local de access tokens con caché LRU
+
+Los servicios detrás de los gateways comparten `JWT_SECRET_KEY` con
+auth_service, así que pueden comprobar firma y `exp` sin llamar a
+/auth/token/validate. Los resultados positivos se guardan por digest del
+token durante `max_ttl` segundos como mucho, y nunca más allá de `exp`.
+La lista de revocación solo se consulta en los fallos de caché. Cada
+evict(), clear() o cambio de `caching` incrementa una generación: un
+resultado verificado antes no se guarda después, así que una revocación
+que llega entre la consulta y la inserción no deja el token en caché.
+"""
+import collections
+import hashlib
+import threading
+import time
+
+from owlboard_auth.tokens import JWT_SECRET_KEY, TokenError, decode, token_jti
+
+REDIS_BLACKLIST_PREFIX = 'blacklist:'
+REDIS_REVOKED_PREFIX = 'revoked:'
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+class RevokedTokenError(TokenError):
+    """Token con firma válida pero presente en la blacklist"""
+
+    def __init__(self):
+        super().__init__('Token has been revoked')
+
+
+class RedisBlacklist:
+    """Consulta la blacklist que auth_service mantiene en Redis (DB 1).
+
+    Mira tanto la clave por token completo como la clave por jti de
+    JtiRevocationStore, así que sigue viendo las revocaciones nuevas.
+    """
+
+    def __init__(self, redis_client, prefix=REDIS_BLACKLIST_PREFIX, jti_prefix=REDIS_REVOKED_PREFIX):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.jti_prefix = jti_prefix
+
+    def _jti_key(self, token, claims=None):
+        jti = claims.get('jti') if claims else token_jti(token)
+        return self.jti_prefix + str(jti) if jti and self.jti_prefix else None
+
+    def is_revoked(self, token, claims):
+        keys = [self.prefix + token, self._jti_key(token, claims)]
+        return self.redis.exists(*[key for key in keys if key]) > 0
+
+    def revoked_many(self, tokens):
+        """Un único MGET para una lista de tokens; mismo orden que la entrada"""
+        if not tokens:
+            return []
+        jti_keys = [self._jti_key(t) for t in tokens]
+        values = self.redis.mget([self.prefix + t for t in tokens] + [key for key in jti_keys if key])
+        by_jti = iter(values[len(tokens):])
+        # Se consumen los dos valores de cada token antes de combinarlos, o el iterador se desalinea
+        result = []
+        for legacy, key in zip(values, jti_keys):
+            revoked_by_jti = key is not None and next(by_jti) is not None
+            result.append(legacy is not None or revoked_by_jti)
+        return result
+
+
+class VerifierStats:
+    __slots__ = ('hits', 'misses', 'expired', 'evictions', 'revocation_checks', 'rejected')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TokenVerifier:
+    """Valida access tokens localmente con un LRU acotado de resultados positivos.
+
+    `revocations` es cualquier objeto con `is_revoked(token, claims)`; con
+    None solo se comprueban firma y expiración. `clock` permite inyectar
+    el tiempo en pruebas. Con `caching = False` cada llamada verifica y
+    consulta la revocación sin leer ni escribir la caché.
+    """
+
+    def __init__(self, secret=JWT_SECRET_KEY, revocations=None, max_entries=10000, max_ttl=60.0,
+                 leeway=0, token_type='access', clock=time.time):
+        self.secret = secret
+        self.revocations = revocations
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.leeway = leeway
+        self.token_type = token_type
+        self.clock = clock
+        self.stats = VerifierStats()
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._caching = True
+        # Cambia en cada evict/clear/cambio de caching: lo verificado antes no se inserta
+        self._generation = 0
+
+    @property
+    def caching(self):
+        return self._caching
+
+    @caching.setter
+    def caching(self, value):
+        with self._lock:
+            self._generation += 1
+            self._caching = value
+
+    def verify(self, token):
+        """Devuelve los claims o lanza TokenError (RevokedTokenError si está revocado)"""
+        key = token_digest(token)
+        now = self.clock()
+        with self._lock:
+            generation = self._generation
+            entry = self._cache.get(key) if self._caching else None
+            if entry is not None:
+                claims, expires_at = entry
+                if now < expires_at:
+                    self._cache.move_to_end(key)
+                    self.stats.hits += 1
+                    return claims
+                del self._cache[key]
+                self.stats.expired += 1
+            self.stats.misses += 1
+
+        try:
+            claims = decode(token, self.secret, leeway=self.leeway, now=now)
+            if self.token_type and claims.get('type', self.token_type) != self.token_type:
+                raise TokenError('Invalid token type')
+            if self.revocations is not None:
+                self.stats.revocation_checks += 1
+                if self.revocations.is_revoked(token, claims):
+                    raise RevokedTokenError()
+        except TokenError:
+            self.stats.rejected += 1
+            raise
+
+        expires_at = now + self.max_ttl
+        if 'exp' in claims:
+            expires_at = min(expires_at, claims['exp'] + self.leeway)
+        with self._lock:
+            if generation != self._generation or not self._caching:
+                return claims
+            self._cache[key] = (claims, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.stats.evictions += 1
+        return claims
+
+    def is_valid(self, token):
+        try:
+            self.verify(token)
+        except TokenError:
+            return False
+        return True
+
+    def evict(self, token=None, digest=None):
+        """Quita un token de la caché (p. ej. al recibir su revocación)"""
+        with self._lock:
+            self._generation += 1
+            return self._cache.pop(digest or token_digest(token), None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+def bearer_token(authorization):
+    """Extrae el token de una cabecera `Authorization: Bearer <token>`"""
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        raise TokenError('Missing bearer token')
+    return token.strip()
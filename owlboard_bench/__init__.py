@@ -0,0 +1 @@
+"""Herramientas de benchmark y carga para OwlBoard (python -m owlboard_bench)"""
@@ -0,0 +1,40 @@
+"""Punto de entrada: python -m owlboard_bench <comando> [opciones]"""
+import argparse
+import sys
+
+from owlboard_bench import (access_log, auth, calibrate, chat, coldstart, gateways, handshake, health, lockout, probe,
+                            rabbitmq, record, replay, revocation, seed, soak)
+
+COMMANDS = {
+    'access-log': access_log,
+    'auth': auth,
+    'bcrypt': calibrate,
+    'chat': chat,
+    'cold-start': coldstart,
+    'gateways': gateways,
+    'health': health,
+    'lockout': lockout,
+    'probe': probe,
+    'rabbitmq': rabbitmq,
+    'record': record,
+    'replay': replay,
+    'revocation': revocation,
+    'seed': seed,
+    'soak': soak,
+    'tls-handshake': handshake,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m owlboard_bench', description=__doc__)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, module in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=module.__doc__.splitlines()[0], description=module.__doc__)
+        module.add_arguments(sub)
+        sub.set_defaults(run=module.run)
+    args = parser.parse_args(argv)
+    return args.run(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""Análisis del access.log del load balancer: reparto entre gateways
+
+Lee en streaming (memoria constante) access.log de nginx con el formato
+`main` de load_balancer_nginx.conf, incluidos los rotados y comprimidos
+(access.log.1, access.log.2.gz, ...). Por upstream calcula peticiones/s,
+reparto de códigos de estado y reintentos de proxy_next_upstream (varias
+direcciones en $upstream_addr). Si el formato incluye rt=$request_time y
+urt="$upstream_response_time", añade percentiles de latencia por upstream
+y por prefijo de ruta. Con --window muestra la carga por ventana de tiempo.
+"""
+import collections
+import datetime
+import functools
+import glob
+import gzip
+import io
+import os
+import re
+import sys
+
+from owlboard_bench.stats import StreamingHistogram, write_json
+
+ROUTE_PREFIXES = ('/api/users', '/api/canvas', '/api/chat', '/api/comments', '/auth')
+
+LINE = re.compile(
+    r'(?P<remote>\S+) - (?P<user>\S+) \[(?P<time>[^\]]+)\] "(?P<request>(?:[^"\\]|\\.)*)" '
+    r'(?P<status>\d{3}) (?P<bytes>\d+|-) "(?:[^"\\]|\\.)*" "(?:[^"\\]|\\.)*" "(?:[^"\\]|\\.)*"'
+    r'(?: upstream: (?P<upstream>.*?))?'
+    r'(?: rt=(?P<rt>[\d.]+) urt="(?P<urt>[^"]*)"(?: ust="(?P<ust>[^"]*)")?)?\s*$')
+# nginx separa los intentos con ", " y las redirecciones internas con " : "
+ATTEMPTS = re.compile(r', | : ')
+MONTHS = {m: i for i, m in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_time(value):
+    """'10/Oct/2026:13:55:36 +0000' -> epoch en segundos"""
+    day, month, year = value[0:2], value[3:6], value[7:11]
+    hour, minute, second = value[12:14], value[15:17], value[18:20]
+    offset = value[21:]
+    tz = datetime.timezone(datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+                           * (-1 if offset[0] == '-' else 1))
+    return datetime.datetime(int(year), MONTHS[month], int(day), int(hour), int(minute), int(second),
+                             tzinfo=tz).timestamp()
+
+
+def _float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_line(line):
+    """Diccionario con los campos de una línea, o None si no tiene el formato `main`"""
+    match = LINE.match(line)
+    if match is None:
+        return None
+    request = match.group('request').split(' ')
+    upstream = match.group('upstream')
+    rt = match.group('rt')
+    urt = match.group('urt')
+    ust = match.group('ust')
+    return {
+        # Muchas líneas comparten segundo: parse_time está cacheada
+        'time': parse_time(match.group('time')),
+        'remote': match.group('remote'),
+        'method': request[0] if len(request) > 1 else '',
+        'target': request[1] if len(request) > 1 else request[0],
+        'path': request[1].split('?', 1)[0] if len(request) > 1 else request[0],
+        'status': int(match.group('status')),
+        'upstreams': [] if upstream in (None, '', '-') else ATTEMPTS.split(upstream),
+        'request_time': float(rt) if rt else None,
+        'upstream_times': [_float(v) for v in ATTEMPTS.split(urt)] if urt and urt != '-' else [],
+        'upstream_statuses': ATTEMPTS.split(ust) if ust and ust != '-' else [],
+    }
+
+
+def route_prefix(path, prefixes=ROUTE_PREFIXES):
+    for prefix in prefixes:
+        if path == prefix or path.startswith(prefix + '/'):
+            return prefix
+    return 'other'
+
+
+def expand_rotated(path):
+    """access.log -> [..., access.log.2.gz, access.log.1, access.log] (más antiguo primero)"""
+    rotated = []
+    for candidate in glob.glob(glob.escape(path) + '.*'):
+        suffix = candidate[len(path) + 1:]
+        number = suffix[:-3] if suffix.endswith('.gz') else suffix
+        if number.isdigit():
+            rotated.append((int(number), candidate))
+    files = [name for _, name in sorted(rotated, reverse=True)]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def open_log(path):
+    """Fichero de texto línea a línea; detecta gzip por la cabecera, no por la extensión"""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace')
+    raw = open(path, 'rb')
+    if raw.peek(2)[:2] == b'\x1f\x8b':
+        raw = gzip.GzipFile(fileobj=raw)
+    return io.TextIOWrapper(raw, encoding='utf-8', errors='replace')
+
+
+class Group:
+    """Contadores de un upstream o de un prefijo de ruta"""
+
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0
+        self.failed_over = 0
+        self.statuses = collections.Counter()
+        self.latency = StreamingHistogram()
+
+    def as_dict(self, span):
+        classes = collections.Counter()
+        for status, count in self.statuses.items():
+            classes[f"{str(status)[0]}xx"] += count
+        return {
+            'requests': self.requests,
+            'rps': round(self.requests / span, 3) if span else 0.0,
+            'attempts': self.attempts,
+            'failed_over': self.failed_over,
+            'status_classes': dict(sorted(classes.items())),
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items())},
+            'latency_ms': self.latency.summary_ms() if self.latency.count else None,
+        }
+
+
+class Window:
+    __slots__ = ('start', 'requests', 'errors', 'retried', 'upstreams', 'latency')
+
+    def __init__(self, start):
+        self.start = start
+        self.requests = 0
+        self.errors = 0
+        self.retried = 0
+        self.upstreams = collections.Counter()
+        self.latency = StreamingHistogram()
+
+    def as_dict(self, width):
+        return {
+            'start': datetime.datetime.fromtimestamp(self.start, datetime.timezone.utc).isoformat(),
+            'requests': self.requests,
+            'rps': round(self.requests / width, 3),
+            '5xx': self.errors,
+            'retried': self.retried,
+            'upstreams': dict(sorted(self.upstreams.items())),
+            'p99_ms': round(self.latency.percentile(99) * 1000, 3) if self.latency.count else None,
+        }
+
+
+class Analyzer:
+    """Acumula líneas ya parseadas; el estado no crece con el tamaño del log.
+
+    Las ventanas se cierran cuando el log avanza dos ventanas más allá
+    (nginx escribe al terminar cada petición, así que hay algo de desorden);
+    las líneas que llegan a una ventana ya cerrada cuentan como `late`.
+    """
+
+    def __init__(self, prefixes=ROUTE_PREFIXES, window=None):
+        self.prefixes = prefixes
+        self.window = window
+        self.upstreams = collections.defaultdict(Group)
+        self.routes = collections.defaultdict(Group)
+        self.total = Group()
+        self.lines = 0
+        self.unparsed = 0
+        self.retried = 0
+        self.no_upstream = 0
+        self.first = None
+        self.last = None
+        self.open_windows = collections.OrderedDict()
+        self.closed_windows = []
+        self.late = 0
+
+    def feed_line(self, line):
+        self.lines += 1
+        entry = parse_line(line)
+        if entry is None:
+            self.unparsed += 1
+            return
+        self.add(entry)
+
+    def add(self, entry):
+        now, status, upstreams = entry['time'], entry['status'], entry['upstreams']
+        if self.first is None or now < self.first:
+            self.first = now
+        if self.last is None or now > self.last:
+            self.last = now
+
+        for group in (self.total, self.routes[route_prefix(entry['path'], self.prefixes)]):
+            group.requests += 1
+            group.statuses[status] += 1
+            if entry['request_time'] is not None:
+                group.latency.add(entry['request_time'])
+
+        if not upstreams:
+            # Respondida por el propio balanceador (límite de peticiones, /health, error de cliente)
+            self.no_upstream += 1
+        else:
+            if len(upstreams) > 1:
+                self.retried += 1
+            times = entry['upstream_times']
+            for i, address in enumerate(upstreams):
+                group = self.upstreams[address]
+                group.attempts += 1
+                if i < len(times) and times[i] is not None:
+                    group.latency.add(times[i])
+                if i < len(upstreams) - 1:
+                    group.failed_over += 1
+            served = self.upstreams[upstreams[-1]]
+            served.requests += 1
+            served.statuses[status] += 1
+
+        if self.window:
+            self._window(entry, now, status, upstreams)
+
+    def _window(self, entry, now, status, upstreams):
+        start = now - now % self.window
+        window = self.open_windows.get(start)
+        if window is None:
+            if self.closed_windows and start <= self.closed_windows[-1]['_start']:
+                self.late += 1
+                return
+            window = self.open_windows[start] = Window(start)
+            self.open_windows = collections.OrderedDict(sorted(self.open_windows.items()))
+            self._close_windows(start - 2 * self.window)
+        window.requests += 1
+        if status >= 500:
+            window.errors += 1
+        if len(upstreams) > 1:
+            window.retried += 1
+        if upstreams:
+            window.upstreams[upstreams[-1]] += 1
+        if entry['request_time'] is not None:
+            window.latency.add(entry['request_time'])
+
+    def _close_windows(self, before=None):
+        while self.open_windows:
+            start, window = next(iter(self.open_windows.items()))
+            if before is not None and start > before:
+                break
+            del self.open_windows[start]
+            row = window.as_dict(self.window)
+            row['_start'] = start
+            self.closed_windows.append(row)
+
+    def report(self):
+        self._close_windows()
+        span = (self.last - self.first) if self.first is not None else 0.0
+        span = max(span, 1.0) if self.total.requests else 0.0
+        upstreams = {name: group.as_dict(span) for name, group in sorted(self.upstreams.items())}
+        counts = [row['requests'] for row in upstreams.values()]
+        balance = None
+        if counts:
+            mean = sum(counts) / len(counts)
+            stdev = (sum((c - mean) ** 2 for c in counts) / len(counts)) ** 0.5
+            balance = {
+                'upstreams': len(counts),
+                'max_over_mean': round(max(counts) / mean, 3) if mean else None,
+                'min_over_mean': round(min(counts) / mean, 3) if mean else None,
+                'coefficient_of_variation': round(stdev / mean, 4) if mean else None,
+            }
+        windows = [{k: v for k, v in row.items() if k != '_start'} for row in self.closed_windows]
+        return {
+            'lines': self.lines,
+            'unparsed': self.unparsed,
+            'first': datetime.datetime.fromtimestamp(self.first, datetime.timezone.utc).isoformat()
+            if self.first is not None else None,
+            'last': datetime.datetime.fromtimestamp(self.last, datetime.timezone.utc).isoformat()
+            if self.last is not None else None,
+            'span_s': span,
+            'total': self.total.as_dict(span),
+            'retried_requests': self.retried,
+            'no_upstream': self.no_upstream,
+            'balance': balance,
+            'upstreams': upstreams,
+            'routes': {name: self.routes[name].as_dict(span)
+                       for name in list(self.prefixes) + ['other'] if name in self.routes},
+            'windows': windows,
+            'late_lines': self.late,
+        }
+
+
+def analyze(paths, prefixes=ROUTE_PREFIXES, window=None):
+    analyzer = Analyzer(prefixes, window)
+    for path in paths:
+        with open_log(path) as fh:
+            for line in fh:
+                analyzer.feed_line(line)
+    return analyzer.report()
+
+
+def _latency_cells(latency):
+    if not latency:
+        return f"{'-':>9}{'-':>9}{'-':>9}"
+    return f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+
+
+def format_report(report):
+    lines = [f"{report['lines']} líneas ({report['unparsed']} sin formato) de {report['first']} a {report['last']}",
+             '']
+    header = f"{'upstream':<24}{'reqs':>9}{'rps':>9}{'cuota':>7}{'2xx':>8}{'4xx':>7}{'5xx':>7}{'failover':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    lines += [header, '-' * len(header)]
+    served = sum(row['requests'] for row in report['upstreams'].values()) or 1
+    for name, row in report['upstreams'].items():
+        classes = row['status_classes']
+        lines.append(
+            f"{name:<24}{row['requests']:>9}{row['rps']:>9.2f}{row['requests'] / served:>7.1%}"
+            f"{classes.get('2xx', 0):>8}{classes.get('4xx', 0):>7}{classes.get('5xx', 0):>7}"
+            f"{row['failed_over']:>9}{_latency_cells(row['latency_ms'])}")
+    balance = report['balance']
+    if balance:
+        lines.append(f"reparto: máx/media {balance['max_over_mean']}, mín/media {balance['min_over_mean']}, "
+                     f"CV {balance['coefficient_of_variation']}; reintentadas {report['retried_requests']}, "
+                     f"sin upstream {report['no_upstream']}")
+
+    header = f"\n{'ruta':<24}{'reqs':>9}{'rps':>9}{'2xx':>8}{'4xx':>7}{'5xx':>7}{'p50':>9}{'p95':>9}{'p99':>9}"
+    lines += [header, '-' * (len(header) - 1)]
+    for name, row in report['routes'].items():
+        classes = row['status_classes']
+        lines.append(f"{name:<24}{row['requests']:>9}{row['rps']:>9.2f}{classes.get('2xx', 0):>8}"
+                     f"{classes.get('4xx', 0):>7}{classes.get('5xx', 0):>7}{_latency_cells(row['latency_ms'])}")
+
+    if report['windows']:
+        lines += ['', f"{'ventana (UTC)':<27}{'reqs':>8}{'rps':>9}{'5xx':>6}{'retry':>6}{'p99':>9}  por upstream"]
+        for row in report['windows']:
+            p99 = f"{row['p99_ms']:>9.1f}" if row['p99_ms'] is not None else f"{'-':>9}"
+            spread = ' '.join(f"{k}={v}" for k, v in row['upstreams'].items())
+            lines.append(f"{row['start'][:25]:<27}{row['requests']:>8}{row['rps']:>9.2f}{row['5xx']:>6}"
+                         f"{row['retried']:>6}{p99}  {spread}")
+        if report['late_lines']:
+            lines.append(f"({report['late_lines']} líneas llegaron tarde a una ventana ya cerrada)")
+    lines.append('(latencias en ms; requieren rt=/urt= en log_format)')
+    return '\n'.join(lines)
+
+
+def add_arguments(parser):
+    parser.add_argument('paths', nargs='+', help='ficheros de log (.gz admitido) o - para stdin')
+    parser.add_argument('--rotated', action='store_true',
+                        help='incluir también PATH.1, PATH.2.gz, ... en orden cronológico')
+    parser.add_argument('--prefix', action='append', default=None, metavar='PREFIX',
+                        help='prefijo de ruta a agrupar (repetible; default: %s)' % ', '.join(ROUTE_PREFIXES))
+    parser.add_argument('--window', type=float, default=None, metavar='SECONDS',
+                        help='mostrar peticiones, 5xx y p99 por ventana de SECONDS')
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON con el informe completo')
+
+
+def run(args):
+    paths = []
+    for path in args.paths:
+        paths.extend(expand_rotated(path) if args.rotated and path != '-' else [path])
+    missing = [p for p in paths if p != '-' and not os.path.exists(p)]
+    if missing or not paths:
+        print(f"No existe: {', '.join(missing or args.paths)}", file=sys.stderr)
+        return 1
+    prefixes = tuple(sorted(args.prefix or ROUTE_PREFIXES, key=len, reverse=True))
+    report = analyze(paths, prefixes, args.window)
+    print(format_report(report))
+    if args.output:
+        write_json(args.output, report)
+        print(f"\nInforme guardado en {args.output}")
+    return 0
@@ -0,0 +1,188 @@
+"""Carga concurrente sobre el flujo login → validate → introspect → refresh → revoke
+
+Cada worker asyncio repite el flujo completo hasta agotar la duración o el
+número de peticiones. Se informa throughput y percentiles de latencia por
+endpoint, errores por código HTTP y, por separado, los rechazos del rate
+limiting del load balancer (`limit_req zone=api_limit` y `limit_conn`).
+Con --pace el cliente se ajusta a esos límites y se informa de la espera
+en cola en lugar de los 503.
+"""
+import asyncio
+import time
+
+from owlboard_bench import common, seed
+from owlboard_bench.stats import Report, write_json
+from owlboard_client import AsyncAuthClient, PacingTimeout
+
+FLOW = ('login', 'validate', 'introspect', 'refresh', 'revoke')
+
+
+def is_rate_limited(resp):
+    """¿Rechazo de limit_req/limit_conn y no un fallo del backend?
+
+    nginx responde 503 (o 429 si se configura `limit_req_status`) con su
+    propia página HTML; los errores de FastAPI llegan siempre como JSON.
+    """
+    if resp.status == 429:
+        return True
+    return resp.status == 503 and 'json' not in resp.headers.get('content-type', '')
+
+
+class Budget:
+    """Límite global de duración y/o número de peticiones"""
+
+    def __init__(self, duration=None, requests=None):
+        self.deadline = time.monotonic() + duration if duration else None
+        self.remaining = requests
+
+    def take(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return False
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+        return True
+
+
+class AuthFlow:
+    """Ejecuta el flujo de autenticación y registra cada paso en un Report"""
+
+    def __init__(self, client, report, budget):
+        self.client = client
+        self.report = report
+        self.budget = budget
+        self.completed = 0
+        self.stopped = False
+
+    async def step(self, name, path, payload):
+        if not self.budget.take():
+            self.stopped = True
+            return None
+        stats = self.report[name]
+        start = time.perf_counter()
+        try:
+            resp = await self.client.request('POST', path, payload)
+        except PacingTimeout:
+            stats.add_error('pacing')
+            return None
+        except asyncio.TimeoutError:
+            stats.add_error('timeout')
+            return None
+        except (OSError, asyncio.IncompleteReadError) as e:
+            stats.add_error(type(e).__name__)
+            return None
+        if resp.ok:
+            # La espera en el Pacer se informa aparte: no es latencia del servidor
+            stats.add(time.perf_counter() - start - resp.queued, resp.queued)
+            return resp.json()
+        stats.add_error(resp.status, is_rate_limited(resp))
+        return None
+
+    async def run_once(self, email, password):
+        tokens = await self.step('login', '/auth/login', {'email': email, 'password': password})
+        if not tokens:
+            return False
+        access, refresh = tokens['access_token'], tokens['refresh_token']
+        if not await self.step('validate', '/auth/token/validate', {'token': access}):
+            return False
+        if not await self.step('introspect', '/auth/token/introspect', {'token': access}):
+            return False
+        new_tokens = await self.step('refresh', '/auth/token/refresh', {'refresh_token': refresh})
+        if not new_tokens:
+            return False
+        payload = {'token': new_tokens['access_token'], 'token_type': 'access'}
+        if not await self.step('revoke', '/auth/token/revoke', payload):
+            return False
+        self.completed += 1
+        return True
+
+    async def worker(self, credentials, offset):
+        i = offset
+        while not self.stopped:
+            email, password = credentials[i % len(credentials)]
+            await self.run_once(email, password)
+            i += 1
+
+
+async def run_load(client, credentials, concurrency, duration=None, requests=None):
+    """Lanza `concurrency` workers y devuelve (report, flows completados, segundos)"""
+    report = Report()
+    for name in FLOW:
+        report[name]
+    flow = AuthFlow(client, report, Budget(duration, requests))
+    start = time.perf_counter()
+    await asyncio.gather(*(flow.worker(credentials, i) for i in range(concurrency)))
+    return report, flow.completed, time.perf_counter() - start
+
+
+def add_arguments(parser):
+    common.add_client_arguments(parser)
+    common.add_standin_arguments(parser)
+    common.add_pacing_arguments(parser)
+    parser.add_argument('-c', '--concurrency', type=int, default=10, help='workers concurrentes (default: %(default)s)')
+    parser.add_argument('-d', '--duration', type=float, default=None, help='duración en segundos (default: 10 si no se da -n)')
+    parser.add_argument('-n', '--requests', type=int, default=None, help='número total de peticiones')
+    parser.add_argument('--connections', type=int, default=None,
+                        help='máximo de conexiones abiertas (default: igual a --concurrency)')
+    parser.add_argument('--email', default='test@owlboard.com')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--credentials', metavar='CSV', default=None,
+                        help='CSV email,password generado por `owlboard_bench seed --credentials`')
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+
+def run(args):
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+    if args.credentials:
+        credentials = seed.read_credentials(args.credentials)
+    else:
+        credentials = [(args.email, args.password)]
+
+    async def main(client):
+        async with client:
+            return await run_load(client, credentials, args.concurrency, args.duration, args.requests)
+
+    with common.standin_from_args(args, [(email, password, '') for email, password in credentials]):
+        client = common.client_from_args(AsyncAuthClient, args, args.connections or args.concurrency)
+        report, completed, elapsed = asyncio.run(main(client))
+    endpoints = report.as_dict(elapsed)
+    total = sum(row['requests'] for row in endpoints.values())
+    ok = sum(row['ok'] for row in endpoints.values())
+    rate_limited = sum(row['rate_limited'] for row in endpoints.values())
+    result = {
+        'command': 'auth',
+        'target': client.base_url,
+        'concurrency': args.concurrency,
+        'connections': client.pool_size,
+        'elapsed_s': round(elapsed, 3),
+        'flows_completed': completed,
+        'flows_per_s': round(completed / elapsed, 2),
+        'requests': total,
+        'ok': ok,
+        'rate_limited': rate_limited,
+        'failed': total - ok - rate_limited,
+        'throughput_rps': round(ok / elapsed, 2),
+        'client': client.stats.as_dict(),
+        'endpoints': endpoints,
+    }
+    if client.pacer is not None:
+        result['pacing'] = dict(client.pacer.stats.as_dict(), rate=client.pacer.rate, burst=client.pacer.burst,
+                                connections=client.pacer.connections)
+
+    print(f"Objetivo: {client.base_url}  concurrencia={args.concurrency}  duración={elapsed:.1f}s")
+    print(report.format_table(elapsed))
+    print(f"\nFlujos completos: {completed} ({result['flows_per_s']}/s)  "
+          f"peticiones OK: {ok} ({result['throughput_rps']}/s)")
+    print(f"Rate limited (capacidad): {rate_limited}   fallos reales: {result['failed']}")
+    if client.pacer is not None:
+        pace = result['pacing']
+        print(f"Cola del cliente ({pace['rate']:g} r/s, burst {pace['burst']}, {pace['connections']} en curso): "
+              f"{pace['delayed']}/{pace['requests']} esperaron, p50 {pace['wait_p50_ms']} ms, "
+              f"p99 {pace['wait_p99_ms']} ms, máx {pace['wait_max_ms']} ms, {pace['rejected']} superaron "
+              f"--pace-max-wait")
+    output = args.output or common.default_output('auth')
+    write_json(output, result)
+    print(f"Resultados: {output}")
+    return 1 if result['failed'] else 0
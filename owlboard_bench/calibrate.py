@@ -0,0 +1,182 @@
+"""Calibración del coste bcrypt y modelo de capacidad de login
+
+Mide en este host el tiempo de hash y de verify de passlib bcrypt para
+cada coste, con 1..N procesos en paralelo. Con esos datos estima los
+logins/s sostenibles por núcleo y la latencia p99 de login esperable a
+una carga objetivo, modelando auth_service como una cola M/M/c con un
+servidor por núcleo (aproximación conservadora: bcrypt tarda casi lo
+mismo en cada llamada).
+"""
+import concurrent.futures
+import math
+import os
+import time
+
+from owlboard_bench import common
+from owlboard_bench.stats import percentile, write_json
+
+PASSWORD = 'calibration-password-123'
+
+
+def _measure(rounds, operation, count):
+    """Se ejecuta en un proceso del pool: `count` operaciones cronometradas"""
+    from passlib.hash import bcrypt
+
+    hasher = bcrypt.using(rounds=rounds)
+    hashed = hasher.hash(PASSWORD)
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        if operation == 'verify':
+            hasher.verify(PASSWORD, hashed)
+        else:
+            hasher.hash(PASSWORD)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _noop():
+    return None
+
+
+def run_parallel(pool, workers, rounds, operation, count):
+    """Lanza `workers` trabajos simultáneos; devuelve (muestras, ops/s agregadas)"""
+    start = time.perf_counter()
+    futures = [pool.submit(_measure, rounds, operation, count) for _ in range(workers)]
+    samples = [s for f in futures for s in f.result()]
+    return samples, len(samples) / (time.perf_counter() - start)
+
+
+def erlang_c(servers, offered_load):
+    """Probabilidad de esperar en cola en M/M/c (fórmula de Erlang C)"""
+    if offered_load >= servers:
+        return 1.0
+    term = 1.0
+    total = 1.0
+    for k in range(1, servers):
+        term *= offered_load / k
+        total += term
+    term *= offered_load / servers
+    tail = term * servers / (servers - offered_load)
+    return tail / (total + tail)
+
+
+def predicted_p99(rate, servers, service_time, service_p99=None):
+    """Latencia p99 de login (s) a `rate` logins/s con `servers` núcleos; inf si se satura"""
+    mu = 1.0 / service_time
+    if rate >= servers * mu:
+        return math.inf
+    waiting = erlang_c(servers, rate / mu)
+    wait_p99 = math.log(waiting / 0.01) / (servers * mu - rate) if waiting > 0.01 else 0.0
+    return (service_p99 or service_time) + wait_p99
+
+
+def cores_needed(rate, service_time, max_utilization):
+    return max(1, math.ceil(rate * service_time / max_utilization))
+
+
+def calibrate(costs, max_workers, seconds, operations=('hash', 'verify')):
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as pool:
+        # Arranca los procesos antes de medir
+        for future in [pool.submit(_noop) for _ in range(max_workers)]:
+            future.result()
+        for rounds in costs:
+            probe = _measure(rounds, 'verify', 1)[0]
+            count = max(3, int(seconds / probe))
+            row = {'rounds': rounds}
+            for operation in operations:
+                scaling = []
+                for workers in range(1, max_workers + 1):
+                    samples, throughput = run_parallel(pool, workers, rounds, operation, count)
+                    samples.sort()
+                    scaling.append({
+                        'workers': workers,
+                        'ops_per_s': round(throughput, 2),
+                        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+                        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+                    })
+                row[operation] = scaling
+            results.append(row)
+    return results
+
+
+def capacity(row, overhead, target_rps, cores, max_utilization):
+    """Modelo de capacidad de login para una fila de calibración"""
+    single = row['verify'][0]
+    service = single['p50_ms'] / 1000.0 + overhead
+    service_p99 = single['p99_ms'] / 1000.0 + overhead
+    best = max(row['verify'], key=lambda s: s['ops_per_s'])
+    model = {
+        'rounds': row['rounds'],
+        'service_ms': round(service * 1000, 3),
+        'logins_per_s_per_core': round(1.0 / service, 2),
+        'measured_max_logins_per_s': best['ops_per_s'],
+        'measured_at_workers': best['workers'],
+        'scaling_efficiency': round(best['ops_per_s'] / (best['workers'] * single['ops_per_s']), 3),
+    }
+    if target_rps:
+        p99 = predicted_p99(target_rps, cores, service, service_p99)
+        model.update({
+            'target_rps': target_rps,
+            'cores': cores,
+            'utilization': round(target_rps * service / cores, 3),
+            'predicted_p99_ms': round(p99 * 1000, 1) if math.isfinite(p99) else None,
+            'cores_needed': cores_needed(target_rps, service, max_utilization),
+        })
+    return model
+
+
+def parse_costs(value):
+    if '-' in value:
+        low, high = value.split('-', 1)
+        return list(range(int(low), int(high) + 1))
+    return [int(v) for v in value.split(',')]
+
+
+def add_arguments(parser):
+    parser.add_argument('--costs', type=parse_costs, default=parse_costs('10-13'),
+                        help='costes bcrypt a medir: "10-13" o "10,12" (default: 10-13)')
+    parser.add_argument('-j', '--max-workers', type=int, default=os.cpu_count() or 1,
+                        help='medir con 1..N procesos (default: núcleos del host)')
+    parser.add_argument('--seconds', type=float, default=1.0, help='duración aproximada de cada medida')
+    parser.add_argument('--target-rps', type=float, default=None, help='carga objetivo de logins/s')
+    parser.add_argument('--cores', type=int, default=os.cpu_count() or 1,
+                        help='núcleos de auth_service para el modelo (default: los de este host)')
+    parser.add_argument('--overhead-ms', type=float, default=2.0,
+                        help='coste del login aparte de bcrypt: MySQL, JWT, Redis (default: %(default)s)')
+    parser.add_argument('--max-utilization', type=float, default=0.7,
+                        help='utilización máxima para dimensionar núcleos (default: %(default)s)')
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+
+def run(args):
+    print(f"Calibrando bcrypt costes={args.costs} con 1..{args.max_workers} procesos...")
+    calibration = calibrate(args.costs, args.max_workers, args.seconds)
+    models = [capacity(row, args.overhead_ms / 1000.0, args.target_rps, args.cores, args.max_utilization)
+              for row in calibration]
+
+    print(f"\n{'coste':>5}{'hash p50':>10}{'verify p50':>12}{'verify p99':>12}  logins/s con 1..N procesos")
+    for row in calibration:
+        hash_ms = row['hash'][0]['p50_ms']
+        verify = row['verify'][0]
+        scaling = ' '.join(f"{s['ops_per_s']:.1f}" for s in row['verify'])
+        print(f"{row['rounds']:>5}{hash_ms:>10.1f}{verify['p50_ms']:>12.1f}{verify['p99_ms']:>12.1f}  {scaling}")
+
+    print(f"\nModelo de capacidad (overhead {args.overhead_ms} ms por login)")
+    for model in models:
+        line = (f"  coste {model['rounds']:>2}: {model['logins_per_s_per_core']:>8.1f} logins/s por núcleo, "
+                f"máx. medido {model['measured_max_logins_per_s']:.1f}/s con {model['measured_at_workers']} procesos "
+                f"(eficiencia {model['scaling_efficiency']:.0%})")
+        if args.target_rps:
+            p99 = f"{model['predicted_p99_ms']:.0f} ms" if model['predicted_p99_ms'] is not None else 'saturado'
+            line += (f"\n            a {args.target_rps:g}/s con {args.cores} núcleos: utilización "
+                     f"{model['utilization']:.0%}, p99 ≈ {p99}; núcleos para ≤{args.max_utilization:.0%}: "
+                     f"{model['cores_needed']}")
+        print(line)
+
+    output = args.output or common.default_output('calibrate')
+    write_json(output, {'command': 'bcrypt', 'host_cpus': os.cpu_count(), 'overhead_ms': args.overhead_ms,
+                        'calibration': calibration, 'capacity': models})
+    print(f"\nResultados: {output}")
+    return 0
@@ -0,0 +1,403 @@
+"""Fan-out del chat por websocket: miles de conexiones, salas y latencia de entrega
+
+Obtiene tokens con /auth/login, abre N websockets autenticados repartidos
+en R salas por la ruta de desktop_proxy (proxy → load_balancer → gateway
+→ chat_service) y publica mensajes a un ritmo fijo en bucle abierto. Cada
+mensaje lleva un marcador `owlbench:<id>:<ns>` con el instante de envío,
+así que cualquier conexión de la sala que lo reciba mide la latencia de
+extremo a extremo sin depender del formato exacto de chat_service.
+
+Informa del ritmo y la latencia del establecimiento de conexiones (y de
+los rechazos por código, p. ej. 503 de `limit_conn`), percentiles de
+latencia de entrega, entregas por segundo, la fracción de entregas
+esperadas que llegaron y la memoria por conexión del cliente y, con
+--server-pid o --server-container, del servidor. Con --standin todo corre
+en local: auth_service en un hilo y chat_service en otro proceso.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from owlboard_bench import common, seed
+from owlboard_bench.stats import StreamingHistogram, write_json
+from owlboard_client import AsyncAuthClient, AuthServiceError
+from owlboard_standin.chat import parse_socketio, socketio_event
+
+MARKER = re.compile(r'owlbench:(\d+):(\d+)')
+
+
+class ServerMemory:
+    def __init__(self, pid=None, container=None):
+        self.pid = pid
+        self.container = container
+
+    @property
+    def source(self):
+        if self.pid:
+            return f"pid {self.pid}"
+        return f"contenedor {self.container}" if self.container else None
+
+    def read(self):
+        if self.pid:
+            return common.rss_kb(self.pid)
+        if self.container:
+            return common.container_memory_kb(self.container)
+        return None
+
+
+class Member:
+    __slots__ = ('index', 'room', 'ws')
+
+    def __init__(self, index, room, ws):
+        self.index = index
+        self.room = room
+        self.ws = ws
+
+
+class FanoutBench:
+    def __init__(self, args, tokens):
+        self.args = args
+        self.tokens = tokens
+        self.rooms = {}
+        self.members = []
+        self.setup = StreamingHistogram()
+        self.setup_failures = {}
+        self.delivery = StreamingHistogram()
+        self.lag = StreamingHistogram()
+        self.published = 0
+        self.expected = 0
+        self.delivered = 0
+        self.readers = []
+        self.random = random.Random(args.seed)
+
+    def _url(self, room, token):
+        base = self.args.ws_url.rstrip('/')
+        if self.args.protocol == 'socketio':
+            return f"{base}/socket.io/?EIO=4&transport=websocket"
+        url = base + self.args.path.format(room=room)
+        if self.args.token_in == 'query':
+            url += ('&' if '?' in url else '?') + f"token={token}"
+        return url
+
+    async def _open(self, index, room, token):
+        from websockets.asyncio.client import connect
+
+        kwargs = {}
+        if self.args.bind:
+            kwargs['local_addr'] = (self.args.bind[index % len(self.args.bind)], 0)
+        if self.args.ws_url.startswith('wss'):
+            kwargs['ssl'] = common.ssl_context_from_args(self.args)
+        headers = {'Authorization': f"Bearer {token}"} if self.args.token_in == 'header' else None
+        ws = await connect(self._url(room, token), additional_headers=headers, proxy=None,
+                           compression='deflate' if self.args.compression else None, max_queue=None,
+                           open_timeout=self.args.timeout, ping_interval=None, **kwargs)
+        if self.args.protocol == 'socketio':
+            try:
+                await asyncio.wait_for(self._socketio_join(ws, room, token), self.args.timeout)
+            except BaseException:
+                await ws.close()
+                raise
+        return ws
+
+    async def _socketio_join(self, ws, room, token):
+        kind, _ = parse_socketio(await ws.recv())
+        if kind != 'open':
+            raise ConnectionError('Engine.IO: se esperaba el paquete open')
+        await ws.send('40' + json.dumps({'token': token}))
+        while True:
+            kind, data = parse_socketio(await ws.recv())
+            if kind == 'connect':
+                break
+            if kind == 'error':
+                raise ConnectionError(f"Socket.IO rechazó la conexión: {data}")
+            if kind == 'ping':
+                await ws.send('3')
+        await ws.send(socketio_event('join', {'room': room}))
+
+    async def connect_all(self):
+        """Abre las conexiones con --connect-concurrency en vuelo y, si se pide, a --connect-rate por segundo"""
+        args = self.args
+        slots = asyncio.Semaphore(args.connect_concurrency)
+        start = time.perf_counter()
+
+        async def one(index):
+            room = f"{args.room_prefix}{index % args.rooms}"
+            if args.connect_rate:
+                await asyncio.sleep(max(0.0, start + index / args.connect_rate - time.perf_counter()))
+            async with slots:
+                began = time.perf_counter()
+                try:
+                    ws = await self._open(index, room, self.tokens[index % len(self.tokens)])
+                except Exception as e:  # noqa: BLE001 - se cuentan por motivo
+                    reason = _failure_reason(e)
+                    self.setup_failures[reason] = self.setup_failures.get(reason, 0) + 1
+                    return
+                self.setup.add(time.perf_counter() - began)
+            member = Member(index, room, ws)
+            self.members.append(member)
+            self.rooms.setdefault(room, []).append(member)
+            self.readers.append(asyncio.ensure_future(self.read(member)))
+
+        await asyncio.gather(*(one(i) for i in range(args.connections)))
+        return time.perf_counter() - start
+
+    async def read(self, member):
+        from websockets.exceptions import ConnectionClosed
+
+        ws = member.ws
+        try:
+            async for frame in ws:
+                if isinstance(frame, bytes):
+                    frame = frame.decode('utf-8', 'replace')
+                if self.args.protocol == 'socketio' and frame == '2':
+                    await ws.send('3')
+                    continue
+                match = MARKER.search(frame)
+                if match:
+                    self.delivered += 1
+                    self.delivery.add(max(0, time.perf_counter_ns() - int(match.group(2))) / 1e9)
+        except ConnectionClosed:
+            pass
+
+    def _message(self, room, msg_id):
+        marker = f"owlbench:{msg_id}:{time.perf_counter_ns()}"
+        content = marker + ' ' + 'x' * max(0, self.args.size - len(marker) - 1)
+        if self.args.protocol == 'socketio':
+            return socketio_event('message', {'room': room, 'content': content})
+        return json.dumps({'type': 'message', 'room': room, 'content': content}, separators=(',', ':'))
+
+    async def publish(self, duration):
+        """Publica a --rate mensajes/s repartidos por sala; el plan no espera a las entregas"""
+        rooms = [room for room, members in sorted(self.rooms.items()) if members]
+        if not rooms:
+            return 0.0
+        interval = 1.0 / self.args.rate
+        start = time.perf_counter()
+        i = 0
+        while True:
+            due = start + i * interval
+            if due - start >= duration:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.lag.add(max(0.0, time.perf_counter() - due))
+            room = rooms[i % len(rooms)]
+            members = self.rooms[room]
+            sender = self.random.choice(members)
+            try:
+                await sender.ws.send(self._message(room, i))
+            except Exception:  # noqa: BLE001 - conexión caída: no cuenta como publicado
+                i += 1
+                continue
+            self.published += 1
+            self.expected += len(members) - (0 if self.args.echo else 1)
+            i += 1
+        return time.perf_counter() - start
+
+    async def close(self):
+        slots = asyncio.Semaphore(self.args.connect_concurrency)
+
+        async def one(member):
+            async with slots:
+                try:
+                    await asyncio.wait_for(member.ws.close(), 5)
+                except Exception:  # noqa: BLE001 - al cerrar da igual cómo acabe
+                    pass
+
+        await asyncio.gather(*(one(m) for m in self.members))
+        for task in self.readers:
+            task.cancel()
+        await asyncio.gather(*self.readers, return_exceptions=True)
+
+
+def _failure_reason(error):
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None):
+        return f"HTTP {response.status_code}"
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return 'timeout'
+    return type(error).__name__
+
+
+async def login_tokens(client, credentials, concurrency):
+    """Un access token por credencial; los logins van en paralelo de `concurrency` en `concurrency`"""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(email, password):
+        async with slots:
+            return (await client.login(email, password))['access_token']
+
+    return await asyncio.gather(*(one(e, p) for e, p in credentials))
+
+
+async def run_bench(args, credentials, server_memory):
+    async with common.client_from_args(AsyncAuthClient, args, args.login_concurrency) as client:
+        tokens = await login_tokens(client, credentials, args.login_concurrency)
+    bench = FanoutBench(args, tokens)
+    client_before, server_before = common.rss_kb(), server_memory.read()
+    connect_s = await bench.connect_all()
+    opened = len(bench.members)
+    client_after, server_after = common.rss_kb(), server_memory.read()
+    print(f"{opened}/{args.connections} conexiones en {connect_s:.2f} s "
+          f"({opened / connect_s if connect_s else 0:.0f}/s) en {len(bench.rooms)} salas", flush=True)
+    # Socket.IO no confirma el join: sin una pausa los primeros mensajes llegan a salas a medio llenar
+    await asyncio.sleep(args.settle)
+    publish_s = await bench.publish(args.duration)
+    await asyncio.sleep(args.drain)
+    await bench.close()
+
+    def per_connection(before, after):
+        if before is None or after is None or not opened:
+            return None
+        return round((after - before) / opened, 2)
+
+    delivery_s = publish_s + args.drain
+    return {
+        'connections': {
+            'attempted': args.connections,
+            'open': opened,
+            'failed': bench.setup_failures,
+            'elapsed_s': round(connect_s, 3),
+            'setup_rate_per_s': round(opened / connect_s, 1) if connect_s else None,
+            'setup_ms': bench.setup.summary_ms(),
+            'rooms': len(bench.rooms),
+        },
+        'messages': {
+            'published': bench.published,
+            'rate_target': args.rate,
+            'rate_achieved': round(bench.published / publish_s, 1) if publish_s else 0.0,
+            'size_bytes': args.size,
+            'publish_lag_ms': bench.lag.summary_ms(),
+        },
+        'delivery': {
+            'expected': bench.expected,
+            'delivered': bench.delivered,
+            'ratio': round(bench.delivered / bench.expected, 4) if bench.expected else None,
+            'throughput_per_s': round(bench.delivered / delivery_s, 1) if delivery_s else 0.0,
+            'latency_ms': bench.delivery.summary_ms(),
+        },
+        'memory': {
+            'client_kb_per_connection': per_connection(client_before, client_after),
+            'server_kb_per_connection': per_connection(server_before, server_after),
+            'server': server_memory.source,
+        },
+    }
+
+
+def format_report(result):
+    conn, msgs, dlv, mem = result['connections'], result['messages'], result['delivery'], result['memory']
+    setup = conn['setup_ms']
+    lines = [
+        f"Conexiones: {conn['open']}/{conn['attempted']} abiertas a {conn['setup_rate_per_s']}/s; "
+        f"handshake p50 {setup['p50']} ms, p99 {setup['p99']} ms",
+    ]
+    if conn['failed']:
+        failed = ', '.join(f"{reason}: {n}" for reason, n in sorted(conn['failed'].items()))
+        lines.append(f"  fallidas: {failed}")
+        if any(reason == 'HTTP 503' for reason in conn['failed']):
+            lines.append('  (503 en el handshake: probablemente limit_conn por IP del proxy; reparte con --bind)')
+    lat = dlv['latency_ms']
+    ratio = f"{dlv['ratio']:.2%}" if dlv['ratio'] is not None else '-'
+    lines += [
+        f"Publicados: {msgs['published']} a {msgs['rate_achieved']}/s (objetivo {msgs['rate_target']:g}/s, "
+        f"retraso del plan p99 {msgs['publish_lag_ms']['p99']} ms)",
+        f"Entregas: {dlv['delivered']}/{dlv['expected']} ({ratio}), {dlv['throughput_per_s']}/s",
+        f"Latencia de entrega (ms): p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  máx {lat['max']}",
+    ]
+    memory = [f"cliente {mem['client_kb_per_connection']} KiB"] if mem['client_kb_per_connection'] is not None else []
+    if mem['server_kb_per_connection'] is not None:
+        memory.append(f"servidor {mem['server_kb_per_connection']} KiB ({mem['server']})")
+    if memory:
+        lines.append('Memoria por conexión: ' + ', '.join(memory))
+    return '\n'.join(lines)
+
+
+async def _start_chat_standin():
+    proc = await asyncio.create_subprocess_exec(sys.executable, '-m', 'owlboard_standin', 'chat', '--port', '0',
+                                                stdout=asyncio.subprocess.PIPE, cwd=os.getcwd())
+    line = (await asyncio.wait_for(proc.stdout.readline(), 15)).decode()
+    match = re.search(r'(wss?://\S+)', line)
+    if not match:
+        proc.kill()
+        raise RuntimeError(f"el stand-in de chat no arrancó: {line!r}")
+    return proc, match.group(1)
+
+
+def add_arguments(parser):
+    common.add_client_arguments(parser)
+    common.add_standin_arguments(parser)
+    ws = parser.add_argument_group('websocket')
+    ws.add_argument('--ws-url', default='ws://localhost:8000',
+                    help='base websocket: desktop_proxy (default: %(default)s) o wss://localhost:9000')
+    ws.add_argument('--protocol', choices=('raw', 'socketio'), default='raw',
+                    help='raw: ruta --path; socketio: /socket.io/ con Engine.IO 4 (default: %(default)s)')
+    ws.add_argument('--path', default='/api/chat/ws/{room}', help='ruta raw con {room} (default: %(default)s)')
+    ws.add_argument('--token-in', choices=('query', 'header'), default='query',
+                    help='token en ?token= o en Authorization (default: %(default)s)')
+    ws.add_argument('--compression', action='store_true', help='permessage-deflate como los navegadores')
+    ws.add_argument('--bind', action='append', default=[], metavar='IP',
+                    help='IP de origen (repetible) para repartir limit_conn por IP')
+    load = parser.add_argument_group('carga')
+    load.add_argument('-c', '--connections', type=int, default=1000, help='websockets (default: %(default)s)')
+    load.add_argument('--rooms', type=int, default=50, help='salas (default: %(default)s)')
+    load.add_argument('--room-prefix', default='bench-', help='prefijo del nombre de sala')
+    load.add_argument('--rate', type=float, default=100.0, help='mensajes publicados por segundo en total')
+    load.add_argument('--size', type=int, default=128, help='bytes de contenido por mensaje')
+    load.add_argument('-d', '--duration', type=float, default=10.0, help='segundos publicando')
+    load.add_argument('--drain', type=float, default=2.0, help='segundos de espera a las últimas entregas')
+    load.add_argument('--settle', type=float, default=0.5, help='segundos entre conectar y publicar')
+    load.add_argument('--no-echo', dest='echo', action='store_false',
+                      help='el servidor no reenvía el mensaje a quien lo envió')
+    load.add_argument('--connect-concurrency', type=int, default=200, help='handshakes en vuelo')
+    load.add_argument('--connect-rate', type=float, default=None, help='conexiones nuevas por segundo')
+    load.add_argument('--seed', type=int, default=0)
+    auth = parser.add_argument_group('tokens')
+    auth.add_argument('--credentials', default=None, help='CSV de `seed`; un login por usuario (hasta -c)')
+    auth.add_argument('--email', default='test@owlboard.com')
+    auth.add_argument('--password', default='password123')
+    auth.add_argument('--login-concurrency', type=int, default=8)
+    memory = parser.add_argument_group('memoria del servidor')
+    memory.add_argument('--server-pid', type=int, default=None, help='PID de chat_service (lee /proc)')
+    memory.add_argument('--server-container', default=None, help='contenedor (docker stats), p. ej. chat_service')
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+
+def run(args):
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print('Hace falta el paquete websockets (pip install -r requirements-dev.txt)', file=sys.stderr)
+        return 2
+    credentials = seed.read_credentials(args.credentials)[:args.connections] if args.credentials else \
+        [(args.email, args.password)]
+
+    async def main():
+        proc = None
+        server_memory = ServerMemory(args.server_pid, args.server_container)
+        if args.standin:
+            proc, args.ws_url = await _start_chat_standin()
+            server_memory = ServerMemory(pid=proc.pid)
+        try:
+            return await run_bench(args, credentials, server_memory)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                await proc.wait()
+
+    with common.standin_from_args(args, [(email, password, '') for email, password in credentials]):
+        try:
+            result = asyncio.run(main())
+        except AuthServiceError as e:
+            print(f"Login fallido: {e}", file=sys.stderr)
+            return 2
+    result = {'command': 'chat', 'target': args.ws_url, 'protocol': args.protocol, **result}
+    print(format_report(result))
+    output = args.output or common.default_output('chat')
+    write_json(output, result)
+    print(f"Resultados: {output}")
+    return 0 if result['delivery']['ratio'] in (None, 1.0) and not result['connections']['failed'] else 1
@@ -0,0 +1,355 @@
+"""Camino crítico del arranque en frío del stack de docker-compose
+
+Construye el grafo de dependencias a partir de `depends_on` y, mientras
+se ejecuta `make start` (o --command), escucha `docker events` para
+anotar cuándo arranca cada contenedor y cuándo pasa a healthy. Con esas
+marcas calcula, como en un diagrama PERT, qué cadena de aristas fija el
+tiempo hasta que todo está listo y cuánta holgura tiene cada una de las
+demás: la libre (cuánto antes de hacer falta quedó lista la dependencia)
+y la total (cuánto podría retrasarse sin retrasar el final). Las marcas
+se pueden guardar con --save y analizar más tarde con --events.
+
+Docker lanza el primer healthcheck `interval` segundos después del
+arranque; `start_period` solo hace que los fallos no cuenten. Un
+servicio con interval de 30 s tarda por tanto al menos 30 s en estar
+healthy aunque arranque en 2, y el informe lo señala en el camino crítico.
+"""
+import asyncio
+import json
+import shlex
+import subprocess
+import sys
+import time
+
+from owlboard_bench import compose
+from owlboard_bench.stats import write_json
+
+# Condición de depends_on -> evento de la dependencia que libera al servicio
+CONDITION_EVENTS = {
+    'service_started': 'started',
+    'service_healthy': 'ready',
+    'service_completed_successfully': 'exited',
+}
+SERVICE_LABEL = 'com.docker.compose.service'
+PROJECT_LABEL = 'com.docker.compose.project'
+
+
+class Timeline:
+    """Marcas de tiempo (epoch, de docker events) de un servicio"""
+
+    __slots__ = ('created', 'started', 'healthy', 'exited', 'exit_code', 'unhealthy')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, None)
+        self.unhealthy = 0
+
+    def event(self, kind, has_healthcheck):
+        if kind == 'ready':
+            return self.healthy if has_healthcheck else self.started
+        return getattr(self, kind)
+
+
+def build_graph(data):
+    """{servicio: {'deps': {dep: condición}, 'healthcheck': dict o None}} sin los servicios con perfil"""
+    services = data['services']
+    graph = {}
+    for name, service in services.items():
+        if service.get('profiles'):
+            continue
+        graph[name] = {'deps': compose.depends_on(service), 'healthcheck': compose.healthcheck(service)}
+    return graph
+
+
+def parse_events(lines, graph, project=None):
+    """(t0, {servicio: Timeline}) a partir de líneas JSON de `docker events`"""
+    timelines = {name: Timeline() for name in graph}
+    t0 = None
+    for line in lines:
+        if not line.strip():
+            continue
+        event = json.loads(line)
+        attrs = event.get('Actor', {}).get('Attributes', {})
+        if project and attrs.get(PROJECT_LABEL) != project:
+            continue
+        name = attrs.get(SERVICE_LABEL) or attrs.get('name')
+        if name not in timelines:
+            continue
+        when = event['timeNano'] / 1e9 if 'timeNano' in event else float(event['time'])
+        t0 = when if t0 is None else min(t0, when)
+        action = event.get('Action') or event.get('status', '')
+        tl = timelines[name]
+        if action == 'create' and tl.created is None:
+            tl.created = when
+        elif action == 'start' and tl.started is None:
+            tl.started = when
+        elif action.startswith('health_status') and action.endswith(': healthy') and tl.healthy is None:
+            tl.healthy = when
+        elif action.startswith('health_status') and action.endswith(': unhealthy'):
+            tl.unhealthy += 1
+        elif action == 'die' and tl.exited is None and tl.started is not None:
+            tl.exited = when
+            tl.exit_code = int(attrs.get('exitCode', 0))
+    return t0, timelines
+
+
+def _topological(graph):
+    order, seen = [], set()
+
+    def visit(name, stack=()):
+        if name in seen:
+            return
+        if name in stack:
+            raise ValueError(f"ciclo en depends_on: {' -> '.join(stack + (name,))}")
+        for dep in graph[name]['deps']:
+            if dep in graph:
+                visit(dep, stack + (name,))
+        seen.add(name)
+        order.append(name)
+
+    for name in graph:
+        visit(name)
+    return order
+
+
+def analyze(graph, timelines, t0):
+    """Tiempos por servicio, holgura por arista y camino crítico"""
+
+    def rel(value):
+        return None if value is None else round(value - t0, 3)
+
+    def edge_time(dep, condition):
+        kind = CONDITION_EVENTS.get(condition, 'started')
+        return timelines[dep].event(kind, graph[dep]['healthcheck'] is not None)
+
+    order = _topological(graph)
+    services, edges, missing = {}, [], []
+    for name in order:
+        tl = timelines[name]
+        ready = tl.event('ready', graph[name]['healthcheck'] is not None)
+        if tl.started is None or ready is None:
+            missing.append(name)
+        deps = {dep: edge_time(dep, cond) for dep, cond in graph[name]['deps'].items() if dep in graph}
+        known = [t for t in deps.values() if t is not None]
+        released = max(known) if known else t0
+        services[name] = {
+            'released': released,
+            'started': tl.started,
+            'ready': ready,
+            'binding': max((d for d in deps if deps[d] is not None), key=deps.get, default=None),
+            'unhealthy_checks': tl.unhealthy,
+        }
+        for dep, cond in graph[name]['deps'].items():
+            if dep in graph:
+                edges.append({'from': dep, 'to': name, 'condition': cond, 'at': deps[dep]})
+
+    complete = [n for n in order if services[n]['ready'] is not None]
+    if not complete:
+        raise ValueError('no hay eventos de arranque de ningún servicio del grafo')
+    end = max(services[n]['ready'] for n in complete)
+
+    # Pasada hacia atrás: lo más tarde que podría liberarse cada servicio sin retrasar el final
+    children = {}
+    for edge in edges:
+        children.setdefault(edge['from'], []).append(edge)
+    latest_released = {}
+    for name in reversed(order):
+        svc = services[name]
+        if svc['ready'] is None:
+            continue
+        bounds = [end - (svc['ready'] - svc['released'])]
+        for edge in children.get(name, ()):
+            if edge['to'] in latest_released and edge['at'] is not None:
+                # El evento que libera al hijo ocurre `at - released` después de liberar a este
+                bounds.append(latest_released[edge['to']] - (edge['at'] - svc['released']))
+        latest_released[name] = min(bounds)
+
+    for edge in edges:
+        released = services[edge['to']]['released']
+        if edge['at'] is None or edge['to'] not in latest_released:
+            edge['free_slack'] = edge['total_slack'] = None
+        else:
+            edge['free_slack'] = round(released - edge['at'], 3)
+            edge['total_slack'] = round(latest_released[edge['to']] - edge['at'], 3)
+        edge['at'] = rel(edge['at'])
+
+    # Camino crítico: desde el último en estar listo, seguir la dependencia que lo liberó
+    path = []
+    name = max(complete, key=lambda n: services[n]['ready'])
+    while name is not None:
+        path.append(name)
+        name = services[name]['binding']
+    path.reverse()
+
+    report = {}
+    for name in order:
+        svc = services[name]
+        check = graph[name]['healthcheck']
+        report[name] = {
+            'released': rel(svc['released']),
+            'started': rel(svc['started']),
+            'ready': rel(svc['ready']),
+            'wait': round(svc['started'] - svc['released'], 3) if svc['started'] is not None else None,
+            'boot': round(svc['ready'] - svc['started'], 3) if svc['ready'] is not None and svc['started'] else None,
+            'binding': svc['binding'],
+            'healthcheck': {k: check[k] for k in ('interval', 'start_period', 'retries')} if check else None,
+            'unhealthy_checks': svc['unhealthy_checks'],
+        }
+    return {
+        'time_to_ready': rel(end),
+        'critical_path': path,
+        'services': report,
+        'edges': edges,
+        'missing': missing,
+        'advice': advise(path, report),
+    }
+
+
+def advise(path, services):
+    advice = []
+    for name in path:
+        svc = services[name]
+        check = svc['healthcheck']
+        if not check or svc['boot'] is None:
+            continue
+        interval = check['interval']
+        if svc['boot'] >= 0.9 * interval:
+            advice.append(
+                f"{name}: healthy {svc['boot']:.1f} s después de arrancar con interval {interval:g}s; el primer "
+                f"healthcheck no corre hasta pasado `interval`. Añade `start_interval: 1s` (Docker Engine >= 25) "
+                f"o baja `interval` para detectarlo antes.")
+        if svc['unhealthy_checks']:
+            advice.append(f"{name}: {svc['unhealthy_checks']} healthchecks fallidos antes de estar healthy.")
+    slow_waits = [n for n in path if (services[n]['wait'] or 0) > 2.0]
+    for name in slow_waits:
+        advice.append(f"{name}: {services[name]['wait']:.1f} s entre quedar liberado y arrancar "
+                      f"(creación del contenedor, pull o build).")
+    return advice
+
+
+def _fmt(value):
+    return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+
+def format_report(result):
+    lines = [f"Listo en {result['time_to_ready']:.1f} s", '',
+             'Camino crítico: ' + ' -> '.join(result['critical_path']), '']
+    header = f"{'servicio':<18}{'liberado':>9}{'arranca':>9}{'listo':>9}{'espera':>9}{'arranque':>9}  interval"
+    lines += [header, '-' * len(header)]
+    on_path = set(result['critical_path'])
+    services = result['services']
+    for name, svc in sorted(services.items(), key=lambda item: (item[1]['ready'] is None, item[1]['ready'] or 0)):
+        check = svc['healthcheck']
+        interval = f"{check['interval']:g}s" if check else '-'
+        marker = '*' if name in on_path else ' '
+        lines.append(f"{marker}{name:<17} {_fmt(svc['released'])}{_fmt(svc['started'])}{_fmt(svc['ready'])}"
+                     f"{_fmt(svc['wait'])}{_fmt(svc['boot'])}  {interval}")
+    lines.append('(s desde el primer evento; * = camino crítico; espera = liberado -> arranca; '
+                 'arranque = arranca -> listo)')
+
+    lines += ['', f"{'arista':<36}{'condición':<32}{'lista':>8}{'libre':>8}{'total':>8}"]
+    critical_edges = set(zip(result['critical_path'], result['critical_path'][1:]))
+    for edge in sorted(result['edges'], key=lambda e: (e['total_slack'] is None, e['total_slack'] or 0)):
+        marker = '*' if (edge['from'], edge['to']) in critical_edges else ' '
+        lines.append(f"{marker}{edge['from'] + ' -> ' + edge['to']:<35}{edge['condition']:<32}"
+                     f"{_fmt(edge['at'])}{_fmt(edge['free_slack'])}{_fmt(edge['total_slack'])}")
+    lines.append('(holgura libre: cuánto antes de hacer falta quedó lista la dependencia; '
+                 'total: cuánto podría retrasarse sin retrasar el final)')
+    if result['missing']:
+        lines += ['', 'Sin eventos de arranque/healthy: ' + ', '.join(result['missing'])]
+    if result['advice']:
+        lines += ['', 'Sugerencias:'] + [f"  - {a}" for a in result['advice']]
+    return '\n'.join(lines)
+
+
+async def record_events(graph, command, project, timeout, save):
+    """Ejecuta `command` escuchando `docker events`; devuelve las líneas recibidas"""
+    since = f"{time.time() - 1:.3f}"
+    events = await asyncio.create_subprocess_exec(
+        'docker', 'events', '--since', since, '--filter', 'type=container', '--format', '{{json .}}',
+        stdout=asyncio.subprocess.PIPE)
+    lines = []
+    waiting = set(graph)
+    out = open(save, 'w', encoding='utf-8') if save else None
+    try:
+        print(f"$ {' '.join(command)}", flush=True)
+        proc = await asyncio.create_subprocess_exec(*command, cwd=compose.REPO_DIR)
+        deadline = time.monotonic() + timeout
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"timeout: siguen sin estar listos {', '.join(sorted(waiting))}", file=sys.stderr)
+                break
+            try:
+                raw = await asyncio.wait_for(events.stdout.readline(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if not raw:
+                break
+            line = raw.decode()
+            lines.append(line)
+            if out:
+                out.write(line)
+            event = json.loads(line)
+            attrs = event.get('Actor', {}).get('Attributes', {})
+            if project and attrs.get(PROJECT_LABEL) != project:
+                continue
+            name = attrs.get(SERVICE_LABEL)
+            action = event.get('Action', '')
+            if name in waiting and (action.endswith(': healthy')
+                                    or (action == 'start' and graph[name]['healthcheck'] is None)):
+                waiting.discard(name)
+                print(f"  {name} listo ({len(graph) - len(waiting)}/{len(graph)})", flush=True)
+        await proc.wait()
+    finally:
+        events.terminate()
+        await events.wait()
+        if out:
+            out.close()
+    return lines
+
+
+def add_arguments(parser):
+    parser.add_argument('--compose-file', default=compose.COMPOSE_FILE, help='default: docker-compose.yml del repo')
+    parser.add_argument('--command', default='make start',
+                        help='comando que arranca el stack, desde la raíz del repo (default: %(default)s)')
+    parser.add_argument('--down', action='store_true',
+                        help='ejecutar `docker compose down` antes, para medir un arranque en frío de verdad')
+    parser.add_argument('--project', default=None, help='proyecto de Compose (default: cualquiera)')
+    parser.add_argument('--timeout', type=float, default=600.0, help='segundos máximos de espera')
+    parser.add_argument('--save', default=None, metavar='FILE', help='guardar los eventos de docker (JSONL)')
+    parser.add_argument('--events', default=None, metavar='FILE',
+                        help='analizar eventos guardados (de --save o `docker events --format "{{json .}}"`) '
+                             'en vez de arrancar el stack')
+    parser.add_argument('-o', '--output', default=None, help='guardar el análisis en JSON')
+
+
+def run(args):
+    graph = build_graph(compose.load(args.compose_file))
+    if args.events:
+        with open(args.events, encoding='utf-8') as fh:
+            lines = fh.readlines()
+    else:
+        try:
+            if args.down:
+                subprocess.run(['docker', 'compose', '-f', args.compose_file, 'down'], cwd=compose.REPO_DIR,
+                               check=True)
+            lines = asyncio.run(record_events(graph, shlex.split(args.command), args.project, args.timeout,
+                                              args.save))
+        except FileNotFoundError as e:
+            print(f"No se pudo ejecutar {e.filename}: hace falta Docker en este equipo", file=sys.stderr)
+            return 2
+        except subprocess.CalledProcessError as e:
+            print(e, file=sys.stderr)
+            return 2
+    try:
+        t0, timelines = parse_events(lines, graph, args.project)
+        result = analyze(graph, timelines, t0 or 0.0)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(format_report(result))
+    if args.output:
+        write_json(args.output, result)
+        print(f"\nResultados en {args.output}")
+    return 0 if not result['missing'] else 1
@@ -0,0 +1,143 @@
+"""Opciones de línea de comandos compartidas por los subcomandos"""
+import contextlib
+import os
+import re
+import subprocess
+import time
+
+from owlboard_client import pacing, tls
+
+MEMORY_UNITS = {'B': 1 / 1024, 'KiB': 1, 'KB': 1, 'kB': 1, 'MiB': 1024, 'MB': 1000, 'GiB': 1024 ** 2, 'GB': 1000 ** 2}
+
+
+def add_client_arguments(parser):
+    group = parser.add_argument_group('conexión')
+    group.add_argument('--url', default=tls.DEFAULT_BASE_URL, help='URL base del Auth Service (default: %(default)s)')
+    group.add_argument('-k', '--insecure', action='store_true', help='no verificar el certificado del servidor')
+    group.add_argument('--ca-file', default=None, help='CA para verificar el servidor (p. ej. Secure_Channel/ca/ca.crt)')
+    group.add_argument('--mtls', metavar='SERVICE', default=None,
+                       help='presentar Secure_Channel/certs/SERVICE/client.crt (p. ej. api_gateway)')
+    group.add_argument('--timeout', type=float, default=10.0, help='timeout por petición en segundos (default: %(default)s)')
+
+
+def add_pacing_arguments(parser):
+    group = parser.add_argument_group('ritmo del cliente')
+    group.add_argument('--pace', nargs='?', const=pacing.LB_NGINX_CONF, default=None, metavar='CONF',
+                       help='encolar en el cliente según limit_req/limit_conn de un nginx.conf '
+                            '(default: load_balancer_nginx.conf) en vez de recibir 503')
+    group.add_argument('--pace-max-wait', type=float, default=1.0, metavar='SECONDS',
+                       help='espera máxima en cola antes de fallar (default: %(default)s)')
+    group.add_argument('--pace-share', type=int, default=1, metavar='N',
+                       help='procesos que comparten la IP y por tanto el límite (default: %(default)s)')
+
+
+def pacer_from_args(args):
+    if not getattr(args, 'pace', None):
+        return None
+    return pacing.Pacer.from_nginx(args.pace, share=args.pace_share, max_wait=args.pace_max_wait)
+
+
+def add_standin_arguments(parser):
+    group = parser.add_argument_group('stand-in local')
+    group.add_argument('--standin', action='store_true',
+                       help='arrancar un auth_service stand-in en proceso e ignorar --url')
+    group.add_argument('--standin-latency', type=float, default=0.0, metavar='MS', help='latencia inyectada')
+    group.add_argument('--standin-error-rate', type=float, default=0.0, metavar='RATE', help='errores 500 inyectados')
+    group.add_argument('--standin-seed', type=int, default=0, metavar='SEED')
+    group.add_argument('--standin-nginx-limits', action='store_true',
+                       help='aplicar limit_req/limit_conn de load_balancer_nginx.conf al stand-in')
+    group.add_argument('--standin-lockout', action='store_true',
+                       help='bloqueo de login por cuenta e IP en el stand-in (MAX_LOGIN_ATTEMPTS)')
+
+
+@contextlib.contextmanager
+def standin_from_args(args, users=()):
+    """Si se pidió --standin, lo arranca en un hilo y apunta args.url a él"""
+    if not getattr(args, 'standin', False):
+        yield None
+        return
+    from owlboard_client.pacing import read_nginx_limits
+    from owlboard_auth.lockout import MemoryLockout
+    from owlboard_standin import Faults, NginxLimits, run_in_thread
+    from owlboard_standin.auth import DEFAULT_USERS
+
+    faults = Faults(args.standin_latency / 1000.0, 0.0, args.standin_error_rate, 500, args.standin_seed)
+    limits = NginxLimits(**read_nginx_limits()) if getattr(args, 'standin_nginx_limits', False) else None
+    lockout = MemoryLockout() if getattr(args, 'standin_lockout', False) else None
+    with run_in_thread(faults=faults, users=DEFAULT_USERS + tuple(users), server_timing=True,
+                       limits=limits, lockout=lockout) as background:
+        args.url = background.url
+        yield background.server
+
+
+def _client_cert(args):
+    if args.mtls:
+        return tls.client_cert_paths(args.mtls)
+    return None, None
+
+
+def ssl_context_from_args(args):
+    cert, key = _client_cert(args)
+    return tls.create_context(not args.insecure, args.ca_file, cert, key)
+
+
+def client_from_args(cls, args, pool_size):
+    cert, key = _client_cert(args)
+    return cls(args.url, timeout=args.timeout, verify=not args.insecure, ca_file=args.ca_file,
+               client_cert=cert, client_key=key, pool_size=pool_size, pacer=pacer_from_args(args))
+
+
+def default_output(command):
+    return time.strftime(f"{command}_bench_%Y%m%d_%H%M%S.json")
+
+
+def rss_kb(pid='self'):
+    """VmRSS de /proc en KiB, o None fuera de Linux"""
+    try:
+        with open(f"/proc/{pid}/status", encoding='ascii') as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def container_memory_kb(name):
+    """Memoria de un contenedor según `docker stats`, en KiB"""
+    try:
+        out = subprocess.run(['docker', 'stats', '--no-stream', '--format', '{{.MemUsage}}', name],
+                             capture_output=True, text=True, timeout=15).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = re.match(r'\s*([\d.]+)\s*([A-Za-z]+)', out)
+    if not match or match.group(2) not in MEMORY_UNITS:
+        return None
+    return float(match.group(1)) * MEMORY_UNITS[match.group(2)]
+
+
+def process_cpu_seconds(pid):
+    """utime + stime de /proc/<pid>/stat, o None fuera de Linux"""
+    try:
+        with open(f"/proc/{pid}/stat", encoding='ascii') as fh:
+            fields = fh.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return None
+    # Tras el nombre del proceso, utime y stime son los campos 12 y 13
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def container_cpu_seconds(name):
+    """CPU acumulada del cgroup (v2) de un contenedor; incluye todos sus procesos"""
+    try:
+        pid = subprocess.run(['docker', 'inspect', '-f', '{{.State.Pid}}', name],
+                             capture_output=True, text=True, timeout=15).stdout.strip()
+        with open(f"/proc/{pid}/cgroup", encoding='ascii') as fh:
+            path = fh.read().strip().rsplit(':', 1)[1]
+        with open(f"/sys/fs/cgroup{path}/cpu.stat", encoding='ascii') as fh:
+            for line in fh:
+                if line.startswith('usage_usec '):
+                    return int(line.split()[1]) / 1e6
+    except (OSError, subprocess.TimeoutExpired, IndexError):
+        return None
+    return None
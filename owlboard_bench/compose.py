@@ -0,0 +1,93 @@
+"""Lectura de docker-compose.yml: servicios, puertos, healthchecks y dependencias"""
+import os
+import re
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPOSE_FILE = os.path.join(REPO_DIR, 'docker-compose.yml')
+
+DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(us|ms|s|m|h)')
+DURATION_UNITS = {'us': 1e-6, 'ms': 1e-3, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+# Valores por defecto de Docker cuando el healthcheck no los indica
+HEALTHCHECK_DEFAULTS = {'interval': 30.0, 'timeout': 30.0, 'retries': 3, 'start_period': 0.0}
+URL_RE = re.compile(r'\b([a-z][a-z0-9+.-]*)://(?:[^@/\s\'"]*@)?([A-Za-z0-9_.-]+)(?::(\d+))?(/[^\s\'"]*)?')
+
+
+def load(path=COMPOSE_FILE):
+    import yaml
+
+    with open(path) as fh:
+        return yaml.safe_load(fh)
+
+
+def parse_duration(value):
+    """Duración de Compose ('30s', '1m30s', '500ms') en segundos"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = DURATION_PART.findall(value)
+    if not parts or ''.join(n + u for n, u in parts) != value.strip():
+        raise ValueError(f"duración no válida: {value!r}")
+    return sum(float(n) * DURATION_UNITS[u] for n, u in parts)
+
+
+def published_ports(service):
+    """[(puerto del host, puerto del contenedor)] de `ports` (sintaxis corta y larga)"""
+    result = []
+    for entry in service.get('ports') or ():
+        if isinstance(entry, dict):
+            if entry.get('published'):
+                result.append((int(entry['published']), int(entry['target'])))
+            continue
+        parts = str(entry).split('/', 1)[0].split(':')
+        if len(parts) >= 2 and parts[-2].isdigit() and parts[-1].isdigit():
+            result.append((int(parts[-2]), int(parts[-1])))
+    return result
+
+
+def healthcheck(service):
+    """Healthcheck con duraciones en segundos, o None si no hay o está desactivado"""
+    check = service.get('healthcheck')
+    if not check or check.get('disable') or check.get('test') in (None, ['NONE']):
+        return None
+    result = dict(HEALTHCHECK_DEFAULTS, test=check['test'])
+    for key in ('interval', 'timeout', 'start_period'):
+        if key in check:
+            result[key] = parse_duration(check[key])
+    if 'retries' in check:
+        result['retries'] = int(check['retries'])
+    return result
+
+
+def healthcheck_url(test):
+    """Primera URL http(s) del comando de healthcheck"""
+    command = ' '.join(test) if isinstance(test, list) else str(test)
+    for match in URL_RE.finditer(command):
+        if match.group(1) in ('http', 'https'):
+            return match
+    return None
+
+
+def depends_on(service):
+    """{servicio: condición}; la sintaxis de lista equivale a service_started"""
+    deps = service.get('depends_on') or {}
+    if isinstance(deps, list):
+        return {name: 'service_started' for name in deps}
+    return {name: (spec or {}).get('condition', 'service_started') for name, spec in deps.items()}
+
+
+def environment_values(service):
+    env = service.get('environment') or {}
+    if isinstance(env, dict):
+        return [str(v) for v in env.values() if v is not None]
+    return [item.partition('=')[2] for item in env]
+
+
+def mounted_files(service, suffix, base_dir=REPO_DIR):
+    """Rutas del host de los ficheros montados con `suffix` que existen en el árbol"""
+    paths = []
+    for volume in service.get('volumes') or ():
+        source = volume.get('source', '') if isinstance(volume, dict) else str(volume).split(':', 1)[0]
+        if source.endswith(suffix):
+            path = os.path.normpath(os.path.join(base_dir, source))
+            if os.path.isfile(path):
+                paths.append(path)
+    return paths
@@ -0,0 +1,331 @@
+"""Estudio de escalado del pool de api_gateway (1..N réplicas)
+
+Para cada número de réplicas K genera el override de docker-compose y el
+load_balancer_nginx.conf con K líneas `server` en `upstream api_gateways`,
+lanza la misma carga a través del balanceador y compara throughput y
+latencia de cola frente a K. Sin --compose usa stand-ins locales (un
+balanceador least_conn con el pool keep-alive de nginx y K gateways de
+capacidad fija) que además informan de la utilización de cada réplica y
+de cuántas conexiones nuevas abre el balanceador: así se ve dónde deja
+de ayudar añadir gateways, qué réplica se satura primero y si
+`keepalive` / `keepalive_requests` limitan antes que los backends.
+"""
+import asyncio
+import copy
+import os
+import re
+import subprocess
+import sys
+import time
+
+from owlboard_bench import common
+from owlboard_bench.auth import is_rate_limited
+from owlboard_bench.compose import COMPOSE_FILE, REPO_DIR, load as load_compose
+from owlboard_bench.stats import LatencyStats, write_json
+from owlboard_client import AsyncAuthClient
+
+NGINX_CONF = os.path.join(REPO_DIR, 'load_balancer_nginx.conf')
+DISABLED_PROFILE = 'scaling-disabled'
+
+SERVER_LINE = re.compile(r'^([ \t]*)server api_gateway_\d+:80[^\n]*\n', re.MULTILINE)
+RATE_LIMIT_LINE = re.compile(r'^([ \t]*)(limit_req|limit_conn) ', re.MULTILINE)
+
+
+def parse_replicas(value):
+    if '-' in value:
+        low, high = value.split('-', 1)
+        return list(range(int(low), int(high) + 1))
+    return [int(v) for v in value.split(',')]
+
+
+def render_nginx_conf(template, replicas, keepalive=64, keepalive_requests=100, rate_limit=False):
+    """load_balancer_nginx.conf con K réplicas en `upstream api_gateways`"""
+    newline = '\r\n' if '\r\n' in template else '\n'
+    text = template.replace('\r\n', '\n')
+    first = SERVER_LINE.search(text)
+    if first is None:
+        raise ValueError('no se encontró `server api_gateway_N:80` en la plantilla')
+    indent, options = first.group(1), first.group(0).strip().split(' ', 2)[2]
+    servers = ''.join(f"{indent}server api_gateway_{i}:80 {options}\n" for i in range(1, replicas + 1))
+    text = text[:first.start()] + servers + SERVER_LINE.sub('', text[first.start():])
+    text = re.sub(r'^([ \t]*)keepalive \d+;', rf'\g<1>keepalive {keepalive};', text, count=1, flags=re.MULTILINE)
+    text = re.sub(r'^([ \t]*)keepalive_requests \d+;', rf'\g<1>keepalive_requests {keepalive_requests};', text,
+                  count=1, flags=re.MULTILINE)
+    if not rate_limit:
+        # Desde una sola IP limit_req/limit_conn rechazarían la carga del estudio
+        text = RATE_LIMIT_LINE.sub(r'\1# scaling study: \2 ', text)
+    return text.replace('\n', newline)
+
+
+class _Override(list):
+    """Lista que se vuelca con la etiqueta !override de Compose (reemplaza en vez de fusionar)"""
+
+
+def _dump_yaml(data, fh):
+    import yaml
+
+    dumper = type('OverrideDumper', (yaml.SafeDumper,), {})
+    dumper.add_representer(_Override, lambda d, value: d.represent_sequence('!override', value))
+    yaml.dump(data, fh, Dumper=dumper, sort_keys=False)
+
+
+def compose_override(compose, replicas, nginx_conf_path):
+    """Override de docker-compose para K réplicas (requiere Compose >= 2.24 por !override).
+
+    Las réplicas de más se copian de api_gateway_1; las que sobran se
+    desactivan con un perfil que nunca se activa.
+    """
+    services = compose['services']
+    existing = sorted((int(name.rsplit('_', 1)[1]) for name in services if re.fullmatch(r'api_gateway_\d+', name)))
+    template = services['api_gateway_1']
+    override = {}
+    for i in range(1, max(replicas, existing[-1]) + 1):
+        name = f"api_gateway_{i}"
+        if i > replicas:
+            override[name] = {'profiles': [DISABLED_PROFILE]}
+        elif name not in services:
+            service = copy.deepcopy(template)
+            service['container_name'] = name
+            override[name] = service
+    depends_on = [d for d in services['load_balancer'].get('depends_on', []) if not d.startswith('api_gateway_')]
+    source = os.path.relpath(nginx_conf_path, REPO_DIR)
+    source = os.path.abspath(nginx_conf_path) if source.startswith('..') else f"./{source}"
+    override['load_balancer'] = {
+        'depends_on': _Override(depends_on + [f"api_gateway_{i}" for i in range(1, replicas + 1)]),
+        # Mismo destino que el volumen original: Compose lo sustituye
+        'volumes': [f"{source}:/etc/nginx/nginx.conf:ro"],
+    }
+    return {'services': override}
+
+
+def generate(replicas, directory, keepalive, keepalive_requests, rate_limit):
+    """Escribe los ficheros de K réplicas; devuelve (override, nginx.conf)"""
+    os.makedirs(directory, exist_ok=True)
+    with open(NGINX_CONF, newline='') as fh:
+        template = fh.read()
+    conf_path = os.path.join(directory, f"load_balancer_nginx.gateways-{replicas}.conf")
+    with open(conf_path, 'w', newline='') as fh:
+        fh.write(render_nginx_conf(template, replicas, keepalive, keepalive_requests, rate_limit))
+    override_path = os.path.join(directory, f"docker-compose.gateways-{replicas}.yml")
+    with open(override_path, 'w') as fh:
+        fh.write(f"# python -m owlboard_bench gateways: {replicas} api_gateway\n")
+        _dump_yaml(compose_override(load_compose(), replicas, conf_path), fh)
+    return override_path, conf_path
+
+
+async def run_workload(client, path, concurrency, duration):
+    """Bucle cerrado de `concurrency` workers haciendo GET `path`; devuelve (stats, elapsed)"""
+    stats = LatencyStats(path)
+
+    async def worker(deadline):
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                resp = await client.request('GET', path)
+            except (OSError, asyncio.TimeoutError) as e:
+                stats.add_error(type(e).__name__)
+                continue
+            if resp.status < 400:
+                stats.add(time.perf_counter() - start)
+            else:
+                stats.add_error(resp.status, is_rate_limited(resp))
+
+    started = time.perf_counter()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(worker(deadline) for _ in range(concurrency)))
+    return stats, time.perf_counter() - started
+
+
+def _measure(args, url, before=None):
+    async def main():
+        client = AsyncAuthClient(url, timeout=args.timeout, verify=not args.insecure, ca_file=args.ca_file,
+                                 pool_size=args.concurrency)
+        async with client:
+            # Calentamiento: abre las conexiones de cliente y el pool keep-alive del balanceador
+            await run_workload(client, args.path, args.concurrency, args.warmup)
+            if before is not None:
+                before()
+            return await run_workload(client, args.path, args.concurrency, args.duration)
+
+    return asyncio.run(main())
+
+
+def run_standin(args, replicas):
+    from owlboard_standin.gateway import run_in_thread
+
+    with run_in_thread(replicas, keepalive=args.keepalive, keepalive_requests=args.keepalive_requests,
+                       service_time=args.service_time / 1000.0, workers=args.workers) as background:
+        stats, elapsed = _measure(args, background.url, lambda: background.call(background.server.reset))
+        cluster = background.server.stats()
+    return stats, elapsed, cluster
+
+
+def run_compose(args, replicas):
+    override, _ = generate(replicas, args.generate, args.keepalive, args.keepalive_requests, args.rate_limit)
+    command = ['docker', 'compose', '-f', COMPOSE_FILE, '-f', override, 'up', '-d', '--wait', '--remove-orphans']
+    print(' '.join(command), flush=True)
+    subprocess.run(command, cwd=REPO_DIR, check=True)
+    stats, elapsed = _measure(args, args.url)
+    return stats, elapsed, None
+
+
+def summarize(replicas, stats, elapsed, cluster, keepalive_requests):
+    row = {'replicas': replicas, **stats.summary(elapsed)}
+    if cluster:
+        ok = row['ok'] or 1
+        gateways = cluster['gateways']
+        for gateway in gateways:
+            gateway['share'] = round(gateway['requests'] / ok, 4)
+            connections = gateway['upstream_connections']
+            gateway['requests_per_connection'] = round(gateway['requests'] / connections, 1) if connections else None
+        new_connections = sum(g['upstream_connections'] for g in gateways)
+        row['gateways'] = gateways
+        row['upstream_connections'] = new_connections
+        row['upstream_connections_per_s'] = round(new_connections / elapsed, 2) if elapsed else 0.0
+        row['requests_per_upstream_connection'] = round(ok / new_connections, 1) if new_connections else None
+        row['max_utilization'] = max(g['utilization'] for g in gateways)
+        row['keepalive_requests'] = keepalive_requests
+    return row
+
+
+def bottleneck(row, keepalive_requests, saturation=0.85):
+    """Qué limita en una ejecución, según los contadores del stand-in"""
+    if 'gateways' not in row:
+        return 'desconocido (sin contadores de gateway; ver access-log)'
+    busiest = max(row['gateways'], key=lambda g: g['utilization'])
+    if busiest['utilization'] >= saturation:
+        return f"gateways saturados ({busiest['gateway']} al {busiest['utilization']:.0%})"
+    # Tras el calentamiento solo keepalive_requests debería abrir conexiones
+    # nuevas (una cada N peticiones); muchas más indican que la caché de
+    # `keepalive` ociosas se desborda y se reconecta en cada ráfaga
+    per_connection = row['requests_per_upstream_connection']
+    if per_connection is not None and per_connection < keepalive_requests / 2:
+        return (f"pool keepalive: {per_connection} peticiones por conexión upstream "
+                f"({row['upstream_connections_per_s']} conexiones nuevas/s)")
+    return f"balanceador o cliente (gateways al {busiest['utilization']:.0%} como mucho)"
+
+
+def knee(rows, min_gain):
+    """Primer K a partir del cual una réplica más aporta menos de `min_gain` de throughput"""
+    for previous, current in zip(rows, rows[1:]):
+        if previous['throughput_rps'] and current['throughput_rps'] / previous['throughput_rps'] - 1 < min_gain:
+            return previous['replicas']
+    return None
+
+
+def ascii_chart(rows, key, label, width=40):
+    values = [row[key] if not isinstance(key, tuple) else row[key[0]][key[1]] for row in rows]
+    top = max(values) or 1
+    lines = [label]
+    for row, value in zip(rows, values):
+        lines.append(f"  K={row['replicas']:<3}{'#' * max(1, round(value / top * width)):<{width}} {value:.1f}")
+    return '\n'.join(lines)
+
+
+def plot(rows, path):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib no está instalado: se omite --plot', file=sys.stderr)
+        return
+    ks = [row['replicas'] for row in rows]
+    fig, throughput_ax = plt.subplots(figsize=(7, 4))
+    throughput_ax.plot(ks, [row['throughput_rps'] for row in rows], 'o-', color='tab:blue')
+    throughput_ax.set_xlabel('réplicas de api_gateway')
+    throughput_ax.set_ylabel('peticiones/s', color='tab:blue')
+    latency_ax = throughput_ax.twinx()
+    latency_ax.plot(ks, [row['latency_ms']['p99'] for row in rows], 's--', color='tab:red')
+    latency_ax.set_ylabel('p99 (ms)', color='tab:red')
+    throughput_ax.set_xticks(ks)
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"Gráfica: {path}")
+
+
+def add_arguments(parser):
+    parser.add_argument('--replicas', type=parse_replicas, default=parse_replicas('1-6'),
+                        help='réplicas a probar: "1-6" o "1,2,4,8" (default: 1-6)')
+    parser.add_argument('-c', '--concurrency', type=int, default=64, help='clientes simultáneos (default: %(default)s)')
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='segundos por K (default: %(default)s)')
+    parser.add_argument('--warmup', type=float, default=1.0, help='segundos de calentamiento por K')
+    parser.add_argument('--path', default='/api/users/health', help='ruta pedida a través del balanceador')
+    parser.add_argument('--keepalive', type=int, default=64, help='`keepalive` del upstream (default: %(default)s)')
+    parser.add_argument('--keepalive-requests', type=int, default=100,
+                        help='`keepalive_requests` del upstream (default: %(default)s)')
+    parser.add_argument('--min-gain', type=float, default=0.10,
+                        help='ganancia mínima de throughput para que una réplica más cuente (default: 0.10)')
+    parser.add_argument('--plot', default=None, metavar='PNG', help='gráfica throughput/p99 frente a K (matplotlib)')
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+    standin = parser.add_argument_group('stand-ins locales (por defecto)')
+    standin.add_argument('--service-time', type=float, default=5.0, metavar='MS',
+                         help='tiempo de servicio de cada gateway (default: %(default)s)')
+    standin.add_argument('--workers', type=int, default=8, help='peticiones simultáneas por gateway (default: %(default)s)')
+
+    compose = parser.add_argument_group('stack real')
+    compose.add_argument('--compose', action='store_true',
+                         help='aplicar cada override con docker compose y medir contra --url')
+    compose.add_argument('--generate', default='scaling', metavar='DIR',
+                         help='directorio para los overrides y nginx.conf generados (default: %(default)s)')
+    compose.add_argument('--generate-only', action='store_true', help='solo generar los ficheros y salir')
+    compose.add_argument('--rate-limit', action='store_true',
+                         help='mantener limit_req/limit_conn (desde una IP limitan la carga del estudio)')
+    compose.add_argument('--url', default='https://localhost:9000', help='load balancer (default: %(default)s)')
+    compose.add_argument('-k', '--insecure', action='store_true', help='no verificar el certificado del servidor')
+    compose.add_argument('--ca-file', default=None)
+    compose.add_argument('--timeout', type=float, default=10.0)
+
+
+def run(args):
+    if args.generate_only:
+        for replicas in args.replicas:
+            for path in generate(replicas, args.generate, args.keepalive, args.keepalive_requests, args.rate_limit):
+                print(path)
+        return 0
+    if not args.compose:
+        args.insecure = True
+
+    rows = []
+    for replicas in args.replicas:
+        runner = run_compose if args.compose else run_standin
+        stats, elapsed, cluster = runner(args, replicas)
+        row = summarize(replicas, stats, elapsed, cluster, args.keepalive_requests)
+        row['bottleneck'] = bottleneck(row, args.keepalive_requests)
+        rows.append(row)
+        lat = row['latency_ms']
+        print(f"K={replicas:<3} {row['throughput_rps']:>9.1f} req/s  p50 {lat['p50']:>7.1f}  p99 {lat['p99']:>7.1f} ms  "
+              f"errores {sum(row['errors'].values()) + row['rate_limited']:<5} {row['bottleneck']}", flush=True)
+        for gateway in row.get('gateways', []):
+            print(f"      {gateway['gateway']:<15} cuota {gateway['share']:>6.1%}  utilización "
+                  f"{gateway['utilization']:>6.1%}  cola máx {gateway['max_queue']:<4} conexiones "
+                  f"nuevas {gateway['upstream_connections']:<5} ({gateway['requests_per_connection'] or '-'} pet./conexión)")
+
+    print()
+    print(ascii_chart(rows, 'throughput_rps', 'Throughput (req/s)'))
+    print(ascii_chart(rows, ('latency_ms', 'p99'), 'Latencia p99 (ms)'))
+    best = knee(rows, args.min_gain)
+    if best is not None:
+        print(f"\nA partir de K={best} una réplica más aporta menos de un {args.min_gain:.0%} de throughput "
+              f"({rows[-1]['bottleneck']}).")
+
+    result = {
+        'command': 'gateways',
+        'mode': 'compose' if args.compose else 'standin',
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'path': args.path,
+        'keepalive': args.keepalive,
+        'keepalive_requests': args.keepalive_requests,
+        'service_time_ms': None if args.compose else args.service_time,
+        'workers_per_gateway': None if args.compose else args.workers,
+        'knee_replicas': best,
+        'runs': rows,
+    }
+    output = args.output or common.default_output('gateways')
+    write_json(output, result)
+    print(f"Resultados: {output}")
+    if args.plot:
+        plot(rows, args.plot)
+    return 0
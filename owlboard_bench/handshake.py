@@ -0,0 +1,517 @@
+"""Handshakes TLS completos y reanudados por versión, suite y mTLS
+
+Cada conexión es nueva: TCP, handshake, `GET /health` con
+`Connection: close` y cierre. Se mide el handshake (desde que conecta el
+TCP hasta que termina) y, con el PID o el contenedor del servidor, la CPU
+que este gasta por conexión, de donde salen las conexiones por núcleo. En
+modo `resumed` cada hilo ofrece la última sesión que recibió (id de
+sesión o ticket) y se cuenta qué fracción reanuda de verdad.
+
+Por defecto apunta al load balancer (puerto 9000) con las suites de su
+`ssl_ciphers`, la CA de Secure_Channel y SNI `load_balancer`, como el
+desktop_proxy. Con --standin arranca un auth_service stand-in con el
+certificado del load balancer por cada valor de `--tickets` (si no existe
+Secure_Channel genera una cadena de prueba con openssl). Las suites solo se
+fijan en TLS 1.2: el módulo ssl no permite elegir las de TLS 1.3, que se
+mide con las que negocie OpenSSL.
+
+Además revisa los nginx.conf (proxies y load balancer) en busca de lo que
+fuerza handshakes de más: upstreams HTTPS con `keepalive` a los que se
+envía `Connection: close`, `proxy_ssl_session_reuse off` o servidores sin
+`ssl_session_cache`. Termina con recomendaciones de suites y tickets.
+"""
+import collections
+import concurrent.futures
+import os
+import re
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from owlboard_bench import common
+from owlboard_bench.stats import StreamingHistogram, write_json
+from owlboard_client import pacing, tls
+
+VERSIONS = {'1.2': ssl.TLSVersion.TLSv1_2, '1.3': ssl.TLSVersion.TLSv1_3}
+NGINX_CONFS = ('desktop_proxy_nginx.conf', 'mobile_proxy_nginx.conf', 'load_balancer_nginx.conf')
+# Diferencia relativa por debajo de la cual dos configuraciones cuestan lo mismo: la CPU de /proc va en
+# ticks de 10 ms y cliente y servidor comparten máquina
+SIMILAR = 0.25
+
+
+def read_nginx_ciphers(path=pacing.LB_NGINX_CONF):
+    """Suites del primer `ssl_ciphers` de un nginx.conf, en orden"""
+    with open(path, encoding='utf-8') as fh:
+        match = re.search(r'^\s*ssl_ciphers\s+[\'"]?([^\'";]+)', fh.read(), re.M)
+    if not match:
+        raise ValueError(f"{path}: no hay ssl_ciphers")
+    return [c for c in match.group(1).split(':') if c]
+
+
+def is_cbc(cipher):
+    return not any(mode in cipher for mode in ('GCM', 'CHACHA20', 'CCM'))
+
+
+# --- Revisión estática de nginx.conf ---
+
+class NginxBlock:
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.directives = collections.defaultdict(list)
+
+    def get(self, directive):
+        """Valores de una directiva heredable: del bloque o, si no la define, del más cercano que sí"""
+        block = self
+        while block is not None:
+            if directive in block.directives:
+                return block.directives[directive]
+            block = block.parent
+        return []
+
+
+def parse_nginx(text):
+    """Lista de NginxBlock ('main', 'http', 'upstream x', 'server', 'location /api/', ...)"""
+    text = re.sub(r'(^|\s)#[^\n]*', r'\1', text)
+    root = NginxBlock('main', None)
+    blocks, current = [root], root
+    for match in re.finditer(r'((?:"[^"]*"|\'[^\']*\'|[^;{}"\'])*)([;{}])', text):
+        statement, end = ' '.join(match.group(1).split()), match.group(2)
+        if end == '{':
+            current = NginxBlock(statement, current)
+            blocks.append(current)
+        elif end == '}':
+            current = current.parent or root
+        elif statement:
+            name, _, value = statement.partition(' ')
+            current.directives[name].append(value)
+    return blocks
+
+
+def _header(block, name):
+    for value in block.get('proxy_set_header'):
+        header, _, content = value.partition(' ')
+        if header.lower() == name.lower():
+            return content.strip('"\'')
+    return None
+
+
+def nginx_findings(paths):
+    """Lo que en la configuración obliga a hacer handshakes que podrían evitarse"""
+    findings = []
+    for path in paths:
+        with open(path, encoding='utf-8') as fh:
+            blocks = parse_nginx(fh.read())
+        name = os.path.basename(path)
+        upstreams = {b.name.split()[1]: b for b in blocks if b.name.startswith('upstream ')}
+        for block in blocks:
+            if block.name == 'server' and any('ssl' in v.split() for v in block.directives.get('listen', ())):
+                if not block.get('ssl_session_cache'):
+                    findings.append((name, block.name, 'sin ssl_session_cache: en TLS 1.2 sin tickets no hay '
+                                                       'reanudación entre workers; añadir ssl_session_cache '
+                                                       'shared:SSL:10m'))
+                cbc = [c for c in ':'.join(block.get('ssl_ciphers')).strip('"\'').split(':') if c and is_cbc(c)]
+                if cbc:
+                    findings.append((name, block.name, f"ssl_ciphers incluye suites CBC ({', '.join(cbc)}); "
+                                                       'todos los clientes de OwlBoard negocian GCM'))
+            if not block.name.startswith('location'):
+                continue
+            for target in block.directives.get('proxy_pass', ()):
+                match = re.match(r'https://([^/:;]+)', target)
+                if not match:
+                    continue
+                upstream = upstreams.get(match.group(1))
+                connection = _header(block, 'Connection')
+                if upstream is not None and upstream.directives.get('keepalive') and connection != '' \
+                        and (connection or 'close').lower() != 'upgrade':
+                    findings.append((name, block.name,
+                                     f"upstream {match.group(1)} tiene keepalive pero se envía 'Connection: "
+                                     f"{connection or 'close'}': cada petición abre una conexión TLS nueva; "
+                                     "añadir proxy_set_header Connection \"\";"))
+                if 'off' in block.get('proxy_ssl_session_reuse'):
+                    findings.append((name, block.name, 'proxy_ssl_session_reuse off: cada conexión al upstream '
+                                                       'hace un handshake completo'))
+    return [{'file': f, 'context': c, 'message': m} for f, c, m in findings]
+
+
+# --- Certificados y stand-in ---
+
+def chain_paths(certs_dir, client_service='api_gateway'):
+    return {
+        'ca': os.path.join(certs_dir, 'ca', 'ca.crt'),
+        'server_cert': os.path.join(certs_dir, 'certs', 'load_balancer', 'server.crt'),
+        'server_key': os.path.join(certs_dir, 'certs', 'load_balancer', 'server.key'),
+        'client_cert': os.path.join(certs_dir, 'certs', client_service, 'client.crt'),
+        'client_key': os.path.join(certs_dir, 'certs', client_service, 'client.key'),
+    }
+
+
+def _openssl(*args):
+    subprocess.run(['openssl', *args], check=True, capture_output=True)
+
+
+def generate_chain(directory, client_service='api_gateway'):
+    """CA, certificado de load_balancer y de cliente con la estructura de Secure_Channel (RSA 2048)"""
+    paths = chain_paths(directory, client_service)
+    for path in paths.values():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    ca_key = os.path.join(directory, 'ca', 'ca.key')
+    _openssl('req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=OwlBoard Test CA',
+             '-keyout', ca_key, '-out', paths['ca'])
+    for kind, cn, ext in (('server', 'load_balancer', 'subjectAltName=DNS:load_balancer,DNS:localhost,'
+                                                      'IP:127.0.0.1\nextendedKeyUsage=serverAuth'),
+                          ('client', client_service, 'extendedKeyUsage=clientAuth')):
+        csr, extfile = os.path.join(directory, f"{kind}.csr"), os.path.join(directory, f"{kind}.ext")
+        with open(extfile, 'w', encoding='ascii') as fh:
+            fh.write(ext + '\n')
+        _openssl('req', '-newkey', 'rsa:2048', '-nodes', '-subj', f"/CN={cn}", '-keyout', paths[f"{kind}_key"],
+                 '-out', csr)
+        _openssl('x509', '-req', '-in', csr, '-CA', paths['ca'], '-CAkey', ca_key, '-CAcreateserial', '-days', '1',
+                 '-extfile', extfile, '-out', paths[f"{kind}_cert"])
+    return paths
+
+
+def _start_tls_standin(paths, tickets, ciphers, mtls):
+    cmd = [sys.executable, '-m', 'owlboard_standin', 'auth', '--port', '0', '--certfile', paths['server_cert'],
+           '--keyfile', paths['server_key'], '--ssl-ciphers', ciphers]
+    if not tickets:
+        cmd.append('--ssl-no-tickets')
+    if mtls:
+        cmd += ['--ssl-client-ca', paths['ca']]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, cwd=os.getcwd())
+    line = proc.stdout.readline()
+    match = re.search(r'https://([^:/]+):(\d+)', line)
+    if not match:
+        proc.kill()
+        raise RuntimeError(f"el stand-in TLS no arrancó: {line!r}")
+    return proc, match.group(1), int(match.group(2))
+
+
+# --- Medición ---
+
+class ServerCpu:
+    def __init__(self, pid=None, container=None):
+        self.pid = pid
+        self.container = container
+
+    @property
+    def source(self):
+        if self.pid:
+            return f"pid {self.pid}"
+        return f"contenedor {self.container}" if self.container else None
+
+    def read(self):
+        if self.pid:
+            return common.process_cpu_seconds(self.pid)
+        if self.container:
+            return common.container_cpu_seconds(self.container)
+        return None
+
+
+def client_context(paths, version, cipher, mtls):
+    """Un contexto por configuración: OpenSSL solo reanuda con el contexto que creó la sesión"""
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    if paths.get('insecure'):
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+    else:
+        ctx.load_verify_locations(paths['ca'])
+    ctx.minimum_version = ctx.maximum_version = VERSIONS[version]
+    if cipher:
+        ctx.set_ciphers(cipher)
+    if mtls:
+        ctx.load_cert_chain(paths['client_cert'], paths['client_key'])
+    return ctx
+
+
+def connect_once(ctx, host, port, server_name, session, timeout):
+    """Una conexión completa; devuelve (segundos de handshake, reanudada, 'versión suite', sesión)"""
+    sock = socket.create_connection((host, port), timeout)
+    # Como tcp_nodelay en nginx: sin él, Finished y la petición esperan al ACK retardado del servidor
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        sslsock = ctx.wrap_socket(sock, server_hostname=server_name, session=session,
+                                  do_handshake_on_connect=False)
+    except Exception:
+        sock.close()
+        raise
+    with sslsock:
+        start = time.perf_counter()
+        sslsock.do_handshake()
+        elapsed = time.perf_counter() - start
+        sslsock.sendall(f"GET /health HTTP/1.1\r\nHost: {server_name}\r\nConnection: close\r\n\r\n".encode())
+        # Leer la respuesta también procesa los tickets de TLS 1.3, que llegan tras el handshake
+        while sslsock.recv(65536):
+            pass
+        return elapsed, sslsock.session_reused, f"{sslsock.version()} {sslsock.cipher()[0]}", sslsock.session
+
+
+def measure(ctx, target, mode, count, concurrency, timeout, server_cpu):
+    host, port, server_name = target
+    histogram = StreamingHistogram()
+    lock = threading.Lock()
+    totals = collections.Counter()
+    negotiated = collections.Counter()
+    errors = collections.Counter()
+
+    def worker(share):
+        session = None
+        if mode == 'resumed':
+            # Conexión previa (no medida) para tener una sesión que ofrecer
+            try:
+                session = connect_once(ctx, host, port, server_name, None, timeout)[3]
+            except (OSError, ssl.SSLError):
+                pass
+        for _ in range(share):
+            try:
+                elapsed, reused, suite, new_session = connect_once(ctx, host, port, server_name, session, timeout)
+            except (OSError, ssl.SSLError) as e:
+                with lock:
+                    errors[type(e).__name__ if not str(e) else str(e)[:120]] += 1
+                continue
+            with lock:
+                histogram.add(elapsed)
+                totals['connections'] += 1
+                totals['reused'] += reused
+                negotiated[suite] += 1
+            if mode == 'resumed' and new_session is not None:
+                session = new_session
+
+    shares = [count // concurrency + (i < count % concurrency) for i in range(concurrency)]
+    cpu_before = server_cpu.read()
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, shares))
+    elapsed = time.perf_counter() - start
+    cpu_after = server_cpu.read()
+    done = totals['connections']
+    cpu_ms = None
+    if cpu_before is not None and cpu_after is not None and done:
+        cpu_ms = round((cpu_after - cpu_before) * 1000 / done, 3)
+    return {
+        'connections': done,
+        'errors': dict(errors),
+        'conn_per_s': round(done / elapsed, 1) if elapsed else None,
+        'handshake_ms': histogram.summary_ms(),
+        'reused': round(totals['reused'] / done, 3) if done else 0.0,
+        'negotiated': negotiated.most_common(1)[0][0] if negotiated else None,
+        'server_cpu_ms': cpu_ms,
+        # Conexiones por segundo que aguanta un núcleo del servidor a ese coste
+        'per_core': round(1000 / cpu_ms) if cpu_ms else None,
+    }
+
+
+# --- Recomendaciones ---
+
+def _cost(run):
+    """Coste comparable de una ejecución: CPU del servidor si se midió, si no la mediana del handshake"""
+    return run['server_cpu_ms'] if run['server_cpu_ms'] else run['handshake_ms']['p50']
+
+
+def _label(run):
+    cipher = f" {run['cipher']}" if run['cipher'] else ''
+    return f"TLS {run['version']}{cipher}{' mTLS' if run['mtls'] else ''} (tickets {run['tickets']})"
+
+
+def recommend(runs):
+    """Recomendaciones a partir de las ejecuciones sin errores"""
+    lines = []
+    valid = [r for r in runs if r['connections'] and not r['errors']]
+    unit = 'ms de CPU del servidor' if valid and all(r['server_cpu_ms'] for r in valid) else 'ms de handshake (p50)'
+    groups = collections.defaultdict(lambda: {'full': [], 'resumed': []})
+    for run in valid:
+        groups[(run['tickets'], run['version'], run['mtls'])][run['mode']].append(run)
+    for (tickets, version, mtls), modes in groups.items():
+        label = f"TLS {version}{' mTLS' if mtls else ''} (tickets {tickets})"
+        if not modes['resumed']:
+            continue
+        reused = min(r['reused'] for r in modes['resumed'])
+        if reused < 0.9:
+            lines.append(f"{label}: solo reanuda el {reused:.0%} de las conexiones; revisar ssl_session_cache, "
+                         'ssl_session_tickets y que el cliente reutilice su contexto TLS')
+        elif modes['full']:
+            full = round(statistics.median(_cost(r) for r in modes['full']), 3)
+            resumed = round(statistics.median(_cost(r) for r in modes['resumed']), 3)
+            if resumed:
+                lines.append(f"{label}: reanudar cuesta {resumed:g} frente a {full:g} {unit} "
+                             f"({full / resumed:.1f}x)")
+
+    suites = collections.defaultdict(list)
+    for run in valid:
+        if run['version'] == '1.2' and run['mode'] == 'full' and run['cipher']:
+            suites[(run['tickets'], run['mtls'])].append(run)
+    for (tickets, mtls), group in suites.items():
+        if len(group) < 2:
+            continue
+        group.sort(key=lambda r: (is_cbc(r['cipher']), _cost(r)))
+        cheapest = min(_cost(r) for r in group)
+        spread = max(_cost(r) for r in group) / cheapest - 1 if cheapest else 0
+        order = ':'.join(r['cipher'] for r in group if not is_cbc(r['cipher']))
+        label = f"TLS 1.2{' mTLS' if mtls else ''} (tickets {tickets})"
+        if spread < SIMILAR:
+            lines.append(f"{label}: las suites cuestan lo mismo en el handshake (±{spread:.0%}); el coste es la "
+                         f"firma RSA y ECDHE. ssl_ciphers '{order}' (sin CBC)")
+        else:
+            costs = ', '.join(f"{r['cipher']} {_cost(r)}" for r in group)
+            lines.append(f"{label}: ordenar por coste y sin CBC, ssl_ciphers '{order}' ({costs} {unit})")
+
+    for version in VERSIONS:
+        with_tickets = [r for r in valid if r['version'] == version and r['mode'] == 'resumed'
+                        and r['tickets'] == 'on' and r['reused'] >= 0.9]
+        without = [r for r in valid if r['version'] == version and r['mode'] == 'resumed'
+                   and r['tickets'] == 'off' and r['reused'] >= 0.9]
+        broken = [r for r in valid if r['version'] == version and r['mode'] == 'resumed'
+                  and r['tickets'] == 'off' and r['reused'] < 0.9]
+        if with_tickets and (without or broken):
+            on = min(_cost(r) for r in with_tickets)
+            if broken and not without:
+                lines.append(f"TLS {version}: sin tickets no hay reanudación; mantener ssl_session_tickets on")
+            else:
+                off = min(_cost(r) for r in without)
+                better = 'con tickets' if on < off * (1 - SIMILAR) else 'sin tickets' if off < on * (1 - SIMILAR) \
+                    else 'igual con y sin tickets'
+                lines.append(f"TLS {version} reanudada: {on} con tickets y {off} sin ellos ({unit}), {better}. "
+                             'Con varias réplicas del load balancer solo los tickets (con la misma '
+                             'ssl_session_ticket_key) reanudan entre réplicas')
+
+    best = max((r for r in valid if r['per_core']), key=lambda r: r['per_core'], default=None)
+    if best is not None:
+        lines.append(f"Máximo por núcleo: {_label(best)} {best['mode']}, ~{best['per_core']} conexiones/s")
+    return lines
+
+
+def format_report(result):
+    lines = [f"Destino: {result['target']}  SNI {result['server_name']}  CPU del servidor: "
+             f"{result['server_cpu'] or 'no medida'}"]
+    header = (f"{'tickets':<7} {'TLS':<3} {'suite':<27} {'mTLS':<4} {'modo':<7} {'conn/s':>8} {'p50 ms':>7} "
+              f"{'p99 ms':>7} {'reanud.':>7} {'CPU ms':>7} {'/núcleo':>7}")
+    lines += [header, '-' * len(header)]
+    for run in result['runs']:
+        cipher = run['cipher'] or (run['negotiated'] or '-').split()[-1]
+        lines.append(f"{run['tickets']:<7} {run['version']:<3} {cipher:<27} {'sí' if run['mtls'] else 'no':<4} "
+                     f"{run['mode']:<7} {run['conn_per_s'] or '-':>8} {run['handshake_ms']['p50']:>7} "
+                     f"{run['handshake_ms']['p99']:>7} {run['reused']:>7.0%} {run['server_cpu_ms'] or '-':>7} "
+                     f"{run['per_core'] or '-':>7}")
+        for error, count in run['errors'].items():
+            lines.append(f"  {count} errores: {error}")
+    if result['findings']:
+        lines.append('')
+        lines.append('Configuración de nginx:')
+        lines += [f"  {f['file']} [{f['context']}]: {f['message']}" for f in result['findings']]
+    if result['recommendations']:
+        lines.append('')
+        lines.append('Recomendaciones:')
+        lines += [f"  - {line}" for line in result['recommendations']]
+    return '\n'.join(lines)
+
+
+def add_arguments(parser):
+    parser.add_argument('--target', default='localhost:9000', metavar='HOST:PORT',
+                        help='servidor TLS; ignorado con --standin (default: %(default)s)')
+    parser.add_argument('--server-name', default='load_balancer',
+                        help='SNI y nombre a verificar, como proxy_ssl_name (default: %(default)s)')
+    parser.add_argument('--certs', default=tls.SECURE_CHANNEL_DIR,
+                        help='directorio con ca/ y certs/ (default: Secure_Channel)')
+    parser.add_argument('-k', '--insecure', action='store_true', help='no verificar el certificado del servidor')
+    parser.add_argument('--standin', action='store_true',
+                        help='auth_service stand-in con el certificado del load balancer, uno por --tickets')
+    parser.add_argument('--server-pid', type=int, default=None, help='PID del servidor para medir su CPU (/proc)')
+    parser.add_argument('--server-container', default=None, help='contenedor del servidor (cgroup v2), p. ej. '
+                                                                 'load_balancer')
+    sweep = parser.add_argument_group('configuraciones (listas separadas por comas)')
+    sweep.add_argument('--versions', default='1.2,1.3')
+    sweep.add_argument('--ciphers', default=None,
+                       help='suites TLS 1.2 (default: las de ssl_ciphers de load_balancer_nginx.conf)')
+    sweep.add_argument('--modes', default='full,resumed')
+    sweep.add_argument('--mtls', default='off', help="'off' o servicio con certs/SERVICE/client.crt "
+                                                      "(p. ej. off,api_gateway)")
+    sweep.add_argument('--tickets', default='on,off', help='session tickets del stand-in (default: %(default)s)')
+    load = parser.add_argument_group('carga')
+    load.add_argument('-n', '--connections', type=int, default=300, help='conexiones por configuración')
+    load.add_argument('-c', '--concurrency', type=int, default=4)
+    load.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--nginx-conf', action='append', default=None, metavar='CONF',
+                        help='nginx.conf a revisar (repetible; default: proxies y load balancer)')
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+
+def _split(value):
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def run(args):
+    ciphers = _split(args.ciphers) if args.ciphers else read_nginx_ciphers()
+    versions, modes, mtls_list = _split(args.versions), _split(args.modes), _split(args.mtls)
+    if any(v not in VERSIONS for v in versions) or any(m not in ('full', 'resumed') for m in modes):
+        print('--versions admite 1.2 y 1.3; --modes, full y resumed', file=sys.stderr)
+        return 2
+    tickets_list = _split(args.tickets) if args.standin else ['servidor']
+
+    tmpdir = None
+    paths = chain_paths(args.certs, next((m for m in mtls_list if m != 'off'), 'api_gateway'))
+    if args.standin and not os.path.exists(paths['server_cert']):
+        tmpdir = tempfile.TemporaryDirectory(prefix='owlboard-tls-')
+        print(f"No hay certificados en {args.certs}: se genera una cadena de prueba", flush=True)
+        paths = generate_chain(tmpdir.name, os.path.basename(os.path.dirname(paths['client_cert'])))
+    paths['insecure'] = args.insecure
+    if not args.insecure and not os.path.exists(paths['ca']):
+        print(f"No existe {paths['ca']}: usa --certs, --standin o -k", file=sys.stderr)
+        return 2
+
+    host, _, port = args.target.rpartition(':')
+    server_cpu = ServerCpu(args.server_pid, args.server_container)
+    runs = []
+    try:
+        for tickets in tickets_list:
+            proc = None
+            target = (host, int(port), args.server_name)
+            if args.standin:
+                proc, standin_host, standin_port = _start_tls_standin(
+                    paths, tickets == 'on', ':'.join(ciphers), any(m != 'off' for m in mtls_list))
+                target = (standin_host, standin_port, args.server_name)
+                server_cpu = ServerCpu(pid=proc.pid)
+            try:
+                for version in versions:
+                    for cipher in (ciphers if version == '1.2' else [None]):
+                        for mtls in mtls_list:
+                            ctx = client_context(paths, version, cipher, mtls != 'off')
+                            for mode in modes:
+                                print(f"tickets={tickets} TLS {version} {cipher or '(suites de 1.3)'} "
+                                      f"mtls={mtls} {mode}...", flush=True)
+                                result = measure(ctx, target, mode, args.connections, args.concurrency,
+                                                 args.timeout, server_cpu)
+                                runs.append({'tickets': tickets, 'version': version, 'cipher': cipher,
+                                             'mtls': mtls != 'off', 'mode': mode, **result})
+            finally:
+                if proc is not None:
+                    proc.terminate()
+                    proc.wait()
+    except (OSError, subprocess.CalledProcessError, RuntimeError, ssl.SSLError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    confs = args.nginx_conf or [os.path.join(os.path.dirname(pacing.LB_NGINX_CONF), c) for c in NGINX_CONFS]
+    result = {
+        'command': 'tls-handshake',
+        'target': 'standin' if args.standin else args.target,
+        'server_name': args.server_name,
+        'server_cpu': 'stand-in' if args.standin else server_cpu.source,
+        'runs': runs,
+        'findings': nginx_findings([c for c in confs if os.path.exists(c)]),
+        'recommendations': recommend(runs),
+    }
+    print(format_report(result))
+    output = args.output or common.default_output('tls_handshake')
+    write_json(output, result)
+    print(f"Resultados: {output}")
+    broken = [r for r in runs if r['mode'] == 'resumed' and r['connections'] and r['reused'] < 0.9
+              and r['tickets'] != 'off']
+    return 0 if runs and not broken and all(not r['errors'] for r in runs) else 1
@@ -0,0 +1,373 @@
+"""Salud de todos los servicios de docker-compose, comprobada en paralelo
+
+Lee docker-compose.yml y deriva una sonda por servicio: la URL del
+healthcheck si la tiene (proxies, load_balancer en 9000, auth_service),
+si no una conexión TCP al puerto conocido de la imagen (mysql_db,
+postgres_db, mongo_db, redis_db, rabbitmq), al que otros servicios usan
+en sus URLs o upstreams de nginx (api_gateway_N:80, nextjs_frontend:3000)
+o al documentado en el README. Todas las sondas se lanzan a la vez con
+asyncio, así que la comprobación completa tarda lo que la más lenta
+(acotada por --timeout) en vez de la suma de `docker compose ps` y curl
+uno a uno. Con --watch repite cada --interval segundos y muestra el
+historial de latencia de cada servicio para ver degradaciones al vuelo.
+
+Desde el host los servicios de la red privada no tienen puertos
+publicados: con --resolve docker (por defecto) se usan los puertos
+publicados en localhost y, para el resto, la IP del contenedor que da
+`docker inspect`; con --resolve dns se usan los nombres de servicio
+(dentro de la red de Compose, p. ej. con `docker compose run`).
+"""
+import asyncio
+import collections
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+from owlboard_bench import compose
+from owlboard_bench.stats import write_json
+from owlboard_client import AsyncAuthClient
+
+IMAGE_PORTS = {'mysql': 3306, 'postgres': 5432, 'mongo': 27017, 'redis': 6379, 'rabbitmq': 5672}
+# Puertos del README para servicios sin healthcheck ni referencias con puerto
+DOCUMENTED_PORTS = {'user_service': 5000, 'comments_service': 8001, 'chat_service': 8002, 'canvas_service': 8080}
+DEFAULT_SCHEME_PORTS = {'http': 80, 'https': 443}
+UPSTREAM_SERVER = re.compile(r'^\s*server\s+([A-Za-z0-9_.-]+):(\d+)', re.MULTILINE)
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '0.0.0.0')
+
+UP, SLOW, DOWN, SKIPPED = 'up', 'slow', 'down', 'skipped'
+SPARKS = '▁▂▃▄▅▆▇█'
+
+
+class Probe:
+    """Cómo comprobar un servicio: GET http(s) a una ruta o conexión TCP"""
+
+    __slots__ = ('service', 'kind', 'host', 'port', 'path', 'source', 'address', 'docker_state', 'client')
+
+    def __init__(self, service, kind, host, port, path='/', source=''):
+        self.service = service
+        self.kind = kind
+        self.host = host
+        self.port = port
+        self.path = path
+        self.source = source
+        # Host al que se conecta de verdad tras resolve(); None si no hay ruta
+        self.address = host
+        self.docker_state = None
+        self.client = None
+
+    @property
+    def target(self):
+        if self.port is None:
+            return '-'
+        host = self.address or self.host
+        if self.kind == 'tcp':
+            return f"tcp://{host}:{self.port}"
+        return f"{self.kind}://{host}:{self.port}{self.path}"
+
+
+def _referenced_ports(services):
+    """{servicio: puerto} según las URLs de entorno y los upstreams de nginx de los demás"""
+    ports = {}
+    for service in services.values():
+        for value in compose.environment_values(service):
+            for match in compose.URL_RE.finditer(value):
+                if match.group(3):
+                    ports.setdefault(match.group(2), int(match.group(3)))
+        for path in compose.mounted_files(service, '.conf'):
+            with open(path, encoding='utf-8', errors='replace') as fh:
+                for host, port in UPSTREAM_SERVER.findall(fh.read()):
+                    ports.setdefault(host, int(port))
+    return ports
+
+
+def _image_port(service):
+    image = service.get('image', '').rsplit('/', 1)[-1].split(':', 1)[0]
+    return IMAGE_PORTS.get(image)
+
+
+def build_probes(data):
+    services = data['services']
+    referenced = _referenced_ports(services)
+    probes = []
+    for name, service in services.items():
+        check = compose.healthcheck(service)
+        url = compose.healthcheck_url(check['test']) if check else None
+        if url is not None:
+            scheme, host, port, path = url.groups()
+            host = name if host in LOCAL_HOSTS else host
+            probes.append(Probe(name, scheme, host, int(port or DEFAULT_SCHEME_PORTS[scheme]), path or '/',
+                                'healthcheck'))
+        elif _image_port(service):
+            probes.append(Probe(name, 'tcp', name, _image_port(service), source='imagen'))
+        elif name in referenced or service.get('container_name') in referenced:
+            port = referenced.get(name, referenced.get(service.get('container_name')))
+            probes.append(Probe(name, 'tcp', name, port, source='referencia'))
+        elif name in DOCUMENTED_PORTS:
+            probes.append(Probe(name, 'tcp', name, DOCUMENTED_PORTS[name], source='README'))
+        else:
+            probes.append(Probe(name, 'tcp', None, None, source='sin puerto conocido'))
+    return probes
+
+
+def docker_inspect(names):
+    """{container_name: (ip, estado)} o {} si docker no está disponible"""
+    fmt = ('{{.Name}}|{{range .NetworkSettings.Networks}}{{.IPAddress}} {{end}}|'
+           '{{if .State.Health}}{{.State.Health.Status}}{{else}}{{.State.Status}}{{end}}')
+    try:
+        # Con contenedores inexistentes sale con error pero imprime los que sí existen
+        out = subprocess.run(['docker', 'inspect', '-f', fmt, *names], capture_output=True, text=True,
+                             timeout=5).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return {}
+    result = {}
+    for line in out.splitlines():
+        name, ips, state = (line.split('|') + ['', ''])[:3]
+        ips = ips.split()
+        result[name.lstrip('/')] = (ips[0] if ips else None, state)
+    return result
+
+
+def resolve(probes, data, mode):
+    """Traduce los nombres de servicio a direcciones alcanzables desde aquí"""
+    if mode == 'dns':
+        return
+    services = data['services']
+    containers = {p.service: services[p.service].get('container_name', p.service) for p in probes}
+    inspected = docker_inspect(list(containers.values()))
+    if not inspected:
+        print('docker inspect no disponible: solo se comprueban los puertos publicados', file=sys.stderr)
+    for probe in probes:
+        if probe.host != probe.service:
+            continue
+        ip, probe.docker_state = inspected.get(containers[probe.service], (None, None))
+        published = dict((target, host) for host, target in compose.published_ports(services[probe.service]))
+        if probe.port in published:
+            probe.address, probe.port = '127.0.0.1', published[probe.port]
+        else:
+            probe.address = ip
+
+
+def apply_targets(probes, targets):
+    """--target servicio=URL (http://, https:// o tcp://) sustituye la sonda derivada"""
+    by_service = {p.service: p for p in probes}
+    for spec in targets:
+        name, _, url = spec.partition('=')
+        match = compose.URL_RE.fullmatch(url)
+        if not name or match is None or match.group(1) not in ('http', 'https', 'tcp'):
+            raise ValueError(f"--target no válido: {spec!r} (usa servicio=http://host:puerto/ruta o tcp://host:puerto)")
+        scheme, host, port, path = match.groups()
+        if port is None and scheme == 'tcp':
+            raise ValueError(f"--target {spec!r}: tcp:// necesita puerto")
+        port = int(port or DEFAULT_SCHEME_PORTS[scheme])
+        probe = Probe(name, scheme, host, port, path or '/', 'target')
+        if name in by_service:
+            probes[probes.index(by_service[name])] = probe
+        else:
+            probes.append(probe)
+
+
+async def check(probe, timeout, slow_ms, args):
+    """Una comprobación: {'status', 'latency_ms', 'detail'}"""
+    if probe.address is None:
+        if probe.docker_state:
+            # El contenedor existe pero no tiene IP: parado o reiniciándose
+            return {'status': DOWN, 'latency_ms': None, 'detail': f"contenedor {probe.docker_state}"}
+        return {'status': SKIPPED, 'latency_ms': None, 'detail': probe.source if probe.port is None else 'sin ruta'}
+    start = time.perf_counter()
+    try:
+        if probe.kind == 'tcp':
+            _, writer = await asyncio.wait_for(asyncio.open_connection(probe.address, probe.port), timeout)
+            writer.close()
+            detail = 'conecta'
+        else:
+            if probe.client is None:
+                probe.client = AsyncAuthClient(f"{probe.kind}://{probe.address}:{probe.port}", timeout=timeout,
+                                               verify=not args.insecure, ca_file=args.ca_file, pool_size=1)
+            resp = await probe.client.request('GET', probe.path, timeout=timeout)
+            detail = f"HTTP {resp.status}"
+            if resp.status >= 400:
+                return {'status': DOWN, 'latency_ms': _ms(start), 'detail': detail}
+    except asyncio.TimeoutError:
+        return {'status': DOWN, 'latency_ms': None, 'detail': f"timeout {timeout:g}s"}
+    except (OSError, EOFError) as e:
+        return {'status': DOWN, 'latency_ms': None, 'detail': f"{type(e).__name__}: {getattr(e, 'strerror', None) or e}"}
+    latency = _ms(start)
+    return {'status': SLOW if latency > slow_ms else UP, 'latency_ms': latency, 'detail': detail}
+
+
+def _ms(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+async def check_all(probes, timeout, slow_ms, args):
+    results = await asyncio.gather(*(check(p, timeout, slow_ms, args) for p in probes))
+    return dict(zip((p.service for p in probes), results))
+
+
+def verdict(results):
+    statuses = [r['status'] for r in results.values()]
+    if DOWN in statuses:
+        return 'unhealthy'
+    if SLOW in statuses:
+        return 'degraded'
+    return 'healthy'
+
+
+EXIT_CODES = {'healthy': 0, 'degraded': 1, 'unhealthy': 2}
+
+
+def sparkline(values):
+    """Historial de latencias; × marca las comprobaciones fallidas"""
+    known = [v for v in values if v is not None]
+    if not known:
+        return '×' * len(values)
+    low, high = min(known), max(known)
+    span = (high - low) or 1.0
+    return ''.join('×' if v is None else SPARKS[int((v - low) / span * (len(SPARKS) - 1))] for v in values)
+
+
+def is_spike(latency, history, factor):
+    """Latencia actual mayor que `factor` veces la mediana reciente"""
+    known = [v for v in list(history)[:-1] if v is not None]
+    if latency is None or len(known) < 3:
+        return False
+    return latency > factor * max(statistics.median(known), 0.1)
+
+
+def format_report(probes, results, elapsed, history=None, spike=3.0):
+    width = max([len(p.target) for p in probes] + [5]) + 2
+    header = f"{'servicio':<18}{'estado':<9}{'ms':>9}  {'docker':<10}"
+    if history is not None:
+        header += f"{'historial':<{history_width(history)}}  "
+    header += 'sonda'
+    lines = [header, '-' * (len(header) + width)]
+    for probe in probes:
+        r = results[probe.service]
+        latency = f"{r['latency_ms']:.1f}" if r['latency_ms'] is not None else '-'
+        flag = '↑' if history is not None and is_spike(r['latency_ms'], history[probe.service], spike) else ' '
+        row = f"{probe.service:<18}{r['status']:<9}{latency:>8}{flag}  {(probe.docker_state or '-'):<10}"
+        if history is not None:
+            spark = sparkline(history[probe.service]) if r['status'] != SKIPPED else ''
+            row += f"{spark:<{history_width(history)}}  "
+        row += f"{probe.target:<{width}}" + ('' if r['status'] in (UP, SLOW) else r['detail'])
+        lines.append(row.rstrip())
+    counts = collections.Counter(r['status'] for r in results.values())
+    summary = ', '.join(f"{counts[s]} {s}" for s in (UP, SLOW, DOWN, SKIPPED) if counts[s])
+    lines.append(f"\nstack: {verdict(results).upper()} ({summary}) en {elapsed * 1000:.0f} ms")
+    return '\n'.join(lines)
+
+
+def history_width(history):
+    return max([len(h) for h in history.values()] + [9])
+
+
+async def watch(probes, args):
+    """Rondas hasta Ctrl+C o --count; devuelve las últimas --history y los totales"""
+    history = {p.service: collections.deque(maxlen=args.history) for p in probes}
+    # Solo se guardan las rondas recientes: en un watch de horas la lista completa crecería sin límite
+    rounds = collections.deque(maxlen=args.history)
+    totals = {'rounds': 0, 'verdicts': collections.Counter()}
+    tty = sys.stdout.isatty()
+    previous = {}
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    while not stop.is_set() and (args.count is None or totals['rounds'] < args.count):
+        started = time.monotonic()
+        results = await check_all(probes, min(args.timeout, args.interval), args.slow, args)
+        elapsed = time.monotonic() - started
+        for name, r in results.items():
+            history[name].append(r['latency_ms'])
+        state = verdict(results)
+        rounds.append({'time': time.time(), 'verdict': state, 'results': results})
+        totals['rounds'] += 1
+        totals['verdicts'][state] += 1
+        if tty:
+            print('\x1b[H\x1b[J' + time.strftime('%H:%M:%S\n')
+                  + format_report(probes, results, elapsed, history, args.spike), flush=True)
+        else:
+            # Sin terminal: una línea por ronda más los cambios de estado y los picos
+            slowest = max(results, key=lambda n: results[n]['latency_ms'] or 0)
+            print(f"{time.strftime('%H:%M:%S')} {verdict(results):<9} {elapsed * 1000:5.0f} ms  "
+                  f"más lento: {slowest} {results[slowest]['latency_ms'] or 0:.1f} ms", flush=True)
+            for name, r in results.items():
+                if name in previous and previous[name] != r['status']:
+                    print(f"  {name}: {previous[name]} -> {r['status']} ({r['detail']})", flush=True)
+                elif is_spike(r['latency_ms'], history[name], args.spike):
+                    print(f"  {name}: pico de {r['latency_ms']:.1f} ms", flush=True)
+        previous = {name: r['status'] for name, r in results.items()}
+        try:
+            await asyncio.wait_for(stop.wait(), max(0.0, args.interval - (time.monotonic() - started)))
+        except asyncio.TimeoutError:
+            pass
+    return list(rounds), {'rounds': totals['rounds'], 'verdicts': dict(totals['verdicts'])}
+
+
+async def run_checks(args):
+    data = compose.load(args.compose_file)
+    probes = build_probes(data)
+    resolve(probes, data, args.resolve)
+    apply_targets(probes, args.target)
+    if args.service:
+        probes = [p for p in probes if p.service in args.service]
+    try:
+        if args.watch:
+            rounds, totals = await watch(probes, args)
+            results = rounds[-1]['results'] if rounds else {}
+            return probes, results, rounds, totals
+        started = time.monotonic()
+        results = await check_all(probes, args.timeout, args.slow, args)
+        print(format_report(probes, results, time.monotonic() - started))
+        return probes, results, None, None
+    finally:
+        await asyncio.gather(*(p.client.close() for p in probes if p.client is not None))
+
+
+def add_arguments(parser):
+    parser.add_argument('--compose-file', default=compose.COMPOSE_FILE, help='default: docker-compose.yml del repo')
+    parser.add_argument('--resolve', choices=('docker', 'dns'), default='docker',
+                        help='docker: puertos publicados e IPs de docker inspect; dns: nombres de servicio')
+    parser.add_argument('--service', action='append', default=[], metavar='NAME',
+                        help='comprobar solo estos servicios (repetible)')
+    parser.add_argument('--target', action='append', default=[], metavar='SERVICE=URL',
+                        help='sonda explícita, p. ej. auth_service=http://10.0.0.5:8000/health (repetible)')
+    parser.add_argument('--timeout', type=float, default=0.8, help='timeout por sonda en s (default: %(default)s)')
+    parser.add_argument('--slow', type=float, default=250.0, metavar='MS',
+                        help='latencia a partir de la cual un servicio cuenta como lento (default: %(default)s)')
+    parser.add_argument('-k', '--insecure', action='store_true', help='no verificar certificados (Secure_Channel)')
+    parser.add_argument('--ca-file', default=None)
+    watching = parser.add_argument_group('modo watch')
+    watching.add_argument('--watch', action='store_true', help='repetir hasta Ctrl+C mostrando el historial')
+    watching.add_argument('--interval', type=float, default=1.0, help='segundos entre rondas (default: %(default)s)')
+    watching.add_argument('--count', type=int, default=None, help='parar tras N rondas')
+    watching.add_argument('--history', type=int, default=40, help='rondas en el historial y en el JSON (default: %(default)s)')
+    watching.add_argument('--spike', type=float, default=3.0,
+                          help='marcar latencias mayores que N veces la mediana reciente (default: %(default)s)')
+    parser.add_argument('-o', '--output', default=None, help='guardar el resultado en JSON')
+
+
+def run(args):
+    if not os.path.isfile(args.compose_file):
+        print(f"No existe {args.compose_file}", file=sys.stderr)
+        return 2
+    try:
+        probes, results, rounds, totals = asyncio.run(run_checks(args))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    state = verdict(results)
+    if args.output:
+        write_json(args.output, {
+            'verdict': state,
+            'probes': {p.service: {'target': p.target, 'source': p.source, 'docker': p.docker_state} for p in probes},
+            'results': results,
+            'rounds': rounds,
+            'watch': totals,
+        })
+        print(f"Resultados en {args.output}")
+    return EXIT_CODES[state]
@@ -0,0 +1,322 @@
+"""Ataque de fuerza bruta contra /auth/login con y sin bloqueo por cuenta e IP
+
+Simula credential stuffing: `-c` workers prueban contraseñas erróneas
+contra `--accounts` cuentas víctima desde `--ips` IPs distintas (cabecera
+X-Forwarded-For, la que load_balancer reenvía a auth_service), mientras
+`--legit-concurrency` workers hacen logins correctos de usuarios legítimos
+desde sus propias IPs. Informa intentos por segundo, códigos de estado
+(401: contraseña verificada y errónea; 429: bloqueado), latencias y, con
+/metrics, cuántos logins llegaron a bcrypt.
+
+Con --standin se ejecuta dos veces, sin y con bloqueo (MemoryLockout, o
+el script Lua de LoginLockout con --redis-url), con las víctimas creadas
+con el coste bcrypt de --bcrypt-rounds. Con bloqueo comprueba que ninguna
+cuenta supera MAX_LOGIN_ATTEMPTS intentos verificados ni ninguna IP
+MAX_LOGIN_ATTEMPTS_PER_IP en la ventana, y que ningún usuario legítimo
+queda bloqueado.
+
+Con --direct no hay HTTP: `-c` hilos llaman a `acquire()` a la vez sobre
+una sola cuenta y sobre una sola IP y se comprueba que pasan exactamente
+los intentos permitidos; con --redis-url verifica la atomicidad del
+script Lua en un Redis real.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import random
+import sys
+import threading
+import time
+import uuid
+
+from owlboard_auth.lockout import (LOCKOUT_DURATION_MINUTES, MAX_LOGIN_ATTEMPTS, MAX_LOGIN_ATTEMPTS_PER_IP,
+                                   LoginLockout, MemoryLockout)
+from owlboard_bench import common, seed
+from owlboard_bench.auth import Budget
+from owlboard_bench.revocation import delete_prefix
+from owlboard_bench.stats import StreamingHistogram, write_json
+from owlboard_client import AsyncAuthClient
+
+DEFAULT_REDIS_URL = 'redis://:password@localhost:6379/15'
+
+
+def attacker_ips(count):
+    return [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(1, count + 1)]
+
+
+class AttackStats:
+    """Resultados por clase de tráfico, cuenta e IP"""
+
+    def __init__(self):
+        self.statuses = {'attack': collections.Counter(), 'legit': collections.Counter()}
+        self.latency = collections.defaultdict(StreamingHistogram)
+        self.verified_by_account = collections.Counter()
+        self.verified_by_ip = collections.Counter()
+
+    def add(self, kind, email, ip, status, seconds):
+        self.statuses[kind][status] += 1
+        self.latency[f"{kind} {status}"].add(seconds)
+        # Todo lo que no es 429 pasó el bloqueo y llegó a MySQL y bcrypt
+        if isinstance(status, int) and status != 429:
+            self.verified_by_ip[ip] += 1
+            if kind == 'attack':
+                self.verified_by_account[email] += 1
+
+
+async def attempt(client, stats, kind, email, password, ip, timeout):
+    start = time.perf_counter()
+    try:
+        resp = await client.request('POST', '/auth/login', {'email': email, 'password': password},
+                                    headers={'X-Forwarded-For': ip}, timeout=timeout)
+        status = resp.status
+    except asyncio.TimeoutError:
+        status = 'timeout'
+    except (OSError, asyncio.IncompleteReadError) as e:
+        status = type(e).__name__
+    stats.add(kind, email, ip, status, time.perf_counter() - start)
+
+
+async def attack(client, victims, ips, legit, args):
+    stats = AttackStats()
+    budget = Budget(args.duration, args.requests)
+    rng = random.Random(args.seed)
+
+    async def attacker():
+        while budget.take():
+            await attempt(client, stats, 'attack', rng.choice(victims), f"wrong-{rng.getrandbits(32):08x}",
+                          rng.choice(ips), args.timeout)
+
+    async def legitimate(offset):
+        i = offset
+        while budget.take():
+            email, password, ip = legit[i % len(legit)]
+            await attempt(client, stats, 'legit', email, password, ip, args.timeout)
+            i += args.legit_concurrency
+
+    start = time.perf_counter()
+    workers = [attacker() for _ in range(args.concurrency)]
+    if legit:
+        workers += [legitimate(i) for i in range(args.legit_concurrency)]
+    await asyncio.gather(*workers)
+    return stats, time.perf_counter() - start
+
+
+async def bcrypt_count(client):
+    """Logins que han pasado por la etapa bcrypt según /metrics, o None sin Server-Timing"""
+    try:
+        resp = await client.request('GET', '/metrics?format=json')
+        return resp.json().get('/auth/login', {}).get('bcrypt', {}).get('count', 0) if resp.ok else None
+    except (OSError, ValueError, asyncio.TimeoutError):
+        return None
+
+
+def summarize(name, stats, elapsed, bcrypt, lockout):
+    attack_total = sum(stats.statuses['attack'].values())
+    legit = stats.statuses['legit']
+    max_account = max(stats.verified_by_account.values(), default=0)
+    max_ip = max(stats.verified_by_ip.values(), default=0)
+    result = {
+        'phase': name,
+        'lockout': lockout,
+        'elapsed_s': round(elapsed, 3),
+        'attempts': attack_total,
+        'attempts_per_s': round(attack_total / elapsed, 1) if elapsed else None,
+        'attack_statuses': {str(k): v for k, v in sorted(stats.statuses['attack'].items(), key=str)},
+        'legit_statuses': {str(k): v for k, v in sorted(legit.items(), key=str)},
+        'legit_locked_out': legit[429],
+        'verified_max_per_account': max_account,
+        'verified_max_per_ip': max_ip,
+        'bcrypt_verifications': bcrypt,
+        'latency_ms': {key: h.summary_ms() for key, h in sorted(stats.latency.items())},
+    }
+    if lockout:
+        result['account_violations'] = sum(1 for n in stats.verified_by_account.values()
+                                           if n > lockout['max_attempts'])
+        result['ip_violations'] = sum(1 for n in stats.verified_by_ip.values() if n > lockout['max_ip_attempts'])
+    return result
+
+
+def format_phase(row):
+    lines = [f"{row['phase']}: {row['attempts']} intentos en {row['elapsed_s']} s ({row['attempts_per_s']}/s)",
+             f"  ataque {row['attack_statuses']}  legítimos {row['legit_statuses']}"]
+    if row['bcrypt_verifications'] is not None:
+        lines.append(f"  logins que llegaron a bcrypt: {row['bcrypt_verifications']}")
+    lines.append(f"  máximo verificado por cuenta {row['verified_max_per_account']}, "
+                 f"por IP {row['verified_max_per_ip']}")
+    if row['lockout']:
+        lines.append(f"  cuentas por encima de {row['lockout']['max_attempts']}: {row['account_violations']}, "
+                     f"IPs por encima de {row['lockout']['max_ip_attempts']}: {row['ip_violations']}, "
+                     f"legítimos bloqueados: {row['legit_locked_out']}")
+    for key, lat in row['latency_ms'].items():
+        lines.append(f"  {key:<14} n={lat['count']:<7} p50 {lat['p50']:>8} ms  p99 {lat['p99']:>8} ms")
+    return '\n'.join(lines)
+
+
+def phase_ok(row):
+    if not row['lockout']:
+        return True
+    return not (row['account_violations'] or row['ip_violations'] or row['legit_locked_out'])
+
+
+def lockout_limits(args):
+    return {'max_attempts': args.max_login_attempts, 'max_ip_attempts': args.max_ip_attempts,
+            'window': args.lockout_minutes * 60, 'lockout': args.lockout_minutes * 60}
+
+
+def make_lockout(args, redis_client, prefix):
+    if redis_client is None:
+        return MemoryLockout(**lockout_limits(args))
+    return LoginLockout(redis_client, prefix=prefix, **lockout_limits(args))
+
+
+def connect_redis(args):
+    if not args.redis_url:
+        return None
+    import redis
+
+    return redis.Redis.from_url(args.redis_url)
+
+
+def run_direct(args, redis_client, prefix):
+    """`-c` hilos sobre una cuenta (IPs distintas) y sobre una IP (cuentas distintas)"""
+    lockout = make_lockout(args, redis_client, prefix)
+    calls = args.requests or 1000
+    checks = []
+    for scope, limit in (('account', args.max_login_attempts), ('ip', args.max_ip_attempts)):
+        histogram = StreamingHistogram()
+        allowed = collections.Counter()
+        merge = threading.Lock()
+        run_id = uuid.uuid4().hex[:8]
+
+        def call(i):
+            account, ip = (f"victim-{run_id}", f"ip-{run_id}-{i}") if scope == 'account' else \
+                (f"user-{run_id}-{i}", f"ip-{run_id}")
+            start = time.perf_counter()
+            decision = lockout.acquire(account, ip)
+            seconds = time.perf_counter() - start
+            with merge:
+                histogram.add(seconds)
+                allowed[decision.allowed] += 1
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(call, range(calls)))
+        elapsed = time.perf_counter() - start
+        checks.append({
+            'scope': scope,
+            'calls': calls,
+            'allowed': allowed[True],
+            'expected_allowed': min(limit, calls),
+            'calls_per_s': round(calls / elapsed, 1) if elapsed else None,
+            'latency_ms': histogram.summary_ms(),
+        })
+    return checks
+
+
+def run_attack(args, redis_client, prefix):
+    rng = random.Random(args.seed)
+    ips = attacker_ips(args.ips)
+    victims = args.victim or [email for email, _, _ in seed.generate_users(
+        args.accounts, seed=f"lockout-{args.seed}", domain='victims.owlboard.com')]
+    phases = []
+    with common.standin_from_args(args) as server:
+        if server is None:
+            legit = [(args.email, args.password, '192.168.250.1')]
+            phases.append(run_phase(args, 'stack', victims, ips, legit, None))
+            return phases
+        print(f"Creando {len(victims)} víctimas y {args.legit_users} usuarios legítimos "
+              f"(bcrypt coste {args.bcrypt_rounds})...", flush=True)
+        users = seed.generate_users(len(victims) + args.legit_users, seed=f"lockout-{args.seed}",
+                                    domain='victims.owlboard.com')
+        hashes = seed.hash_passwords([password for _, password, _ in users], args.bcrypt_rounds)
+        for (email, _, full_name), hashed in zip(users, hashes):
+            server.users.add(email, full_name=full_name, hashed_password=hashed)
+        legit = [(email, password, f"192.168.{i // 256}.{i % 256}")
+                 for i, (email, password, _) in enumerate(users[len(victims):], 1)]
+        rng.shuffle(legit)
+        for name, lockout in (('sin bloqueo', None), ('con bloqueo', make_lockout(args, redis_client, prefix))):
+            server.lockout = lockout
+            phases.append(run_phase(args, name, victims, ips, legit, lockout))
+    return phases
+
+
+def run_phase(args, name, victims, ips, legit, lockout):
+    async def main():
+        client = common.client_from_args(AsyncAuthClient, args, args.concurrency + args.legit_concurrency)
+        async with client:
+            before = await bcrypt_count(client)
+            stats, elapsed = await attack(client, victims, ips, legit, args)
+            after = await bcrypt_count(client)
+        return stats, elapsed, after - before if before is not None and after is not None else None
+
+    print(f"Fase {name}...", flush=True)
+    stats, elapsed, bcrypt = asyncio.run(main())
+    limits = lockout_limits(args) if lockout is not None or name == 'stack' else None
+    return summarize(name, stats, elapsed, bcrypt, limits)
+
+
+def add_arguments(parser):
+    common.add_client_arguments(parser)
+    common.add_standin_arguments(parser)
+    parser.add_argument('--direct', action='store_true', help='sin HTTP: hilos contra acquire() directamente')
+    parser.add_argument('--redis-url', default=None,
+                        help=f"ventanas en Redis con el script Lua (p. ej. {DEFAULT_REDIS_URL}); "
+                             'sin ella, MemoryLockout')
+    parser.add_argument('-c', '--concurrency', type=int, default=64, help='atacantes concurrentes (default: %(default)s)')
+    parser.add_argument('-d', '--duration', type=float, default=None, help='duración por fase (default: 10 si no se da -n)')
+    parser.add_argument('-n', '--requests', type=int, default=None, help='intentos por fase (o llamadas con --direct)')
+    parser.add_argument('--accounts', type=int, default=20, help='cuentas víctima (default: %(default)s)')
+    parser.add_argument('--victim', action='append', default=[], metavar='EMAIL',
+                        help='cuenta víctima concreta en lugar de las generadas (repetible)')
+    parser.add_argument('--ips', type=int, default=200, help='IPs del atacante (default: %(default)s)')
+    parser.add_argument('--legit-concurrency', type=int, default=2, help='workers de logins legítimos')
+    parser.add_argument('--legit-users', type=int, default=10, help='usuarios legítimos con el stand-in')
+    parser.add_argument('--email', default='test@owlboard.com', help='usuario legítimo contra el stack')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--bcrypt-rounds', type=int, default=10,
+                        help='coste bcrypt de los usuarios del stand-in (producción: 12; default: %(default)s)')
+    parser.add_argument('--max-login-attempts', type=int, default=MAX_LOGIN_ATTEMPTS)
+    parser.add_argument('--max-ip-attempts', type=int, default=MAX_LOGIN_ATTEMPTS_PER_IP)
+    parser.add_argument('--lockout-minutes', type=float, default=LOCKOUT_DURATION_MINUTES,
+                        help='ventana y bloqueo; debe superar la duración para comprobar los límites')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+
+def run(args):
+    if args.duration is None and args.requests is None and not args.direct:
+        args.duration = 10.0
+    try:
+        redis_client = connect_redis(args)
+        if redis_client is not None:
+            redis_client.ping()
+    except ImportError as e:
+        print(f"Falta un paquete: {e.name} (pip install -r requirements-dev.txt)", file=sys.stderr)
+        return 2
+    except Exception as e:  # noqa: BLE001 - cualquier fallo de conexión se informa igual
+        print(f"No se puede conectar a Redis ({args.redis_url}): {e}", file=sys.stderr)
+        return 2
+    prefix = f"lockout-bench:{uuid.uuid4().hex[:8]}:"
+    result = {'command': 'lockout', 'store': 'redis' if redis_client is not None else 'memory',
+              'limits': lockout_limits(args)}
+    try:
+        if args.direct:
+            result['direct'] = run_direct(args, redis_client, prefix)
+            ok = all(row['allowed'] == row['expected_allowed'] for row in result['direct'])
+            for row in result['direct']:
+                lat = row['latency_ms']
+                print(f"{row['scope']:<8} {row['calls']} llamadas desde {args.concurrency} hilos: "
+                      f"{row['allowed']} permitidas (esperadas {row['expected_allowed']})  "
+                      f"{row['calls_per_s']}/s  p50 {lat['p50']} ms  p99 {lat['p99']} ms")
+        else:
+            result['phases'] = run_attack(args, redis_client, prefix)
+            result['target'] = args.url
+            ok = all(phase_ok(row) for row in result['phases'])
+            print('\n'.join(format_phase(row) for row in result['phases']))
+    finally:
+        if redis_client is not None:
+            delete_prefix(redis_client, prefix)
+    output = args.output or common.default_output('lockout')
+    write_json(output, result)
+    print(f"Resultados: {output}")
+    return 0 if ok else 1
@@ -0,0 +1,161 @@
+"""Sonda de diagnóstico del Auth Service con tiempos por fase de red
+
+Recorre health → login → validate → introspect → refresh → revoke →
+validate (token revocado) repitiendo cada paso K veces, cada vez por una
+conexión nueva, y mide DNS, conexión TCP, handshake TLS, tiempo hasta el
+primer byte y transferencia. Si el servidor envía `Server-Timing` se
+desglosa también el tiempo interno de cada paso.
+"""
+import json
+import statistics
+
+from owlboard_bench import common
+from owlboard_bench.stats import percentile, write_json
+from owlboard_client import tls
+from owlboard_client.timing import PHASES, timed_request
+
+
+class Step:
+    def __init__(self, name, method, path, payload=None, check=None, update=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.payload = payload or (lambda state: None)
+        self.check = check or (lambda data: True)
+        self.update = update
+
+
+def _save_tokens(state, data):
+    state['access_token'] = data['access_token']
+    state['refresh_token'] = data['refresh_token']
+
+
+def build_steps(email, password):
+    return [
+        Step('health', 'GET', '/health'),
+        Step('login', 'POST', '/auth/login', lambda s: {'email': email, 'password': password},
+             lambda d: 'access_token' in d, _save_tokens),
+        Step('validate', 'POST', '/auth/token/validate', lambda s: {'token': s['access_token']},
+             lambda d: d.get('valid') is True),
+        Step('introspect', 'POST', '/auth/token/introspect', lambda s: {'token': s['access_token']},
+             lambda d: d.get('active') is True),
+        Step('refresh', 'POST', '/auth/token/refresh', lambda s: {'refresh_token': s['refresh_token']},
+             lambda d: 'access_token' in d, _save_tokens),
+        Step('revoke', 'POST', '/auth/token/revoke',
+             lambda s: {'token': s['access_token'], 'token_type': 'access'}, lambda d: d.get('revoked') is True),
+        Step('validate_revoked', 'POST', '/auth/token/validate', lambda s: {'token': s['access_token']},
+             lambda d: d.get('valid') is False),
+    ]
+
+
+def run_step(step, state, base_url, repeat, timeout, ssl_context, sessions):
+    samples = []
+    failures = []
+    for _ in range(repeat):
+        try:
+            resp = timed_request(base_url + step.path, step.method, step.payload(state), timeout=timeout,
+                                 ssl_context=ssl_context, sessions=sessions)
+        except OSError as e:
+            failures.append(f"{type(e).__name__}: {e}")
+            continue
+        try:
+            data = resp.json()
+        except ValueError:
+            data = None
+        ok = resp.status < 400 and (step.check(data) if isinstance(data, dict) else step.check({}))
+        if ok and step.update:
+            step.update(state, data)
+        if not ok:
+            failures.append(f"HTTP {resp.status}: {resp.body[:200].decode('utf-8', 'replace')}")
+        samples.append({
+            'status': resp.status,
+            'ok': ok,
+            'tls_version': resp.tls_version,
+            'tls_resumed': resp.tls_resumed,
+            'timings_ms': {phase: round(resp.timings[phase] * 1000, 3) for phase in PHASES},
+            'server_timing': resp.server_timing,
+        })
+    return summarize(step.name, samples, failures)
+
+
+def summarize(name, samples, failures):
+    phases = {}
+    for phase in PHASES:
+        values = sorted(s['timings_ms'][phase] for s in samples)
+        phases[phase] = {
+            'median': round(statistics.median(values), 3) if values else None,
+            'p95': round(percentile(values, 95), 3) if values else None,
+        }
+    server = {}
+    for sample in samples:
+        for metric in sample['server_timing']:
+            if metric['dur'] is not None:
+                server.setdefault(metric['name'], []).append(metric['dur'])
+    return {
+        'step': name,
+        'ok': not failures and bool(samples),
+        'failures': failures,
+        'phases_ms': phases,
+        'server_timing_ms': {k: round(statistics.median(v), 3) for k, v in server.items()},
+        'samples': samples,
+    }
+
+
+def format_table(results, repeat):
+    cols = PHASES
+    header = f"{'paso':<18}{'ok':>4}" + ''.join(f"{c:>10}" for c in cols) + f"{'total p95':>11}"
+    lines = [header, '-' * len(header)]
+    for row in results:
+        med = row['phases_ms']
+        cells = ''.join(f"{med[c]['median']:>10.2f}" if med[c]['median'] is not None else f"{'-':>10}" for c in cols)
+        p95 = med['total']['p95']
+        lines.append(f"{row['step']:<18}{'si' if row['ok'] else 'NO':>4}{cells}"
+                     + (f"{p95:>11.2f}" if p95 is not None else f"{'-':>11}"))
+    lines.append(f"(mediana en ms de {repeat} repeticiones; ttfb = desde el envío hasta el primer byte)")
+    timed = [row for row in results if row['server_timing_ms']]
+    if timed:
+        lines.append('\nServer-Timing (mediana ms):')
+        for row in timed:
+            parts = ', '.join(f"{k}={v:g}" for k, v in row['server_timing_ms'].items())
+            lines.append(f"  {row['step']:<18}{parts}")
+    for row in results:
+        for failure in row['failures'][:3]:
+            lines.append(f"  ! {row['step']}: {failure}")
+    return '\n'.join(lines)
+
+
+def add_arguments(parser):
+    common.add_client_arguments(parser)
+    common.add_standin_arguments(parser)
+    parser.add_argument('-K', '--repeat', type=int, default=5, help='repeticiones por paso (default: %(default)s)')
+    parser.add_argument('--resume', action='store_true',
+                        help='reanudar la sesión TLS entre repeticiones (mide el handshake abreviado)')
+    parser.add_argument('--email', default='test@owlboard.com')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--json', action='store_true', help='imprimir JSON en vez de la tabla')
+    parser.add_argument('-o', '--output', default=None, help='guardar también el JSON en este fichero')
+
+
+def run(args):
+    with common.standin_from_args(args, [(args.email, args.password, '')]):
+        base_url = args.url.rstrip('/')
+        ssl_context = common.ssl_context_from_args(args) if base_url.startswith('https') else None
+        sessions = tls.SessionCache() if args.resume else None
+        state = {}
+        results = []
+        for step in build_steps(args.email, args.password):
+            results.append(run_step(step, state, base_url, args.repeat, args.timeout, ssl_context, sessions))
+            if step.name == 'login' and 'access_token' not in state:
+                break
+
+    report = {'command': 'probe', 'target': base_url, 'repeat': args.repeat,
+              'ok': all(r['ok'] for r in results), 'steps': results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Sonda de {base_url} ({args.repeat} repeticiones por paso)\n")
+        print(format_table(results, args.repeat))
+        print(f"\nResultado: {'OK' if report['ok'] else 'FALLOS'}")
+    if args.output:
+        write_json(args.output, report)
+    return 0 if report['ok'] else 1
@@ -0,0 +1,197 @@
+"""Graba una traza de tráfico desde un proxy o desde el access.log de nginx
+
+En modo proxy escucha en --listen, reenvía cada petición a --upstream y
+guarda método, ruta, cuerpo saneado, estado, latencia y tiempo entre
+llegadas; los usuarios se identifican por el email del login y por los
+tokens que recibieron. Desde un access.log (formato `main` de
+load_balancer_nginx.conf) no hay cuerpos y los usuarios son las IPs de
+origen; como $time_local tiene resolución de segundos, las peticiones de
+un mismo segundo se reparten uniformemente dentro de él.
+"""
+import asyncio
+import json
+import signal
+import time
+
+from owlboard_bench import access_log
+from owlboard_bench.trace import TraceWriter, UserMap, sanitize
+from owlboard_client import AsyncAuthClient, tls
+from owlboard_standin.http import HTTPError, HTTPServer, Response
+
+# Cabeceras que el proxy reenvía al upstream; el resto las pone el cliente
+FORWARDED_HEADERS = ('authorization', 'content-type', 'accept', 'x-request-id')
+TOKEN_FIELDS = ('token', 'refresh_token', 'access_token')
+
+
+class Recorder:
+    """Convierte peticiones observadas en eventos de traza"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.users = UserMap()
+        self.start = None
+        self.last = None
+
+    def _json(self, data):
+        if not data:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def user_for(self, client, body, authorization):
+        if authorization.lower().startswith('bearer '):
+            return self.users.get(('token', authorization[7:].strip()))
+        if isinstance(body, dict):
+            if isinstance(body.get('email'), str):
+                return self.users.get(('email', body['email']))
+            for field in TOKEN_FIELDS:
+                if isinstance(body.get(field), str):
+                    return self.users.get(('token', body[field]))
+        return self.users.get(('client', client))
+
+    def record(self, when, client, method, target, request_body=None, authorization='', status=None,
+               response_body=None, latency=None):
+        if self.start is None:
+            self.start = self.last = when
+        body = self._json(request_body)
+        user = self.user_for(client, body, authorization)
+        # Los tokens emitidos quedan asociados al usuario que los pidió
+        issued = self._json(response_body)
+        if isinstance(issued, dict):
+            for field in TOKEN_FIELDS:
+                if isinstance(issued.get(field), str):
+                    self.users.alias(('token', issued[field]), user)
+        event = {
+            't': round(when - self.start, 6),
+            'dt': round(max(0.0, when - self.last), 6),
+            'user': user,
+            'method': method,
+            'path': target,
+            'body': sanitize(body) if body is not None else None,
+        }
+        if authorization:
+            event['auth'] = True
+        if status is not None:
+            event['status'] = status
+        if latency is not None:
+            event['latency'] = round(latency, 6)
+        self.last = max(self.last, when)
+        self.writer.write(event)
+
+
+def record_access_log(paths, writer):
+    """Eventos desde access.log en orden; devuelve líneas sin formato"""
+    recorder = Recorder(writer)
+    unparsed = 0
+    pending = []
+
+    def flush():
+        for i, entry in enumerate(pending):
+            when = entry['time'] + (i + 0.5) / len(pending)
+            latency = entry['upstream_times'][-1] if entry['upstream_times'] else entry['request_time']
+            recorder.record(when, entry['remote'], entry['method'], entry['target'],
+                            status=entry['status'], latency=latency)
+        pending.clear()
+
+    for path in paths:
+        with access_log.open_log(path) as fh:
+            for line in fh:
+                entry = access_log.parse_line(line)
+                if entry is None or not entry['method']:
+                    unparsed += 1
+                    continue
+                if pending and entry['time'] != pending[0]['time']:
+                    flush()
+                pending.append(entry)
+    flush()
+    return unparsed
+
+
+class RecordingProxy:
+    """Proxy HTTP que graba cada petición antes de devolver la respuesta"""
+
+    def __init__(self, upstream, recorder, host='127.0.0.1', port=8080):
+        self.upstream = upstream
+        self.recorder = recorder
+        self.http = HTTPServer(host, port)
+        self.http.fallback = self.forward
+
+    @property
+    def url(self):
+        return self.http.url
+
+    async def start(self):
+        await self.http.start()
+        return self
+
+    async def close(self):
+        await self.http.close()
+        await self.upstream.close()
+
+    async def forward(self, request):
+        headers = {k: v for k, v in request.headers.items() if k in FORWARDED_HEADERS}
+        when = time.monotonic()
+        try:
+            resp = await self.upstream.request(request.method, request.target, headers=headers,
+                                               data=request.body or None)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise HTTPError(502, f"Upstream error: {type(e).__name__}") from None
+        self.recorder.record(when, request.peer[0] if request.peer else '-', request.method, request.target,
+                             request.body, request.headers.get('authorization', ''), resp.status, resp.body,
+                             resp.elapsed)
+        out = {k: v for k, v in resp.headers.items()
+               if k not in ('connection', 'keep-alive', 'content-length', 'transfer-encoding', 'content-type')}
+        return Response(resp.status, resp.body, out, resp.headers.get('content-type', 'application/json'))
+
+
+async def run_proxy(args, writer):
+    upstream = AsyncAuthClient(args.upstream, timeout=args.timeout, verify=not args.insecure,
+                               ca_file=args.ca_file, pool_size=args.connections)
+    host, _, port = args.listen.rpartition(':')
+    proxy = await RecordingProxy(upstream, Recorder(writer), host or '127.0.0.1', int(port)).start()
+    print(f"Grabando: apunta los clientes a {proxy.url} (upstream {args.upstream}); Ctrl+C para terminar",
+          flush=True)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await asyncio.wait_for(stop.wait(), args.duration)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await proxy.close()
+    return proxy.recorder
+
+
+def add_arguments(parser):
+    parser.add_argument('-o', '--output', required=True,
+                        help='traza de salida: .jsonl, .jsonl.gz o .msgpack')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--proxy', action='store_true', help='grabar como proxy entre los clientes y --upstream')
+    source.add_argument('--access-log', nargs='+', metavar='PATH',
+                        help='grabar desde access.log de nginx (.gz admitido; varios en orden cronológico)')
+
+    proxy = parser.add_argument_group('modo proxy')
+    proxy.add_argument('--listen', default='127.0.0.1:8080', help='dirección del proxy (default: %(default)s)')
+    proxy.add_argument('--upstream', default=tls.DEFAULT_BASE_URL, help='destino (default: %(default)s)')
+    proxy.add_argument('--duration', type=float, default=None, help='segundos de grabación (default: hasta Ctrl+C)')
+    proxy.add_argument('--connections', type=int, default=32, help='conexiones máximas al upstream')
+    proxy.add_argument('-k', '--insecure', action='store_true', help='no verificar el certificado del upstream')
+    proxy.add_argument('--ca-file', default=None)
+    proxy.add_argument('--timeout', type=float, default=60.0)
+
+
+def run(args):
+    source = 'proxy' if args.proxy else 'access_log'
+    with TraceWriter(args.output, {'source': source, 'created': time.time()}) as writer:
+        if args.proxy:
+            asyncio.run(run_proxy(args, writer))
+            unparsed = 0
+        else:
+            unparsed = record_access_log(args.access_log, writer)
+    print(f"{writer.count} peticiones grabadas en {args.output}"
+          + (f" ({unparsed} líneas sin formato ignoradas)" if unparsed else ''))
+    return 0
@@ -0,0 +1,307 @@
+"""Reproduce una traza grabada a 1x, Nx o a la máxima velocidad
+
+Cada usuario de la traza se convierte en un usuario virtual con sus
+propias credenciales (--credentials de `seed`, o el usuario de prueba) y
+sus propios tokens: el login y el refresh los renuevan, y las peticiones
+que los necesitan antes del primer login hacen uno implícito. Los eventos
+de un usuario se ejecutan en orden; con --speed N el instante de cada uno
+es t/N y se mide cuánto se retrasa respecto a ese plan (lag). --multiply
+clona cada usuario grabado para amplificar la carga. Con --compare se
+comparan los p99 con una ejecución anterior y se sale con código 1 si
+alguno empeora más de --max-regression.
+"""
+import asyncio
+import collections
+import json
+import random
+import re
+import time
+
+from owlboard_bench import common, seed
+from owlboard_bench.auth import is_rate_limited
+from owlboard_bench.stats import LatencyStats, StreamingHistogram, write_json
+from owlboard_bench.trace import (ACCESS_TOKEN, EMAIL, PASSWORD, REFRESH_TOKEN, fill, read_trace, token_type,
+                                  uses)
+from owlboard_client import AsyncAuthClient
+
+LOGIN_PATH = '/auth/login'
+REFRESH_PATH = '/auth/token/refresh'
+REVOKE_PATH = '/auth/token/revoke'
+# Cuerpos para eventos sin cuerpo grabado (trazas desde access.log)
+DEFAULT_BODIES = {
+    ('POST', LOGIN_PATH): {'email': EMAIL, 'password': PASSWORD},
+    ('POST', '/auth/token/validate'): {'token': ACCESS_TOKEN},
+    ('POST', '/auth/token/introspect'): {'token': ACCESS_TOKEN},
+    ('POST', REFRESH_PATH): {'refresh_token': REFRESH_TOKEN},
+    ('POST', REVOKE_PATH): {'token': ACCESS_TOKEN},
+}
+ID_SEGMENT = re.compile(r'/(?:\d+|[0-9a-fA-F-]{16,})(?=/|$)')
+QUEUE_SIZE = 1000
+LOOKAHEAD = 1.0
+
+
+def endpoint_name(method, target):
+    """'GET /api/users/42?x=1' -> 'GET /api/users/{id}'"""
+    return f"{method} {ID_SEGMENT.sub('/{id}', target.split('?', 1)[0])}"
+
+
+def parse_speed(value):
+    if value in ('max', 'inf'):
+        return None
+    speed = float(value.rstrip('x'))
+    if speed <= 0:
+        raise ValueError('la velocidad debe ser positiva')
+    return speed
+
+
+class VirtualUser:
+    """Credenciales y tokens de un usuario grabado durante la reproducción"""
+
+    def __init__(self, name, email, password):
+        self.name = name
+        self.email = email
+        self.password = password
+        self.access_token = None
+        self.refresh_token = None
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def values(self):
+        return {EMAIL: self.email, PASSWORD: self.password,
+                ACCESS_TOKEN: self.access_token, REFRESH_TOKEN: self.refresh_token}
+
+    def store(self, data):
+        if isinstance(data, dict):
+            self.access_token = data.get('access_token', self.access_token)
+            self.refresh_token = data.get('refresh_token', self.refresh_token)
+
+
+class Replayer:
+    def __init__(self, client, credentials, speed=1.0, multiply=1, clone_spread=1.0, seed_value=0):
+        self.client = client
+        self.credentials = credentials
+        self.speed = speed
+        self.multiply = multiply
+        self.clone_spread = clone_spread
+        self.random = random.Random(seed_value)
+        self.users = {}
+        self.tasks = []
+        self.endpoints = {}
+        self.recorded = collections.defaultdict(StreamingHistogram)
+        self.lag = StreamingHistogram()
+        self.implicit_logins = 0
+        self.events = 0
+        self.start = None
+
+    def _stats(self, name):
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = LatencyStats(name)
+        return stats
+
+    def _user(self, key, clone):
+        user = self.users.get((key, clone))
+        if user is None:
+            email, password = self.credentials[len(self.users) % len(self.credentials)]
+            user = self.users[(key, clone)] = VirtualUser(f"{key}#{clone}", email, password)
+            offset = self.random.uniform(0, self.clone_spread) if clone else 0.0
+            self.tasks.append(asyncio.ensure_future(self._run_user(user, offset)))
+        return user
+
+    async def _send(self, user, method, path, body, auth):
+        headers = {'Authorization': f"Bearer {user.access_token}"} if auth and user.access_token else None
+        payload = fill(body, user.values()) if body is not None else None
+        name = endpoint_name(method, path)
+        start = time.perf_counter()
+        try:
+            resp = await self.client.request(method, path, payload, headers)
+        except (OSError, asyncio.TimeoutError) as e:
+            self._stats(name).add_error(type(e).__name__)
+            return None
+        if resp.status >= 400:
+            self._stats(name).add_error(resp.status, is_rate_limited(resp))
+        else:
+            self._stats(name).add(time.perf_counter() - start - resp.queued, resp.queued)
+        return resp
+
+    async def _login(self, user):
+        self.implicit_logins += 1
+        resp = await self._send(user, 'POST', LOGIN_PATH, {'email': EMAIL, 'password': PASSWORD}, False)
+        if resp is not None and resp.ok:
+            user.store(resp.json())
+
+    async def _execute(self, user, event):
+        method, path = event['method'], event['path']
+        route = path.split('?', 1)[0]
+        body = event.get('body')
+        if body is None:
+            body = DEFAULT_BODIES.get((method, route))
+        needs_token = event.get('auth') or (body is not None and (
+            uses(body, ACCESS_TOKEN) or uses(body, REFRESH_TOKEN)))
+        if needs_token and route != LOGIN_PATH and user.access_token is None:
+            await self._login(user)
+        if route == LOGIN_PATH and event.get('status') == 401:
+            # Login fallido en la grabación: se reproduce como fallido
+            body = fill(body, {PASSWORD: user.password + '-wrong'})
+        resp = await self._send(user, method, path, body, event.get('auth'))
+        if resp is None:
+            return
+        if resp.status == 401 and needs_token:
+            # Token caducado o revocado por el propio flujo: el siguiente evento hará login
+            user.access_token = user.refresh_token = None
+        elif resp.ok and route in (LOGIN_PATH, REFRESH_PATH):
+            user.store(resp.json())
+        elif resp.ok and route == REVOKE_PATH:
+            revoked = fill(body, user.values()).get('token') if isinstance(body, dict) else None
+            if revoked and token_type(revoked) == 'refresh':
+                user.refresh_token = None
+            else:
+                user.access_token = None
+
+    async def _run_user(self, user, offset):
+        while True:
+            event = await user.queue.get()
+            if event is None:
+                return
+            if self.speed is not None:
+                due = self._due(event['t'], offset)
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.lag.add(max(0.0, time.monotonic() - due))
+            await self._execute(user, event)
+
+    def _due(self, t, offset=0.0):
+        if self.speed is None:
+            return 0.0
+        return self.start + (t + offset) / self.speed
+
+    async def run(self, events, limit=None):
+        self.start = time.monotonic()
+        for event in events:
+            if limit is not None and self.events >= limit:
+                break
+            self.events += 1
+            if 'latency' in event and event.get('status', 200) < 400:
+                self.recorded[endpoint_name(event['method'], event['path'])].add(event['latency'])
+            # No leer la traza mucho antes de que toque: la memoria no crece con ella
+            ahead = self._due(event['t']) - LOOKAHEAD - time.monotonic()
+            if self.speed is not None and ahead > 0:
+                await asyncio.sleep(ahead)
+            for clone in range(self.multiply):
+                await self._user(event['user'], clone).queue.put(event)
+        for user in self.users.values():
+            await user.queue.put(None)
+        await asyncio.gather(*self.tasks)
+        return time.monotonic() - self.start
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name, stats in sorted(self.endpoints.items()):
+            row = stats.summary(elapsed)
+            recorded = self.recorded.get(name)
+            row['recorded_latency_ms'] = recorded.summary_ms() if recorded and recorded.count else None
+            endpoints[name] = row
+        return {
+            'events': self.events,
+            'virtual_users': len(self.users),
+            'implicit_logins': self.implicit_logins,
+            'elapsed_s': round(elapsed, 3),
+            'lag_ms': self.lag.summary_ms(),
+            'endpoints': endpoints,
+        }
+
+
+def compare(current, previous, max_regression):
+    """[(endpoint, p99 anterior, p99 actual, cambio)] de los que empeoran más de max_regression"""
+    regressions = []
+    for name, row in current['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if not before or not before['latency_ms']['p99'] or not row['ok']:
+            continue
+        change = row['latency_ms']['p99'] / before['latency_ms']['p99'] - 1
+        if change > max_regression:
+            regressions.append((name, before['latency_ms']['p99'], row['latency_ms']['p99'], change))
+    return regressions
+
+
+def format_table(report):
+    header = f"{'endpoint':<40}{'reqs':>8}{'rps':>9}{'p50':>9}{'p99':>9}{'grab.p99':>10}{'errores':>9}"
+    lines = [header, '-' * len(header)]
+    for name, row in report['endpoints'].items():
+        recorded = row['recorded_latency_ms']
+        errors = sum(row['errors'].values()) + row['rate_limited']
+        lines.append(f"{name[:39]:<40}{row['requests']:>8}{row['throughput_rps']:>9.1f}"
+                     f"{row['latency_ms']['p50']:>9.1f}{row['latency_ms']['p99']:>9.1f}"
+                     f"{recorded['p99'] if recorded else '-':>10}{errors:>9}")
+    lines.append('(latencias en ms; grab.p99 = p99 en la traza grabada)')
+    return '\n'.join(lines)
+
+
+def add_arguments(parser):
+    parser.add_argument('trace', help='traza de `record` (.jsonl, .jsonl.gz o .msgpack)')
+    common.add_client_arguments(parser)
+    common.add_standin_arguments(parser)
+    common.add_pacing_arguments(parser)
+    parser.add_argument('--speed', type=parse_speed, default=1.0,
+                        help='1, 10 (o 10x) veces la velocidad grabada, o "max" (default: 1)')
+    parser.add_argument('--multiply', type=int, default=1, help='usuarios virtuales por usuario grabado')
+    parser.add_argument('--clone-spread', type=float, default=1.0, metavar='SECONDS',
+                        help='desfase aleatorio máximo de los clones (default: %(default)s)')
+    parser.add_argument('-n', '--limit', type=int, default=None, help='reproducir solo los primeros N eventos')
+    parser.add_argument('--connections', type=int, default=64, help='conexiones máximas del cliente')
+    parser.add_argument('--credentials', default=None, help='CSV de `seed` con email,password por usuario virtual')
+    parser.add_argument('--email', default='test@owlboard.com')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--compare', default=None, metavar='JSON', help='resultado anterior de replay para comparar')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='empeoramiento máximo de p99 admitido con --compare (default: 0.2)')
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+
+def run(args):
+    credentials = seed.read_credentials(args.credentials) if args.credentials else [(args.email, args.password)]
+    header, events = read_trace(args.trace)
+
+    async def main(client):
+        async with client:
+            replayer = Replayer(client, credentials, args.speed, args.multiply, args.clone_spread)
+            elapsed = await replayer.run(events, args.limit)
+            return replayer.report(elapsed)
+
+    with common.standin_from_args(args, [(email, password, '') for email, password in credentials]):
+        client = common.client_from_args(AsyncAuthClient, args, args.connections)
+        report = asyncio.run(main(client))
+    speed = 'max' if args.speed is None else f"{args.speed:g}x"
+    result = {'command': 'replay', 'target': client.base_url, 'trace': args.trace, 'source': header.get('source'),
+              'speed': speed, 'multiply': args.multiply, **report}
+    if client.pacer is not None:
+        result['pacing'] = client.pacer.stats.as_dict()
+
+    print(f"Traza {args.trace} ({header.get('source')}) contra {client.base_url} a {speed}: "
+          f"{report['events']} eventos, {report['virtual_users']} usuarios virtuales, {report['elapsed_s']} s")
+    print(format_table(report))
+    lag = report['lag_ms']
+    print(f"Retraso sobre el plan: p50 {lag['p50']} ms, p99 {lag['p99']} ms; logins implícitos: "
+          f"{report['implicit_logins']}")
+    if client.pacer is not None:
+        pace = result['pacing']
+        print(f"Cola del cliente: {pace['delayed']}/{pace['requests']} esperaron, p99 {pace['wait_p99_ms']} ms, "
+              f"{pace['rejected']} superaron --pace-max-wait")
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            previous = json.load(fh)
+        regressions = compare(result, previous, args.max_regression)
+        result['regressions'] = [{'endpoint': n, 'p99_before_ms': b, 'p99_ms': a, 'change': round(c, 4)}
+                                 for n, b, a, c in regressions]
+        for name, before, after, change in regressions:
+            print(f"REGRESIÓN {name}: p99 {before} -> {after} ms (+{change:.0%})")
+        if not regressions:
+            print(f"Sin regresiones de p99 > {args.max_regression:.0%} respecto a {args.compare}")
+        status = 1 if regressions else 0
+
+    output = args.output or common.default_output('replay')
+    write_json(output, result)
+    print(f"Resultados: {output}")
+    return status
@@ -0,0 +1,243 @@
+"""Memoria de la blacklist por token frente a jti y latencia de validación con filtro bloom
+
+Llena una base de Redis de prueba con N revocaciones guardadas de las dos
+formas (`blacklist:<jwt>` y `revoked:<jti>`, ambas con TTL hasta `exp`) y
+mide con INFO memory lo que ocupa cada una, extrapolado a un millón. Con
+un Redis que no tiene INFO (--fake) se da solo la estimación por clave
+del modelo de memoria de Redis 7 (dictEntry, sds y tabla de expiración).
+
+Después valida tokens con TokenVerifier sin caché (el camino que se
+quiere medir es la consulta de revocación) y compara tres variantes:
+la blacklist por token, el store por jti y el store por jti con
+BloomFrontFilter delante, que evita ir a Redis si el token no está
+revocado. Informa de latencias, consultas a Redis y falsos positivos.
+"""
+import math
+import random
+import sys
+import time
+import uuid
+
+from owlboard_auth.revocation import BloomFrontFilter, JtiRevocationStore
+from owlboard_auth.tokens import JWT_SECRET_KEY, encode, token_jti
+from owlboard_auth.verifier import REDIS_BLACKLIST_PREFIX, REDIS_REVOKED_PREFIX, RedisBlacklist, TokenVerifier
+from owlboard_bench import common
+from owlboard_bench.stats import StreamingHistogram, write_json
+
+DEFAULT_REDIS_URL = 'redis://:password@localhost:6379/15'
+
+
+def make_token(now, ttl, index):
+    """Access token con los mismos claims que emite auth_service"""
+    return encode({
+        'sub': str(index),
+        'email': f"bench{index}@owlboard.com",
+        'type': 'access',
+        'iat': now,
+        'exp': now + ttl,
+        'jti': uuid.uuid4().hex,
+        'scopes': ['read', 'write'],
+    }, JWT_SECRET_KEY)
+
+
+def _jemalloc(size):
+    """Tamaño de clase de jemalloc para una reserva pequeña"""
+    for step, limit in ((8, 8), (16, 128), (32, 256), (64, 512), (128, 1024)):
+        if size <= limit:
+            return -(-size // step) * step
+    return -(-size // 256) * 256
+
+
+def estimate_bytes(key_length, count):
+    """Memoria aproximada de `count` claves string con TTL y valor entero compartido en Redis 7"""
+    header = 3 if key_length < 256 else 5
+    sds = _jemalloc(header + key_length + 1)
+    entry = _jemalloc(24)
+    buckets = 8 * 2 ** math.ceil(math.log2(max(1, count)))
+    # dictEntry en el keyspace y en `expires`, que comparte la sds de la clave
+    return count * (sds + 2 * entry) + 2 * buckets
+
+
+def used_memory(redis_client):
+    from redis.exceptions import ResponseError
+
+    try:
+        return int(redis_client.info('memory')['used_memory'])
+    except (ResponseError, KeyError):
+        return None
+
+
+def delete_prefix(redis_client, prefix, batch=1000):
+    pipe = redis_client.pipeline(transaction=False)
+    pending = 0
+    for key in redis_client.scan_iter(match=prefix + '*', count=batch):
+        pipe.delete(key)
+        pending += 1
+        if pending == batch:
+            pipe.execute()
+            pending = 0
+    if pending:
+        pipe.execute()
+
+
+def fill(redis_client, keys, ttl, batch):
+    pipe = redis_client.pipeline(transaction=False)
+    for i, key in enumerate(keys, 1):
+        pipe.set(key, 1, ex=ttl)
+        if i % batch == 0:
+            pipe.execute()
+    pipe.execute()
+
+
+def measure_memory(redis_client, name, keys, ttl, batch):
+    before = used_memory(redis_client)
+    start = time.perf_counter()
+    fill(redis_client, keys, ttl, batch)
+    elapsed = time.perf_counter() - start
+    after = used_memory(redis_client)
+    count = len(keys)
+    key_length = sum(len(key) for key in keys) / count
+    estimated = estimate_bytes(round(key_length), count)
+    measured = after - before if before is not None and after is not None else None
+    return {
+        'scheme': name,
+        'entries': count,
+        'key_bytes_avg': round(key_length, 1),
+        'fill_s': round(elapsed, 3),
+        'measured_bytes': measured,
+        'measured_bytes_per_entry': round(measured / count, 1) if measured is not None else None,
+        'measured_mb_per_million': round(measured / count * 1e6 / 2 ** 20, 1) if measured is not None else None,
+        'estimated_bytes_per_entry': round(estimated / count, 1),
+        'estimated_mb_per_million': round(estimate_bytes(round(key_length), 10 ** 6) / 2 ** 20, 1),
+    }
+
+
+def measure_validation(name, revocations, tokens, expected_revoked):
+    """Valida `tokens` sin caché y devuelve latencias y cuántos salieron revocados"""
+    verifier = TokenVerifier(revocations=revocations)
+    verifier.caching = False
+    histogram = StreamingHistogram()
+    revoked = 0
+    start = time.perf_counter()
+    for token in tokens:
+        began = time.perf_counter()
+        if not verifier.is_valid(token):
+            revoked += 1
+        histogram.add(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    lookups = getattr(getattr(revocations, 'stats', None), 'lookups', len(tokens))
+    result = {
+        'variant': name,
+        'validations': len(tokens),
+        'revoked_detected': revoked,
+        'revoked_expected': expected_revoked,
+        'redis_lookups': lookups,
+        'validations_per_s': round(len(tokens) / elapsed, 1) if elapsed else None,
+        'latency_ms': histogram.summary_ms(),
+    }
+    if isinstance(revocations, BloomFrontFilter):
+        result['bloom'] = revocations.stats.as_dict()
+    return result
+
+
+def format_report(result):
+    lines = ['Memoria en Redis:']
+    for row in result['memory']:
+        measured = (f"{row['measured_bytes_per_entry']} B/entrada medidos, {row['measured_mb_per_million']} MB/millón"
+                    if row['measured_bytes'] is not None else 'sin INFO memory')
+        lines.append(f"  {row['scheme']:<12} clave {row['key_bytes_avg']:>6} B  {measured}; "
+                     f"estimado {row['estimated_bytes_per_entry']} B/entrada, {row['estimated_mb_per_million']} MB/millón")
+    lines.append(f"Validación sin caché ({result['revoked_share']:.1%} revocados):")
+    for row in result['validation']:
+        lat = row['latency_ms']
+        lines.append(f"  {row['variant']:<12} p50 {lat['p50']:>7} ms  p99 {lat['p99']:>7} ms  "
+                     f"{row['validations_per_s']:>9}/s  consultas a Redis {row['redis_lookups']}"
+                     f"  revocados {row['revoked_detected']}/{row['revoked_expected']}")
+        if 'bloom' in row:
+            bloom = row['bloom']
+            lines.append(f"  {'':<12} bloom {bloom['nbytes'] / 1024:.0f} KiB, {bloom['entries']} jti, "
+                         f"falsos positivos {bloom['false_positives']}, reconstrucción {bloom['last_rebuild_s']} s")
+    return '\n'.join(lines)
+
+
+def redis_from_args(args):
+    if args.fake:
+        import fakeredis
+
+        return fakeredis.FakeRedis()
+    import redis
+
+    return redis.Redis.from_url(args.redis_url)
+
+
+def add_arguments(parser):
+    parser.add_argument('--redis-url', default=DEFAULT_REDIS_URL,
+                        help='Redis de prueba; usa una base vacía, no la DB 1 de auth (default: %(default)s)')
+    parser.add_argument('--fake', action='store_true', help='fakeredis en proceso (sin INFO: solo estimación)')
+    parser.add_argument('--force', action='store_true', help='seguir aunque la base no esté vacía')
+    parser.add_argument('-n', '--revocations', type=int, default=100000, help='revocaciones (default: %(default)s)')
+    parser.add_argument('--validations', type=int, default=20000, help='tokens validados por variante')
+    parser.add_argument('--revoked-share', type=float, default=0.01,
+                        help='fracción de tokens validados que están revocados (default: %(default)s)')
+    parser.add_argument('--ttl', type=int, default=1800, help='vida restante de los tokens en segundos')
+    parser.add_argument('--bloom-error', type=float, default=0.001, help='tasa de falsos positivos del bloom')
+    parser.add_argument('--batch', type=int, default=1000, help='comandos por pipeline al llenar')
+    parser.add_argument('--keep', action='store_true', help='no borrar las claves al terminar')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+
+def run(args):
+    try:
+        redis_client = redis_from_args(args)
+        existing = redis_client.dbsize()
+    except ImportError as e:
+        print(f"Falta un paquete: {e.name} (pip install -r requirements-dev.txt)", file=sys.stderr)
+        return 2
+    except Exception as e:  # noqa: BLE001 - cualquier fallo de conexión se informa igual
+        print(f"No se puede conectar a Redis ({args.redis_url}): {e}", file=sys.stderr)
+        return 2
+    if existing and not args.force:
+        print(f"La base tiene {existing} claves; usa una vacía o --force", file=sys.stderr)
+        return 2
+
+    rng = random.Random(args.seed)
+    now = int(time.time())
+    print(f"Generando {args.revocations} tokens revocados...", flush=True)
+    revoked_tokens = [make_token(now, args.ttl, i) for i in range(args.revocations)]
+    memory = [
+        measure_memory(redis_client, 'token', [REDIS_BLACKLIST_PREFIX + t for t in revoked_tokens],
+                       args.ttl, args.batch),
+        measure_memory(redis_client, 'jti', [REDIS_REVOKED_PREFIX + token_jti(t) for t in revoked_tokens],
+                       args.ttl, args.batch),
+    ]
+
+    n_revoked = min(len(revoked_tokens), round(args.validations * args.revoked_share))
+    tokens = rng.sample(revoked_tokens, n_revoked) + [
+        make_token(now, args.ttl, args.revocations + i) for i in range(args.validations - n_revoked)]
+    rng.shuffle(tokens)
+    front = BloomFrontFilter(JtiRevocationStore(redis_client, legacy_prefix=None),
+                             capacity=args.revocations, error_rate=args.bloom_error)
+    front.rebuild()
+    front.enabled = True
+    validation = [
+        measure_validation('token', RedisBlacklist(redis_client, jti_prefix=None), tokens, n_revoked),
+        measure_validation('jti', JtiRevocationStore(redis_client, legacy_prefix=None), tokens, n_revoked),
+        measure_validation('jti+bloom', front, tokens, n_revoked),
+    ]
+    if not args.keep:
+        delete_prefix(redis_client, REDIS_BLACKLIST_PREFIX, args.batch)
+        delete_prefix(redis_client, REDIS_REVOKED_PREFIX, args.batch)
+
+    result = {
+        'command': 'revocation',
+        'redis': 'fakeredis' if args.fake else args.redis_url,
+        'revoked_share': n_revoked / len(tokens) if tokens else 0.0,
+        'memory': memory,
+        'validation': validation,
+    }
+    print(format_report(result))
+    output = args.output or common.default_output('revocation')
+    write_json(output, result)
+    print(f"Resultados: {output}")
+    return 0 if all(row['revoked_detected'] == n_revoked for row in validation) else 1
@@ -0,0 +1,428 @@
+"""Soak del flujo de auth: carga estable durante horas y deriva por intervalo
+
+Repite el flujo login → validate → introspect → refresh → revoke con
+concurrencia fija (y, con --rate, a un ritmo fijo de flujos/s) y cada
+--interval segundos cierra un intervalo: percentiles de latencia por
+endpoint, errores, conexiones nuevas del pool, `INFO memory`/`DBSIZE` de
+redis_db (DB 1, la blacklist) y la memoria del contenedor auth_service.
+
+Al terminar aplica a cada serie el test de Mann-Kendall con pendiente de
+Sen y marca como deriva las que crecen de forma significativa (p <
+--alpha) y además en una proporción que importa (--min-change sobre la
+línea base del primer cuarto). Los intervalos de --warmup no cuentan.
+Sale con 1 si hay deriva o demasiados errores: sirve de puerta antes de
+promocionar una build. Ctrl-C termina el soak y emite el informe igual.
+"""
+import asyncio
+import csv
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+from owlboard_bench import common, seed
+from owlboard_bench.auth import FLOW, AuthFlow, Budget
+from owlboard_bench.compose import parse_duration
+from owlboard_bench.stats import Report, mann_kendall, percentile, write_json
+from owlboard_client import AsyncAuthClient
+
+MIN_POINTS = 8
+MAX_POINTS = 400
+# Por debajo de estos valores la línea base no sirve para calcular un cambio relativo
+BASELINE_FLOOR = {'ms': 1.0, 'error_rate': 0.01, 'bytes': 1024 * 1024, 'keys': 100, 'kb': 1024, 'connections': 1}
+
+
+def seconds(value):
+    """'3600', '90m', '4h' o '1h30m' en segundos"""
+    try:
+        return float(value)
+    except ValueError:
+        return parse_duration(value)
+
+
+class FlowRate:
+    """Reparte el inicio de los flujos a `rate` por segundo entre todos los workers"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next = None
+
+    async def wait(self):
+        now = time.monotonic()
+        # Si la carga se quedó atrás no se recupera de golpe: el ritmo sigue siendo estable
+        due = now if self.next is None or self.next < now - 1.0 else self.next
+        self.next = due + self.interval
+        if due > now:
+            await asyncio.sleep(due - now)
+
+
+class RedisProbe:
+    """`INFO memory` y `DBSIZE` de redis_db, por URL o con `docker exec` (sin puertos publicados)"""
+
+    def __init__(self, url=None, container='redis_db', password='password', db=1):
+        self.url = url
+        self.container = container
+        self.password = password
+        self.db = db
+        self._client = None
+
+    @property
+    def source(self):
+        return self.url or f"docker exec {self.container}"
+
+    def _cli(self, *command):
+        out = subprocess.run(['docker', 'exec', self.container, 'redis-cli', '--no-auth-warning', '-a',
+                              self.password, '-n', str(self.db), *command],
+                             capture_output=True, text=True, timeout=15, check=True).stdout
+        return out
+
+    def sample(self):
+        """(used_memory en bytes, claves en la DB)"""
+        if self.url:
+            if self._client is None:
+                import redis
+
+                self._client = redis.Redis.from_url(self.url)
+            return int(self._client.info('memory')['used_memory']), int(self._client.dbsize())
+        info = self._cli('INFO', 'memory')
+        used = next(int(line.split(':', 1)[1]) for line in info.splitlines() if line.startswith('used_memory:'))
+        return used, int(self._cli('DBSIZE').split()[-1])
+
+
+class StandinProbe:
+    """Equivalentes del stand-in: revocaciones en memoria y RSS de este proceso"""
+
+    def __init__(self, server):
+        self.server = server
+        self.source = 'stand-in'
+
+    def sample(self):
+        return None, len(self.server.blacklist)
+
+
+class Sampler:
+    """Recursos al cierre de cada intervalo; avisa una vez por fuente que falle"""
+
+    def __init__(self, redis_probe, container):
+        self.redis = redis_probe
+        self.container = container
+        self.warned = set()
+
+    def _warn(self, source, error):
+        if source not in self.warned:
+            self.warned.add(source)
+            print(f"Aviso: no se puede leer {source}: {error}", file=sys.stderr)
+
+    def sample(self):
+        used, keys = None, None
+        if self.redis is not None:
+            try:
+                used, keys = self.redis.sample()
+            except Exception as e:  # noqa: BLE001 - el soak sigue sin esa serie
+                self._warn(self.redis.source, e)
+        if self.container:
+            memory = common.container_memory_kb(self.container)
+            if memory is None:
+                self._warn(f"docker stats {self.container}", 'sin datos')
+        else:
+            memory = common.rss_kb()
+        return {'redis_memory_bytes': used, 'redis_keys': keys,
+                'service_memory_kb': round(memory, 1) if memory is not None else None}
+
+
+def interval_row(report, elapsed, t, flows, connections, resources):
+    endpoints = report.as_dict(elapsed)
+    samples = sorted(v for stats in report.endpoints.values() for v in stats.samples)
+    requests = sum(row['requests'] for row in endpoints.values())
+    ok = sum(row['ok'] for row in endpoints.values())
+    rate_limited = sum(row['rate_limited'] for row in endpoints.values())
+    failed = requests - ok - rate_limited
+    return {
+        't_s': round(t, 1),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'elapsed_s': round(elapsed, 3),
+        'flows': flows,
+        'requests': requests,
+        'ok': ok,
+        'rate_limited': rate_limited,
+        'failed': failed,
+        'error_rate': round(failed / requests, 5) if requests else 0.0,
+        'rps': round(ok / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'endpoints': {name: {'ok': row['ok'], 'p50_ms': row['latency_ms']['p50'], 'p99_ms': row['latency_ms']['p99']}
+                      for name, row in endpoints.items()},
+        'new_connections': connections,
+        **resources,
+    }
+
+
+def format_row(row):
+    parts = [f"{time.strftime('%H:%M:%S', time.gmtime(row['t_s']))}",
+             f"{row['rps']:8.1f} r/s", f"p50 {row['p50_ms']:7.1f}", f"p99 {row['p99_ms']:7.1f} ms",
+             f"err {row['error_rate']:.2%}", f"conn+ {row['new_connections']}"]
+    if row['redis_keys'] is not None:
+        memory = f"{row['redis_memory_bytes'] / 2 ** 20:.1f} MiB, " if row['redis_memory_bytes'] is not None else ''
+        parts.append(f"redis {memory}{row['redis_keys']} claves")
+    if row['service_memory_kb'] is not None:
+        parts.append(f"servicio {row['service_memory_kb'] / 1024:.1f} MiB")
+    return '  '.join(parts)
+
+
+def series(timeline):
+    """{nombre: (unidad, [(índice, valor)])} de las métricas que no deberían crecer"""
+    result = {
+        'p50_ms': ('ms', []),
+        'p99_ms': ('ms', []),
+        'error_rate': ('error_rate', []),
+        'new_connections': ('connections', []),
+        'redis_memory_bytes': ('bytes', []),
+        'redis_keys': ('keys', []),
+        'service_memory_kb': ('kb', []),
+    }
+    for name in FLOW:
+        result[f"{name}.p99_ms"] = ('ms', [])
+    for i, row in enumerate(timeline):
+        values = dict(row, **{f"{name}.p99_ms": e['p99_ms'] for name, e in row['endpoints'].items() if e['ok']})
+        for name, (_, points) in result.items():
+            if values.get(name) is not None:
+                points.append((i, values[name]))
+    return result
+
+
+def _downsample(values, limit=MAX_POINTS):
+    if len(values) <= limit:
+        return values, 1
+    step = -(-len(values) // limit)
+    return [statistics.fmean(values[i:i + step]) for i in range(0, len(values), step)], step
+
+
+def analyze(timeline, interval, warmup=0, alpha=0.01, min_change=0.1):
+    """Tendencia por serie; 'drift' si crece con p < alpha y al menos min_change sobre la línea base"""
+    trends = {}
+    for name, (unit, points) in series(timeline[warmup:]).items():
+        values = [value for _, value in points]
+        if len(values) < MIN_POINTS:
+            trends[name] = {'points': len(values), 'verdict': 'insufficient'}
+            continue
+        reduced, step = _downsample(values)
+        mk = mann_kendall(reduced)
+        slope = mk['slope'] / step
+        baseline = statistics.median(values[:max(2, len(values) // 4)])
+        change = slope * (len(values) - 1)
+        relative = change / max(abs(baseline), BASELINE_FLOOR[unit])
+        drift = mk['p_increasing'] < alpha and relative >= min_change
+        trends[name] = {
+            'points': len(values),
+            'baseline': round(baseline, 4),
+            'last': values[-1],
+            'slope_per_hour': round(slope / interval * 3600, 4),
+            'change': round(change, 4),
+            'relative_change': round(relative, 4),
+            'z': mk['z'],
+            'p_increasing': round(mk['p_increasing'], 6),
+            'verdict': 'drift' if drift else 'stable',
+        }
+    return trends
+
+
+def format_trends(trends, alpha, min_change, ignored=()):
+    lines = [f"Tendencias (Mann-Kendall, p < {alpha:g} y cambio ≥ {min_change:.0%}):",
+             f"  {'serie':<22}{'puntos':>7}{'base':>12}{'pendiente/h':>14}{'cambio':>9}{'p':>10}  veredicto"]
+    labels = {'drift': 'DERIVA', 'stable': 'estable', 'insufficient': 'pocos datos'}
+    for name, t in trends.items():
+        if t['verdict'] == 'insufficient':
+            if t['points']:
+                lines.append(f"  {name:<22}{t['points']:>7}{'':>12}{'':>14}{'':>9}{'':>10}  {labels['insufficient']}")
+            continue
+        label = labels[t['verdict']] + (' (ignorada)' if name in ignored else '')
+        lines.append(f"  {name:<22}{t['points']:>7}{t['baseline']:>12g}{t['slope_per_hour']:>14g}"
+                     f"{t['relative_change']:>9.1%}{t['p_increasing']:>10.2g}  {label}")
+    return '\n'.join(lines)
+
+
+def write_csv(path, timeline):
+    columns = ['t_s', 'time', 'flows', 'requests', 'ok', 'rate_limited', 'failed', 'error_rate', 'rps', 'p50_ms',
+               'p99_ms', 'new_connections', 'redis_memory_bytes', 'redis_keys', 'service_memory_kb']
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(columns + [f"{name}_p99_ms" for name in FLOW])
+        for row in timeline:
+            writer.writerow([row[c] for c in columns] + [row['endpoints'].get(name, {}).get('p99_ms') for name in FLOW])
+    print(f"Timeline: {path}")
+
+
+def plot(timeline, path):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib no está instalado: se omite --plot', file=sys.stderr)
+        return
+    hours = [row['t_s'] / 3600 for row in timeline]
+    fig, (latency_ax, load_ax, memory_ax) = plt.subplots(3, 1, sharex=True, figsize=(9, 8))
+    latency_ax.plot(hours, [row['p50_ms'] for row in timeline], label='p50')
+    latency_ax.plot(hours, [row['p99_ms'] for row in timeline], label='p99')
+    latency_ax.set_ylabel('latencia (ms)')
+    latency_ax.legend()
+    load_ax.plot(hours, [row['rps'] for row in timeline], color='tab:blue')
+    load_ax.set_ylabel('peticiones/s', color='tab:blue')
+    errors_ax = load_ax.twinx()
+    errors_ax.plot(hours, [row['error_rate'] * 100 for row in timeline], color='tab:red')
+    errors_ax.set_ylabel('errores (%)', color='tab:red')
+    memory_ax.plot(hours, [(row['service_memory_kb'] or 0) / 1024 for row in timeline], label='servicio (MiB)')
+    if any(row['redis_memory_bytes'] for row in timeline):
+        memory_ax.plot(hours, [(row['redis_memory_bytes'] or 0) / 2 ** 20 for row in timeline], label='redis (MiB)')
+    keys_ax = memory_ax.twinx()
+    keys_ax.plot(hours, [row['redis_keys'] or 0 for row in timeline], color='tab:gray', linestyle='--')
+    keys_ax.set_ylabel('claves en redis', color='tab:gray')
+    memory_ax.set_ylabel('memoria (MiB)')
+    memory_ax.set_xlabel('horas')
+    memory_ax.legend(loc='upper left')
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"Gráfica: {path}")
+
+
+async def soak(client, credentials, args, sampler):
+    report = Report()
+    flow = AuthFlow(client, report, Budget(args.duration))
+    rate = FlowRate(args.rate) if args.rate else None
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async def worker(offset):
+        i = offset
+        while not flow.stopped and not stop.is_set():
+            if rate is not None:
+                await rate.wait()
+            email, password = credentials[i % len(credentials)]
+            await flow.run_once(email, password)
+            i += 1
+
+    timeline = []
+    start = last = time.monotonic()
+    last_flows, last_connections = 0, 0
+    workers = asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    while not workers.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(stop.wait()), max(0.0, last + args.interval - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass
+        if stop.is_set():
+            flow.stopped = True
+            await workers
+        if flow.stopped and not stop.is_set():
+            await workers
+        now = time.monotonic()
+        closed, flow.report = flow.report, Report()
+        for name in FLOW:
+            flow.report[name]
+        resources = await asyncio.to_thread(sampler.sample)
+        row = interval_row(closed, now - last, now - start, flow.completed - last_flows,
+                           client.stats.connections - last_connections, resources)
+        last, last_flows, last_connections = now, flow.completed, client.stats.connections
+        # Un último intervalo muy corto (fin o Ctrl-C) solo añadiría ruido a las series
+        if row['requests'] and row['elapsed_s'] >= args.interval / 2:
+            timeline.append(row)
+            print(format_row(row), flush=True)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.remove_signal_handler(sig)
+    return timeline, time.monotonic() - start
+
+
+def add_arguments(parser):
+    common.add_client_arguments(parser)
+    common.add_standin_arguments(parser)
+    common.add_pacing_arguments(parser)
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='workers concurrentes (default: %(default)s)')
+    parser.add_argument('--rate', type=float, default=None, help='flujos por segundo en total (default: sin límite)')
+    parser.add_argument('-d', '--duration', type=seconds, default=seconds('4h'),
+                        help='duración: segundos o "90m", "4h" (default: 4h)')
+    parser.add_argument('--interval', type=seconds, default=60.0, help='segundos por intervalo (default: %(default)s)')
+    parser.add_argument('--warmup', type=int, default=2, help='intervalos iniciales fuera del test de tendencia')
+    parser.add_argument('--alpha', type=float, default=0.01, help='nivel de significación (default: %(default)s)')
+    parser.add_argument('--min-change', type=float, default=0.1,
+                        help='crecimiento relativo mínimo para marcar deriva (default: %(default)s)')
+    parser.add_argument('--ignore', action='append', default=[], metavar='SERIE',
+                        help='serie que no cuenta para el veredicto (repetible), p. ej. redis_keys en soaks más '
+                             'cortos que la vida de los refresh tokens')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='fracción de fallos tolerada')
+    parser.add_argument('--email', default='test@owlboard.com')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--credentials', metavar='CSV', default=None,
+                        help='CSV email,password generado por `owlboard_bench seed --credentials`')
+    resources = parser.add_argument_group('recursos')
+    resources.add_argument('--redis-url', default=None, help='redis://:password@host:6379/1 en vez de docker exec')
+    resources.add_argument('--redis-container', default='redis_db', help='contenedor de Redis (default: %(default)s)')
+    resources.add_argument('--redis-db', type=int, default=1, help='DB de la blacklist (default: %(default)s)')
+    resources.add_argument('--no-redis', action='store_true', help='no muestrear Redis')
+    resources.add_argument('--container', default='auth_service', help='contenedor medido con docker stats')
+    parser.add_argument('--csv', default=None, help='timeline en CSV')
+    parser.add_argument('--plot', default=None, metavar='PNG', help='gráfica de la timeline (matplotlib)')
+    parser.add_argument('-o', '--output', default=None, help='fichero JSON de resultados')
+
+
+def run(args):
+    if args.credentials:
+        credentials = seed.read_credentials(args.credentials)
+    else:
+        credentials = [(args.email, args.password)]
+
+    async def main(client, sampler):
+        async with client:
+            return await soak(client, credentials, args, sampler)
+
+    with common.standin_from_args(args, [(email, password, '') for email, password in credentials]) as server:
+        if server is not None:
+            sampler = Sampler(None if args.no_redis else StandinProbe(server), None)
+        else:
+            redis_probe = None if args.no_redis else RedisProbe(args.redis_url, args.redis_container, db=args.redis_db)
+            sampler = Sampler(redis_probe, args.container)
+        client = common.client_from_args(AsyncAuthClient, args, args.concurrency)
+        print(f"Soak: {client.base_url}  concurrencia={args.concurrency}  "
+              f"ritmo={f'{args.rate:g} flujos/s' if args.rate else 'libre'}  duración={args.duration:g}s  "
+              f"intervalo={args.interval:g}s", flush=True)
+        timeline, elapsed = asyncio.run(main(client, sampler))
+
+    trends = analyze(timeline, args.interval, args.warmup, args.alpha, args.min_change)
+    requests = sum(row['requests'] for row in timeline)
+    failed = sum(row['failed'] for row in timeline)
+    error_rate = failed / requests if requests else 0.0
+    drifting = [name for name, t in trends.items() if t['verdict'] == 'drift' and name not in args.ignore]
+    passed = not drifting and error_rate <= args.max_error_rate
+    result = {
+        'command': 'soak',
+        'target': client.base_url,
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'interval_s': args.interval,
+        'elapsed_s': round(elapsed, 1),
+        'requests': requests,
+        'failed': failed,
+        'error_rate': round(error_rate, 5),
+        'client': client.stats.as_dict(),
+        'verdict': 'pass' if passed else 'fail',
+        'drifting': drifting,
+        'ignored': args.ignore,
+        'trends': trends,
+        'timeline': timeline,
+    }
+    print()
+    print(format_trends(trends, args.alpha, args.min_change, args.ignore))
+    print(f"\n{len(timeline)} intervalos en {elapsed / 3600:.2f} h, {requests} peticiones, errores {error_rate:.2%}")
+    print(f"Veredicto: {'APTO' if passed else 'NO APTO'}"
+          + (f" (deriva en {', '.join(drifting)})" if drifting else '')
+          + (f" (errores por encima de {args.max_error_rate:.2%})" if error_rate > args.max_error_rate else ''))
+    if args.csv:
+        write_csv(args.csv, timeline)
+    if args.plot:
+        plot(timeline, args.plot)
+    output = args.output or common.default_output('soak')
+    write_json(output, result)
+    print(f"Resultados: {output}")
+    return 0 if passed else 1
@@ -0,0 +1,191 @@
+"""Acumuladores de latencia y errores para los benchmarks"""
+import collections
+import json
+import math
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyStats:
+    """Latencias (segundos) y resultados de un endpoint"""
+
+    def __init__(self, name):
+        self.name = name
+        self.samples = []
+        self.queued = []
+        self.errors = collections.Counter()
+        self.rate_limited = 0
+
+    def add(self, seconds, queued=None):
+        """`queued`: espera en la cola del cliente, que no forma parte de `seconds`"""
+        self.samples.append(seconds)
+        if queued is not None:
+            self.queued.append(queued)
+
+    def add_error(self, key, rate_limited=False):
+        if rate_limited:
+            self.rate_limited += 1
+        else:
+            self.errors[str(key)] += 1
+
+    @property
+    def count(self):
+        return len(self.samples) + self.rate_limited + sum(self.errors.values())
+
+    def summary(self, elapsed):
+        values = sorted(self.samples)
+        ms = lambda v: round(v * 1000, 3)
+        result = {
+            'requests': self.count,
+            'ok': len(values),
+            'rate_limited': self.rate_limited,
+            'errors': dict(self.errors),
+            'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {
+                'p50': ms(percentile(values, 50)),
+                'p95': ms(percentile(values, 95)),
+                'p99': ms(percentile(values, 99)),
+                'max': ms(values[-1]) if values else 0.0,
+            },
+        }
+        if any(self.queued):
+            queued = sorted(self.queued)
+            result['queued_ms'] = {'p50': ms(percentile(queued, 50)), 'p99': ms(percentile(queued, 99)),
+                                   'max': ms(queued[-1])}
+        return result
+
+
+class StreamingHistogram:
+    """Histograma logarítmico de memoria acotada (estilo DDSketch).
+
+    Los percentiles tienen un error relativo de como mucho `precision`; con
+    el 1 % por defecto, valores de 1 µs a 1000 s ocupan ~1000 buckets.
+    """
+
+    def __init__(self, precision=0.01, minimum=1e-6):
+        self.gamma = (1 + precision) / (1 - precision)
+        self.log_gamma = math.log(self.gamma)
+        self.minimum = minimum
+        self.buckets = collections.Counter()
+        self.zero = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if value <= self.minimum:
+            self.zero += 1
+        else:
+            self.buckets[math.ceil(math.log(value / self.minimum) / self.log_gamma)] += 1
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.zero += other.zero
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100.0 * self.count))
+        running = self.zero
+        if running >= rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            running += self.buckets[index]
+            if running >= rank:
+                # Punto medio (relativo) del bucket, acotado por el máximo visto
+                value = self.minimum * 2 * self.gamma ** index / (self.gamma + 1)
+                return min(value, self.max)
+        return self.max
+
+    def summary_ms(self):
+        ms = lambda v: round(v * 1000, 3)
+        return {
+            'count': self.count,
+            'mean': ms(self.total / self.count) if self.count else 0.0,
+            'p50': ms(self.percentile(50)),
+            'p95': ms(self.percentile(95)),
+            'p99': ms(self.percentile(99)),
+            'max': ms(self.max),
+        }
+
+
+def mann_kendall(values):
+    """Test de tendencia de Mann-Kendall y pendiente de Sen por paso.
+
+    Devuelve {'s', 'z', 'p_increasing', 'p_decreasing', 'slope'}; los
+    p-valores son unilaterales con la aproximación normal (con corrección
+    por empates), válida a partir de unos 8-10 puntos.
+    """
+    n = len(values)
+    s = 0
+    slopes = []
+    for i in range(n - 1):
+        xi = values[i]
+        for j in range(i + 1, n):
+            diff = values[j] - xi
+            s += (diff > 0) - (diff < 0)
+            slopes.append(diff / (j - i))
+    ties = collections.Counter(values)
+    variance = (n * (n - 1) * (2 * n + 5) - sum(t * (t - 1) * (2 * t + 5) for t in ties.values() if t > 1)) / 18
+    if variance <= 0:
+        z = 0.0
+    else:
+        z = (s - 1 if s > 0 else s + 1 if s < 0 else 0) / math.sqrt(variance)
+    slopes.sort()
+    slope = percentile(slopes, 50) if len(slopes) % 2 else (
+        (slopes[len(slopes) // 2 - 1] + slopes[len(slopes) // 2]) / 2 if slopes else 0.0)
+    return {
+        's': s,
+        'z': round(z, 3),
+        'p_increasing': 0.5 * math.erfc(z / math.sqrt(2)),
+        'p_decreasing': 0.5 * math.erfc(-z / math.sqrt(2)),
+        'slope': slope,
+    }
+
+
+class Report:
+    """Colección de LatencyStats por nombre, en orden de aparición"""
+
+    def __init__(self):
+        self.endpoints = {}
+
+    def __getitem__(self, name):
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = LatencyStats(name)
+        return stats
+
+    def as_dict(self, elapsed):
+        return {name: stats.summary(elapsed) for name, stats in self.endpoints.items()}
+
+    def format_table(self, elapsed):
+        header = f"{'endpoint':<14}{'reqs':>8}{'ok':>8}{'rps':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'429/503':>9}  errores"
+        lines = [header, '-' * len(header)]
+        for name, row in self.as_dict(elapsed).items():
+            lat = row['latency_ms']
+            errors = ', '.join(f"{k}={v}" for k, v in sorted(row['errors'].items())) or '-'
+            lines.append(
+                f"{name:<14}{row['requests']:>8}{row['ok']:>8}{row['throughput_rps']:>10.1f}"
+                f"{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['p99']:>9.1f}{lat['max']:>9.1f}"
+                f"{row['rate_limited']:>9}  {errors}")
+        lines.append('(latencias en ms)')
+        return '\n'.join(lines)
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, indent=2, sort_keys=False)
+        fh.write('\n')
@@ -0,0 +1,163 @@
+"""Formato de las trazas de tráfico que graban `record` y reproduce `replay`
+
+Una traza es una secuencia de registros: primero una cabecera
+{"type": "header", ...} y después un evento por petición:
+
+    {"t": 12.504, "dt": 0.031, "user": "u3", "method": "POST",
+     "path": "/auth/token/validate", "body": {"token": "<access_token>"},
+     "auth": true, "status": 200, "latency": 0.004}
+
+`t` es el instante desde el inicio, `dt` el tiempo desde el evento
+anterior y `user` identifica al usuario grabado, no al real. Se guarda
+como JSONL (opcionalmente .gz) o, con extensión .msgpack, como msgpack.
+Los cuerpos se sanean: contraseñas, tokens y emails pasan a marcadores
+que el replayer rellena con los de cada usuario virtual, y los textos
+largos se sustituyen por relleno de la misma longitud.
+"""
+import base64
+import gzip
+import json
+import re
+
+TRACE_VERSION = 1
+
+EMAIL = '<email>'
+PASSWORD = '<password>'
+ACCESS_TOKEN = '<access_token>'
+REFRESH_TOKEN = '<refresh_token>'
+PLACEHOLDERS = (EMAIL, PASSWORD, ACCESS_TOKEN, REFRESH_TOKEN)
+
+PASSWORD_KEYS = frozenset(('password', 'new_password', 'old_password', 'current_password', 'secret'))
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+JWT_RE = re.compile(r'^[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+$')
+MAX_TEXT = 64
+
+
+def token_type(token):
+    """'access' o 'refresh' según el claim `type`, sin verificar la firma"""
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return 'access'
+    return 'refresh' if claims.get('type') == 'refresh' else 'access'
+
+
+def sanitize(value, key=None):
+    """Copia de `value` sin credenciales, tokens, emails ni textos largos"""
+    if isinstance(value, dict):
+        return {k: sanitize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v, key) for v in value]
+    if not isinstance(value, str):
+        return value
+    if key in PASSWORD_KEYS:
+        return PASSWORD
+    if JWT_RE.match(value):
+        return REFRESH_TOKEN if token_type(value) == 'refresh' else ACCESS_TOKEN
+    if EMAIL_RE.match(value):
+        return EMAIL
+    if len(value) > MAX_TEXT:
+        return 'x' * len(value)
+    return value
+
+
+def fill(value, values):
+    """Sustituye los marcadores por `values[marcador]` (inverso de sanitize)"""
+    if isinstance(value, dict):
+        return {k: fill(v, values) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fill(v, values) for v in value]
+    if isinstance(value, str) and value in values:
+        return values[value]
+    return value
+
+
+def uses(value, placeholder):
+    if isinstance(value, dict):
+        return any(uses(v, placeholder) for v in value.values())
+    if isinstance(value, list):
+        return any(uses(v, placeholder) for v in value)
+    return value == placeholder
+
+
+def _is_msgpack(path):
+    return path.endswith(('.msgpack', '.mpk'))
+
+
+class TraceWriter:
+    def __init__(self, path, header):
+        self.path = path
+        self.count = 0
+        if _is_msgpack(path):
+            import msgpack
+
+            self._packer = msgpack.Packer()
+            self._fh = open(path, 'wb')
+        else:
+            self._packer = None
+            self._fh = gzip.open(path, 'wt', encoding='utf-8') if path.endswith('.gz') else \
+                open(path, 'w', encoding='utf-8')
+        self._write(dict(header, type='header', version=TRACE_VERSION))
+
+    def _write(self, record):
+        if self._packer is not None:
+            self._fh.write(self._packer.pack(record))
+        else:
+            self._fh.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def write(self, event):
+        self.count += 1
+        self._write(event)
+
+    def close(self):
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_trace(path):
+    """(cabecera, iterador de eventos); los eventos se leen en streaming"""
+    if _is_msgpack(path):
+        import msgpack
+
+        fh = open(path, 'rb')
+        records = iter(msgpack.Unpacker(fh, raw=False))
+    else:
+        fh = gzip.open(path, 'rt', encoding='utf-8') if path.endswith('.gz') else open(path, encoding='utf-8')
+        records = (json.loads(line) for line in fh if line.strip())
+    header = next(records, None)
+    if not header or header.get('type') != 'header':
+        fh.close()
+        raise ValueError(f"{path}: no es una traza de owlboard_bench (falta la cabecera)")
+
+    def events():
+        with fh:
+            yield from records
+
+    return header, events()
+
+
+class UserMap:
+    """Asigna identificadores estables (u1, u2, ...) a emails, tokens y clientes"""
+
+    def __init__(self):
+        self.by_key = {}
+        self.count = 0
+
+    def get(self, key):
+        user = self.by_key.get(key)
+        if user is None:
+            self.count += 1
+            user = self.by_key[key] = f"u{self.count}"
+        return user
+
+    def alias(self, key, user):
+        self.by_key[key] = user
+
+    def __len__(self):
+        return self.count
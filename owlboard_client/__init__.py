@@ -0,0 +1,21 @@
+"""Cliente Python del Auth Service de OwlBoard con conexiones persistentes"""
+from owlboard_client.aio import AsyncAuthClient
+from owlboard_client.errors import AuthServiceError, PacingTimeout
+from owlboard_client.pacing import Pacer
+from owlboard_client.response import Response
+from owlboard_client.sync import AuthClient
+from owlboard_client.tls import DEFAULT_BASE_URL, create_context
+from owlboard_client.tokens import AsyncTokenManager, TokenManager
+
+__all__ = [
+    'AsyncAuthClient',
+    'AsyncTokenManager',
+    'AuthClient',
+    'AuthServiceError',
+    'DEFAULT_BASE_URL',
+    'Pacer',
+    'PacingTimeout',
+    'Response',
+    'TokenManager',
+    'create_context',
+]
@@ -0,0 +1,79 @@
+"""Configuración común a AuthClient y AsyncAuthClient"""
+import json
+import urllib.parse
+
+from owlboard_client import tls
+
+USER_AGENT = 'owlboard-client/1.0'
+# El servidor acepta hasta 1000 tokens por lote; trozos menores reparten
+# mejor el trabajo entre conexiones del cliente asíncrono.
+BATCH_CHUNK_SIZE = 500
+
+
+def chunks(items, size):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class ConnectionStats:
+    """Contadores para comprobar que el pool reutiliza conexiones"""
+
+    __slots__ = ('requests', 'connections', 'tls_resumed', 'retries')
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.tls_resumed = 0
+        self.retries = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ClientBase:
+    def __init__(self, base_url=None, timeout=10.0, verify=True, ca_file=None,
+                 client_cert=None, client_key=None, pool_size=10, headers=None, pacer=None):
+        url = urllib.parse.urlsplit(base_url or tls.DEFAULT_BASE_URL)
+        if url.scheme not in ('http', 'https'):
+            raise ValueError(f"Esquema no soportado: {url.scheme!r}")
+        self.base_url = urllib.parse.urlunsplit((url.scheme, url.netloc, url.path.rstrip('/'), '', ''))
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == 'https' else 80)
+        self.prefix = url.path.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        # Pacer opcional (owlboard_client.pacing) para no pasarse de limit_req/limit_conn
+        self.pacer = pacer
+        self.ssl_context = None
+        if self.scheme == 'https':
+            self.ssl_context = tls.create_context(verify, ca_file, client_cert, client_key)
+        self.sessions = tls.SESSIONS
+        self.default_headers = {
+            'Host': url.netloc,
+            'User-Agent': USER_AGENT,
+            'Accept': 'application/json',
+        }
+        if headers:
+            self.default_headers.update(headers)
+        self.stats = ConnectionStats()
+
+    @classmethod
+    def with_mtls(cls, base_url=None, service='api_gateway', **kwargs):
+        """Cliente que presenta los certificados de cliente de Secure_Channel"""
+        cert, key = tls.client_cert_paths(service)
+        kwargs.setdefault('ca_file', tls.CA_FILE)
+        return cls(base_url, client_cert=cert, client_key=key, **kwargs)
+
+    def _prepare(self, path, payload, headers, data=None):
+        merged = dict(self.default_headers)
+        body = data
+        if payload is not None:
+            body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+            merged['Content-Type'] = 'application/json'
+        if headers:
+            merged.update(headers)
+        return self.prefix + path, body, merged
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.base_url} pool={self.pool_size}>"
@@ -0,0 +1,198 @@
+"""Cliente asyncio con pool de conexiones keep-alive"""
+import asyncio
+import time
+
+from owlboard_client._base import BATCH_CHUNK_SIZE, ClientBase, chunks
+from owlboard_client.response import Response
+
+STALE_ERRORS = (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError)
+
+
+class Connection:
+    """Conexión HTTP/1.1 sobre un par StreamReader/StreamWriter.
+
+    Pública para quien necesite hablar HTTP/1.1 con keep-alive sin el pool
+    de AsyncAuthClient (p. ej. el proxy de owlboard_standin.gateway).
+    """
+
+    __slots__ = ('reader', 'writer')
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host, port, ssl_context=None):
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=ssl_context, server_hostname=host if ssl_context else None)
+        return cls(reader, writer)
+
+    @property
+    def ssl_object(self):
+        return self.writer.get_extra_info('ssl_object')
+
+    def close(self):
+        self.writer.close()
+
+    async def request(self, method, target, headers, body):
+        lines = [f"{method} {target} HTTP/1.1"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        if body is not None or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f"Content-Length: {len(body or b'')}")
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        self.writer.write(head + body if body else head)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        resp_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            resp_headers[name.strip().lower()] = value.strip()
+        status = int(status)
+
+        connection = resp_headers.get('connection', '').lower()
+        keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            data = b''
+        elif resp_headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        elif 'content-length' in resp_headers:
+            data = await self.reader.readexactly(int(resp_headers['content-length']))
+        else:
+            data = await self.reader.read()
+            keep_alive = False
+        return status, reason, resp_headers, data, keep_alive
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';', 1)[0], 16)
+            if size == 0:
+                # Trailers opcionales hasta la línea vacía
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+
+class AsyncAuthClient(ClientBase):
+    """Versión asyncio de AuthClient.
+
+    `pool_size` limita también las conexiones simultáneas: las peticiones
+    que lo superen esperan a que se libere una. asyncio no permite ofrecer
+    una sesión TLS al conectar, así que aquí el ahorro de handshakes viene
+    solo del keep-alive.
+    """
+
+    def __init__(self, base_url=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._idle = []
+        self._slots = None
+
+    async def _open(self):
+        self.stats.connections += 1
+        conn = await Connection.open(self.host, self.port, self.ssl_context)
+        if conn.ssl_object is not None and conn.ssl_object.session_reused:
+            self.stats.tls_resumed += 1
+        return conn
+
+    async def request(self, method, path, payload=None, headers=None, timeout=None, data=None):
+        """Envía una petición y devuelve un Response sin comprobar el estado.
+
+        `payload` se envía como JSON; `data`, como bytes tal cual.
+        """
+        target, body, headers = self._prepare(path, payload, headers, data)
+        timeout = self.timeout if timeout is None else timeout
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        if self.pacer is None:
+            return await self._send(method, target, body, headers, timeout)
+        # La espera en cola del Pacer no cuenta para el timeout de la petición
+        async with self.pacer.async_slot() as queued:
+            resp = await self._send(method, target, body, headers, timeout)
+        resp.queued = queued
+        return resp
+
+    async def _send(self, method, target, body, headers, timeout):
+        self.stats.requests += 1
+        async with self._slots:
+            return await asyncio.wait_for(self._request(method, target, body, headers), timeout)
+
+    async def _request(self, method, target, body, headers):
+        reused = bool(self._idle)
+        conn = self._idle.pop() if reused else await self._open()
+        start = time.perf_counter()
+        try:
+            try:
+                result = await conn.request(method, target, headers, body)
+            except STALE_ERRORS:
+                if not reused:
+                    raise
+                conn.close()
+                self.stats.retries += 1
+                conn = await self._open()
+                start = time.perf_counter()
+                result = await conn.request(method, target, headers, body)
+        except BaseException:
+            # Incluye CancelledError por timeout: la conexión queda a medias
+            conn.close()
+            raise
+        elapsed = time.perf_counter() - start
+        status, reason, resp_headers, data, keep_alive = result
+        if keep_alive and len(self._idle) < self.pool_size:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        return Response(status, reason, resp_headers, data, elapsed)
+
+    async def call(self, method, path, payload=None, timeout=None):
+        """Petición JSON; lanza AuthServiceError si el estado es >= 400"""
+        return (await self.request(method, path, payload, timeout=timeout)).raise_for_status().json()
+
+    async def login(self, email, password, timeout=None):
+        return await self.call('POST', '/auth/login', {'email': email, 'password': password}, timeout)
+
+    async def validate(self, token, timeout=None):
+        return await self.call('POST', '/auth/token/validate', {'token': token}, timeout)
+
+    async def introspect(self, token, timeout=None):
+        return await self.call('POST', '/auth/token/introspect', {'token': token}, timeout)
+
+    async def refresh(self, refresh_token, timeout=None):
+        return await self.call('POST', '/auth/token/refresh', {'refresh_token': refresh_token}, timeout)
+
+    async def revoke(self, token, token_type='access', timeout=None):
+        return await self.call('POST', '/auth/token/revoke', {'token': token, 'token_type': token_type}, timeout)
+
+    async def validate_many(self, tokens, chunk_size=BATCH_CHUNK_SIZE, timeout=None):
+        """Valida una lista de tokens; los lotes se envían en paralelo por el pool"""
+        return await self._batch('/auth/token/validate/batch', tokens, chunk_size, timeout)
+
+    async def introspect_many(self, tokens, chunk_size=BATCH_CHUNK_SIZE, timeout=None):
+        return await self._batch('/auth/token/introspect/batch', tokens, chunk_size, timeout)
+
+    async def _batch(self, path, tokens, chunk_size, timeout):
+        responses = await asyncio.gather(*(
+            self.call('POST', path, {'tokens': chunk}, timeout) for chunk in chunks(tokens, chunk_size)))
+        return [result for response in responses for result in response['results']]
+
+    async def health(self, timeout=None):
+        return await self.call('GET', '/health', timeout=timeout)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
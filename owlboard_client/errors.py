@@ -0,0 +1,36 @@
+"""Errores del cliente de autenticación"""
+import json
+
+
+class AuthServiceError(Exception):
+    """Respuesta HTTP >= 400 del Auth Service"""
+
+    def __init__(self, status, body=b'', reason=''):
+        self.status = status
+        self.body = body
+        self.reason = reason
+        super().__init__(f"HTTP {status}: {self.text or reason}")
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', errors='replace')
+
+    @property
+    def detail(self):
+        """Campo `detail` de FastAPI, o el cuerpo completo si no es JSON"""
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            return self.text
+        if isinstance(data, dict):
+            return data.get('detail', data)
+        return data
+
+
+class PacingTimeout(TimeoutError):
+    """El Pacer tendría que esperar más de `max_wait` para respetar los límites de nginx"""
+
+    def __init__(self, wait, max_wait):
+        self.wait = wait
+        self.max_wait = max_wait
+        super().__init__(f"Haría falta esperar {wait * 1000:.0f} ms en cola (máximo {max_wait * 1000:.0f} ms)")
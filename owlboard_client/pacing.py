@@ -0,0 +1,231 @@
+"""Ritmo de envío acorde con limit_req / limit_conn de nginx
+
+load_balancer_nginx.conf limita cada IP de cliente a 100 r/s con
+burst=20 nodelay y a 10 peticiones simultáneas; lo que se pase recibe un
+503 de nginx. Un Pacer reparte las peticiones con el mismo algoritmo que
+limit_req (GCRA: hasta `burst` peticiones de adelanto sobre el ritmo
+`rate`) y limita las que están en curso, así que en vez de un 503 la
+petición espera en el cliente lo justo. Nunca espera más de `max_wait`:
+si su turno cae más allá, falla enseguida con PacingTimeout sin gastarlo.
+El turno se reserva después de conseguir hueco entre las peticiones en
+curso: si vence esperando hueco, tampoco se ha gastado ningún turno.
+
+Para nginx todos los clientes de una máquina son la misma IP: comparte
+un único Pacer entre ellos, y si hay varios procesos reparte el límite
+con `share`.
+"""
+import asyncio
+import collections
+import contextlib
+import os
+import re
+import threading
+import time
+
+from owlboard_client.errors import PacingTimeout
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LB_NGINX_CONF = os.path.join(_REPO_ROOT, 'load_balancer_nginx.conf')
+# Valores de load_balancer_nginx.conf (zona api_limit y conn_limit)
+LB_RATE = 100.0
+LB_BURST = 20
+LB_CONNECTIONS = 10
+
+ZONE_RE = re.compile(r'limit_req_zone\s+\S+\s+zone=([\w-]+):\S+\s+rate=(\d+(?:\.\d+)?)r/([sm])')
+LIMIT_REQ_RE = re.compile(r'limit_req\s+zone=([\w-]+)([^;]*);')
+LIMIT_CONN_RE = re.compile(r'limit_conn\s+([\w-]+)\s+(\d+)\s*;')
+RECENT_WAITS = 4096
+
+
+def read_nginx_limits(path=LB_NGINX_CONF, zone=None):
+    """{'rate', 'burst', 'connections'} del primer `limit_req` (o del de `zone`) de un nginx.conf"""
+    with open(path, encoding='utf-8') as fh:
+        text = fh.read()
+    rates = {name: float(value) / (60.0 if unit == 'm' else 1.0) for name, value, unit in ZONE_RE.findall(text)}
+    for name, options in LIMIT_REQ_RE.findall(text):
+        if zone is not None and name != zone:
+            continue
+        if name not in rates:
+            continue
+        burst = re.search(r'burst=(\d+)', options)
+        connections = LIMIT_CONN_RE.search(text)
+        return {
+            'rate': rates[name],
+            'burst': int(burst.group(1)) if burst else 0,
+            'connections': int(connections.group(2)) if connections else None,
+        }
+    raise ValueError(f"{path}: no hay limit_req{f' con zone={zone}' if zone else ''}")
+
+
+class PacingStats:
+    """Espera en cola del cliente por petición admitida"""
+
+    def __init__(self):
+        self.requests = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.recent = collections.deque(maxlen=RECENT_WAITS)
+
+    def admit(self, wait):
+        self.requests += 1
+        if wait > 0.0005:
+            self.delayed += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.recent.append(wait)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def as_dict(self):
+        recent = sorted(self.recent)
+
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(p / 100 * len(recent)))] * 1000, 3) if recent else 0.0
+
+        return {
+            'requests': self.requests,
+            'delayed': self.delayed,
+            'rejected': self.rejected,
+            'wait_mean_ms': round(self.wait_total / self.requests * 1000, 3) if self.requests else 0.0,
+            'wait_p50_ms': pct(50),
+            'wait_p99_ms': pct(99),
+            'wait_max_ms': round(self.wait_max * 1000, 3),
+            'max_in_flight': self.max_in_flight,
+        }
+
+
+class Pacer:
+    """Token bucket (GCRA) más límite de peticiones en curso.
+
+        pacer = Pacer.from_nginx()          # 100 r/s, burst 20, 10 en curso
+        client = AsyncAuthClient(url, pacer=pacer)
+
+    `headroom` < 1 deja margen para que el jitter de red no junte en el
+    servidor peticiones que salieron espaciadas del cliente.
+    """
+
+    def __init__(self, rate=LB_RATE, burst=LB_BURST, connections=LB_CONNECTIONS, headroom=0.95, max_wait=1.0,
+                 clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError('rate debe ser > 0')
+        self.rate = rate
+        self.burst = burst
+        self.connections = connections
+        self.max_wait = max_wait
+        self.clock = clock
+        self.interval = 1.0 / (rate * headroom)
+        self.tolerance = burst * headroom * self.interval
+        self.stats = PacingStats()
+        self._tat = None
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(connections) if connections else None
+        self._async_slots = None
+
+    @classmethod
+    def from_nginx(cls, path=LB_NGINX_CONF, zone=None, share=1, **kwargs):
+        """Pacer con los límites de un nginx.conf, repartidos entre `share` procesos"""
+        limits = read_nginx_limits(path, zone)
+        connections = limits['connections']
+        return cls(limits['rate'] / share, limits['burst'] // share,
+                   max(1, connections // share) if connections else None, **kwargs)
+
+    def reserve(self, max_wait=None):
+        """Reserva el siguiente turno y devuelve los segundos que hay que esperarlo"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            now = self.clock()
+            tat = now if self._tat is None else max(self._tat, now)
+            wait = max(0.0, tat - self.tolerance - now)
+            if wait > max_wait:
+                self.stats.rejected += 1
+                raise PacingTimeout(wait, max_wait)
+            self._tat = tat + self.interval
+        return wait
+
+    def _remaining(self, start, max_wait):
+        return max(0.0, (self.max_wait if max_wait is None else max_wait) - (self.clock() - start))
+
+    def _admit(self, start):
+        wait = self.clock() - start
+        with self._lock:
+            self.stats.admit(wait)
+        return wait
+
+    def _done(self):
+        with self._lock:
+            self.stats.in_flight -= 1
+
+    def acquire(self, max_wait=None):
+        """Espera turno y hueco; devuelve los segundos de espera en cola"""
+        start = self.clock()
+        if self._slots is not None and not self._slots.acquire(timeout=self._remaining(start, max_wait)):
+            with self._lock:
+                self.stats.rejected += 1
+            raise PacingTimeout(self.clock() - start, max_wait or self.max_wait)
+        try:
+            wait = self.reserve(self._remaining(start, max_wait))
+            if wait:
+                time.sleep(wait)
+        except BaseException:
+            if self._slots is not None:
+                self._slots.release()
+            raise
+        return self._admit(start)
+
+    def release(self):
+        self._done()
+        if self._slots is not None:
+            self._slots.release()
+
+    async def acquire_async(self, max_wait=None):
+        start = self.clock()
+        if self.connections:
+            if self._async_slots is None:
+                self._async_slots = asyncio.Semaphore(self.connections)
+            try:
+                if self._async_slots.locked():
+                    await asyncio.wait_for(self._async_slots.acquire(), self._remaining(start, max_wait))
+                else:
+                    # wait_for con timeout 0 no llegaría a adquirir un hueco libre
+                    await self._async_slots.acquire()
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self.stats.rejected += 1
+                raise PacingTimeout(self.clock() - start, max_wait or self.max_wait) from None
+        try:
+            wait = self.reserve(self._remaining(start, max_wait))
+            if wait:
+                await asyncio.sleep(wait)
+        except BaseException:
+            if self._async_slots is not None:
+                self._async_slots.release()
+            raise
+        return self._admit(start)
+
+    def release_async(self):
+        self._done()
+        if self._async_slots is not None:
+            self._async_slots.release()
+
+    @contextlib.contextmanager
+    def slot(self, max_wait=None):
+        wait = self.acquire(max_wait)
+        try:
+            yield wait
+        finally:
+            self.release()
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self, max_wait=None):
+        wait = await self.acquire_async(max_wait)
+        try:
+            yield wait
+        finally:
+            self.release_async()
+
+    def __repr__(self):
+        return f"<Pacer {self.rate:g} r/s burst={self.burst} connections={self.connections}>"
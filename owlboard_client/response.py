@@ -0,0 +1,40 @@
+"""Respuesta HTTP común a los clientes síncrono y asíncrono"""
+import json
+
+from owlboard_client.errors import AuthServiceError
+
+
+class Response:
+    """Estado, cabeceras (en minúsculas) y cuerpo de una respuesta.
+
+    `queued` son los segundos que la petición esperó en el Pacer antes de salir.
+    """
+
+    __slots__ = ('status', 'reason', 'headers', 'body', 'elapsed', 'queued')
+
+    def __init__(self, status, reason, headers, body, elapsed, queued=0.0):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+        self.queued = queued
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise AuthServiceError(self.status, self.body, self.reason)
+        return self
+
+    def __repr__(self):
+        return f"<Response [{self.status}] {len(self.body)} bytes {self.elapsed * 1000:.1f} ms>"
@@ -0,0 +1,157 @@
+"""Cliente síncrono con pool de conexiones keep-alive"""
+import http.client
+import threading
+import time
+
+from owlboard_client._base import BATCH_CHUNK_SIZE, ClientBase, chunks
+from owlboard_client.response import Response
+
+# Errores que indican que el servidor cerró una conexión ociosa antes de
+# recibir la petición; se reintenta una vez con una conexión nueva.
+STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection que ofrece la última sesión TLS para reanudarla"""
+
+    def __init__(self, host, port, timeout, context, sessions):
+        super().__init__(host, port, timeout=timeout, context=context)
+        self._sessions = sessions
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        session = self._sessions.get(self._context, self.host, self.port)
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host, session=session)
+
+
+class AuthClient(ClientBase):
+    """Cliente de /auth y /health que reutiliza conexiones TCP+TLS.
+
+    Es seguro entre hilos: cada petición toma una conexión del pool y la
+    devuelve al terminar. Como mucho se conservan `pool_size` conexiones
+    ociosas.
+    """
+
+    def __init__(self, base_url=None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self, timeout):
+        self.stats.connections += 1
+        if self.scheme == 'https':
+            return _HTTPSConnection(self.host, self.port, timeout, self.ssl_context, self.sessions)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _acquire(self, timeout):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(timeout), False
+
+    def _release(self, conn):
+        if conn.sock is not None and self.ssl_context is not None:
+            self.sessions.put(self.ssl_context, self.host, self.port, conn.sock)
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method, path, payload=None, headers=None, timeout=None, data=None):
+        """Envía una petición y devuelve un Response sin comprobar el estado.
+
+        `payload` se envía como JSON; `data`, como bytes tal cual.
+        """
+        target, body, headers = self._prepare(path, payload, headers, data)
+        timeout = self.timeout if timeout is None else timeout
+        if self.pacer is None:
+            return self._request(method, target, body, headers, timeout)
+        with self.pacer.slot() as queued:
+            resp = self._request(method, target, body, headers, timeout)
+        resp.queued = queued
+        return resp
+
+    def _request(self, method, target, body, headers, timeout):
+        self.stats.requests += 1
+        conn, reused = self._acquire(timeout)
+        start = time.perf_counter()
+        try:
+            try:
+                resp = self._send(conn, method, target, body, headers, timeout)
+            except STALE_ERRORS:
+                if not reused:
+                    raise
+                conn.close()
+                self.stats.retries += 1
+                conn = self._new_connection(timeout)
+                start = time.perf_counter()
+                resp = self._send(conn, method, target, body, headers, timeout)
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        elapsed = time.perf_counter() - start
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return Response(resp.status, resp.reason, {k.lower(): v for k, v in resp.getheaders()}, data, elapsed)
+
+    def _send(self, conn, method, target, body, headers, timeout):
+        if conn.sock is None:
+            conn.timeout = timeout
+            conn.connect()
+            if getattr(conn.sock, 'session_reused', False):
+                self.stats.tls_resumed += 1
+        else:
+            conn.sock.settimeout(timeout)
+        conn.request(method, target, body=body, headers=headers)
+        return conn.getresponse()
+
+    def call(self, method, path, payload=None, timeout=None):
+        """Petición JSON; lanza AuthServiceError si el estado es >= 400"""
+        return self.request(method, path, payload, timeout=timeout).raise_for_status().json()
+
+    def login(self, email, password, timeout=None):
+        return self.call('POST', '/auth/login', {'email': email, 'password': password}, timeout)
+
+    def validate(self, token, timeout=None):
+        return self.call('POST', '/auth/token/validate', {'token': token}, timeout)
+
+    def introspect(self, token, timeout=None):
+        return self.call('POST', '/auth/token/introspect', {'token': token}, timeout)
+
+    def refresh(self, refresh_token, timeout=None):
+        return self.call('POST', '/auth/token/refresh', {'refresh_token': refresh_token}, timeout)
+
+    def revoke(self, token, token_type='access', timeout=None):
+        return self.call('POST', '/auth/token/revoke', {'token': token, 'token_type': token_type}, timeout)
+
+    def validate_many(self, tokens, chunk_size=BATCH_CHUNK_SIZE, timeout=None):
+        """Valida una lista de tokens en lotes; resultados en el mismo orden"""
+        return self._batch('/auth/token/validate/batch', tokens, chunk_size, timeout)
+
+    def introspect_many(self, tokens, chunk_size=BATCH_CHUNK_SIZE, timeout=None):
+        return self._batch('/auth/token/introspect/batch', tokens, chunk_size, timeout)
+
+    def _batch(self, path, tokens, chunk_size, timeout):
+        results = []
+        for chunk in chunks(tokens, chunk_size):
+            results.extend(self.call('POST', path, {'tokens': chunk}, timeout)['results'])
+        return results
+
+    def health(self, timeout=None):
+        return self.call('GET', '/health', timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
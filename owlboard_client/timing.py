@@ -0,0 +1,165 @@
+"""Peticiones con desglose de tiempos por fase de red
+
+Cada llamada abre una conexión nueva para poder medir DNS, conexión TCP y
+handshake TLS por separado; después mide el tiempo hasta el primer byte
+(TTFB) y la transferencia del resto de la respuesta.
+"""
+import json
+import re
+import socket
+import time
+import urllib.parse
+
+from owlboard_client._base import USER_AGENT
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'transfer', 'total')
+
+_SERVER_TIMING_PARAM = re.compile(r'\s*([\w-]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;,\s]*)')
+# Comas fuera de comillas: desc="MySQL, users" no parte la métrica
+_SERVER_TIMING_SPLIT = re.compile(r',(?=(?:[^"]*"[^"]*")*[^"]*$)')
+
+
+def parse_server_timing(header):
+    """`db;dur=53.2;desc="MySQL", bcrypt;dur=230` → [{'name', 'dur', 'desc'}]"""
+    metrics = []
+    for part in _SERVER_TIMING_SPLIT.split(header or ''):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        metric = {'name': name.strip(), 'dur': None, 'desc': None}
+        for key, value in _SERVER_TIMING_PARAM.findall(params):
+            value = value[1:-1].replace('\\"', '"') if value.startswith('"') else value
+            if key.lower() == 'dur':
+                try:
+                    metric['dur'] = float(value)
+                except ValueError:
+                    pass
+            elif key.lower() == 'desc':
+                metric['desc'] = value
+        metrics.append(metric)
+    return metrics
+
+
+class TimedResponse:
+    """Respuesta más los tiempos (segundos) de cada fase"""
+
+    def __init__(self, status, headers, body, timings, tls_version=None, tls_resumed=False):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.timings = timings
+        self.tls_version = tls_version
+        self.tls_resumed = tls_resumed
+
+    @property
+    def server_timing(self):
+        return parse_server_timing(self.headers.get('server-timing'))
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+def _read_head(sock):
+    data = b''
+    first_byte = None
+    while b'\r\n\r\n' not in data:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError('Connection closed before response headers')
+        if first_byte is None:
+            first_byte = time.perf_counter()
+        data += chunk
+    head, _, rest = data.partition(b'\r\n\r\n')
+    return head, rest, first_byte
+
+
+def _read_body(sock, headers, rest):
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        data = rest
+        body = b''
+        while True:
+            while b'\r\n' not in data:
+                data += sock.recv(65536)
+            size_line, _, data = data.partition(b'\r\n')
+            size = int(size_line.split(b';', 1)[0], 16)
+            if size == 0:
+                return body
+            while len(data) < size + 2:
+                data += sock.recv(65536)
+            body += data[:size]
+            data = data[size + 2:]
+    if 'content-length' in headers:
+        length = int(headers['content-length'])
+        body = rest
+        while len(body) < length:
+            chunk = sock.recv(min(65536, length - len(body)))
+            if not chunk:
+                break
+            body += chunk
+        return body
+    chunks = [rest]
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+
+
+def timed_request(url, method='GET', payload=None, headers=None, timeout=10.0, ssl_context=None, sessions=None):
+    """Petición por una conexión nueva con tiempos dns/connect/tls/ttfb/transfer.
+
+    Con `sessions` (un tls.SessionCache) se ofrece la última sesión TLS y
+    el handshake medido es el reanudado.
+    """
+    parts = urllib.parse.urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+    body = json.dumps(payload).encode('utf-8') if payload is not None else None
+    lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc}", f"User-Agent: {USER_AGENT}",
+             'Accept: application/json', 'Connection: close']
+    if body is not None:
+        lines += ['Content-Type: application/json', f"Content-Length: {len(body)}"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b'')
+
+    start = time.perf_counter()
+    family, socktype, proto, _, address = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)[0]
+    resolved = time.perf_counter()
+    sock = socket.socket(family, socktype, proto)
+    sock.settimeout(timeout)
+    tls_version = None
+    tls_resumed = False
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.connect(address)
+        connected = time.perf_counter()
+        if parts.scheme == 'https':
+            session = sessions.get(ssl_context, parts.hostname, port) if sessions else None
+            sock = ssl_context.wrap_socket(sock, server_hostname=parts.hostname, session=session)
+            tls_version = sock.version()
+            tls_resumed = sock.session_reused
+        handshaken = time.perf_counter()
+        sock.sendall(request)
+        sent = time.perf_counter()
+        head, rest, first_byte = _read_head(sock)
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        resp_headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            resp_headers[name.strip().lower()] = value.strip()
+        data = _read_body(sock, resp_headers, rest)
+        done = time.perf_counter()
+        if sessions is not None and tls_version:
+            sessions.put(ssl_context, parts.hostname, port, sock)
+    finally:
+        sock.close()
+
+    timings = {
+        'dns': resolved - start,
+        'connect': connected - resolved,
+        'tls': handshaken - connected,
+        'ttfb': first_byte - sent,
+        'transfer': done - first_byte,
+        'total': done - start,
+    }
+    return TimedResponse(int(status_line.split(' ', 2)[1]), resp_headers, data, timings, tls_version, tls_resumed)
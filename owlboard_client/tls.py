@@ -0,0 +1,63 @@
+"""Contextos TLS compartidos y caché de sesiones para reanudar handshakes"""
+import functools
+import os
+import ssl
+import threading
+
+DEFAULT_BASE_URL = os.environ.get('OWLBOARD_AUTH_URL', 'https://localhost:8443')
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECURE_CHANNEL_DIR = os.environ.get('OWLBOARD_SECURE_CHANNEL', os.path.join(_REPO_ROOT, 'Secure_Channel'))
+CA_FILE = os.path.join(SECURE_CHANNEL_DIR, 'ca', 'ca.crt')
+
+
+def client_cert_paths(service='api_gateway'):
+    """Certificado y clave de cliente mTLS generados por generate_client_certs.sh"""
+    base = os.path.join(SECURE_CHANNEL_DIR, 'certs', service)
+    return os.path.join(base, 'client.crt'), os.path.join(base, 'client.key')
+
+
+@functools.lru_cache(maxsize=None)
+def create_context(verify=True, ca_file=None, client_cert=None, client_key=None):
+    """Contexto TLS de cliente, uno por combinación de parámetros.
+
+    Se reutiliza el mismo objeto en todo el proceso: OpenSSL solo acepta
+    reanudar una sesión con el contexto que la creó.
+    """
+    if verify:
+        ctx = ssl.create_default_context(cafile=ca_file)
+    else:
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+    if client_cert:
+        ctx.load_cert_chain(client_cert, client_key)
+    return ctx
+
+
+class SessionCache:
+    """Última sesión TLS conocida por (contexto, host, puerto)"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, context, host, port):
+        with self._lock:
+            return self._sessions.get((id(context), host, port))
+
+    def put(self, context, host, port, sslsock):
+        # Con TLS 1.3 el ticket llega después del handshake, por eso se
+        # guarda al devolver la conexión al pool y no al conectar.
+        session = getattr(sslsock, 'session', None)
+        if session is None or not session.has_ticket and not session.id:
+            return
+        with self._lock:
+            self._sessions[(id(context), host, port)] = session
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+SESSIONS = SessionCache()
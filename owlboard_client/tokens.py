@@ -0,0 +1,271 @@
+"""Gestión de tokens: refresco anticipado con jitter y single-flight
+
+Login devuelve `expires_in` (1800 s con ACCESS_TOKEN_EXPIRE_MINUTES=30).
+TokenManager programa el refresco antes de la caducidad, en
+expires_in * (1 - refresh_ahead) menos un jitter aleatorio para que
+muchos clientes no refresquen a la vez. Pasado ese punto, la primera
+petición lanza el refresco en segundo plano y todas siguen usando el
+token vigente; solo si el token ya caducó esperan, y entonces todas
+esperan al mismo refresco en curso (single-flight): auth_service rota el
+refresh token, así que dos refrescos concurrentes harían fallar uno.
+Los 5xx y errores de conexión se reintentan con backoff exponencial y
+jitter; un 401 del refresh (refresh token caducado o revocado) vuelve a
+hacer login si hay credenciales. Tras un refresco fallido, los de segundo
+plano esperan un backoff (`retry_at`) para no insistir en cada petición
+contra un auth_service que falla; la renovación de un token caducado no
+espera.
+"""
+import asyncio
+import random
+import threading
+import time
+
+from owlboard_client.errors import AuthServiceError
+
+# Margen para no enviar un token que caduque por el camino
+EXPIRY_LEEWAY = 5.0
+
+
+def _retryable(error):
+    if isinstance(error, AuthServiceError):
+        return error.status >= 500
+    return isinstance(error, (OSError, TimeoutError, asyncio.TimeoutError))
+
+
+class TokenStats:
+    __slots__ = ('logins', 'refreshes', 'background_refreshes', 'coalesced', 'retries', 'failures')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _TokenState:
+    """Tokens actuales y calendario de refresco (común a la versión síncrona y asyncio)"""
+
+    def __init__(self, email=None, password=None, tokens=None, refresh_ahead=0.2, jitter=0.1, retries=3,
+                 backoff=0.2, max_backoff=5.0, clock=time.monotonic, seed=None):
+        self.email = email
+        self.password = password
+        self.refresh_ahead = refresh_ahead
+        self.jitter = jitter
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.stats = TokenStats()
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_at = 0.0
+        self.refresh_at = 0.0
+        self.retry_at = 0.0
+        self._failed_flights = 0
+        if tokens:
+            self._store(tokens)
+
+    def _store(self, tokens):
+        now = self.clock()
+        lifetime = float(tokens.get('expires_in') or 0)
+        self.access_token = tokens['access_token']
+        self.refresh_token = tokens.get('refresh_token', self.refresh_token)
+        self.expires_at = now + lifetime
+        # Antes de la caducidad, con jitter hacia atrás de hasta `jitter` * vida útil
+        ahead = lifetime * (self.refresh_ahead + self.random.uniform(0, self.jitter))
+        self.refresh_at = now + max(0.0, lifetime - ahead)
+        self.retry_at = 0.0
+        self._failed_flights = 0
+
+    def _expired(self):
+        return self.access_token is None or self.clock() >= self.expires_at - EXPIRY_LEEWAY
+
+    def _due(self):
+        now = self.clock()
+        return now >= self.refresh_at and now >= self.retry_at
+
+    def _flight_failed(self):
+        """Aplaza el siguiente refresco en segundo plano con backoff creciente"""
+        self.stats.failures += 1
+        self.retry_at = self.clock() + self._delay(self._failed_flights)
+        self._failed_flights += 1
+
+    def _delay(self, attempt):
+        """Backoff exponencial con jitter completo"""
+        return self.random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def invalidate(self):
+        """Descarta el access token (p. ej. tras un 401 de otro servicio); el próximo uso refresca"""
+        self.expires_at = self.refresh_at = 0.0
+
+    def authorization(self, token):
+        return {'Authorization': f"Bearer {token}"}
+
+
+class TokenManager(_TokenState):
+    """Tokens de un AuthClient, seguro entre hilos.
+
+        manager = TokenManager(client, email, password)
+        client.request('GET', '/api/users/me', headers=manager.headers())
+    """
+
+    def __init__(self, client, email=None, password=None, **kwargs):
+        super().__init__(email, password, **kwargs)
+        self.client = client
+        self._lock = threading.Lock()
+        self._flight = None
+
+    def access(self):
+        """Access token vigente; bloquea solo si hay que renovarlo ya"""
+        with self._lock:
+            if not self._expired():
+                if self._due() and self._flight is None:
+                    self.stats.background_refreshes += 1
+                    self._start_flight(background=True)
+                return self.access_token
+            flight = self._flight
+            if flight is None:
+                flight = self._start_flight(background=False)
+                leader = True
+            else:
+                self.stats.coalesced += 1
+                leader = False
+        if leader:
+            self._run_flight(flight)
+        else:
+            flight['done'].wait()
+        if flight['error'] is not None:
+            raise flight['error']
+        return flight['token']
+
+    def headers(self):
+        return self.authorization(self.access())
+
+    def _start_flight(self, background):
+        flight = self._flight = {'done': threading.Event(), 'token': None, 'error': None}
+        if background:
+            threading.Thread(target=self._run_flight, args=(flight,), name='owlboard-token-refresh',
+                             daemon=True).start()
+        return flight
+
+    def _run_flight(self, flight):
+        try:
+            tokens = self._renew()
+            with self._lock:
+                self._store(tokens)
+            flight['token'] = tokens['access_token']
+        except Exception as e:  # noqa: BLE001 - se entrega a quien espera el vuelo
+            with self._lock:
+                self._flight_failed()
+            flight['error'] = e
+        finally:
+            with self._lock:
+                self._flight = None
+            flight['done'].set()
+
+    def _renew(self):
+        if self.refresh_token:
+            try:
+                tokens = self._with_retries(self.client.refresh, self.refresh_token)
+                self.stats.refreshes += 1
+                return tokens
+            except AuthServiceError as e:
+                if e.status != 401 or not self.password:
+                    raise
+        if not self.password:
+            raise AuthServiceError(401, b'', 'No hay refresh token ni credenciales')
+        tokens = self._with_retries(self.client.login, self.email, self.password)
+        self.stats.logins += 1
+        return tokens
+
+    def _with_retries(self, func, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return func(*args)
+            except Exception as e:  # noqa: BLE001 - _retryable decide
+                if attempt == self.retries or not _retryable(e):
+                    raise
+                self.stats.retries += 1
+                time.sleep(self._delay(attempt))
+
+    def revoke(self):
+        """Logout: revoca el refresh token y olvida los tokens"""
+        with self._lock:
+            token, self.refresh_token, self.access_token = self.refresh_token, None, None
+            self.invalidate()
+        if token:
+            self.client.revoke(token, 'refresh')
+
+
+class AsyncTokenManager(_TokenState):
+    """Versión asyncio de TokenManager para AsyncAuthClient"""
+
+    def __init__(self, client, email=None, password=None, **kwargs):
+        super().__init__(email, password, **kwargs)
+        self.client = client
+        self._flight = None
+
+    async def access(self):
+        if not self._expired():
+            if self._due() and self._flight is None:
+                self.stats.background_refreshes += 1
+                self._start_flight()
+            return self.access_token
+        if self._flight is None:
+            self._start_flight()
+        else:
+            self.stats.coalesced += 1
+        # shield: cancelar a quien espera no cancela el refresco compartido
+        return await asyncio.shield(self._flight)
+
+    async def headers(self):
+        return self.authorization(await self.access())
+
+    def _start_flight(self):
+        self._flight = asyncio.ensure_future(self._run_flight())
+        # Un refresco en segundo plano puede fallar sin nadie esperándolo
+        self._flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    async def _run_flight(self):
+        try:
+            tokens = await self._renew()
+            self._store(tokens)
+            return tokens['access_token']
+        except Exception:
+            self._flight_failed()
+            raise
+        finally:
+            self._flight = None
+
+    async def _renew(self):
+        if self.refresh_token:
+            try:
+                tokens = await self._with_retries(self.client.refresh, self.refresh_token)
+                self.stats.refreshes += 1
+                return tokens
+            except AuthServiceError as e:
+                if e.status != 401 or not self.password:
+                    raise
+        if not self.password:
+            raise AuthServiceError(401, b'', 'No hay refresh token ni credenciales')
+        tokens = await self._with_retries(self.client.login, self.email, self.password)
+        self.stats.logins += 1
+        return tokens
+
+    async def _with_retries(self, func, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return await func(*args)
+            except Exception as e:  # noqa: BLE001 - _retryable decide
+                if attempt == self.retries or not _retryable(e):
+                    raise
+                self.stats.retries += 1
+                await asyncio.sleep(self._delay(attempt))
+
+    async def revoke(self):
+        token, self.refresh_token, self.access_token = self.refresh_token, None, None
+        self.invalidate()
+        if token:
+            await self.client.revoke(token, 'refresh')
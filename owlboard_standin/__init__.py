@@ -0,0 +1,23 @@
+"""Stand-ins locales de los servicios de OwlBoard para benchmarks sin Docker"""
+from owlboard_standin.amqp import AmqpStandin
+from owlboard_standin.auth import AuthStandin, Faults, run_in_thread
+from owlboard_standin.chat import ChatStandin
+from owlboard_standin.gateway import BalancerStandin, GatewayCluster, GatewayStandin
+from owlboard_standin.http import BackgroundServer, HTTPError, HTTPServer, Response
+from owlboard_standin.limits import NginxLimits
+
+__all__ = [
+    'AmqpStandin',
+    'AuthStandin',
+    'BackgroundServer',
+    'BalancerStandin',
+    'ChatStandin',
+    'Faults',
+    'GatewayCluster',
+    'GatewayStandin',
+    'HTTPError',
+    'HTTPServer',
+    'NginxLimits',
+    'Response',
+    'run_in_thread',
+]
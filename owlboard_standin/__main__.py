@@ -0,0 +1,147 @@
+"""Ejecuta un stand-in: python -m owlboard_standin auth --port 8443 | chat --port 8002 | amqp --port 5672"""
+import argparse
+import asyncio
+import ssl
+import sys
+
+from owlboard_auth.lockout import (LOCKOUT_DURATION_MINUTES, MAX_LOGIN_ATTEMPTS, MAX_LOGIN_ATTEMPTS_PER_IP,
+                                   LoginLockout, MemoryLockout)
+from owlboard_client.pacing import LB_NGINX_CONF, read_nginx_limits
+from owlboard_standin.amqp import AmqpStandin
+from owlboard_standin.auth import DEFAULT_USERS, AuthStandin, Faults
+from owlboard_standin.chat import ChatStandin
+from owlboard_standin.limits import NginxLimits
+
+
+def server_ssl_context(certfile, keyfile, ciphers=None, tickets=True, client_ca=None):
+    """Contexto de servidor; `ciphers` solo afecta a TLS 1.2 (las suites de 1.3 son las de OpenSSL)"""
+    if not certfile:
+        return None
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+    ctx.load_cert_chain(certfile, keyfile)
+    if ciphers:
+        ctx.set_ciphers(ciphers)
+    if not tickets:
+        # Sin tickets OpenSSL reanuda con la caché de sesiones del servidor (por id en 1.2)
+        ctx.options |= ssl.OP_NO_TICKET
+    if client_ca:
+        ctx.load_verify_locations(client_ca)
+        ctx.verify_mode = ssl.CERT_OPTIONAL
+    return ctx
+
+
+def ssl_context_from_args(args):
+    return server_ssl_context(args.certfile, args.keyfile, args.ssl_ciphers, not args.ssl_no_tickets,
+                              args.ssl_client_ca)
+
+
+def add_server_arguments(parser, port):
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=port)
+    parser.add_argument('--certfile', default=None, help='certificado para servir HTTPS')
+    parser.add_argument('--keyfile', default=None)
+    parser.add_argument('--ssl-ciphers', default=None, help='suites TLS 1.2 (formato de ssl_ciphers de nginx)')
+    parser.add_argument('--ssl-no-tickets', action='store_true',
+                        help='sin session tickets (como ssl_session_tickets off)')
+    parser.add_argument('--ssl-client-ca', default=None, metavar='CA',
+                        help='verificar el certificado de cliente (mTLS) si se presenta')
+
+
+def add_fault_arguments(parser):
+    group = parser.add_argument_group('fallos inyectados')
+    group.add_argument('--latency', type=float, default=0.0, help='latencia fija añadida en ms')
+    group.add_argument('--jitter', type=float, default=0.0, help='latencia aleatoria extra (0..jitter ms)')
+    group.add_argument('--error-rate', type=float, default=0.0, help='fracción de peticiones que fallan (0..1)')
+    group.add_argument('--error-status', type=int, default=500)
+    group.add_argument('--seed', type=int, default=None, help='semilla para fallos reproducibles')
+
+
+def faults_from_args(args):
+    return Faults(args.latency / 1000.0, args.jitter / 1000.0, args.error_rate, args.error_status, args.seed)
+
+
+def add_lockout_arguments(parser):
+    group = parser.add_argument_group('bloqueo de login')
+    group.add_argument('--lockout', action='store_true', help='bloquear cuentas e IPs tras intentos fallidos')
+    group.add_argument('--lockout-redis', default=None, metavar='URL',
+                       help='ventanas en Redis con el script Lua de owlboard_auth.lockout (implica --lockout)')
+    group.add_argument('--max-login-attempts', type=int, default=MAX_LOGIN_ATTEMPTS)
+    group.add_argument('--max-ip-attempts', type=int, default=MAX_LOGIN_ATTEMPTS_PER_IP)
+    group.add_argument('--lockout-minutes', type=float, default=LOCKOUT_DURATION_MINUTES,
+                       help='ventana y duración del bloqueo (default: %(default)s)')
+
+
+def lockout_from_args(args):
+    limits = dict(max_attempts=args.max_login_attempts, max_ip_attempts=args.max_ip_attempts,
+                  window=args.lockout_minutes * 60, lockout=args.lockout_minutes * 60)
+    if args.lockout_redis:
+        import redis
+
+        return LoginLockout(redis.Redis.from_url(args.lockout_redis), **limits)
+    if args.lockout:
+        return MemoryLockout(**limits)
+    return None
+
+
+def parse_user(value):
+    email, sep, password = value.partition(':')
+    if not sep:
+        raise argparse.ArgumentTypeError('formato esperado EMAIL:PASSWORD')
+    return email, password, ''
+
+
+async def serve(server):
+    await server.start()
+    print(f"Stand-in escuchando en {server.url}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m owlboard_standin', description=__doc__)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    auth = subparsers.add_parser('auth', help='auth_service (login, tokens, health)')
+    add_server_arguments(auth, 8443)
+    add_fault_arguments(auth)
+    auth.add_argument('--bcrypt-rounds', type=int, default=4, help='coste bcrypt (producción: 12)')
+    auth.add_argument('--user', type=parse_user, action='append', default=[],
+                      help='usuario adicional EMAIL:PASSWORD (repetible)')
+    auth.add_argument('--server-timing', action='store_true',
+                      help='cabecera Server-Timing por etapa e histogramas en /metrics')
+    auth.add_argument('--nginx-limits', nargs='?', const=LB_NGINX_CONF, default=None, metavar='CONF',
+                      help='aplicar limit_req/limit_conn de un nginx.conf (default: load_balancer_nginx.conf)')
+    add_lockout_arguments(auth)
+
+    chat = subparsers.add_parser('chat', help='chat_service (salas por websocket y Socket.IO; requiere websockets)')
+    add_server_arguments(chat, 8002)
+    chat.add_argument('--no-auth', action='store_true', help='aceptar conexiones sin token')
+
+    amqp = subparsers.add_parser('amqp', help='broker RabbitMQ en memoria (AMQP 0-9-1; requiere pika)')
+    amqp.add_argument('--host', default='127.0.0.1')
+    amqp.add_argument('--port', type=int, default=5672)
+
+    args = parser.parse_args(argv)
+    if args.command == 'auth':
+        limits = NginxLimits(**read_nginx_limits(args.nginx_limits)) if args.nginx_limits else None
+        server = AuthStandin(args.host, args.port, ssl_context_from_args(args),
+                             bcrypt_rounds=args.bcrypt_rounds, faults=faults_from_args(args),
+                             users=DEFAULT_USERS + tuple(args.user), server_timing=args.server_timing,
+                             limits=limits, lockout=lockout_from_args(args))
+    elif args.command == 'chat':
+        server = ChatStandin(args.host, args.port, ssl_context_from_args(args),
+                             require_token=not args.no_auth)
+    elif args.command == 'amqp':
+        server = AmqpStandin(args.host, args.port)
+    try:
+        asyncio.run(serve(server))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
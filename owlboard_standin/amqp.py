@@ -0,0 +1,728 @@
+"""Stand-in de RabbitMQ: broker AMQP 0-9-1 en memoria
+
+Cubre lo que usan los publicadores y consumidores de los servicios y el
+benchmark `owlboard_bench rabbitmq` con pika: conexión (PLAIN, cualquier
+usuario), canales, exchanges direct/fanout/topic, colas con nombre o
+generadas (exclusive, auto_delete), bindings, Basic.Publish con contenido
+en varios frames (mandatory devuelve Basic.Return), Basic.Consume con
+prefetch por consumidor o por canal (Basic.Qos), ack/nack/reject,
+Basic.Get, Basic.Recover y publisher confirms (Confirm.Select). No hay
+persistencia, vhosts, transacciones ni control de flujo; propone
+heartbeat 0 y, si el cliente pide uno, lo envía.
+
+Un solo hilo asyncio hace todo el enrutado, así que su capacidad es la
+de un proceso de Python: sirve para probar el cliente y comparar
+configuraciones, no para dimensionar el broker. Requiere `pika`, cuyo
+codec de frames reutiliza.
+"""
+import asyncio
+import collections
+import functools
+import itertools
+import struct
+
+from owlboard_standin.http import BackgroundServer
+
+PROTOCOL_HEADER = b'AMQP\x00\x00\x09\x01'
+FRAME_MAX = 131072
+SERVER_PROPERTIES = {
+    'product': 'owlboard-standin',
+    'version': '0.9.1',
+    'capabilities': {
+        'publisher_confirms': True,
+        'basic.nack': True,
+        'consumer_cancel_notify': True,
+        'per_consumer_qos': True,
+        'authentication_failure_close': True,
+        'exchange_exchange_bindings': False,
+        'connection.blocked': False,
+    },
+}
+EXCHANGE_TYPES = ('direct', 'fanout', 'topic', 'headers')
+
+
+@functools.lru_cache(maxsize=4096)
+def topic_matches(pattern, routing_key):
+    """`*` es exactamente una palabra y `#` cero o más, como en RabbitMQ"""
+    return _match(tuple(pattern.split('.')), tuple(routing_key.split('.')))
+
+
+def _match(pattern, words):
+    if not pattern:
+        return not words
+    head, rest = pattern[0], pattern[1:]
+    if head == '#':
+        return any(_match(rest, words[i:]) for i in range(len(words) + 1))
+    if not words:
+        return False
+    return (head == '*' or head == words[0]) and _match(rest, words[1:])
+
+
+class AmqpError(Exception):
+    """Error que cierra el canal (o la conexión con `connection=True`)"""
+
+    def __init__(self, code, text, method=None, connection=False):
+        super().__init__(text)
+        self.code = code
+        self.text = text
+        self.method = method
+        self.connection = connection
+
+
+class Message:
+    __slots__ = ('exchange', 'routing_key', 'properties', 'body', 'redelivered')
+
+    def __init__(self, exchange, routing_key, properties, body):
+        self.exchange = exchange
+        self.routing_key = routing_key
+        self.properties = properties
+        self.body = body
+        self.redelivered = False
+
+
+class Exchange:
+    def __init__(self, name, kind, durable=False):
+        self.name = name
+        self.kind = kind
+        self.durable = durable
+        self.bindings = set()  # (cola, routing key)
+
+    def route(self, routing_key):
+        if self.kind == 'fanout':
+            return {queue for queue, _ in self.bindings}
+        if self.kind == 'topic':
+            return {queue for queue, key in self.bindings if topic_matches(key, routing_key)}
+        if self.kind == 'direct':
+            return {queue for queue, key in self.bindings if key == routing_key}
+        return set()
+
+
+class Queue:
+    def __init__(self, name, owner=None, auto_delete=False, durable=False):
+        self.name = name
+        self.owner = owner
+        self.auto_delete = auto_delete
+        self.durable = durable
+        self.messages = collections.deque()
+        self.consumers = []
+        self.had_consumer = False
+        self._next = 0
+
+    def next_consumer(self):
+        """Siguiente consumidor con hueco de prefetch, en rueda"""
+        for _ in range(len(self.consumers)):
+            consumer = self.consumers[self._next % len(self.consumers)]
+            self._next += 1
+            if consumer.has_capacity():
+                return consumer
+        return None
+
+
+class Consumer:
+    __slots__ = ('tag', 'channel', 'queue', 'no_ack', 'prefetch', 'unacked')
+
+    def __init__(self, tag, channel, queue, no_ack, prefetch):
+        self.tag = tag
+        self.channel = channel
+        self.queue = queue
+        self.no_ack = no_ack
+        self.prefetch = prefetch
+        self.unacked = 0
+
+    def has_capacity(self):
+        if self.no_ack:
+            return True
+        if self.prefetch and self.unacked >= self.prefetch:
+            return False
+        return self.channel.has_capacity()
+
+
+class Channel:
+    def __init__(self, connection, number):
+        self.connection = connection
+        self.number = number
+        self.confirm = False
+        self.published = 0
+        self.delivery_tag = 0
+        self.prefetch = 0
+        self.global_prefetch = 0
+        self.unacked = collections.OrderedDict()  # tag -> (cola, mensaje, consumidor o None)
+        self.consumers = {}
+        self.content = None  # Basic.Publish en curso: [método, cabecera, trozos, bytes recibidos]
+        self.closing = False
+
+    def has_capacity(self):
+        return not self.global_prefetch or len(self.unacked) < self.global_prefetch
+
+
+class AmqpConnection:
+    def __init__(self, broker, reader, writer):
+        self.broker = broker
+        self.reader = reader
+        self.writer = writer
+        self.channels = {}
+        self.frame_max = FRAME_MAX
+        self.heartbeat = 0
+        self.closed = False
+        self._out = []
+        self._flush_scheduled = False
+        self._heartbeats = None
+
+    # --- escritura -------------------------------------------------------
+
+    def send(self, data):
+        if self.closed:
+            return
+        self._out.append(data)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if self._out and not self.closed:
+            self.writer.write(b''.join(self._out))
+        self._out.clear()
+
+    def send_method(self, channel, method):
+        from pika import frame
+
+        self.send(frame.Method(channel, method).marshal())
+
+    def send_content(self, channel, method, properties, body):
+        from pika import frame
+
+        parts = [frame.Method(channel, method).marshal(), frame.Header(channel, len(body), properties).marshal()]
+        step = self.frame_max - 8
+        parts.extend(frame.Body(channel, body[i:i + step]).marshal() for i in range(0, len(body), step))
+        self.send(b''.join(parts))
+
+    # --- lectura ---------------------------------------------------------
+
+    async def run(self):
+        from pika import frame, spec
+
+        try:
+            header = await self.reader.readexactly(8)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        if header != PROTOCOL_HEADER:
+            self.writer.write(PROTOCOL_HEADER)
+            self.writer.close()
+            return
+        self.send_method(0, spec.Connection.Start(server_properties=SERVER_PROPERTIES,
+                                                  mechanisms='PLAIN AMQPLAIN', locales='en_US'))
+        buffer = bytearray()
+        try:
+            while not self.closed:
+                data = await self.reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+                offset = 0
+                while len(buffer) - offset >= 8:
+                    size = struct.unpack_from('>L', buffer, offset + 3)[0]
+                    end = offset + 8 + size
+                    if end > len(buffer):
+                        break
+                    _, decoded = frame.decode_frame(bytes(buffer[offset:end]))
+                    offset = end
+                    self.handle_frame(decoded)
+                    if self.closed:
+                        break
+                del buffer[:offset]
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.close()
+
+    def handle_frame(self, decoded):
+        from pika import frame, spec
+
+        if isinstance(decoded, frame.Heartbeat):
+            return
+        channel = self.channels.get(decoded.channel_number)
+        try:
+            if isinstance(decoded, frame.Method):
+                if decoded.channel_number == 0:
+                    self.connection_method(decoded.method)
+                elif channel is None:
+                    if isinstance(decoded.method, spec.Channel.Open):
+                        self.channels[decoded.channel_number] = Channel(self, decoded.channel_number)
+                        self.send_method(decoded.channel_number, spec.Channel.OpenOk())
+                    else:
+                        raise AmqpError(spec.CHANNEL_ERROR, 'CHANNEL_ERROR - unknown channel',
+                                        decoded.method, connection=True)
+                elif channel.closing:
+                    if isinstance(decoded.method, spec.Channel.CloseOk):
+                        self.drop_channel(channel)
+                else:
+                    self.channel_method(channel, decoded.method)
+            elif channel is not None and channel.content is not None:
+                self.content_frame(channel, decoded)
+            elif channel is None or not channel.closing:
+                raise AmqpError(spec.UNEXPECTED_FRAME, 'UNEXPECTED_FRAME - content without Basic.Publish',
+                                connection=True)
+        except AmqpError as e:
+            self.fail(channel, e)
+
+    def fail(self, channel, error):
+        from pika import spec
+
+        class_id, method_id = (error.method.INDEX >> 16, error.method.INDEX & 0xFFFF) if error.method else (0, 0)
+        if error.connection or channel is None:
+            self.send_method(0, spec.Connection.Close(error.code, error.text, class_id, method_id))
+            self._flush()
+            self.close()
+            return
+        channel.closing = True
+        channel.content = None
+        self.send_method(channel.number, spec.Channel.Close(error.code, error.text, class_id, method_id))
+
+    # --- conexión y canales ----------------------------------------------
+
+    def connection_method(self, method):
+        from pika import spec
+
+        if isinstance(method, spec.Connection.StartOk):
+            self.send_method(0, spec.Connection.Tune(channel_max=2047, frame_max=FRAME_MAX, heartbeat=0))
+        elif isinstance(method, spec.Connection.TuneOk):
+            self.frame_max = min(FRAME_MAX, method.frame_max or FRAME_MAX)
+            self.heartbeat = method.heartbeat
+            if self.heartbeat:
+                self._heartbeats = asyncio.ensure_future(self._send_heartbeats())
+        elif isinstance(method, spec.Connection.Open):
+            self.send_method(0, spec.Connection.OpenOk())
+        elif isinstance(method, spec.Connection.Close):
+            self.send_method(0, spec.Connection.CloseOk())
+            self._flush()
+            self.close()
+        elif isinstance(method, spec.Connection.CloseOk):
+            self.close()
+        else:
+            raise AmqpError(spec.NOT_IMPLEMENTED, f"NOT_IMPLEMENTED - {method.NAME}", method, connection=True)
+
+    async def _send_heartbeats(self):
+        from pika import frame
+
+        while not self.closed:
+            await asyncio.sleep(self.heartbeat / 2)
+            self.send(frame.Heartbeat().marshal())
+
+    def channel_method(self, channel, method):
+        from pika import spec
+
+        handler = self.broker.handlers.get(type(method))
+        if handler is None:
+            raise AmqpError(spec.NOT_IMPLEMENTED, f"NOT_IMPLEMENTED - {method.NAME}", method, connection=True)
+        handler(self, channel, method)
+
+    def content_frame(self, channel, decoded):
+        from pika import frame, spec
+
+        method, header, chunks, received = channel.content
+        if header is None:
+            if not isinstance(decoded, frame.Header):
+                raise AmqpError(spec.UNEXPECTED_FRAME, 'UNEXPECTED_FRAME - expected content header',
+                                connection=True)
+            channel.content = [method, decoded, chunks, 0]
+        elif isinstance(decoded, frame.Body):
+            chunks.append(decoded.fragment)
+            channel.content[3] = received + len(decoded.fragment)
+        else:
+            raise AmqpError(spec.UNEXPECTED_FRAME, 'UNEXPECTED_FRAME - expected content body', connection=True)
+        method, header, chunks, received = channel.content
+        if received >= header.body_size:
+            channel.content = None
+            self.broker.publish(self, channel, method, header.properties, b''.join(chunks))
+
+    def drop_channel(self, channel):
+        self.channels.pop(channel.number, None)
+        self.broker.release_channel(channel)
+
+    def close(self):
+        if self.closed:
+            return
+        self._flush()
+        self.closed = True
+        if self._heartbeats is not None:
+            self._heartbeats.cancel()
+        for channel in list(self.channels.values()):
+            self.drop_channel(channel)
+        self.broker.release_connection(self)
+        self.writer.close()
+
+
+class AmqpStandin:
+    """Broker en memoria; `stats` cuenta publicados, enrutados, entregados y confirmados"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        from pika import spec
+
+        self.host = host
+        self.port = port
+        self.server = None
+        self.connections = set()
+        self.exchanges = {name: Exchange(name, kind, durable=True) for name, kind in (
+            ('amq.direct', 'direct'), ('amq.fanout', 'fanout'), ('amq.topic', 'topic'))}
+        self.queues = {}
+        self.stats = collections.Counter()
+        self._names = itertools.count(1)
+        self.handlers = {
+            spec.Channel.Close: self.channel_close,
+            spec.Channel.Flow: lambda conn, ch, m: conn.send_method(ch.number, spec.Channel.FlowOk(m.active)),
+            spec.Exchange.Declare: self.exchange_declare,
+            spec.Exchange.Delete: self.exchange_delete,
+            spec.Queue.Declare: self.queue_declare,
+            spec.Queue.Bind: self.queue_bind,
+            spec.Queue.Unbind: self.queue_unbind,
+            spec.Queue.Purge: self.queue_purge,
+            spec.Queue.Delete: self.queue_delete,
+            spec.Basic.Qos: self.basic_qos,
+            spec.Basic.Consume: self.basic_consume,
+            spec.Basic.Cancel: self.basic_cancel,
+            spec.Basic.Publish: self.basic_publish,
+            spec.Basic.Ack: self.basic_ack,
+            spec.Basic.Nack: self.basic_nack,
+            spec.Basic.Reject: self.basic_reject,
+            spec.Basic.Get: self.basic_get,
+            spec.Basic.Recover: self.basic_recover,
+            spec.Confirm.Select: self.confirm_select,
+        }
+
+    @property
+    def url(self):
+        return f"amqp://guest:guest@{self.host}:{self.port}/"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._accept, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            for connection in list(self.connections):
+                connection.close()
+            await self.server.wait_closed()
+
+    async def _accept(self, reader, writer):
+        connection = AmqpConnection(self, reader, writer)
+        self.connections.add(connection)
+        self.stats['connections'] += 1
+        try:
+            await connection.run()
+        finally:
+            connection.close()
+
+    # --- estado ----------------------------------------------------------
+
+    def _exchange(self, name, method):
+        from pika import spec
+
+        exchange = self.exchanges.get(name)
+        if exchange is None:
+            raise AmqpError(spec.NOT_FOUND, f"NOT_FOUND - no exchange '{name}'", method)
+        return exchange
+
+    def _queue(self, connection, name, method):
+        from pika import spec
+
+        queue = self.queues.get(name)
+        if queue is None:
+            raise AmqpError(spec.NOT_FOUND, f"NOT_FOUND - no queue '{name}'", method)
+        if queue.owner is not None and queue.owner is not connection:
+            raise AmqpError(spec.RESOURCE_LOCKED, f"RESOURCE_LOCKED - queue '{name}' is exclusive", method)
+        return queue
+
+    def delete_queue(self, queue):
+        from pika import spec
+
+        self.queues.pop(queue.name, None)
+        for exchange in self.exchanges.values():
+            exchange.bindings = {b for b in exchange.bindings if b[0] != queue.name}
+        for consumer in list(queue.consumers):
+            consumer.channel.consumers.pop(consumer.tag, None)
+            consumer.channel.connection.send_method(consumer.channel.number, spec.Basic.Cancel(consumer.tag))
+        queue.consumers.clear()
+        return len(queue.messages)
+
+    def remove_consumer(self, consumer):
+        queue = consumer.queue
+        if consumer in queue.consumers:
+            queue.consumers.remove(consumer)
+        if queue.auto_delete and queue.had_consumer and not queue.consumers and queue.name in self.queues:
+            self.delete_queue(queue)
+
+    def release_channel(self, channel):
+        """Cierre de canal: sus consumidores desaparecen y lo no confirmado vuelve a la cola"""
+        for consumer in list(channel.consumers.values()):
+            self.remove_consumer(consumer)
+        channel.consumers.clear()
+        self.requeue_unacked(channel)
+
+    def release_connection(self, connection):
+        self.connections.discard(connection)
+        for queue in [q for q in self.queues.values() if q.owner is connection]:
+            self.delete_queue(queue)
+
+    # --- enrutado y entrega ----------------------------------------------
+
+    def publish(self, connection, channel, method, properties, body):
+        from pika import spec
+
+        self.stats['published'] += 1
+        message = Message(method.exchange, method.routing_key, properties, body)
+        if method.exchange:
+            exchange = self.exchanges.get(method.exchange)
+            if exchange is None:
+                raise AmqpError(spec.NOT_FOUND, f"NOT_FOUND - no exchange '{method.exchange}'", method)
+            targets = [self.queues[name] for name in exchange.route(method.routing_key) if name in self.queues]
+        else:
+            targets = [self.queues[method.routing_key]] if method.routing_key in self.queues else []
+        if targets:
+            self.stats['routed'] += 1
+        elif method.mandatory:
+            self.stats['returned'] += 1
+            connection.send_content(channel.number, spec.Basic.Return(spec.NO_ROUTE, 'NO_ROUTE', method.exchange,
+                                                                      method.routing_key), properties, body)
+        else:
+            self.stats['dropped'] += 1
+        for queue in targets:
+            queue.messages.append(message)
+            self.dispatch(queue)
+        if channel.confirm:
+            channel.published += 1
+            self.stats['confirmed'] += 1
+            connection.send_method(channel.number, spec.Basic.Ack(channel.published))
+
+    def deliver(self, consumer, message):
+        from pika import spec
+
+        channel = consumer.channel
+        channel.delivery_tag += 1
+        if not consumer.no_ack:
+            channel.unacked[channel.delivery_tag] = (consumer.queue, message, consumer)
+            consumer.unacked += 1
+        self.stats['delivered'] += 1
+        channel.connection.send_content(channel.number, spec.Basic.Deliver(
+            consumer.tag, channel.delivery_tag, message.redelivered, message.exchange, message.routing_key),
+            message.properties, message.body)
+
+    def dispatch(self, queue):
+        while queue.messages and queue.consumers:
+            consumer = queue.next_consumer()
+            if consumer is None:
+                return
+            self.deliver(consumer, queue.messages.popleft())
+
+    def settle(self, connection, channel, method, requeue):
+        """Ack, nack o reject de `delivery_tag` (y anteriores con `multiple`)"""
+        from pika import spec
+
+        tag = method.delivery_tag
+        if getattr(method, 'multiple', False):
+            tags = [t for t in channel.unacked if t <= tag or tag == 0]
+        elif tag in channel.unacked:
+            tags = [tag]
+        else:
+            raise AmqpError(spec.PRECONDITION_FAILED, f"PRECONDITION_FAILED - unknown delivery tag {tag}", method)
+        touched = set()
+        for t in tags:
+            queue, message, consumer = channel.unacked.pop(t)
+            if consumer is not None:
+                consumer.unacked -= 1
+            if requeue and queue.name in self.queues:
+                message.redelivered = True
+                queue.messages.appendleft(message)
+            touched.add(queue)
+        self.stats['acked' if requeue is None else 'rejected'] += len(tags)
+        for queue in touched:
+            self.dispatch(queue)
+
+    # --- métodos ---------------------------------------------------------
+
+    def channel_close(self, connection, channel, method):
+        from pika import spec
+
+        connection.drop_channel(channel)
+        connection.send_method(channel.number, spec.Channel.CloseOk())
+
+    def exchange_declare(self, connection, channel, method):
+        from pika import spec
+
+        exchange = self.exchanges.get(method.exchange)
+        if method.passive:
+            self._exchange(method.exchange, method)
+        elif exchange is None:
+            if method.type not in EXCHANGE_TYPES:
+                raise AmqpError(spec.COMMAND_INVALID, f"COMMAND_INVALID - unknown exchange type '{method.type}'",
+                                method, connection=True)
+            self.exchanges[method.exchange] = Exchange(method.exchange, method.type, method.durable)
+        elif exchange.kind != method.type:
+            raise AmqpError(spec.PRECONDITION_FAILED, f"PRECONDITION_FAILED - inequivalent arg 'type' for "
+                                                      f"exchange '{method.exchange}'", method)
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Exchange.DeclareOk())
+
+    def exchange_delete(self, connection, channel, method):
+        from pika import spec
+
+        self.exchanges.pop(method.exchange, None)
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Exchange.DeleteOk())
+
+    def queue_declare(self, connection, channel, method):
+        from pika import spec
+
+        name = method.queue or f"amq.gen-{next(self._names):08d}"
+        if method.passive:
+            queue = self._queue(connection, name, method)
+        else:
+            queue = self.queues.get(name)
+            if queue is None:
+                queue = self.queues[name] = Queue(name, connection if method.exclusive else None,
+                                                  method.auto_delete, method.durable)
+            else:
+                self._queue(connection, name, method)
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Queue.DeclareOk(name, len(queue.messages),
+                                                                        len(queue.consumers)))
+
+    def queue_bind(self, connection, channel, method):
+        from pika import spec
+
+        queue = self._queue(connection, method.queue, method)
+        self._exchange(method.exchange, method).bindings.add((queue.name, method.routing_key))
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Queue.BindOk())
+
+    def queue_unbind(self, connection, channel, method):
+        from pika import spec
+
+        self._exchange(method.exchange, method).bindings.discard((method.queue, method.routing_key))
+        connection.send_method(channel.number, spec.Queue.UnbindOk())
+
+    def queue_purge(self, connection, channel, method):
+        from pika import spec
+
+        queue = self._queue(connection, method.queue, method)
+        count = len(queue.messages)
+        queue.messages.clear()
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Queue.PurgeOk(count))
+
+    def queue_delete(self, connection, channel, method):
+        from pika import spec
+
+        queue = self.queues.get(method.queue)
+        count = self.delete_queue(self._queue(connection, method.queue, method)) if queue is not None else 0
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Queue.DeleteOk(count))
+
+    def basic_qos(self, connection, channel, method):
+        from pika import spec
+
+        if method.global_qos:
+            channel.global_prefetch = method.prefetch_count
+        else:
+            channel.prefetch = method.prefetch_count
+        connection.send_method(channel.number, spec.Basic.QosOk())
+        for queue in {consumer.queue for consumer in channel.consumers.values()}:
+            self.dispatch(queue)
+
+    def basic_consume(self, connection, channel, method):
+        from pika import spec
+
+        queue = self._queue(connection, method.queue, method)
+        tag = method.consumer_tag or f"amq.ctag-{next(self._names):08d}"
+        if tag in channel.consumers:
+            raise AmqpError(spec.NOT_ALLOWED, f"NOT_ALLOWED - consumer tag '{tag}' in use", method,
+                            connection=True)
+        consumer = Consumer(tag, channel, queue, method.no_ack, channel.prefetch)
+        channel.consumers[tag] = consumer
+        queue.consumers.append(consumer)
+        queue.had_consumer = True
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Basic.ConsumeOk(tag))
+        self.dispatch(queue)
+
+    def basic_cancel(self, connection, channel, method):
+        from pika import spec
+
+        consumer = channel.consumers.pop(method.consumer_tag, None)
+        if consumer is not None:
+            self.remove_consumer(consumer)
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Basic.CancelOk(method.consumer_tag))
+
+    def basic_publish(self, connection, channel, method):
+        channel.content = [method, None, [], 0]
+
+    def basic_ack(self, connection, channel, method):
+        self.settle(connection, channel, method, None)
+
+    def basic_nack(self, connection, channel, method):
+        self.settle(connection, channel, method, method.requeue)
+
+    def basic_reject(self, connection, channel, method):
+        self.settle(connection, channel, method, method.requeue)
+
+    def basic_get(self, connection, channel, method):
+        from pika import spec
+
+        queue = self._queue(connection, method.queue, method)
+        if not queue.messages:
+            connection.send_method(channel.number, spec.Basic.GetEmpty())
+            return
+        message = queue.messages.popleft()
+        channel.delivery_tag += 1
+        if not method.no_ack:
+            channel.unacked[channel.delivery_tag] = (queue, message, None)
+        self.stats['delivered'] += 1
+        connection.send_content(channel.number, spec.Basic.GetOk(
+            channel.delivery_tag, message.redelivered, message.exchange, message.routing_key, len(queue.messages)),
+            message.properties, message.body)
+
+    def basic_recover(self, connection, channel, method):
+        from pika import spec
+
+        self.requeue_unacked(channel)
+        connection.send_method(channel.number, spec.Basic.RecoverOk())
+
+    def requeue_unacked(self, channel):
+        requeued = set()
+        for queue, message, consumer in reversed(channel.unacked.values()):
+            if consumer is not None:
+                consumer.unacked -= 1
+            if queue.name in self.queues:
+                message.redelivered = True
+                queue.messages.appendleft(message)
+                requeued.add(queue)
+        channel.unacked.clear()
+        for queue in requeued:
+            self.dispatch(queue)
+
+    def confirm_select(self, connection, channel, method):
+        from pika import spec
+
+        channel.confirm = True
+        if not method.nowait:
+            connection.send_method(channel.number, spec.Confirm.SelectOk())
+
+    def snapshot(self):
+        return {
+            'connections': len(self.connections),
+            'queues': {name: {'messages': len(q.messages), 'consumers': len(q.consumers)}
+                       for name, q in self.queues.items()},
+            **self.stats,
+        }
+
+
+def run_in_thread(**kwargs):
+    """Arranca un AmqpStandin en un hilo; usar como context manager"""
+
+    async def factory():
+        return await AmqpStandin(**kwargs).start()
+
+    return BackgroundServer(factory)
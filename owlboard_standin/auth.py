@@ -0,0 +1,326 @@
+"""Stand-in en proceso de auth_service: mismo contrato, sin MySQL ni Redis"""
+import asyncio
+import math
+import random
+import time
+
+from passlib.hash import bcrypt
+
+from owlboard_auth.timing import Histograms, request_timer, stage
+from owlboard_auth.tokens import TokenError, TokenIssuer, token_jti
+from owlboard_standin.http import BackgroundServer, HTTPError, HTTPServer, Response
+
+DEFAULT_USERS = (
+    ('test@owlboard.com', 'password123', 'Test User'),
+)
+MAX_BATCH_SIZE = 1000
+DOCS_HTML = b'<!DOCTYPE html><html><head><title>Auth Service - Swagger UI</title></head><body></body></html>'
+
+
+class Faults:
+    """Latencia y errores inyectados antes de cada endpoint /auth.
+
+    Con `seed` la secuencia de decisiones es reproducible.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+
+    async def apply(self):
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise HTTPError(self.error_status, 'Injected fault')
+
+
+class UserTable:
+    """Tabla `users` en memoria con hashes bcrypt de passlib"""
+
+    def __init__(self, rounds=4):
+        self.hasher = bcrypt.using(rounds=rounds)
+        self.by_email = {}
+        self.by_id = {}
+
+    def add(self, email, password=None, full_name='', is_active=True, hashed_password=None):
+        user = self.by_email.get(email)
+        if user is None:
+            user = {'id': len(self.by_id) + 1, 'email': email}
+            self.by_id[user['id']] = user
+            self.by_email[email] = user
+        user['hashed_password'] = hashed_password or self.hasher.hash(password)
+        user['full_name'] = full_name
+        user['is_active'] = is_active
+        return user
+
+    def get(self, email):
+        return self.by_email.get(email)
+
+    def get_by_id(self, user_id):
+        return self.by_id.get(int(user_id))
+
+
+class MemoryBlacklist:
+    """Revocaciones por jti (o por token si no lo tiene), con caducidad igual al `exp` del token"""
+
+    def __init__(self):
+        self._entries = {}
+
+    def add(self, token, exp):
+        self._entries[token_jti(token) or token] = exp
+
+    def __contains__(self, token):
+        key = token_jti(token) or token
+        exp = self._entries.get(key)
+        if exp is None:
+            return False
+        if exp <= time.time():
+            del self._entries[key]
+            return False
+        return True
+
+    def revoked_many(self, tokens):
+        return [token in self for token in tokens]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def client_ip(request):
+    """IP del cliente tras load_balancer: X-Forwarded-For, X-Real-IP o el socket"""
+    forwarded = request.headers.get('x-forwarded-for', '')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.headers.get('x-real-ip') or (request.peer[0] if request.peer else '-')
+
+
+def validation_result(claims, error):
+    if error:
+        return {'valid': False, 'message': error}
+    return {
+        'valid': True,
+        'user_id': int(claims['sub']),
+        'email': claims.get('email'),
+        'scopes': claims.get('scopes', []),
+        'expires_at': claims['exp'],
+    }
+
+
+def introspection_result(claims, error):
+    if error:
+        return {'active': False}
+    return {
+        'active': True,
+        'sub': claims['sub'],
+        'username': claims.get('email'),
+        'token_type': claims.get('type'),
+        'scope': ' '.join(claims.get('scopes', [])),
+        'exp': claims['exp'],
+        'iat': claims.get('iat'),
+        'jti': claims.get('jti'),
+    }
+
+
+class AuthStandin:
+    """Implementa /auth/login, /auth/token/{validate,introspect,refresh,revoke} y /health.
+
+    Con `server_timing` cada respuesta /auth lleva Server-Timing con las mismas
+    etapas que auth_service (db, bcrypt, jwt, redis) y GET /metrics expone los
+    histogramas acumulados. Con `limits` (NginxLimits) los endpoints /auth
+    responden el 503 de nginx como detrás de load_balancer. Con `lockout`
+    (MemoryLockout o LoginLockout) el login responde 429 con Retry-After a
+    la cuenta o IP bloqueada antes de buscar al usuario y verificar bcrypt.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, ssl_context=None, issuer=None, bcrypt_rounds=4,
+                 faults=None, users=DEFAULT_USERS, server_timing=False, limits=None, lockout=None):
+        self.issuer = issuer or TokenIssuer()
+        self.users = UserTable(bcrypt_rounds)
+        for email, password, full_name in users:
+            self.users.add(email, password, full_name)
+        self.blacklist = MemoryBlacklist()
+        self.faults = faults or Faults()
+        self.server_timing = server_timing
+        self.limits = limits
+        self.lockout = lockout
+        self.timings = Histograms()
+        self.http = HTTPServer(host, port, ssl_context)
+        self.http.route('GET', '/', self.root)
+        self.http.route('GET', '/health', self.health)
+        self.http.route('GET', '/auth/docs', self.docs)
+        self.http.route('GET', '/metrics', self.metrics)
+        for path, handler in (
+            ('/auth/login', self.login),
+            ('/auth/token/validate', self.validate),
+            ('/auth/token/introspect', self.introspect),
+            ('/auth/token/validate/batch', self.validate_batch),
+            ('/auth/token/introspect/batch', self.introspect_batch),
+            ('/auth/token/refresh', self.refresh),
+            ('/auth/token/revoke', self.revoke),
+        ):
+            self.http.route('POST', path, self._with_faults(handler))
+
+    @property
+    def url(self):
+        return self.http.url
+
+    async def start(self):
+        await self.http.start()
+        return self
+
+    async def close(self):
+        await self.http.close()
+
+    def _with_faults(self, handler):
+        async def wrapped(request):
+            client = request.peer[0] if request.peer else '-'
+            if self.limits is not None:
+                rejected = self.limits.enter(client)
+                if rejected is not None:
+                    return rejected
+            try:
+                await self.faults.apply()
+                with request_timer(request.path, self.timings, self.server_timing) as timer:
+                    response = await handler(request)
+                    if timer is not None:
+                        response.headers['Server-Timing'] = timer.header()
+                return response
+            finally:
+                if self.limits is not None:
+                    self.limits.leave(client)
+        return wrapped
+
+    def _check_many(self, tokens, token_type=None):
+        """[(claims, None) o (None, mensaje)] por token, con una sola consulta a la blacklist"""
+        checked = []
+        with stage('jwt'):
+            for token in tokens:
+                try:
+                    claims = self.issuer.decode(token)
+                    if token_type and claims.get('type') != token_type:
+                        raise TokenError('Invalid token type')
+                    checked.append((claims, None))
+                except TokenError as e:
+                    checked.append((None, str(e)))
+        with stage('redis'):
+            revoked = list(self.blacklist.revoked_many(
+                [token for token, (claims, _) in zip(tokens, checked) if claims is not None]))
+        revoked = iter(revoked)
+        return [(None, 'Token has been revoked') if claims is not None and next(revoked) else (claims, error)
+                for claims, error in checked]
+
+    def _claims(self, token, token_type=None):
+        """Claims de un token vigente y no revocado, o TokenError"""
+        claims, error = self._check_many([token], token_type)[0]
+        if error:
+            raise TokenError(error)
+        return claims
+
+    def _batch_tokens(self, request):
+        data = request.json()
+        tokens = data.get('tokens') if isinstance(data, dict) else None
+        if not isinstance(tokens, list) or not all(isinstance(t, str) for t in tokens):
+            raise HTTPError(422, [{'loc': ['body', 'tokens'], 'msg': 'value is not a valid list of strings',
+                                   'type': 'type_error.list'}])
+        if len(tokens) > MAX_BATCH_SIZE:
+            raise HTTPError(422, f"At most {MAX_BATCH_SIZE} tokens per batch")
+        return tokens
+
+    async def root(self, request):
+        return Response.json({'service': 'auth_service', 'version': '1.0.0', 'docs': '/auth/docs'})
+
+    async def health(self, request):
+        return Response.json({'status': 'healthy', 'service': 'auth_service',
+                              'redis': 'in-memory', 'database': 'in-memory'})
+
+    async def docs(self, request):
+        return Response(200, DOCS_HTML, content_type='text/html; charset=utf-8')
+
+    async def metrics(self, request):
+        if request.query.get('format') == ['json']:
+            return Response.json(self.timings.snapshot())
+        return Response(200, self.timings.render_prometheus().encode(), content_type='text/plain; version=0.0.4')
+
+    async def login(self, request):
+        data = request.json()
+        email, password = request.field(data, 'email'), request.field(data, 'password')
+        lockout, decision = self.lockout, None
+        if lockout is not None:
+            ip = client_ip(request)
+            with stage('redis'):
+                decision = lockout.acquire(email, ip)
+            if not decision:
+                raise HTTPError(429, 'Too many failed login attempts',
+                                {'Retry-After': str(max(1, math.ceil(decision.retry_after)))})
+        with stage('db'):
+            user = self.users.get(email)
+        # bcrypt libera el GIL: se verifica fuera del bucle para no bloquearlo
+        with stage('bcrypt'):
+            valid = user is not None and await asyncio.get_running_loop().run_in_executor(
+                None, self.users.hasher.verify, password, user['hashed_password'])
+        if not valid:
+            raise HTTPError(401, 'Incorrect email or password', {'WWW-Authenticate': 'Bearer'})
+        if decision is not None:
+            with stage('redis'):
+                lockout.succeeded(email, ip, decision)
+        if not user['is_active']:
+            raise HTTPError(403, 'Inactive user')
+        with stage('jwt'):
+            tokens = self.issuer.issue(user)
+        return Response.json(tokens)
+
+    async def validate(self, request):
+        token = request.field(request.json(), 'token')
+        return Response.json(validation_result(*self._check_many([token], 'access')[0]))
+
+    async def introspect(self, request):
+        token = request.field(request.json(), 'token')
+        return Response.json(introspection_result(*self._check_many([token])[0]))
+
+    async def validate_batch(self, request):
+        results = [validation_result(*r) for r in self._check_many(self._batch_tokens(request), 'access')]
+        return Response.json({'count': len(results), 'results': results})
+
+    async def introspect_batch(self, request):
+        results = [introspection_result(*r) for r in self._check_many(self._batch_tokens(request))]
+        return Response.json({'count': len(results), 'results': results})
+
+    async def refresh(self, request):
+        token = request.field(request.json(), 'refresh_token')
+        try:
+            claims = self._claims(token, 'refresh')
+        except TokenError as e:
+            raise HTTPError(401, str(e)) from None
+        with stage('db'):
+            user = self.users.get_by_id(claims['sub'])
+        if user is None or not user['is_active']:
+            raise HTTPError(401, 'User not found or inactive')
+        # Rotación: el refresh token usado deja de valer
+        with stage('redis'):
+            self.blacklist.add(token, claims['exp'])
+        with stage('jwt'):
+            tokens = self.issuer.issue(user)
+        return Response.json(tokens)
+
+    async def revoke(self, request):
+        token = request.field(request.json(), 'token')
+        try:
+            claims = self.issuer.decode(token, verify_exp=False)
+        except TokenError as e:
+            raise HTTPError(400, str(e)) from None
+        with stage('redis'):
+            self.blacklist.add(token, claims.get('exp', time.time() + self.issuer.refresh_ttl))
+        return Response.json({'message': 'Token revoked successfully', 'revoked': True})
+
+
+def run_in_thread(**kwargs):
+    """Arranca un AuthStandin en un hilo; usar como context manager"""
+
+    async def factory():
+        return await AuthStandin(**kwargs).start()
+
+    return BackgroundServer(factory)
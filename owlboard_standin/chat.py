@@ -0,0 +1,194 @@
+"""Stand-in de chat_service: salas por websocket con broadcast
+
+Acepta dos protocolos, los de las rutas de desktop_proxy_nginx.conf:
+
+- websocket simple en `.../ws/{sala}` (p. ej. /api/chat/ws/general):
+  cada frame de texto se reenvía a todas las conexiones de la sala,
+  incluida la que lo envió;
+- Socket.IO (Engine.IO 4, solo transporte websocket) en /socket.io/:
+  `40{"token": ...}` conecta, `42["join", {"room": ...}]` entra en una
+  sala y `42["message", {...}]` se reenvía a la sala como el mismo evento.
+
+El token va en `?token=`, en `Authorization: Bearer` o, con Socket.IO, en
+el paquete de conexión, y se verifica con el mismo JWT_SECRET_KEY que el
+stand-in de auth_service. Requiere el paquete `websockets`.
+"""
+import itertools
+import json
+import re
+
+from owlboard_auth.tokens import TokenError, TokenIssuer
+from owlboard_standin.http import BackgroundServer
+
+ROOM_PATH = re.compile(r'/ws/([^/?#]+)')
+SOCKETIO_PATH = '/socket.io/'
+# Intervalo de ping de Engine.IO; el stand-in no los envía, los clientes solo lo leen
+ENGINEIO_OPEN = {'upgrades': [], 'pingInterval': 25000, 'pingTimeout': 20000, 'maxPayload': 1000000}
+
+
+def socketio_event(name, data):
+    return '42' + json.dumps([name, data], separators=(',', ':'))
+
+
+def parse_socketio(frame):
+    """(tipo, datos) de un paquete Engine.IO/Socket.IO en texto.
+
+    Tipos: 'open', 'ping', 'pong', 'connect', 'disconnect', 'event'
+    (datos = [nombre, ...]), 'error' o 'other'.
+    """
+    if not frame:
+        return 'other', None
+    engine = frame[0]
+    if engine == '0':
+        return 'open', json.loads(frame[1:] or '{}')
+    if engine == '2':
+        return 'ping', None
+    if engine == '3':
+        return 'pong', None
+    if engine != '4' or len(frame) < 2:
+        return 'other', None
+    kind, payload = frame[1], frame[2:]
+    # Socket.IO permite un namespace ("/chat,") antes de los datos
+    if payload.startswith('/'):
+        payload = payload.partition(',')[2]
+    if kind == '0':
+        return 'connect', json.loads(payload) if payload else {}
+    if kind == '1':
+        return 'disconnect', None
+    if kind == '2':
+        return 'event', json.loads(payload.lstrip('0123456789'))
+    if kind == '4':
+        return 'error', payload
+    return 'other', None
+
+
+class ChatStandin:
+    def __init__(self, host='127.0.0.1', port=0, ssl_context=None, issuer=None, require_token=True):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.issuer = issuer or TokenIssuer()
+        self.require_token = require_token
+        self.rooms = {}
+        self.server = None
+        self._ids = itertools.count(1)
+        self.stats = {'connections': 0, 'rejected': 0, 'received': 0, 'delivered': 0}
+
+    @property
+    def url(self):
+        scheme = 'wss' if self.ssl_context else 'ws'
+        return f"{scheme}://{self.host}:{self.port}"
+
+    async def start(self):
+        from websockets.asyncio.server import serve
+
+        self.server = await serve(self.handle, self.host, self.port, ssl=self.ssl_context,
+                                  process_request=self.authenticate, compression=None, max_queue=None)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def _verify(self, token):
+        if not self.require_token:
+            return True
+        try:
+            return self.issuer.decode(token).get('type', 'access') == 'access'
+        except TokenError:
+            return False
+
+    def authenticate(self, connection, request):
+        """Rechaza el handshake con 401 si falta el token o no es válido (salvo en Socket.IO)"""
+        path = request.path
+        if path.startswith(SOCKETIO_PATH):
+            return None
+        if not ROOM_PATH.search(path):
+            return connection.respond(404, 'Not Found\n')
+        token = _query_token(path) or _bearer(request.headers.get('Authorization', ''))
+        if not token or not self._verify(token):
+            self.stats['rejected'] += 1
+            return connection.respond(401, 'Invalid or missing token\n')
+        return None
+
+    async def handle(self, connection):
+        self.stats['connections'] += 1
+        if connection.request.path.startswith(SOCKETIO_PATH):
+            await self._socketio(connection)
+            return
+        room = ROOM_PATH.search(connection.request.path).group(1)
+        members = self.rooms.setdefault(room, set())
+        members.add(connection)
+        try:
+            async for message in connection:
+                self._broadcast(members, message)
+        finally:
+            self._leave(room, connection)
+
+    async def _socketio(self, connection):
+        from websockets.exceptions import ConnectionClosed
+
+        sid = f"standin-{next(self._ids)}"
+        room = None
+        await connection.send('0' + json.dumps(dict(ENGINEIO_OPEN, sid=sid), separators=(',', ':')))
+        try:
+            async for frame in connection:
+                kind, data = parse_socketio(frame)
+                if kind == 'ping':
+                    await connection.send('3')
+                elif kind == 'connect':
+                    token = (data or {}).get('token') or _query_token(connection.request.path) or _bearer(
+                        connection.request.headers.get('Authorization', ''))
+                    if not token or not self._verify(token):
+                        self.stats['rejected'] += 1
+                        await connection.send('44' + json.dumps({'message': 'Invalid or missing token'}))
+                        return
+                    await connection.send('40' + json.dumps({'sid': sid}))
+                elif kind == 'event' and data and data[0] == 'join':
+                    if room is not None:
+                        self._leave(room, connection)
+                    room = str((data[1] if len(data) > 1 else {}).get('room', 'general'))
+                    self.rooms.setdefault(room, set()).add(connection)
+                elif kind == 'event' and room is not None:
+                    self._broadcast(self.rooms[room], frame)
+                elif kind == 'disconnect':
+                    return
+        except ConnectionClosed:
+            pass
+        finally:
+            if room is not None:
+                self._leave(room, connection)
+
+    def _broadcast(self, members, message):
+        from websockets.asyncio.server import broadcast
+
+        self.stats['received'] += 1
+        self.stats['delivered'] += len(members)
+        broadcast(members, message)
+
+    def _leave(self, room, connection):
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(connection)
+            if not members:
+                del self.rooms[room]
+
+
+def _query_token(path):
+    match = re.search(r'[?&]token=([^&#]+)', path)
+    return match.group(1) if match else None
+
+
+def _bearer(value):
+    return value[7:].strip() if value.lower().startswith('bearer ') else None
+
+
+def run_in_thread(**kwargs):
+    """Arranca un ChatStandin en un hilo; usar como context manager"""
+
+    async def factory():
+        return await ChatStandin(**kwargs).start()
+
+    return BackgroundServer(factory)
@@ -0,0 +1,270 @@
+"""Stand-ins del load balancer y de las réplicas de api_gateway
+
+GatewayStandin responde a cualquier ruta tras un tiempo de servicio fijo,
+con `workers` peticiones a la vez como máximo (las demás hacen cola), y
+cuenta utilización, cola y conexiones nuevas. BalancerStandin reparte entre
+varias réplicas como el bloque `upstream api_gateways` de
+load_balancer_nginx.conf: least_conn, `keepalive` conexiones ociosas,
+`keepalive_requests` peticiones por conexión y proxy_next_upstream con
+`tries` intentos ante error, 502, 503 o 504.
+"""
+import asyncio
+import collections
+import random
+import time
+
+from owlboard_client.aio import Connection
+from owlboard_standin.http import BackgroundServer, HTTPError, HTTPServer, Response
+
+# Cabeceras hop-by-hop que el proxy no reenvía (Response.encode pone las suyas)
+HOP_BY_HOP = frozenset(('connection', 'keep-alive', 'content-length', 'transfer-encoding', 'upgrade'))
+
+
+class GatewayStandin:
+    """Réplica de api_gateway con capacidad limitada"""
+
+    def __init__(self, name='api_gateway_1', host='127.0.0.1', port=0, service_time=0.005, jitter=0.0,
+                 workers=8, seed=None):
+        self.name = name
+        self.service_time = service_time
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.workers = workers
+        self._slots = asyncio.Semaphore(workers)
+        self.http = HTTPServer(host, port)
+        self.http.route('GET', '/health', self.health)
+        self.http.route('GET', '/_standin/stats', self.stats_endpoint)
+        self.http.fallback = self.handle
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.busy = 0.0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.queue_time = 0.0
+        self.http.connections = 0
+
+    @property
+    def url(self):
+        return self.http.url
+
+    async def start(self):
+        await self.http.start()
+        return self
+
+    async def close(self):
+        await self.http.close()
+
+    async def health(self, request):
+        return Response(200, b'healthy\n', content_type='text/plain')
+
+    async def handle(self, request):
+        queued = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        async with self._slots:
+            self.waiting -= 1
+            start = time.perf_counter()
+            self.queue_time += start - queued
+            delay = self.service_time + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.busy += time.perf_counter() - start
+        self.requests += 1
+        return Response.json({'gateway': self.name, 'path': request.path}, headers={'X-Gateway': self.name})
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'gateway': self.name,
+            'requests': self.requests,
+            'connections': self.http.connections,
+            'utilization': round(self.busy / (elapsed * self.workers), 4) if elapsed else 0.0,
+            'max_queue': self.max_waiting,
+            'mean_queue_ms': round(self.queue_time / self.requests * 1000, 3) if self.requests else 0.0,
+        }
+
+    async def stats_endpoint(self, request):
+        return Response.json(self.stats())
+
+
+class Upstream:
+    __slots__ = ('host', 'port', 'name', 'active', 'requests', 'connections', 'failures')
+
+    def __init__(self, address, name=None):
+        self.host, _, port = address.rpartition(':')
+        self.port = int(port)
+        self.name = name or address
+        self.active = 0
+        self.requests = 0
+        self.connections = 0
+        self.failures = 0
+
+
+class BalancerStandin:
+    """Proxy HTTP least_conn con el pool keep-alive de nginx hacia las réplicas"""
+
+    def __init__(self, upstreams, host='127.0.0.1', port=0, keepalive=64, keepalive_requests=100, tries=2,
+                 timeout=60.0):
+        self.upstreams = [Upstream(address, name) for address, name in upstreams]
+        self.keepalive = keepalive
+        self.keepalive_requests = keepalive_requests
+        self.tries = tries
+        self.timeout = timeout
+        # Caché de conexiones ociosas compartida por todo el grupo, como `keepalive N`
+        self._idle = collections.OrderedDict()
+        self._next = 0
+        self.http = HTTPServer(host, port)
+        self.http.route('GET', '/health', self.health)
+        self.http.fallback = self.proxy
+
+    @property
+    def url(self):
+        return self.http.url
+
+    async def start(self):
+        await self.http.start()
+        return self
+
+    async def close(self):
+        await self.http.close()
+        for conn, _ in self._idle.values():
+            conn.close()
+        self._idle.clear()
+
+    async def health(self, request):
+        return Response(200, b'Load Balancer Healthy (standin)\n', content_type='text/plain')
+
+    def _pick(self, exclude):
+        """least_conn; a igualdad de conexiones activas, round-robin"""
+        candidates = [u for u in self.upstreams if u not in exclude] or self.upstreams
+        fewest = min(u.active for u in candidates)
+        tied = [u for u in candidates if u.active == fewest]
+        self._next += 1
+        return tied[self._next % len(tied)]
+
+    def _take_idle(self, upstream):
+        for key, (conn, owner) in reversed(self._idle.items()):
+            if owner is upstream:
+                del self._idle[key]
+                return conn, key[1]
+        return None, 0
+
+    def _release(self, upstream, conn, used):
+        if used >= self.keepalive_requests:
+            conn.close()
+            return
+        self._idle[(id(conn), used)] = (conn, upstream)
+        while len(self._idle) > self.keepalive:
+            _, (oldest, _) = self._idle.popitem(last=False)
+            oldest.close()
+
+    async def _forward(self, upstream, request, headers):
+        conn, used = self._take_idle(upstream)
+        if conn is None:
+            upstream.connections += 1
+            conn = await Connection.open(upstream.host, upstream.port)
+        try:
+            status, reason, resp_headers, body, keep_alive = await asyncio.wait_for(
+                conn.request(request.method, request.target, headers, request.body or None), self.timeout)
+        except BaseException:
+            conn.close()
+            raise
+        if keep_alive:
+            self._release(upstream, conn, used + 1)
+        else:
+            conn.close()
+        return status, resp_headers, body
+
+    async def proxy(self, request):
+        headers = {k: v for k, v in request.headers.items() if k not in HOP_BY_HOP}
+        headers['X-Forwarded-For'] = request.peer[0] if request.peer else ''
+        tried = []
+        for attempt in range(self.tries):
+            upstream = self._pick(tried)
+            tried.append(upstream)
+            upstream.active += 1
+            try:
+                status, resp_headers, body = await self._forward(upstream, request, headers)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                upstream.failures += 1
+                status, resp_headers, body = 502, None, None
+            finally:
+                upstream.active -= 1
+            if status not in (502, 503, 504) or attempt == self.tries - 1:
+                break
+            upstream.failures += resp_headers is not None
+        upstream.requests += 1
+        if resp_headers is None:
+            raise HTTPError(502)
+        out = {k: v for k, v in resp_headers.items() if k not in HOP_BY_HOP}
+        out['X-Upstream-Addr'] = ', '.join(f"{u.host}:{u.port}" for u in tried)
+        content_type = out.pop('content-type', 'application/json')
+        return Response(status, body, out, content_type)
+
+    def stats(self):
+        return {
+            'upstreams': {u.name: {'requests': u.requests, 'connections': u.connections, 'failures': u.failures}
+                          for u in self.upstreams},
+            'idle_connections': len(self._idle),
+            'client_connections': self.http.connections,
+        }
+
+    def reset(self):
+        for upstream in self.upstreams:
+            upstream.requests = upstream.connections = upstream.failures = 0
+        self.http.connections = 0
+
+
+class GatewayCluster:
+    """`replicas` GatewayStandin detrás de un BalancerStandin"""
+
+    def __init__(self, replicas, keepalive=64, keepalive_requests=100, tries=2, **gateway_kwargs):
+        self.gateways = [GatewayStandin(f"api_gateway_{i}", **gateway_kwargs) for i in range(1, replicas + 1)]
+        self.balancer_options = {'keepalive': keepalive, 'keepalive_requests': keepalive_requests, 'tries': tries}
+        self.balancer = None
+
+    @property
+    def url(self):
+        return self.balancer.url
+
+    async def start(self):
+        for gateway in self.gateways:
+            await gateway.start()
+        self.balancer = BalancerStandin([(f"127.0.0.1:{g.http.port}", g.name) for g in self.gateways],
+                                        **self.balancer_options)
+        await self.balancer.start()
+        return self
+
+    async def close(self):
+        if self.balancer is not None:
+            await self.balancer.close()
+        for gateway in self.gateways:
+            await gateway.close()
+
+    def reset(self):
+        self.balancer.reset()
+        for gateway in self.gateways:
+            gateway.reset()
+
+    def stats(self):
+        balancer = self.balancer.stats()
+        gateways = []
+        for gateway in self.gateways:
+            row = gateway.stats()
+            row['upstream_connections'] = balancer['upstreams'][gateway.name]['connections']
+            row['failures'] = balancer['upstreams'][gateway.name]['failures']
+            gateways.append(row)
+        return {'gateways': gateways, 'idle_connections': balancer['idle_connections'],
+                'client_connections': balancer['client_connections']}
+
+
+def run_in_thread(replicas, **kwargs):
+    """Arranca un GatewayCluster en un hilo; usar como context manager"""
+
+    async def factory():
+        return await GatewayCluster(replicas, **kwargs).start()
+
+    return BackgroundServer(factory)
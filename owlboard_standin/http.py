@@ -0,0 +1,236 @@
+"""Servidor HTTP/1.1 mínimo sobre asyncio para los stand-ins locales"""
+import asyncio
+import json
+import threading
+import urllib.parse
+
+REASONS = {
+    200: 'OK', 204: 'No Content', 400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden',
+    404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 422: 'Unprocessable Entity',
+    429: 'Too Many Requests', 500: 'Internal Server Error', 502: 'Bad Gateway',
+    503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+MAX_BODY = 10 * 1024 * 1024  # client_max_body_size 10M
+
+
+class HTTPError(Exception):
+    """Se convierte en una respuesta JSON {"detail": ...} como en FastAPI"""
+
+    def __init__(self, status, detail=None, headers=None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail if detail is not None else REASONS.get(status, '')
+        self.headers = headers or {}
+
+
+class Request:
+    __slots__ = ('method', 'target', 'path', 'query', 'headers', 'body', 'peer', 'state')
+
+    def __init__(self, method, target, headers, body, peer):
+        url = urllib.parse.urlsplit(target)
+        self.method = method
+        self.target = target
+        self.path = url.path
+        self.query = urllib.parse.parse_qs(url.query)
+        self.headers = headers
+        self.body = body
+        self.peer = peer
+        self.state = {}
+
+    def json(self):
+        try:
+            return json.loads(self.body) if self.body else {}
+        except ValueError:
+            raise HTTPError(422, 'Invalid JSON body') from None
+
+    def field(self, data, name):
+        """Campo obligatorio del cuerpo; 422 si falta, como la validación de FastAPI"""
+        value = data.get(name) if isinstance(data, dict) else None
+        if not isinstance(value, str) or not value:
+            raise HTTPError(422, [{'loc': ['body', name], 'msg': 'field required', 'type': 'value_error.missing'}])
+        return value
+
+
+class Response:
+    __slots__ = ('status', 'body', 'headers')
+
+    def __init__(self, status=200, body=b'', headers=None, content_type='application/json'):
+        self.status = status
+        self.body = body
+        self.headers = {'Content-Type': content_type}
+        if headers:
+            self.headers.update(headers)
+
+    @classmethod
+    def json(cls, data, status=200, headers=None):
+        return cls(status, json.dumps(data, separators=(',', ':')).encode('utf-8'), headers)
+
+    def encode(self, keep_alive):
+        lines = [f"HTTP/1.1 {self.status} {REASONS.get(self.status, '')}"]
+        lines.extend(f"{k}: {v}" for k, v in self.headers.items())
+        lines.append(f"Content-Length: {len(self.body)}")
+        lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + self.body
+
+
+class HTTPServer:
+    """Enruta (método, ruta) a corrutinas `handler(request) -> Response`.
+
+    `fallback`, si se asigna, atiende lo que no coincide con ninguna ruta
+    (lo usan los proxies). Mantiene las conexiones abiertas (keep-alive) y escribe cada respuesta
+    en una sola llamada para no pagar Nagle + ACK retardado.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, ssl_context=None):
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.routes = {}
+        self.fallback = None
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+        self._active = {}
+
+    def route(self, method, path, handler):
+        self.routes[(method, path)] = handler
+
+    @property
+    def url(self):
+        scheme = 'https' if self.ssl_context else 'http'
+        return f"{scheme}://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port, ssl=self.ssl_context)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # Las conexiones keep-alive ociosas no terminan solas: al cerrar el
+        # transporte su readline() devuelve EOF y el bucle sale limpiamente
+        tasks = list(self._active)
+        for writer in self._active.values():
+            writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def dispatch(self, request):
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            if self.fallback is not None:
+                return await self.fallback(request)
+            if any(path == request.path for _, path in self.routes):
+                raise HTTPError(405, 'Method Not Allowed')
+            raise HTTPError(404, 'Not Found')
+        return await handler(request)
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        task = asyncio.current_task()
+        self._active[task] = writer
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    break
+                method, target, version = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY:
+                    writer.write(Response.json({'detail': REASONS[413]}, 413).encode(False))
+                    break
+                body = await reader.readexactly(length) if length else b''
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+
+                self.requests += 1
+                request = Request(method, target, headers, body, peer)
+                try:
+                    response = await self.dispatch(request)
+                except HTTPError as e:
+                    response = Response.json({'detail': e.detail}, e.status, e.headers)
+                except Exception as e:  # noqa: BLE001 - un stand-in nunca debe cortar la conexión
+                    response = Response.json({'detail': f"{type(e).__name__}: {e}"}, 500)
+                writer.write(response.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._active.pop(task, None)
+            writer.close()
+
+
+class BackgroundServer:
+    """Ejecuta un servidor asyncio en un hilo propio (para tests y benchmarks).
+
+    `factory` es una corrutina que crea y arranca el servidor dentro del
+    bucle del hilo y devuelve un objeto con `url` y `close()`.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._loop = None
+        self._thread = None
+        self.server = None
+
+    def start(self):
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self.server = self._loop.run_until_complete(self._factory())
+            except Exception as e:  # noqa: BLE001 - se relanza en el hilo principal
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.server.close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='owlboard-standin', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self.server
+
+    @property
+    def url(self):
+        return self.server.url
+
+    def call(self, coro_or_func):
+        """Ejecuta algo en el bucle del servidor desde otro hilo"""
+        if asyncio.iscoroutine(coro_or_func):
+            return asyncio.run_coroutine_threadsafe(coro_or_func, self._loop).result()
+        return self._loop.call_soon_threadsafe(coro_or_func)
+
+    def stop(self):
+        if self._loop is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,58 @@
+"""limit_req y limit_conn de nginx por IP de cliente, para los stand-ins
+
+Mismo algoritmo que ngx_http_limit_req_module con `nodelay`: por cada
+IP se guarda el exceso de peticiones sobre `rate`, que se vacía con el
+tiempo; si una petición lo dejaría por encima de `burst`, nginx responde
+503 sin pasarla al upstream. limit_conn cuenta las peticiones en curso.
+"""
+import time
+
+from owlboard_standin.http import Response
+
+NGINX_503 = (b'<html>\r\n<head><title>503 Service Temporarily Unavailable</title></head>\r\n<body>\r\n'
+             b'<center><h1>503 Service Temporarily Unavailable</h1></center>\r\n'
+             b'<hr><center>nginx</center>\r\n</body>\r\n</html>\r\n')
+
+
+class NginxLimits:
+    def __init__(self, rate=100.0, burst=20, connections=10, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.connections = connections
+        self.clock = clock
+        self._excess = {}
+        self._active = {}
+        self.passed = 0
+        self.rejected_req = 0
+        self.rejected_conn = 0
+
+    def enter(self, client):
+        """Response 503 si se rechaza; si no, None y hay que llamar a leave() al terminar"""
+        now = self.clock()
+        state = self._excess.get(client)
+        if state is None:
+            excess = 0.0
+        else:
+            # Como nginx: se suma la petición antes de recortar a 0, así una IP inactiva equivale a una nueva
+            excess = max(0.0, state[0] - self.rate * (now - state[1]) + 1.0)
+            if excess > self.burst:
+                self.rejected_req += 1
+                return Response(503, NGINX_503, content_type='text/html')
+        active = self._active.get(client, 0)
+        if self.connections and active >= self.connections:
+            self.rejected_conn += 1
+            return Response(503, NGINX_503, content_type='text/html')
+        self._excess[client] = (excess, now)
+        self._active[client] = active + 1
+        self.passed += 1
+        return None
+
+    def leave(self, client):
+        active = self._active.get(client, 1) - 1
+        if active:
+            self._active[client] = active
+        else:
+            self._active.pop(client, None)
+
+    def stats(self):
+        return {'passed': self.passed, 'rejected_req': self.rejected_req, 'rejected_conn': self.rejected_conn}
@@ -1,113 +0,0 @@
-#!/usr/bin/env python3
-"""Script para probar el servicio de autenticación"""
-import urllib.request
-import ssl
-import json
-
-# Crear contexto SSL que no verifica certificados (solo para pruebas)
-ctx = ssl._create_unverified_context()
-
-def test_root():
-    """Probar endpoint raíz"""
-    print("\n=== Probando endpoint raíz (/) ===")
-    try:
-        response = urllib.request.urlopen('https://localhost:8443/', context=ctx)
-        data = json.loads(response.read().decode())
-        print("✅ Respuesta exitosa:")
-        print(json.dumps(data, indent=2))
-        return True
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
-
-def test_health():
-    """Probar endpoint de health"""
-    print("\n=== Probando endpoint de health (/health) ===")
-    try:
-        response = urllib.request.urlopen('https://localhost:8443/health', context=ctx)
-        data = json.loads(response.read().decode())
-        print("✅ Respuesta exitosa:")
-        print(json.dumps(data, indent=2))
-        return True
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
-
-def test_login():
-    """Probar endpoint de login"""
-    print("\n=== Probando endpoint de login (/auth/login) ===")
-    try:
-        credentials = {
-            'email': 'admin@owlboard.com',
-            'password': 'admin123'
-        }
-        data = json.dumps(credentials).encode('utf-8')
-        req = urllib.request.Request(
-            'https://localhost:8443/auth/login',
-            data=data,
-            headers={'Content-Type': 'application/json'},
-            method='POST'
-        )
-        response = urllib.request.urlopen(req, context=ctx)
-        result = json.loads(response.read().decode())
-        print("✅ Login exitoso:")
-        print(json.dumps(result, indent=2))
-        return True
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode()
-        print(f"⚠️  Error HTTP {e.code}:")
-        try:
-            error_data = json.loads(error_body)
-            print(json.dumps(error_data, indent=2))
-        except:
-            print(error_body)
-        # Un 401 o 404 significa que el endpoint funciona pero credenciales incorrectas
-        if e.code in [401, 404]:
-            print("✅ El endpoint funciona (credenciales incorrectas esperado)")
-            return True
-        return False
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
-
-def test_docs():
-    """Probar endpoint de documentación"""
-    print("\n=== Probando endpoint de documentación (/auth/docs) ===")
-    try:
-        response = urllib.request.urlopen('https://localhost:8443/auth/docs', context=ctx)
-        print(f"✅ Documentación accesible (Status: {response.status})")
-        return True
-    except urllib.error.HTTPError as e:
-        print(f"⚠️  Error HTTP {e.code}")
-        return False
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
-
-if __name__ == "__main__":
-    print("="*60)
-    print("PRUEBAS DEL SERVICIO DE AUTENTICACIÓN")
-    print("="*60)
-    
-    results = []
-    results.append(("Root Endpoint", test_root()))
-    results.append(("Health Check", test_health()))
-    results.append(("Login Endpoint", test_login()))
-    results.append(("Documentation", test_docs()))
-    
-    print("\n" + "="*60)
-    print("RESUMEN DE PRUEBAS")
-    print("="*60)
-    
-    for name, result in results:
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{name:20} : {status}")
-    
-    passed = sum(1 for _, r in results if r)
-    total = len(results)
-    print(f"\nTotal: {passed}/{total} pruebas exitosas")
-    
-    if passed == total:
-        print("\n🎉 ¡Todas las pruebas pasaron! El Auth Service está funcionando correctamente.")
-    else:
-        print(f"\n⚠️  {total - passed} prueba(s) fallaron.")
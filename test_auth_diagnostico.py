@@ -1,205 +1,26 @@
 #!/usr/bin/env python3
-"""Prueba completa de autenticación con métodos HTTP correctos"""
-import urllib.request
-import ssl
-import json
-
-ctx = ssl._create_unverified_context()
-
-print("="*70)
-print("DIAGNÓSTICO COMPLETO DEL AUTH SERVICE")
-print("="*70)
-
-# Test 1: Login
-print("\n1. 🔐 Login con credenciales válidas")
-print("-" * 70)
-try:
-    credentials = {'email': 'test@owlboard.com', 'password': 'password123'}
-    data = json.dumps(credentials).encode('utf-8')
-    req = urllib.request.Request(
-        'https://localhost:8443/auth/login',
-        data=data,
-        headers={'Content-Type': 'application/json'},
-        method='POST'
-    )
-    response = urllib.request.urlopen(req, context=ctx)
-    tokens = json.loads(response.read().decode())
-    
-    print("✅ Login EXITOSO")
-    print(f"   Access Token: {tokens['access_token'][:60]}...")
-    print(f"   Refresh Token: {tokens['refresh_token'][:60]}...")
-    print(f"   Tipo: {tokens['token_type']}")
-    print(f"   Expira en: {tokens['expires_in']} segundos ({tokens['expires_in']//60} minutos)")
-    
-    access_token = tokens['access_token']
-    refresh_token = tokens['refresh_token']
-    
-except Exception as e:
-    print(f"❌ FALLÓ: {e}")
-    exit(1)
-
-# Test 2: Validate token (POST, no GET)
-print("\n2. ✓ Validar Access Token")
-print("-" * 70)
-try:
-    # El endpoint es POST, no GET
-    data = json.dumps({'token': access_token}).encode('utf-8')
-    req = urllib.request.Request(
-        'https://localhost:8443/auth/token/validate',
-        data=data,
-        headers={'Content-Type': 'application/json'},
-        method='POST'
-    )
-    response = urllib.request.urlopen(req, context=ctx)
-    validation = json.loads(response.read().decode())
-    
-    if validation.get('valid'):
-        print("✅ Token VÁLIDO")
-        print(f"   User ID: {validation.get('user_id')}")
-        print(f"   Email: {validation.get('email')}")
-        print(f"   Scopes: {validation.get('scopes')}")
-    else:
-        print(f"⚠️  Token inválido: {validation.get('message')}")
-    
-except urllib.error.HTTPError as e:
-    print(f"❌ Error HTTP {e.code}: {e.read().decode()}")
-except Exception as e:
-    print(f"❌ FALLÓ: {e}")
-
-# Test 3: Introspect token
-print("\n3. 🔍 Introspección de Token (OAuth2)")
-print("-" * 70)
-try:
-    data = json.dumps({'token': access_token}).encode('utf-8')
-    req = urllib.request.Request(
-        'https://localhost:8443/auth/token/introspect',
-        data=data,
-        headers={'Content-Type': 'application/json'},
-        method='POST'
-    )
-    response = urllib.request.urlopen(req, context=ctx)
-    introspection = json.loads(response.read().decode())
-    
-    print("✅ Introspección EXITOSA")
-    print(f"   Active: {introspection.get('active')}")
-    print(f"   Subject: {introspection.get('sub')}")
-    print(f"   Username: {introspection.get('username')}")
-    print(f"   Token Type: {introspection.get('token_type')}")
-    print(f"   Expiration: {introspection.get('exp')}")
-    
-except urllib.error.HTTPError as e:
-    error_body = e.read().decode()
-    print(f"❌ Error HTTP {e.code}")
-    try:
-        error_data = json.loads(error_body)
-        print(f"   Detalle: {error_data}")
-    except:
-        print(f"   Respuesta: {error_body}")
-except Exception as e:
-    print(f"❌ FALLÓ: {e}")
-
-# Test 4: Refresh token
-print("\n4. 🔄 Refrescar Tokens")
-print("-" * 70)
-try:
-    data = json.dumps({'refresh_token': refresh_token}).encode('utf-8')
-    req = urllib.request.Request(
-        'https://localhost:8443/auth/token/refresh',
-        data=data,
-        headers={'Content-Type': 'application/json'},
-        method='POST'
-    )
-    response = urllib.request.urlopen(req, context=ctx)
-    new_tokens = json.loads(response.read().decode())
-    
-    print("✅ Tokens REFRESCADOS")
-    print(f"   Nuevo Access Token: {new_tokens['access_token'][:60]}...")
-    print(f"   Nuevo Refresh Token: {new_tokens['refresh_token'][:60]}...")
-    print(f"   Expira en: {new_tokens['expires_in']} segundos")
-    
-    new_access_token = new_tokens['access_token']
-    
-except urllib.error.HTTPError as e:
-    error_body = e.read().decode()
-    print(f"❌ Error HTTP {e.code}")
-    try:
-        error_data = json.loads(error_body)
-        print(f"   Detalle: {error_data.get('detail', error_data)}")
-    except:
-        print(f"   Respuesta: {error_body}")
-    new_access_token = access_token
-except Exception as e:
-    print(f"❌ FALLÓ: {e}")
-    new_access_token = access_token
-
-# Test 5: Revoke token
-print("\n5. 🚫 Revocar Token")
-print("-" * 70)
-try:
-    data = json.dumps({'token': new_access_token, 'token_type': 'access'}).encode('utf-8')
-    req = urllib.request.Request(
-        'https://localhost:8443/auth/token/revoke',
-        data=data,
-        headers={'Content-Type': 'application/json'},
-        method='POST'
-    )
-    response = urllib.request.urlopen(req, context=ctx)
-    revoke_result = json.loads(response.read().decode())
-    
-    print("✅ Token REVOCADO")
-    print(f"   Mensaje: {revoke_result.get('message')}")
-    print(f"   Revocado: {revoke_result.get('revoked')}")
-    
-except urllib.error.HTTPError as e:
-    error_body = e.read().decode()
-    print(f"❌ Error HTTP {e.code}")
-    try:
-        error_data = json.loads(error_body)
-        print(f"   Detalle: {error_data.get('detail', error_data)}")
-    except:
-        print(f"   Respuesta: {error_body}")
-except Exception as e:
-    print(f"❌ FALLÓ: {e}")
-
-# Test 6: Verificar que token revocado no funciona
-print("\n6. ⛔ Verificar Token Revocado")
-print("-" * 70)
-try:
-    data = json.dumps({'token': new_access_token}).encode('utf-8')
-    req = urllib.request.Request(
-        'https://localhost:8443/auth/token/validate',
-        data=data,
-        headers={'Content-Type': 'application/json'},
-        method='POST'
-    )
-    response = urllib.request.urlopen(req, context=ctx)
-    validation = json.loads(response.read().decode())
-    
-    if not validation.get('valid'):
-        print("✅ Token correctamente INVALIDADO")
-        print(f"   Mensaje: {validation.get('message')}")
-    else:
-        print("⚠️  Token sigue válido (no se revocó correctamente)")
-    
-except Exception as e:
-    print(f"❌ FALLÓ: {e}")
-
-print("\n" + "="*70)
-print("📊 RESUMEN DE FUNCIONALIDADES")
-print("="*70)
-print("""
-✅ Login (POST /auth/login) - FUNCIONAL
-✅ Generación de JWT tokens - FUNCIONAL
-✅ Redis para blacklist - CONECTADO
-✅ MySQL para usuarios - CONECTADO
-✅ HTTPS con certificados SSL - FUNCIONAL
-✅ Healthcheck - FUNCIONAL
-
-Endpoints de gestión de tokens:
-- POST /auth/token/validate - Para verificar tokens
-- POST /auth/token/introspect - OAuth2 introspection
-- POST /auth/token/refresh - Renovar tokens
-- POST /auth/token/revoke - Invalidar tokens
-
-🎯 El Auth Service está OPERACIONAL y listo para producción!
-""")
+"""Diagnóstico completo del Auth Service con tiempos por fase de red
+
+Repite cada paso del flujo (health, login, validate, introspect, refresh,
+revoke y validación del token revocado) K veces, cada una por una conexión
+nueva, y mide DNS, conexión TCP, handshake TLS, tiempo hasta el primer
+byte y transferencia. Si la respuesta trae `Server-Timing` también se
+muestra el desglose interno del servicio.
+
+Ejemplos:
+    python test_auth_diagnostico.py                  # https://localhost:8443, K=5
+    python test_auth_diagnostico.py -K 20 -o diagnostico.json
+    python test_auth_diagnostico.py --resume         # handshake TLS reanudado
+    python test_auth_diagnostico.py --standin        # sin Docker
+"""
+import argparse
+import sys
+
+from owlboard_bench import probe
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    probe.add_arguments(parser)
+    # Igual que el resto de scripts: certificados autofirmados sin verificar
+    parser.set_defaults(insecure=True)
+    sys.exit(probe.run(parser.parse_args()))
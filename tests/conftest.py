@@ -0,0 +1,151 @@
+"""Fixtures de la suite de auth: stand-in o stack real, tokens de sesión y usuarios en bloque
+
+    python -m pytest -n auto                          # stand-in en proceso, uno por worker
+    python -m pytest -n auto --target live            # stack de docker-compose (OWLBOARD_AUTH_URL)
+    python -m pytest tests/test_benchmark.py --benchmark-enable --benchmark-autosave
+
+El login de sesión se hace una vez (con --target live, una vez para todos
+los workers de xdist) y sus tokens son de solo lectura; las pruebas que
+refrescan o revocan piden `fresh_tokens`, que entra con un usuario de
+`bulk_users`. Esos usuarios se crean por sesión y worker con bcrypt de
+coste 4: el servidor verifica con el coste guardado en el hash, así que
+cada login cuesta milisegundos en lugar de cientos.
+"""
+import contextlib
+import itertools
+import json
+import os
+import uuid
+
+import pytest
+
+from owlboard_bench import seed
+from owlboard_client import AuthClient, tls
+
+TEST_EMAIL = os.environ.get('OWLBOARD_TEST_EMAIL', 'test@owlboard.com')
+TEST_PASSWORD = os.environ.get('OWLBOARD_TEST_PASSWORD', 'password123')
+BULK_ROUNDS = 4
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('owlboard')
+    group.addoption('--target', choices=('standin', 'live'), default=os.environ.get('OWLBOARD_TEST_TARGET', 'standin'),
+                    help='standin: auth_service en proceso; live: el stack (default: %(default)s)')
+    group.addoption('--auth-url', default=None,
+                    help=f"Auth Service con --target live (default: OWLBOARD_AUTH_URL o {tls.DEFAULT_BASE_URL})")
+    group.addoption('--bulk-users', type=int, default=20, help='usuarios aislados por worker (default: %(default)s)')
+    group.addoption('--database-url', default=seed.DATABASE_URL,
+                    help='user_db donde se crean los usuarios con --target live')
+
+
+def pytest_collection_modifyitems(config, items):
+    other = 'live' if config.getoption('--target') == 'standin' else 'standin'
+    skip = pytest.mark.skip(reason=f"solo con --target {other}")
+    for item in items:
+        if other in item.keywords:
+            item.add_marker(skip)
+
+
+def _worker(config):
+    return getattr(config, 'workerinput', {}).get('workerid', 'master')
+
+
+@contextlib.contextmanager
+def _exclusive(path):
+    """Cerrojo entre workers de xdist; sin fcntl (Windows) cada worker hace su propio login"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, 'a') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+@pytest.fixture(scope='session')
+def target(pytestconfig):
+    return pytestconfig.getoption('--target')
+
+
+@pytest.fixture(scope='session')
+def standin(target):
+    """AuthStandin en un hilo de este worker; None con --target live"""
+    if target != 'standin':
+        yield None
+        return
+    from owlboard_standin import run_in_thread
+
+    with run_in_thread(users=((TEST_EMAIL, TEST_PASSWORD, 'Test User'),), server_timing=True) as background:
+        yield background.server
+
+
+@pytest.fixture(scope='session')
+def auth_url(pytestconfig, standin):
+    if standin is not None:
+        return standin.url
+    return pytestconfig.getoption('--auth-url') or tls.DEFAULT_BASE_URL
+
+
+@pytest.fixture(scope='session')
+def client(auth_url):
+    # Certificados autofirmados del stack: igual que los scripts, sin verificar
+    with AuthClient(auth_url, verify=False, timeout=10) as session_client:
+        yield session_client
+
+
+@pytest.fixture(scope='session')
+def session_tokens(pytestconfig, client, target, tmp_path_factory):
+    """Par de tokens de TEST_EMAIL compartido por toda la sesión; no revocar ni refrescar"""
+    worker = _worker(pytestconfig)
+    if target == 'standin' or worker == 'master':
+        return client.login(TEST_EMAIL, TEST_PASSWORD)
+    cache = tmp_path_factory.getbasetemp().parent / 'owlboard_session_tokens.json'
+    with _exclusive(f"{cache}.lock"):
+        if cache.exists():
+            return json.loads(cache.read_text(encoding='utf-8'))
+        tokens = client.login(TEST_EMAIL, TEST_PASSWORD)
+        cache.write_text(json.dumps(tokens), encoding='utf-8')
+        return tokens
+
+
+@pytest.fixture(scope='session')
+def bulk_users(pytestconfig, standin):
+    """[(email, password)] creados para esta sesión y worker, y borrados al terminar"""
+    run = uuid.uuid4().hex[:8]
+    users = seed.generate_users(pytestconfig.getoption('--bulk-users'), seed=f"pytest-{run}",
+                                domain=f"{run}-{_worker(pytestconfig)}.pytest.owlboard.com")
+    credentials = [(email, password) for email, password, _ in users]
+    if standin is not None:
+        hashes = seed.hash_passwords([password for _, password, _ in users], BULK_ROUNDS, workers=1)
+        for (email, _, full_name), hashed in zip(users, hashes):
+            standin.users.add(email, full_name=full_name, hashed_password=hashed)
+        yield credentials
+        return
+    connection = seed.connect(pytestconfig.getoption('--database-url'))
+    try:
+        seed.seed_users(connection, users, rounds=BULK_ROUNDS, workers=1)
+        yield credentials
+    finally:
+        seed.delete_emails(connection, [email for email, _ in credentials])
+        connection.close()
+
+
+@pytest.fixture(scope='session')
+def _user_cycle(bulk_users):
+    return itertools.cycle(bulk_users)
+
+
+@pytest.fixture
+def bulk_user(_user_cycle):
+    """Siguiente usuario de `bulk_users` (se reutilizan en rueda)"""
+    return next(_user_cycle)
+
+
+@pytest.fixture
+def fresh_tokens(client, bulk_user):
+    """Tokens propios de la prueba, que puede refrescar o revocar sin afectar a las demás"""
+    return client.login(*bulk_user)
@@ -0,0 +1,126 @@
+"""Endpoints del Auth Service: antes test_auth.py y test_auth_complete.py en la raíz"""
+import pytest
+
+from owlboard_client import AuthServiceError, tls
+from owlboard_client.timing import parse_server_timing, timed_request
+
+from conftest import TEST_EMAIL, TEST_PASSWORD
+
+
+def test_root(client):
+    assert isinstance(client.call('GET', '/'), dict)
+
+
+def test_health(client):
+    assert client.health()['status'] == 'healthy'
+
+
+def test_docs(client):
+    assert client.request('GET', '/auth/docs').raise_for_status().status == 200
+
+
+def test_login_returns_token_pair(session_tokens):
+    assert session_tokens['access_token'] and session_tokens['refresh_token']
+    assert session_tokens['token_type'] == 'bearer'
+    assert session_tokens['expires_in'] > 0
+
+
+@pytest.mark.parametrize('email,password', [
+    (TEST_EMAIL, 'wrong-password'),
+    ('nobody@owlboard.com', TEST_PASSWORD),
+])
+def test_login_rejects_bad_credentials(client, email, password):
+    with pytest.raises(AuthServiceError) as excinfo:
+        client.login(email, password)
+    assert excinfo.value.status == 401
+
+
+def test_login_validates_payload(client):
+    with pytest.raises(AuthServiceError) as excinfo:
+        client.call('POST', '/auth/login', {'email': TEST_EMAIL})
+    assert excinfo.value.status == 422
+
+
+def test_validate(client, session_tokens):
+    result = client.validate(session_tokens['access_token'])
+    assert result['valid'] is True
+    assert result['email'] == TEST_EMAIL
+
+
+def test_validate_rejects_garbage(client):
+    assert client.validate('not-a-jwt')['valid'] is False
+
+
+def test_validate_rejects_refresh_token(client, session_tokens):
+    assert client.validate(session_tokens['refresh_token'])['valid'] is False
+
+
+def test_introspect(client, session_tokens):
+    result = client.introspect(session_tokens['access_token'])
+    assert result['active'] is True
+    assert result['username'] == TEST_EMAIL
+
+
+def test_introspect_inactive_token(client):
+    assert client.introspect('not-a-jwt')['active'] is False
+
+
+def test_validate_many_keeps_order(client, session_tokens):
+    results = client.validate_many([session_tokens['access_token'], 'not-a-jwt'] * 3, chunk_size=4)
+    assert [r['valid'] for r in results] == [True, False] * 3
+
+
+def test_refresh_rotates_tokens(client, fresh_tokens):
+    new_tokens = client.refresh(fresh_tokens['refresh_token'])
+    assert new_tokens['access_token'] != fresh_tokens['access_token']
+    assert client.validate(new_tokens['access_token'])['valid'] is True
+    # El refresh token usado queda revocado
+    with pytest.raises(AuthServiceError) as excinfo:
+        client.refresh(fresh_tokens['refresh_token'])
+    assert excinfo.value.status == 401
+
+
+def test_revoke(client, fresh_tokens):
+    assert client.revoke(fresh_tokens['access_token'])['revoked'] is True
+    assert client.validate(fresh_tokens['access_token'])['valid'] is False
+    assert client.introspect(fresh_tokens['access_token'])['active'] is False
+
+
+def test_revoke_does_not_affect_other_sessions(client, bulk_users):
+    (email, password), (other_email, other_password) = bulk_users[:2]
+    revoked = client.login(email, password)
+    kept = client.login(other_email, other_password)
+    client.revoke(revoked['access_token'])
+    assert client.validate(kept['access_token'])['valid'] is True
+
+
+def test_bulk_users_can_log_in(client, bulk_users):
+    for email, password in bulk_users[:5]:
+        assert client.validate(client.login(email, password)['access_token'])['email'] == email
+
+
+@pytest.mark.standin
+def test_server_timing_stages(client, session_tokens):
+    response = client.request('POST', '/auth/token/validate', {'token': session_tokens['access_token']})
+    stages = parse_server_timing(response.headers.get('server-timing', ''))
+    assert {'jwt', 'redis'} <= {metric['name'] for metric in stages}
+
+
+@pytest.mark.standin
+def test_injected_faults_surface_as_server_errors(client, standin):
+    faults = standin.faults
+    previous = faults.error_rate
+    faults.error_rate = 1.0
+    try:
+        with pytest.raises(AuthServiceError) as excinfo:
+            client.validate('not-a-jwt')
+    finally:
+        faults.error_rate = previous
+    assert excinfo.value.status == 500
+
+
+@pytest.mark.live
+def test_served_over_tls(auth_url):
+    assert auth_url.startswith('https://')
+    response = timed_request(auth_url + '/health', ssl_context=tls.create_context(False, None, None, None))
+    assert response.tls_version in ('TLSv1.2', 'TLSv1.3')
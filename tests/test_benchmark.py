@@ -0,0 +1,42 @@
+"""Latencia por endpoint con pytest-benchmark (grupo auth-endpoints)
+
+En la suite normal cada benchmark se ejecuta una sola vez (--benchmark-disable
+en pytest.ini). Para medir y guardar el histórico en .benchmarks/:
+
+    python -m pytest tests/test_benchmark.py -p no:xdist --benchmark-enable --benchmark-autosave
+    python -m pytest tests/test_benchmark.py -p no:xdist --benchmark-enable --benchmark-compare
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+pytestmark = pytest.mark.benchmark(group='auth-endpoints')
+
+
+def test_health(benchmark, client):
+    assert benchmark(client.health)['status'] == 'healthy'
+
+
+def test_login(benchmark, client, bulk_user):
+    assert 'access_token' in benchmark(client.login, *bulk_user)
+
+
+def test_validate(benchmark, client, session_tokens):
+    assert benchmark(client.validate, session_tokens['access_token'])['valid'] is True
+
+
+def test_introspect(benchmark, client, session_tokens):
+    assert benchmark(client.introspect, session_tokens['access_token'])['active'] is True
+
+
+def test_validate_batch_100(benchmark, client, session_tokens):
+    results = benchmark(client.validate_many, [session_tokens['access_token']] * 100)
+    assert len(results) == 100
+
+
+def test_refresh(benchmark, client, bulk_user):
+    # Cada ronda necesita un refresh token sin usar: el login va en el setup y no se mide
+    def setup():
+        return (client.login(*bulk_user)['refresh_token'],), {}
+
+    assert 'access_token' in benchmark.pedantic(client.refresh, setup=setup, rounds=20)
@@ -0,0 +1,14 @@
+"""Sonda por fases de red (antes test_auth_diagnostico.py como única comprobación)"""
+from owlboard_bench import probe
+from owlboard_client import tls
+from owlboard_client.timing import PHASES
+
+
+def test_probe_flow_has_phase_timings(auth_url, bulk_user):
+    ssl_context = tls.create_context(False, None, None, None) if auth_url.startswith('https') else None
+    state = {}
+    for step in probe.build_steps(*bulk_user):
+        result = probe.run_step(step, state, auth_url, 1, 10.0, ssl_context, None)
+        assert result['ok'], f"{step.name}: {result['failures']}"
+        assert set(result['phases_ms']) == set(PHASES)
+        assert result['phases_ms']['total']['median'] > 0
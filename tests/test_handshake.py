@@ -0,0 +1,82 @@
+"""Benchmark de handshakes TLS: revisión de nginx.conf, recomendaciones y reanudación contra el stand-in"""
+import shutil
+import urllib.parse
+
+import pytest
+
+from owlboard_bench import handshake
+from owlboard_client import pacing
+from owlboard_standin import run_in_thread
+from owlboard_standin.__main__ import server_ssl_context
+
+
+@pytest.fixture(scope='module')
+def chain(tmp_path_factory):
+    if not shutil.which('openssl'):
+        pytest.skip('hace falta openssl para generar la cadena de prueba')
+    return handshake.generate_chain(str(tmp_path_factory.mktemp('tls')))
+
+
+def test_reads_load_balancer_ciphers():
+    assert handshake.read_nginx_ciphers(pacing.LB_NGINX_CONF)[:2] == [
+        'ECDHE-RSA-AES256-GCM-SHA384', 'ECDHE-RSA-AES128-GCM-SHA256']
+
+
+def test_finds_proxy_locations_that_close_keepalive_upstreams(tmp_path):
+    conf = tmp_path / 'proxy.conf'
+    conf.write_text('''
+http {
+    proxy_set_header X-Real-IP $remote_addr;
+    upstream lb { server load_balancer:9000; keepalive 32; }
+    server {
+        listen 80;
+        location /api/ { proxy_pass https://lb; add_header X-Test "a; b"; }
+        location /ws/ { proxy_pass https://lb; proxy_set_header Connection "upgrade"; }
+        location /ok/ { proxy_pass https://lb; proxy_set_header Connection ""; }
+        location /old/ { proxy_pass https://lb; proxy_set_header Connection ""; proxy_ssl_session_reuse off; }
+    }
+    server { listen 9000 ssl; ssl_ciphers 'ECDHE-RSA-AES128-GCM-SHA256:ECDHE-RSA-AES128-SHA256'; }
+}
+''')
+    findings = {(f['context'], f['message'].split(':')[0]) for f in handshake.nginx_findings([str(conf)])}
+    assert findings == {
+        ('location /api/', "upstream lb tiene keepalive pero se envía 'Connection"),
+        ('location /old/', 'proxy_ssl_session_reuse off'),
+        ('server', 'sin ssl_session_cache'),
+        ('server', 'ssl_ciphers incluye suites CBC (ECDHE-RSA-AES128-SHA256); todos los clientes de OwlBoard negocian GCM'),
+    }
+
+
+def run(version, mode, cost, reused, cipher=None, tickets='on'):
+    return {'tickets': tickets, 'version': version, 'cipher': cipher, 'mtls': False, 'mode': mode,
+            'connections': 100, 'errors': {}, 'reused': reused, 'server_cpu_ms': cost,
+            'per_core': round(1000 / cost), 'handshake_ms': {'p50': cost}}
+
+
+def test_recommendations_flag_broken_resumption_and_order_gcm_first():
+    lines = handshake.recommend([
+        run('1.2', 'full', 2.0, 0.0, 'ECDHE-RSA-AES256-SHA384'),
+        run('1.2', 'full', 1.0, 0.0, 'ECDHE-RSA-AES256-GCM-SHA384'),
+        run('1.2', 'full', 0.5, 0.0, 'ECDHE-RSA-AES128-GCM-SHA256'),
+        run('1.3', 'full', 1.0, 0.0),
+        run('1.3', 'resumed', 1.0, 0.2),
+    ])
+    assert any('TLS 1.3 (tickets on): solo reanuda el 20%' in line for line in lines)
+    assert any("ssl_ciphers 'ECDHE-RSA-AES128-GCM-SHA256:ECDHE-RSA-AES256-GCM-SHA384'" in line for line in lines)
+    assert lines[-1].startswith('Máximo por núcleo: TLS 1.2 ECDHE-RSA-AES128-GCM-SHA256')
+
+
+@pytest.mark.parametrize('version, cipher', [('1.2', 'ECDHE-RSA-AES128-GCM-SHA256'), ('1.3', None)])
+@pytest.mark.parametrize('tickets', [True, False])
+def test_resumed_handshakes_reuse_sessions(chain, version, cipher, tickets):
+    ctx = server_ssl_context(chain['server_cert'], chain['server_key'], tickets=tickets, client_ca=chain['ca'])
+    with run_in_thread(ssl_context=ctx) as background:
+        target = ('127.0.0.1', urllib.parse.urlsplit(background.url).port, 'load_balancer')
+        client = handshake.client_context(chain, version, cipher, mtls=True)
+        cpu = handshake.ServerCpu()
+        full = handshake.measure(client, target, 'full', 6, 2, 5, cpu)
+        resumed = handshake.measure(client, target, 'resumed', 6, 2, 5, cpu)
+    assert full['connections'] == resumed['connections'] == 6 and not full['errors']
+    assert full['reused'] == 0 and resumed['reused'] == 1
+    assert full['negotiated'].startswith(f"TLSv{version}")
+    assert full['server_cpu_ms'] is None
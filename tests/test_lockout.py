@@ -0,0 +1,85 @@
+"""Bloqueo de login por cuenta e IP: semántica, atomicidad y 429 antes de bcrypt"""
+import concurrent.futures
+import uuid
+
+import pytest
+
+from owlboard_auth.lockout import LoginLockout, MemoryLockout
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def concurrent_allowed(lockout, calls, account=None, ip=None):
+    def call(i):
+        return lockout.acquire(account or f"user{i}@owlboard.com", ip or f"10.0.0.{i % 250}").allowed
+
+    with concurrent.futures.ThreadPoolExecutor(16) as pool:
+        return sum(pool.map(call, range(calls)))
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def lockout(request):
+    limits = dict(max_attempts=5, max_ip_attempts=20, window=60, lockout=60)
+    if request.param == 'memory':
+        return MemoryLockout(**limits)
+    pytest.importorskip('lupa', reason='fakeredis ejecuta Lua con fakeredis[lua]')
+    fakeredis = pytest.importorskip('fakeredis')
+    return LoginLockout(fakeredis.FakeRedis(), **limits)
+
+
+def test_account_allows_exactly_max_attempts_under_concurrency(lockout):
+    assert concurrent_allowed(lockout, 200, account='victim@owlboard.com') == 5
+    decision = lockout.acquire('VICTIM@owlboard.com', '10.9.9.9')
+    assert not decision and decision.scope == 'account' and decision.retry_after > 0
+
+
+def test_ip_allows_exactly_max_attempts_under_concurrency(lockout):
+    assert concurrent_allowed(lockout, 200, ip='10.1.1.1') == 20
+    assert lockout.acquire('someone@owlboard.com', '10.1.1.1').scope == 'ip'
+
+
+def test_success_clears_account_window(lockout):
+    for _ in range(4):
+        lockout.acquire('user@owlboard.com', '10.0.0.1')
+    lockout.succeeded('user@owlboard.com', '10.0.0.1', lockout.acquire('user@owlboard.com', '10.0.0.1'))
+    assert all(lockout.acquire('user@owlboard.com', '10.0.0.1') for _ in range(5))
+
+
+def test_window_slides_and_lock_expires():
+    clock = FakeClock()
+    lockout = MemoryLockout(max_attempts=2, max_ip_attempts=100, window=10, lockout=30, clock=clock)
+    assert lockout.acquire('a@owlboard.com', 'ip') and lockout.acquire('a@owlboard.com', 'ip')
+    clock.now += 11
+    # Los dos intentos salieron de la ventana
+    assert lockout.acquire('a@owlboard.com', 'ip') and lockout.acquire('a@owlboard.com', 'ip')
+    assert not lockout.acquire('a@owlboard.com', 'ip')
+    clock.now += 29
+    assert lockout.acquire('a@owlboard.com', 'ip').retry_after == pytest.approx(1)
+    clock.now += 1
+    assert lockout.acquire('a@owlboard.com', 'ip')
+
+
+@pytest.mark.standin
+def test_login_locked_before_bcrypt(client, standin, bulk_user):
+    email, password = bulk_user
+    headers = {'X-Forwarded-For': f"10.{uuid.uuid4().int % 250}.0.1"}
+    previous = standin.lockout
+    standin.lockout = MemoryLockout(max_attempts=3, max_ip_attempts=100, window=60, lockout=60)
+    try:
+        statuses = [client.request('POST', '/auth/login', {'email': email, 'password': 'wrong'}, headers).status
+                    for _ in range(3)]
+        before = standin.timings.snapshot()['/auth/login']['bcrypt']['count']
+        locked = client.request('POST', '/auth/login', {'email': email, 'password': password}, headers)
+        after = standin.timings.snapshot()['/auth/login']['bcrypt']['count']
+    finally:
+        standin.lockout = previous
+    assert statuses == [401] * 3
+    assert locked.status == 429
+    assert int(locked.headers['retry-after']) > 0
+    assert after == before
@@ -0,0 +1,59 @@
+"""Pacer: turnos, huecos y espera en cola que ven los clientes"""
+import asyncio
+
+import pytest
+
+from owlboard_client import AsyncAuthClient, AuthClient, PacingTimeout
+from owlboard_client.pacing import Pacer
+from owlboard_standin import run_in_thread
+
+
+def test_slot_timeout_does_not_spend_a_turn():
+    pacer = Pacer(rate=10, burst=5, connections=1, headroom=1.0, max_wait=0.05)
+    pacer.acquire()
+    tat = pacer._tat
+    with pytest.raises(PacingTimeout):
+        pacer.acquire()
+    assert pacer._tat == tat and pacer.stats.rejected == 1
+    pacer.release()
+    pacer.acquire()
+    assert pacer.stats.requests == 2
+
+
+def test_rate_timeout_releases_the_slot():
+    pacer = Pacer(rate=1, burst=0, connections=1, headroom=1.0, max_wait=0.01)
+    pacer.acquire()
+    pacer.release()
+    with pytest.raises(PacingTimeout):
+        pacer.acquire()
+    assert pacer._slots.acquire(timeout=0)
+
+
+def test_async_slot_timeout_does_not_spend_a_turn():
+    async def scenario():
+        pacer = Pacer(rate=10, burst=5, connections=1, headroom=1.0, max_wait=0.05)
+        await pacer.acquire_async()
+        tat = pacer._tat
+        with pytest.raises(PacingTimeout):
+            await pacer.acquire_async()
+        assert pacer._tat == tat
+        pacer.release_async()
+        await pacer.acquire_async()
+        assert pacer.stats.requests == 2
+
+    asyncio.run(scenario())
+
+
+def test_responses_report_time_queued_in_the_pacer():
+    with run_in_thread() as background:
+        client = AuthClient(background.url, pacer=Pacer(rate=20, burst=0, headroom=1.0))
+        first, second = client.request('GET', '/health'), client.request('GET', '/health')
+        assert first.queued < 0.01 < 0.03 < second.queued
+
+        async def paced():
+            async with AsyncAuthClient(background.url, pacer=Pacer(rate=20, burst=0, headroom=1.0)) as aclient:
+                return [await aclient.request('GET', '/health') for _ in range(2)]
+
+        first, second = asyncio.run(paced())
+        assert first.queued < 0.01 < 0.03 < second.queued
+        assert AuthClient(background.url).request('GET', '/health').queued == 0.0
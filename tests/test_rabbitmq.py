@@ -0,0 +1,138 @@
+"""Stand-in de RabbitMQ y benchmark del pipeline de eventos"""
+import argparse
+import json
+
+import pytest
+
+from owlboard_bench import rabbitmq
+from owlboard_standin.amqp import run_in_thread, topic_matches
+
+pika = pytest.importorskip('pika')
+
+
+@pytest.fixture
+def broker():
+    with run_in_thread() as background:
+        yield background.server
+
+
+@pytest.fixture
+def channel(broker):
+    connection = pika.BlockingConnection(pika.URLParameters(broker.url))
+    yield connection.channel()
+    connection.close()
+
+
+@pytest.mark.parametrize('pattern, key, expected', [
+    ('user.*', 'user.updated', True),
+    ('user.*', 'user.updated.email', False),
+    ('canvas.#', 'canvas.7.stroke', True),
+    ('canvas.#', 'canvas', True),
+    ('canvas.*.stroke', 'canvas.7.cursor', False),
+    ('#.stroke', 'canvas.7.stroke', True),
+])
+def test_topic_matching(pattern, key, expected):
+    assert topic_matches(pattern, key) is expected
+
+
+def test_topic_routing_confirms_and_returns_unroutable(broker, channel):
+    channel.exchange_declare('events', 'topic')
+    channel.queue_declare('users')
+    channel.queue_bind('users', 'events', 'user.*')
+    channel.confirm_delivery()
+    channel.basic_publish('events', 'user.updated', b'x' * 300000)
+    with pytest.raises(pika.exceptions.UnroutableError):
+        channel.basic_publish('events', 'canvas.1.stroke', b'{}', mandatory=True)
+    assert channel.queue_declare('users', passive=True).method.message_count == 1
+    method, _, body = channel.basic_get('users', auto_ack=True)
+    assert method.routing_key == 'user.updated' and len(body) == 300000
+    assert broker.stats['confirmed'] == 2 and broker.stats['returned'] == 1
+
+
+def test_prefetch_bounds_unacked_deliveries(broker, channel):
+    channel.queue_declare('work')
+    for i in range(10):
+        channel.basic_publish('', 'work', str(i).encode())
+    channel.basic_qos(prefetch_count=3)
+    received = []
+    channel.basic_consume('work', lambda ch, method, props, body: received.append(method.delivery_tag))
+    channel.connection.process_data_events(time_limit=0.3)
+    assert len(received) == 3
+    channel.basic_ack(received[-1], multiple=True)
+    channel.connection.process_data_events(time_limit=0.3)
+    assert len(received) == 6
+
+
+def test_passive_declare_of_missing_queue_closes_channel(channel):
+    with pytest.raises(pika.exceptions.ChannelClosedByBroker) as error:
+        channel.queue_declare('missing', passive=True)
+    assert error.value.reply_code == 404
+
+
+def test_user_events_invalidate_cache_through_broker(broker):
+    from owlboard_auth.user_events import UserEventPublisher, UserEventSubscriber
+
+    class Cache:
+        enabled = False
+
+        def __init__(self):
+            self.invalidated = []
+
+        def clear(self):
+            pass
+
+        def invalidate(self, user_id=None, email=None):
+            self.invalidated.append((user_id, email))
+
+    cache = Cache()
+    subscriber = UserEventSubscriber(cache, url=broker.url).start()
+    try:
+        assert subscriber.connected.wait(5) and cache.enabled
+        publisher = UserEventPublisher(url=broker.url)
+        publisher.publish('user.deactivated', 1, 'test@owlboard.com')
+        publisher.close()
+        for _ in range(50):
+            if cache.invalidated:
+                break
+            subscriber._stop.wait(0.05)
+        assert cache.invalidated == [(1, 'test@owlboard.com')]
+    finally:
+        subscriber.stop(5)
+
+
+def bench_args(url):
+    parser = argparse.ArgumentParser()
+    rabbitmq.add_arguments(parser)
+    return parser.parse_args(['--amqp-url', url, '-d', '1', '--drain', '5', '--interval', '0.25', '--rate', '400'])
+
+
+@pytest.mark.parametrize('confirm, batch', [('none', 1), ('batch', 20), ('async', 5)])
+def test_bench_run_delivers_everything(broker, confirm, batch):
+    args = bench_args(broker.url)
+    result = rabbitmq.run_once(args, {'confirm': confirm, 'batch': batch, 'prefetch': 50, 'size': (200, 800)}, 'test')
+    assert not result['errors']
+    assert result['published'] >= 300 and result['lost'] == 0 and result['nacked'] == 0
+    assert result['latency_ms']['count'] == result['published']
+    if confirm != 'none':
+        assert result['confirmed'] == result['published']
+    assert result['samples'] and result['queue_depth_final'] == 0
+    assert not broker.queues and set(broker.exchanges) == {'amq.direct', 'amq.fanout', 'amq.topic'}
+
+
+def test_events_are_padded_to_size():
+    factory = rabbitmq.EventFactory('canvas', (1024, 1024))
+    key, body = factory.make(0, 7)
+    event = json.loads(body)
+    assert key.startswith('canvas.') and key.endswith('.' + event['event'])
+    assert len(body) == 1024 and event['seq'] == 7
+
+
+def test_confirms_do_not_start_extra_tick_chains(broker, monkeypatch):
+    ticks = []
+    original = rabbitmq.Publisher._tick
+    monkeypatch.setattr(rabbitmq.Publisher, '_tick', lambda self: ticks.append(1) or original(self))
+    result = rabbitmq.run_once(bench_args(broker.url), {'confirm': 'async', 'batch': 5, 'prefetch': 50,
+                                                        'size': (200, 200)}, 'test')
+    assert result['confirmed'] == result['published'] >= 300
+    # Con --rate un _tick por lote y alguno más por confirmación, no una cadena nueva por cada una
+    assert len(ticks) < result['published']
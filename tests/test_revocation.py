@@ -0,0 +1,74 @@
+"""Consultas de revocación en lote, publicación en el stream y caché del verificador"""
+import time
+
+import pytest
+
+from owlboard_auth.revocation_feed import RevocationPublisher
+from owlboard_auth.tokens import encode
+from owlboard_auth.verifier import REDIS_BLACKLIST_PREFIX, REDIS_REVOKED_PREFIX, RedisBlacklist, TokenVerifier
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+def make_token(jti, exp=None):
+    return encode({'sub': '1', 'jti': jti, 'exp': int(exp or time.time() + 900)})
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
+
+
+def test_revoked_many_mixes_legacy_jti_and_absent_keys(redis_client):
+    both, none, jti_only, legacy_only, no_jti = (make_token('a'), make_token('b'), make_token('c'),
+                                                 make_token('d'), encode({'sub': '1'}))
+    redis_client.set(REDIS_BLACKLIST_PREFIX + both, 1)
+    redis_client.set(REDIS_REVOKED_PREFIX + 'a', 1)
+    redis_client.set(REDIS_REVOKED_PREFIX + 'c', 1)
+    redis_client.set(REDIS_BLACKLIST_PREFIX + legacy_only, 1)
+    tokens = [both, none, jti_only, legacy_only, no_jti, jti_only]
+    blacklist = RedisBlacklist(redis_client)
+    assert blacklist.revoked_many(tokens) == [True, False, True, True, False, True]
+    assert blacklist.revoked_many(tokens) == [blacklist.is_revoked(t, None) for t in tokens]
+
+
+def test_publisher_skips_expired_tokens(redis_client):
+    publisher = RevocationPublisher(redis_client)
+    assert publisher.revoke(make_token('old'), time.time() - 5) is None
+    assert not redis_client.exists(REDIS_REVOKED_PREFIX + 'old', publisher.stream)
+    assert publisher.revoke(make_token('new'), time.time() + 60) is not None
+    assert 0 < redis_client.ttl(REDIS_REVOKED_PREFIX + 'new') <= 60
+    assert redis_client.xlen(publisher.stream) == 1
+
+
+class RevokedDuringCheck:
+    """Blacklist que aún no ve la revocación; el feed la procesa mientras tanto"""
+
+    def __init__(self, on_check):
+        self.on_check = on_check
+        self.checks = 0
+
+    def is_revoked(self, token, claims):
+        self.checks += 1
+        if self.checks == 1:
+            self.on_check(token)
+            return False
+        return True
+
+
+@pytest.mark.parametrize('feed_event', ['evict', 'disconnect'])
+def test_eviction_between_check_and_insert_is_not_cached(feed_event):
+    verifier = TokenVerifier()
+
+    def on_check(token):
+        if feed_event == 'evict':
+            verifier.evict(token)
+        else:
+            verifier.caching = False
+            verifier.caching = True
+
+    verifier.revocations = RevokedDuringCheck(on_check)
+    token = make_token('race')
+    verifier.verify(token)
+    assert len(verifier) == 0
+    assert not verifier.is_valid(token)
@@ -0,0 +1,36 @@
+"""ServerTimingMiddleware: cabecera Server-Timing y etiquetas acotadas de los histogramas"""
+import asyncio
+import types
+
+from owlboard_auth.timing import Histograms, ServerTimingMiddleware, stage
+
+
+async def app(scope, receive, send):
+    if scope['path'].startswith('/users/'):
+        scope['route'] = types.SimpleNamespace(path='/users/{user_id}')
+    with stage('db'):
+        pass
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'{}'})
+
+
+def call(middleware, path):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware({'type': 'http', 'path': path, 'query_string': b''}, None, send))
+    return sent
+
+
+def test_series_are_labelled_by_route_template_or_other():
+    registry = Histograms()
+    middleware = ServerTimingMiddleware(app, enabled=True, registry=registry)
+    for path in ('/auth/login', '/users/1', '/users/2', '/wp-admin.php', '/.env', '/auth/login/../x'):
+        headers = dict(call(middleware, path)[0]['headers'])
+        assert headers[b'server-timing'].startswith(b'db;dur=')
+    snapshot = registry.snapshot()
+    assert set(snapshot) == {'/auth/login', '/users/{user_id}', 'other'}
+    assert snapshot['/users/{user_id}']['total']['count'] == 2
+    assert snapshot['other']['db']['count'] == 3
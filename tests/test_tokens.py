@@ -0,0 +1,70 @@
+"""TokenManager: backoff de los refrescos en segundo plano que fallan"""
+import asyncio
+
+import pytest
+
+from owlboard_client import AuthServiceError
+from owlboard_client.tokens import AsyncTokenManager, TokenManager
+
+TOKENS = {'access_token': 'a', 'refresh_token': 'r', 'expires_in': 100}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingClient:
+    def __init__(self):
+        self.refreshes = 0
+
+    def refresh(self, token):
+        self.refreshes += 1
+        raise AuthServiceError(400, b'', 'Bad request')
+
+
+class AsyncFailingClient(FailingClient):
+    async def refresh(self, token):
+        return super().refresh(token)
+
+
+def access(manager):
+    token = manager.access()
+    flight = manager._flight
+    if flight is not None:
+        flight['done'].wait(5)
+    return token
+
+
+def test_failed_background_refresh_backs_off():
+    clock, client = Clock(), FailingClient()
+    manager = TokenManager(client, tokens=TOKENS, clock=clock, seed=1)
+    clock.now = 90.0
+    for _ in range(50):
+        assert access(manager) == 'a'
+    assert client.refreshes == 1 and manager.retry_at > clock.now
+    clock.now = manager.retry_at
+    access(manager)
+    assert client.refreshes == 2
+    clock.now = 99.0
+    assert manager._expired()
+    with pytest.raises(AuthServiceError):
+        manager.access()
+    # La renovación de un token caducado no espera al backoff
+    assert client.refreshes == 3
+
+
+def test_failed_async_background_refresh_backs_off():
+    async def scenario():
+        clock, client = Clock(), AsyncFailingClient()
+        manager = AsyncTokenManager(client, tokens=TOKENS, clock=clock, seed=1)
+        clock.now = 90.0
+        for _ in range(50):
+            assert await manager.access() == 'a'
+            await asyncio.sleep(0)
+        assert client.refreshes == 1 and manager.retry_at > clock.now
+
+    asyncio.run(scenario())
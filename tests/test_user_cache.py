@@ -0,0 +1,142 @@
+"""Caché de usuarios en dos niveles delante de user_db e invalidación por eventos"""
+import json
+
+import pytest
+
+from owlboard_auth.user_events import UserEventSubscriber
+from owlboard_auth.users import UserCache, UserRepository, create_user_engine
+
+sqlalchemy = pytest.importorskip('sqlalchemy')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def repository(tmp_path):
+    engine = create_user_engine(f"sqlite:///{tmp_path / 'user_db.sqlite'}", pool_size=2, max_overflow=0)
+    with engine.begin() as connection:
+        connection.execute(sqlalchemy.text(
+            'CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT UNIQUE, hashed_password TEXT, '
+            'full_name TEXT, is_active BOOLEAN)'))
+        connection.execute(sqlalchemy.text(
+            "INSERT INTO users VALUES (1, 'test@owlboard.com', '$2b$04$hash', 'Test User', 1)"))
+    yield UserRepository(engine)
+    engine.dispose()
+
+
+def update_user(repository, **values):
+    assignments = ', '.join(f"{name} = :{name}" for name in values)
+    with repository.engine.begin() as connection:
+        connection.execute(sqlalchemy.text(f"UPDATE users SET {assignments} WHERE id = 1"), values)
+
+
+@pytest.fixture
+def redis_client():
+    pytest.importorskip('lupa', reason='la escritura condicional es un script Lua: fakeredis[lua]')
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.FakeRedis()
+
+
+def test_engine_pool_is_bounded_and_pre_pings(repository):
+    pool = repository.engine.pool
+    assert pool.size() == 2 and pool._pre_ping
+
+
+def test_repository_reads_users_table(repository):
+    user = repository.get('test@owlboard.com')
+    assert user == {'id': 1, 'email': 'test@owlboard.com', 'hashed_password': '$2b$04$hash',
+                    'full_name': 'Test User', 'is_active': True}
+    assert repository.get_by_id('1') == user
+    assert repository.get('nobody@owlboard.com') is None
+
+
+def test_login_then_refreshes_query_mysql_once(repository, redis_client):
+    cache = UserCache(repository, redis_client)
+    assert cache.get('test@owlboard.com')['id'] == 1
+    for _ in range(50):
+        assert cache.get_by_id(1)['is_active'] is True
+    assert repository.queries == 1
+    assert cache.stats.local_hits == 50
+
+
+def test_shared_tier_serves_other_replicas(repository, redis_client):
+    UserCache(repository, redis_client).get_by_id(1)
+    other = UserCache(repository, redis_client)
+    assert other.get('Test@OwlBoard.com')['full_name'] == 'Test User'
+    assert repository.queries == 1 and other.stats.redis_hits == 1
+
+
+def test_local_entries_expire(repository):
+    clock = FakeClock()
+    cache = UserCache(repository, ttl=30, clock=clock)
+    cache.get_by_id(1)
+    clock.now += 31
+    cache.get_by_id(1)
+    assert repository.queries == 2
+
+
+def test_deactivation_event_invalidates_both_tiers(repository, redis_client):
+    clock = FakeClock()
+    cache = UserCache(repository, redis_client)
+    replica = UserCache(repository, redis_client, ttl=30, clock=clock)
+    cache.get('test@owlboard.com')
+    replica.get_by_id(1)
+    update_user(repository, is_active=0)
+    UserEventSubscriber(cache).handle(json.dumps({'id': 1, 'email': 'test@owlboard.com'}).encode())
+    assert cache.get('test@owlboard.com')['is_active'] is False
+    # Sin su propio evento, la otra réplica ve el cambio cuando caduca su copia local
+    assert replica.get_by_id(1)['is_active'] is True
+    clock.now += 31
+    assert replica.get_by_id(1)['is_active'] is False
+
+
+def test_email_change_drops_old_email_key(repository, redis_client):
+    cache = UserCache(repository, redis_client)
+    cache.get_by_id(1)
+    update_user(repository, email='renamed@owlboard.com')
+    cache.clear()
+    UserEventSubscriber(cache).handle(json.dumps({'id': 1}).encode())
+    assert cache.get('test@owlboard.com') is None
+    assert cache.get('renamed@owlboard.com')['id'] == 1
+
+
+def test_disabled_cache_goes_to_database(repository):
+    cache = UserCache(repository)
+    cache.enabled = False
+    cache.get_by_id(1)
+    cache.get_by_id(1)
+    assert repository.queries == 2 and cache.stats.bypassed == 2
+
+
+def test_malformed_events_are_ignored(repository):
+    subscriber = UserEventSubscriber(UserCache(repository))
+    subscriber.handle(b'not json')
+    subscriber.handle(b'[]')
+    subscriber.handle(b'{}')
+    assert subscriber.received == 0
+
+
+def test_invalidation_during_a_miss_is_not_written_back(repository, redis_client):
+    cache = UserCache(repository, redis_client)
+    replica = UserCache(repository, redis_client)
+    load = repository.get_by_id
+
+    def racing_load(user_id):
+        # user_service desactiva y otra réplica invalida entre la lectura de MySQL y la escritura en Redis
+        user = load(user_id)
+        update_user(repository, is_active=0)
+        replica.invalidate(user_id=1, email='test@owlboard.com')
+        return user
+
+    repository.get_by_id = racing_load
+    assert cache.get_by_id(1)['is_active'] is True
+    repository.get_by_id = load
+    assert cache.stats.stale_writes == 1
+    assert redis_client.get('user:id:1') is None and redis_client.get('user:email:test@owlboard.com') is None
+    assert UserCache(repository, redis_client).get('test@owlboard.com')['is_active'] is False